@@ -84,11 +84,11 @@ class AgentWorker:
         # Open a per-request token accumulator so every LLM hook call during
         # this inference can append its record — enabling per-query token totals.
         from litellm_standalone_tracker import init_request_accumulator
-        init_request_accumulator(session_id)
+        token_request_id = init_request_accumulator(session_id)
 
         # updating session context for telemetry with user_email
-        # session_id MUST be set here so the token-usage hook can look up the
-        # per-request accumulator bucket by session_id via SessionContext.
+        # session_id MUST be set here so the token-usage hook records against this
+        # request's accumulator bucket (opened above) with the right session.
         update_session_context(
             user_id=user_email,  # Use user_email for tracking
             agent_id=agent_id,
@@ -212,7 +212,7 @@ class AgentWorker:
                 
                 # Drain token accumulator and persist per-query token usage
                 from litellm_standalone_tracker import get_and_clear_accumulator
-                token_records = get_and_clear_accumulator(session_id)
+                token_records = get_and_clear_accumulator(session_id, request_id=token_request_id)
                 if token_records:
                     agent_name = token_records[0].get("agent_name") if token_records else None
                     await inference_service.update_token_usage_in_graph(
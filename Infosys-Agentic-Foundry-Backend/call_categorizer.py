@@ -362,11 +362,29 @@ It works by examining:
 3. Keywords in the call stack
 
 This enables 100% automatic coverage!
+
+Callers that know what they are doing can skip stack inspection entirely by
+declaring the category explicitly:
+
+    with call_category_scope("evaluation", evaluation_type="response_quality"):
+        await llm.ainvoke(prompt)
+
+    @categorize_as("tool_operation", tool_operation="json_validation")
+    async def node(state): ...
+
+The declaration is stored in a contextvar, so it follows the request into
+LangGraph node tasks. Without a declaration the categorizer walks frames with
+sys._getframe, which reads code object names only and never loads source.
 """
 
+import functools
 import inspect
 import re
-from typing import Optional, Tuple, Dict, Any
+import sys
+import time
+from contextlib import contextmanager
+from contextvars import Context, ContextVar, Token, copy_context
+from typing import Optional, Tuple, Dict, Any, Callable, List
 from pathlib import Path
 
 try:
@@ -376,6 +394,93 @@ except ImportError:
     log = logging.getLogger(__name__)
 
 
+# Explicit categorization declared by the caller (category plus optional detail fields)
+_explicit_call_category: ContextVar[Optional[Dict[str, Optional[str]]]] = ContextVar(
+    "explicit_call_category", default=None
+)
+
+_CATEGORY_DETAIL_FIELDS = (
+    'call_sub_category', 'call_operation', 'agent_type', 'agent_component',
+    'tool_operation', 'evaluation_type', 'tool_id', 'tool_name',
+)
+
+
+def _build_explicit_category(category: str, details: Dict[str, Optional[str]]) -> Dict[str, Optional[str]]:
+    unknown = set(details) - set(_CATEGORY_DETAIL_FIELDS)
+    if unknown:
+        raise ValueError(f"Unknown call category fields: {sorted(unknown)}")
+    # Nested declarations inherit the details of the enclosing scope unless they override them
+    outer = _explicit_call_category.get() or {}
+    merged = dict(outer) if outer.get('call_category') == category else {}
+    merged.update({key: value for key, value in details.items() if value is not None})
+    merged['call_category'] = category
+    if merged.get('agent_type'):
+        # Accept configured agent types such as "react_agent" or "multi_agent"
+        merged['agent_type'] = CallCategorizer._detect_agent_type(merged['agent_type'].lower()) or merged['agent_type']
+    return merged
+
+
+def set_call_category(category: str, **details: Optional[str]) -> Token:
+    """
+    Declares the category of LLM calls made from the current context onwards.
+
+    Use this at entry points that cannot wrap their body in a with-block (e.g. async
+    generators); pass the returned token to reset_call_category to restore the previous value.
+    """
+    return _explicit_call_category.set(_build_explicit_category(category, details))
+
+
+def reset_call_category(token: Token) -> None:
+    try:
+        _explicit_call_category.reset(token)
+    except ValueError:
+        # Token created in another context, e.g. an async generator finalized outside the task that ran it
+        pass
+
+
+def copy_context_without_call_category() -> Context:
+    """
+    Copy of the current context with no explicit call category, for work that outlives the caller
+    (background jobs): their LLM calls are categorized on their own instead of inheriting the caller's label.
+    """
+    context = copy_context()
+    context.run(_explicit_call_category.set, None)
+    return context
+
+
+@contextmanager
+def call_category_scope(category: str, **details: Optional[str]):
+    """Declares the category of every LLM call made inside the with-block."""
+    token = set_call_category(category, **details)
+    try:
+        yield
+    finally:
+        reset_call_category(token)
+
+
+def categorize_as(category: str, **details: Optional[str]) -> Callable:
+    """Decorator form of call_category_scope for sync and async functions."""
+    def decorator(func: Callable) -> Callable:
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                with call_category_scope(category, **details):
+                    return await func(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def sync_wrapper(*args, **kwargs):
+            with call_category_scope(category, **details):
+                return func(*args, **kwargs)
+        return sync_wrapper
+    return decorator
+
+
+@functools.lru_cache(maxsize=4096)
+def _code_names(code) -> Tuple[str, str]:
+    return code.co_filename.lower(), code.co_name.lower()
+
+
 class CallCategorizer:
     """
     Automatically categorizes LLM calls based on call stack inspection
@@ -515,18 +620,18 @@ class CallCategorizer:
         'preference_analysis': ['preference', 'feedback'],
     }
     
+    # Number of frames inspected when no explicit category is declared
+    MAX_STACK_DEPTH = 50
+
     @classmethod
     def categorize_call(cls) -> Dict[str, Optional[str]]:
         """
-        Automatically categorize an LLM call based on call stack
+        Categorize an LLM call, preferring an explicitly declared category over stack inspection
         
         Returns:
             dict with keys: call_category, call_sub_category, agent_type, 
                            agent_component, tool_operation, evaluation_type
         """
-        # Get call stack
-        stack = inspect.stack()
-        
         # Initialize result
         result = {
             'call_category': 'other',
@@ -539,23 +644,29 @@ class CallCategorizer:
             'tool_id': None,
             'tool_name': None,
         }
-        
-        # Collect info from stack
-        filenames = []
-        function_names = []
-        
-        # Check up to 50 frames to find the original caller (tool_validation.py, agent_inference.py, etc.)
+
+        explicit = _explicit_call_category.get()
+        if explicit:
+            result.update(explicit)
+            # Only detail fields the caller left out are derived from the (cheap) frame walk
+            required = cls.DETECTED_FIELDS.get(result['call_category'], ())
+            if any(not result[field] for field in required) and not result['call_sub_category']:
+                filepath_str, funcname_str = cls._collect_stack_strings(skip=2)
+            else:
+                filepath_str, funcname_str = '', ''
+            cls._fill_details(result, filepath_str + ' ' + funcname_str, funcname_str, prefer_existing=True)
+            log.debug(f"🔍 Explicitly categorized call: {result}")
+            return result
+
+        return cls._categorize_from_stack(result, cls._collect_stack_strings)
+
+    @classmethod
+    def _categorize_from_stack(cls, result: Dict[str, Optional[str]],
+                               collect_stack_strings: Callable[[int], Tuple[str, str]]) -> Dict[str, Optional[str]]:
+        """Stack-based categorization used when no category was declared"""
+        # Check up to MAX_STACK_DEPTH frames to find the original caller (tool_validation.py, agent_inference.py, etc.)
         # This is needed because async calls (LangChain/LangGraph) create deep stacks
-        for frame_info in stack[1:50]:
-            filename = frame_info.filename
-            function_name = frame_info.function
-            
-            filenames.append(filename.lower())
-            function_names.append(function_name.lower())
-        
-        # Convert to search strings
-        filepath_str = ' '.join(filenames)
-        funcname_str = ' '.join(function_names)
+        filepath_str, funcname_str = collect_stack_strings(3)
         combined_str = filepath_str + ' ' + funcname_str
         
         # 1. Detect main category (stack-based)
@@ -577,16 +688,36 @@ class CallCategorizer:
                     result['call_category'] = 'agent_inference'
                     if agent_type:
                         result['agent_type'] = agent_type
-                    log.info(f"🔍 Context fallback → agent_inference (agent_id={agent_id}, agent_type={agent_type})")
+                    log.debug(f"🔍 Context fallback → agent_inference (agent_id={agent_id}, agent_type={agent_type})")
             except Exception as e:
                 log.debug(f"Context fallback skipped: {e}")
 
         # 2. Detect sub-category based on category
-        if result['call_category'] == 'agent_inference':
-            # Prefer stack-based detection; fall back to value already set by context fallback
-            stack_agent_type = cls._detect_agent_type(combined_str)
+        cls._fill_details(result, combined_str, funcname_str)
+        
+        log.debug(f"🔍 Auto-categorized call: {result}")
+        return result
+
+    # Detail fields that would otherwise be detected from the stack, per category
+    DETECTED_FIELDS = {
+        'agent_inference': ('agent_type', 'agent_component'),
+        'tool_operation': ('tool_operation',),
+        'evaluation': ('evaluation_type',),
+    }
+
+    @classmethod
+    def _fill_details(cls, result: Dict[str, Optional[str]], combined_str: str, funcname_str: str,
+                      prefer_existing: bool = False) -> None:
+        """Fill sub-category, operation and detail fields not already set for the detected category"""
+        category = result['call_category']
+        if category == 'agent_inference':
+            # Explicit declarations win; otherwise prefer stack-based detection over the SessionContext value
+            if prefer_existing and result.get('agent_type'):
+                stack_agent_type = None
+            else:
+                stack_agent_type = cls._detect_agent_type(combined_str)
             result['agent_type'] = stack_agent_type or result.get('agent_type')
-            result['agent_component'] = cls._detect_component(combined_str)
+            result['agent_component'] = result.get('agent_component') or cls._detect_component(combined_str)
             
             # Build sub_category
             parts = []
@@ -601,49 +732,70 @@ class CallCategorizer:
                 else:
                     parts.append('invoke')
             
-            result['call_sub_category'] = '_'.join(parts) if parts else 'agent_general'
-            result['call_operation'] = 'chat_inference'
-            
-        elif result['call_category'] == 'tool_operation':
-            result['tool_operation'] = cls._detect_tool_operation(combined_str)
-            result['call_sub_category'] = f"tool_{result['tool_operation']}" if result['tool_operation'] else 'tool_general'
-            result['call_operation'] = result['tool_operation'] or 'tool_operation'
-            
-        elif result['call_category'] == 'evaluation':
-            result['evaluation_type'] = cls._detect_evaluation_type(combined_str)
-            result['call_sub_category'] = f"eval_{result['evaluation_type']}" if result['evaluation_type'] else 'eval_general'
-            result['call_operation'] = 'evaluation'
-            
-        elif result['call_category'] == 'prompt_generation':
-            result['call_sub_category'] = 'prompt_generation'
-            result['call_operation'] = 'generate_prompt'
+            result['call_sub_category'] = result['call_sub_category'] or ('_'.join(parts) if parts else 'agent_general')
+            result['call_operation'] = result['call_operation'] or 'chat_inference'
             
-        elif result['call_category'] == 'file_analysis':
-            result['call_sub_category'] = 'file_analysis'
-            result['call_operation'] = 'analyze_file'
+        elif category == 'tool_operation':
+            result['tool_operation'] = result['tool_operation'] or cls._detect_tool_operation(combined_str)
+            result['call_sub_category'] = result['call_sub_category'] or (f"tool_{result['tool_operation']}" if result['tool_operation'] else 'tool_general')
+            result['call_operation'] = result['call_operation'] or result['tool_operation'] or 'tool_operation'
             
-        elif result['call_category'] == 'rag_query':
-            result['call_sub_category'] = 'rag_query'
-            result['call_operation'] = 'knowledge_retrieval'
+        elif category == 'evaluation':
+            result['evaluation_type'] = result['evaluation_type'] or cls._detect_evaluation_type(combined_str)
+            result['call_sub_category'] = result['call_sub_category'] or (f"eval_{result['evaluation_type']}" if result['evaluation_type'] else 'eval_general')
+            result['call_operation'] = result['call_operation'] or 'evaluation'
             
-        elif result['call_category'] == 'guardrail':
-            result['call_sub_category'] = 'guardrail_check'
-            result['call_operation'] = 'content_moderation'
-            
-        elif result['call_category'] == 'conversation':
-            result['call_sub_category'] = 'conversation_management'
-            result['call_operation'] = 'conversation'
-        
-        log.debug(f"🔍 Auto-categorized call: {result}")
-        return result
+        elif category in cls.CATEGORY_DEFAULTS:
+            sub_category, operation = cls.CATEGORY_DEFAULTS[category]
+            result['call_sub_category'] = result['call_sub_category'] or sub_category
+            result['call_operation'] = result['call_operation'] or operation
+
+    # Fixed sub-category and operation for categories without further detection
+    CATEGORY_DEFAULTS = {
+        'prompt_generation': ('prompt_generation', 'generate_prompt'),
+        'file_analysis': ('file_analysis', 'analyze_file'),
+        'rag_query': ('rag_query', 'knowledge_retrieval'),
+        'guardrail': ('guardrail_check', 'content_moderation'),
+        'conversation': ('conversation_management', 'conversation'),
+    }
+
+    @classmethod
+    def _collect_stack_strings(cls, skip: int = 1) -> Tuple[str, str]:
+        """
+        Walk up to MAX_STACK_DEPTH frames with sys._getframe and return the joined
+        lower-cased filenames and function names. Unlike inspect.stack() this never
+        reads source lines, and per-code-object names are memoized.
+        """
+        filenames: List[str] = []
+        function_names: List[str] = []
+        try:
+            frame = sys._getframe(skip)
+        except ValueError:
+            return '', ''
+        depth = 0
+        while frame is not None and depth < cls.MAX_STACK_DEPTH:
+            filename, function_name = _code_names(frame.f_code)
+            filenames.append(filename)
+            function_names.append(function_name)
+            frame = frame.f_back
+            depth += 1
+        return ' '.join(filenames), ' '.join(function_names)
+
+    @classmethod
+    def _collect_stack_strings_inspect(cls, skip: int = 1) -> Tuple[str, str]:
+        """Previous inspect.stack() based collection, kept for benchmark comparison only"""
+        stack = inspect.stack()
+        filenames = [frame_info.filename.lower() for frame_info in stack[skip:cls.MAX_STACK_DEPTH]]
+        function_names = [frame_info.function.lower() for frame_info in stack[skip:cls.MAX_STACK_DEPTH]]
+        return ' '.join(filenames), ' '.join(function_names)
     
     @classmethod
     def _detect_category(cls, filepath_str: str, funcname_str: str) -> str:
         """Detect main category from file path and function names"""
         combined = filepath_str + ' ' + funcname_str
         
-        log.info(f"🔍 [Categorizer] filepath_str: {filepath_str[:400] if len(filepath_str) > 400 else filepath_str}")
-        log.info(f"🔍 [Categorizer] funcname_str: {funcname_str[:400] if len(funcname_str) > 400 else funcname_str}")
+        log.debug(f"🔍 [Categorizer] filepath_str: {filepath_str[:400] if len(filepath_str) > 400 else filepath_str}")
+        log.debug(f"🔍 [Categorizer] funcname_str: {funcname_str[:400] if len(funcname_str) > 400 else funcname_str}")
         
         # PRIORITY 1: Check for specific operation types FIRST (tool, agent, evaluation, etc.)
         # These take precedence over infrastructure (guardrail_aware_llm.py file)
@@ -652,13 +804,13 @@ class CallCategorizer:
                 continue  # Handle guardrail LAST (lowest priority)
             for pattern in patterns:
                 if pattern.lower() in combined:
-                    log.info(f"🔍 Matched category '{category}' via FILE_PATTERNS (pattern: '{pattern}')")
+                    log.debug(f"🔍 Matched category '{category}' via FILE_PATTERNS (pattern: '{pattern}')")
                     return category
         
         # PRIORITY 2: Check function name patterns for specific operations
         for category, patterns in cls.FUNCTION_PATTERNS.items():
             if any(pattern.lower() in funcname_str for pattern in patterns):
-                log.info(f"🔍 Matched category '{category}' via FUNCTION_PATTERNS (priority match)")
+                log.debug(f"🔍 Matched category '{category}' via FUNCTION_PATTERNS (priority match)")
                 return category
         
         # PRIORITY 3 (LOWEST): Only categorize as guardrail if:
@@ -671,14 +823,14 @@ class CallCategorizer:
                 'safety' in funcname_str,
                 'content_filter' in funcname_str,
             ])
-            log.info(f"🔍 Guardrail check (fallback): evidence={has_guardrail_evidence}")
+            log.debug(f"🔍 Guardrail check (fallback): evidence={has_guardrail_evidence}")
             if has_guardrail_evidence:
-                log.info(f"🔍 Categorized as guardrail (no specific operation detected)")
+                log.debug(f"🔍 Categorized as guardrail (no specific operation detected)")
                 return 'guardrail'
         
         # If nothing matched, default to 'other'
-        log.info(f"🔍 No category match - defaulting to 'other'")
-        log.info(f"🔍 [Categorizer] DEBUG: Checked {len(cls.FILE_PATTERNS)} file patterns and {len(cls.FUNCTION_PATTERNS)} function patterns")
+        log.debug(f"🔍 No category match - defaulting to 'other'")
+        log.debug(f"🔍 [Categorizer] DEBUG: Checked {len(cls.FILE_PATTERNS)} file patterns and {len(cls.FUNCTION_PATTERNS)} function patterns")
         return 'other'
     
     @classmethod
@@ -725,4 +877,49 @@ def auto_categorize_llm_call() -> Dict[str, Optional[str]]:
     return CallCategorizer.categorize_call()
 
 
-__all__ = ['CallCategorizer', 'auto_categorize_llm_call']
+def benchmark_categorization(iterations: int = 2000, depth: int = 30) -> Dict[str, float]:
+    """
+    Compare the per-call cost (microseconds) of stack-based categorization with the previous
+    inspect.stack() frame walk and with sys._getframe (same detection path otherwise), and of an
+    explicitly declared category, at a given stack depth.
+    """
+    def measure(fn: Callable[[], Any]) -> float:
+        def nested(level: int) -> float:
+            if level > 0:
+                return nested(level - 1)
+            start = time.perf_counter()
+            for _ in range(iterations):
+                fn()
+            return (time.perf_counter() - start) / iterations * 1_000_000
+        return nested(depth)
+
+    def categorize_with(collect_stack_strings: Callable[[int], Tuple[str, str]]) -> Callable[[], Dict[str, Optional[str]]]:
+        # Same full categorization path for both collectors; only the frame walk differs
+        return lambda: CallCategorizer._categorize_from_stack(
+            {field: None for field in _CATEGORY_DETAIL_FIELDS}, collect_stack_strings
+        )
+
+    results = {
+        'inspect_stack_us': measure(categorize_with(CallCategorizer._collect_stack_strings_inspect)),
+        'getframe_fallback_us': measure(categorize_with(CallCategorizer._collect_stack_strings)),
+    }
+    with call_category_scope('evaluation', call_sub_category='eval_benchmark', call_operation='evaluation'):
+        results['explicit_context_us'] = measure(CallCategorizer.categorize_call)
+    return results
+
+
+__all__ = [
+    'CallCategorizer',
+    'auto_categorize_llm_call',
+    'call_category_scope',
+    'categorize_as',
+    'set_call_category',
+    'reset_call_category',
+    'copy_context_without_call_category',
+    'benchmark_categorization',
+]
+
+
+if __name__ == "__main__":
+    for name, micros in benchmark_categorization().items():
+        print(f"{name:>24}: {micros:10.2f} us/call")
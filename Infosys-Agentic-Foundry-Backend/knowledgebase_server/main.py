@@ -46,7 +46,13 @@ async def get_db_pool() -> asyncpg.Pool:
 @app.on_event("startup")
 async def startup_event():
     logger.info("KB Server starting")
-    await get_db_pool()
+    pool = await get_db_pool()
+    # Inserts rely on the content hash unique index as their ON CONFLICT target, so a missing schema is fatal
+    try:
+        await PostgresVectorStoreJSONB(pool).ensure_content_hash_schema()
+    except Exception as e:
+        logger.error(f"Could not verify content hash schema: {e}")
+        raise
     logger.info("KB Server started")
 
 
@@ -0,0 +1,21 @@
+"""
+Chunk content hashing shared by the KB server and the main application's vector store.
+
+Chunks are deduplicated per (kb_id, source filename, content hash): identical text in two files
+of one knowledge base is stored once per file, so re-ingesting or trimming one file never
+touches the rows of the other.
+"""
+import hashlib
+
+
+# Chunks stored without a filename in their metadata share the '' bucket of their KB
+CHUNK_FILENAME_EXPRESSION = "(COALESCE(metadata->>'filename', ''))"
+CHUNK_DEDUP_INDEX_NAME = "idx_vector_embeddings_jsonb_kb_file_content_hash"
+# Earlier per-KB index (kb_id, content_hash); dropped once CHUNK_DEDUP_INDEX_NAME exists
+LEGACY_CHUNK_DEDUP_INDEX_NAME = "idx_vector_embeddings_jsonb_kb_id_content_hash"
+CHUNK_CONFLICT_TARGET = f"(kb_id, {CHUNK_FILENAME_EXPRESSION}, content_hash) WHERE content_hash IS NOT NULL"
+
+
+def compute_chunk_hash(chunk_text: str) -> str:
+    """Returns the content hash used to deduplicate chunks of a file within a knowledge base."""
+    return hashlib.sha256(chunk_text.strip().encode("utf-8")).hexdigest()
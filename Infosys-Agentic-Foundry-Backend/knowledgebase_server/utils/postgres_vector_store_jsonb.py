@@ -5,6 +5,14 @@ import asyncpg
 from datetime import datetime, timezone
 import logging
 
+from utils.chunk_hashing import (
+    compute_chunk_hash,
+    CHUNK_CONFLICT_TARGET,
+    CHUNK_DEDUP_INDEX_NAME,
+    CHUNK_FILENAME_EXPRESSION,
+    LEGACY_CHUNK_DEDUP_INDEX_NAME,
+)
+
 logger = logging.getLogger(__name__)
 
 
@@ -15,6 +23,104 @@ class PostgresVectorStoreJSONB:
         self.kb_table = "knowledgebase_table"
         self.embedding_table = "vector_embeddings_jsonb"
 
+    async def ensure_content_hash_schema(self):
+        """
+        Adds the content_hash column and its indexes if the table predates content hashing.
+        Does nothing while the embedding table does not exist yet (the main application creates it with the indexes).
+        """
+        async with self.pool.acquire() as conn:
+            table_exists = await conn.fetchval("SELECT to_regclass($1) IS NOT NULL", self.embedding_table)
+            if not table_exists:
+                logger.info(f"'{self.embedding_table}' does not exist yet, content hash schema left to its creator")
+                return
+            await conn.execute(
+                f"ALTER TABLE {self.embedding_table} ADD COLUMN IF NOT EXISTS content_hash TEXT"
+            )
+            await conn.execute(
+                f"""CREATE UNIQUE INDEX IF NOT EXISTS {CHUNK_DEDUP_INDEX_NAME}
+                ON {self.embedding_table} (kb_id, {CHUNK_FILENAME_EXPRESSION}, content_hash)
+                WHERE content_hash IS NOT NULL"""
+            )
+            await conn.execute(f"DROP INDEX IF EXISTS {LEGACY_CHUNK_DEDUP_INDEX_NAME}")
+            await conn.execute(
+                f"""CREATE INDEX IF NOT EXISTS idx_vector_embeddings_jsonb_content_hash
+                ON {self.embedding_table} (content_hash)
+                WHERE content_hash IS NOT NULL"""
+            )
+        logger.info(f"Content hash schema verified for '{self.embedding_table}'")
+
+    async def get_existing_chunk_hashes(self, kb_id: str, filename: str, content_hashes: List[str]) -> set:
+        """
+        Returns the subset of content_hashes already stored for filename in kb_id.
+        """
+        if not content_hashes:
+            return set()
+        async with self.pool.acquire() as conn:
+            rows = await conn.fetch(
+                f"""SELECT content_hash FROM {self.embedding_table}
+                WHERE kb_id = $1 AND {CHUNK_FILENAME_EXPRESSION} = $2 AND content_hash = ANY($3::text[])""",
+                kb_id, filename or "", content_hashes
+            )
+        return {row['content_hash'] for row in rows}
+
+    async def get_embeddings_by_hash(self, content_hashes: List[str]) -> Dict[str, List[float]]:
+        """
+        Returns already computed embeddings for content_hashes from any knowledge base.
+        """
+        if not content_hashes:
+            return {}
+        async with self.pool.acquire() as conn:
+            rows = await conn.fetch(
+                f"""SELECT DISTINCT ON (content_hash) content_hash, embedding
+                FROM {self.embedding_table}
+                WHERE content_hash = ANY($1::text[])""",
+                content_hashes
+            )
+        return {row['content_hash']: json.loads(row['embedding']) for row in rows}
+
+    async def update_chunk_metadata(
+        self,
+        kb_id: str,
+        filename: str,
+        content_hashes: List[str],
+        metadata_list: List[Dict[str, Any]]
+    ) -> None:
+        """
+        Refreshes metadata (page numbers, chunk positions) of unchanged chunks belonging to filename.
+        """
+        if not content_hashes:
+            return
+        now = datetime.now(timezone.utc)
+        records = [
+            (kb_id, content_hash, json.dumps(metadata), now, filename)
+            for content_hash, metadata in zip(content_hashes, metadata_list)
+        ]
+        async with self.pool.acquire() as conn:
+            await conn.executemany(
+                f"""UPDATE {self.embedding_table}
+                SET metadata = $3::jsonb, updated_on = $4
+                WHERE kb_id = $1 AND content_hash = $2
+                  AND {CHUNK_FILENAME_EXPRESSION} = $5
+                  AND metadata IS DISTINCT FROM $3::jsonb""",
+                records
+            )
+
+    async def delete_stale_chunks(self, kb_id: str, filename: str, keep_hashes: List[str]) -> int:
+        """
+        Deletes chunks of filename that are no longer part of the document, including legacy rows without a hash.
+        """
+        async with self.pool.acquire() as conn:
+            result = await conn.execute(
+                f"""DELETE FROM {self.embedding_table}
+                WHERE kb_id = $1 AND {CHUNK_FILENAME_EXPRESSION} = $2
+                  AND (content_hash IS NULL OR NOT (content_hash = ANY($3::text[])))""",
+                kb_id, filename, keep_hashes
+            )
+        deleted_count = int(result.split()[-1]) if result else 0
+        if deleted_count:
+            logger.info(f"Deleted {deleted_count} stale chunks of '{filename}' for KB ID: {kb_id}")
+        return deleted_count
+
     async def get_or_create_kb_id(self, kb_name: str, created_by: str = "system", list_of_documents: str = "") -> str:
         async with self.pool.acquire() as conn:
             result = await conn.fetchrow(
@@ -73,8 +179,9 @@ class PostgresVectorStoreJSONB:
         
         insert_query = f"""
         INSERT INTO {self.embedding_table} 
-        (kb_id, chunk_text, embedding, metadata, created_on, updated_on)
-        VALUES ($1, $2, $3, $4, $5, $6)
+        (kb_id, chunk_text, content_hash, embedding, metadata, created_on, updated_on)
+        VALUES ($1, $2, $3, $4, $5, $6, $7)
+        ON CONFLICT {CHUNK_CONFLICT_TARGET} DO NOTHING
         """
         
         now = datetime.now(timezone.utc)
@@ -86,6 +193,7 @@ class PostgresVectorStoreJSONB:
             records.append((
                 kb_id,
                 chunk,
+                compute_chunk_hash(chunk),
                 json.dumps(embedding_list),
                 json.dumps(metadata),
                 now,
@@ -147,8 +255,9 @@ class PostgresVectorStoreJSONB:
         
         insert_query = f"""
         INSERT INTO {self.embedding_table} 
-        (kb_id, chunk_text, embedding, metadata, created_on, updated_on)
-        VALUES ($1, $2, $3, $4, $5, $6)
+        (kb_id, chunk_text, content_hash, embedding, metadata, created_on, updated_on)
+        VALUES ($1, $2, $3, $4, $5, $6, $7)
+        ON CONFLICT {CHUNK_CONFLICT_TARGET} DO NOTHING
         """
         
         now = datetime.now(timezone.utc)
@@ -160,6 +269,7 @@ class PostgresVectorStoreJSONB:
             records.append((
                 kb_id,
                 chunk,
+                compute_chunk_hash(chunk),
                 json.dumps(embedding_list),
                 json.dumps(metadata),
                 now,
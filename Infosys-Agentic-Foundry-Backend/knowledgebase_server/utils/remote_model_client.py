@@ -3,6 +3,7 @@ Model Client for communicating with the FastAPI model server
 """
 import os
 import requests
+import numpy as np
 from typing import List, Union, Any
 import logging
 
@@ -11,6 +12,20 @@ load_dotenv(override=True)
 
 logger = logging.getLogger(__name__)
 
+# Binary embeddings transport negotiated with the model server; JSON remains the fallback
+EMBEDDINGS_BINARY_MEDIA_TYPE = "application/x-embeddings-f32le"
+EMBEDDING_SHAPE_HEADER = "X-Embedding-Shape"
+EMBEDDINGS_ACCEPT_HEADER = f"{EMBEDDINGS_BINARY_MEDIA_TYPE}, application/json;q=0.5"
+
+
+def decode_embeddings_response(response: requests.Response) -> Union[np.ndarray, List[List[float]]]:
+    """Decodes an /embeddings response, zero-copy for the binary format and a list of lists for JSON"""
+    content_type = response.headers.get("Content-Type", "")
+    if content_type.startswith(EMBEDDINGS_BINARY_MEDIA_TYPE):
+        rows, cols = (int(dim) for dim in response.headers[EMBEDDING_SHAPE_HEADER].split(","))
+        return np.frombuffer(response.content, dtype="<f4").reshape(rows, cols)
+    return response.json()["embeddings"]
+
 
 class ModelServerClient:
     """Client for communicating with the model server"""
@@ -95,22 +110,23 @@ class RemoteSentenceTransformer:
             response = self.client.session.post(
                 f"{self.client.base_url}/embeddings",
                 json=payload,
+                headers={"Accept": EMBEDDINGS_ACCEPT_HEADER},
                 timeout=30,
                 verify=False
             )
             if response.status_code != 200:
                 raise Exception(f"Model server error: {response.status_code} - {response.text}")
             
-            result = response.json()
-            embeddings = result["embeddings"]
+            embeddings = decode_embeddings_response(response)
             
             if convert_to_numpy:
-                import numpy as np
-                embeddings = np.array(embeddings)
+                embeddings = np.asarray(embeddings, dtype=np.float32)
                 if isinstance(sentences, str):
                     return embeddings[0]
                 return embeddings
             
+            if isinstance(embeddings, np.ndarray):
+                embeddings = embeddings.tolist()
             if isinstance(sentences, str):
                 return embeddings[0] if embeddings else []
             else:
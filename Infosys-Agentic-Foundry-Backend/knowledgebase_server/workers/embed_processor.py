@@ -24,6 +24,7 @@ except Exception as e:
     logger = logging.getLogger(__name__)
 
 from utils.postgres_vector_store_jsonb import PostgresVectorStoreJSONB
+from utils.chunk_hashing import compute_chunk_hash
 from utils.remote_model_client import get_remote_models
 
 
@@ -44,18 +45,59 @@ class EmbeddingProcessor:
         filename: str = ""
     ):
         try:
-            embeddings = self.embedding_model.encode(texts, convert_to_numpy=True)
-            if not isinstance(embeddings, np.ndarray):
-                embeddings = np.array(embeddings)
-            
+            if metadata_list is None:
+                metadata_list = [{} for _ in texts]
+
+            # Identical chunks within one document collapse onto a single row; dedup never crosses files
+            unique_chunks = {}
+            for text, metadata in zip(texts, metadata_list):
+                unique_chunks.setdefault(compute_chunk_hash(text), (text, metadata))
+            content_hashes = list(unique_chunks.keys())
+
+            existing_hashes = await self.vector_store.get_existing_chunk_hashes(kb_id, filename, content_hashes)
+            new_hashes = [h for h in content_hashes if h not in existing_hashes]
+            reusable_embeddings = await self.vector_store.get_embeddings_by_hash(new_hashes)
+            hashes_to_embed = [h for h in new_hashes if h not in reusable_embeddings]
+
+            computed_embeddings = {}
+            if hashes_to_embed:
+                embeddings = self.embedding_model.encode(
+                    [unique_chunks[h][0] for h in hashes_to_embed], convert_to_numpy=True
+                )
+                if not isinstance(embeddings, np.ndarray):
+                    embeddings = np.array(embeddings)
+                computed_embeddings = dict(zip(hashes_to_embed, embeddings))
+
+            logger.info(
+                f"KB ID '{kb_id}' file '{filename}': {len(content_hashes)} chunks, "
+                f"{len(existing_hashes)} unchanged, {len(reusable_embeddings)} reused, {len(hashes_to_embed)} embedded"
+            )
+
             await self.vector_store.store_embeddings_by_id(
                 kb_id=kb_id,
-                chunks=texts,
-                embeddings=embeddings,
-                metadata_list=metadata_list,
+                chunks=[unique_chunks[h][0] for h in new_hashes],
+                embeddings=[
+                    computed_embeddings[h] if h in computed_embeddings else reusable_embeddings[h]
+                    for h in new_hashes
+                ],
+                metadata_list=[unique_chunks[h][1] for h in new_hashes],
                 created_by=created_by,
                 filename=filename
             )
+
+            if filename:
+                unchanged_hashes = [h for h in content_hashes if h in existing_hashes]
+                await self.vector_store.update_chunk_metadata(
+                    kb_id=kb_id,
+                    filename=filename,
+                    content_hashes=unchanged_hashes,
+                    metadata_list=[unique_chunks[h][1] for h in unchanged_hashes]
+                )
+                await self.vector_store.delete_stale_chunks(
+                    kb_id=kb_id,
+                    filename=filename,
+                    keep_hashes=content_hashes
+                )
         except Exception as e:
             logger.error(f"Error processing embeddings for KB ID '{kb_id}': {e}", exc_info=True)
     
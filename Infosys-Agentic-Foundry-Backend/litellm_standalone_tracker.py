@@ -12,7 +12,7 @@ It integrates with the existing database schema:
 Features:
 - Extracts tokens from both LiteLLM and Azure OpenAI responses
 - Calculates costs from model_costs table  
-- Logs to token_usage_logs table
+- Logs to token_usage_logs table through a buffered batch writer
 - Background task to update model_costs from LiteLLM's API
 - Works regardless of USE_LITELLM_PROXY_FLAG setting
 
@@ -30,11 +30,16 @@ Usage in src/models/guardrail_aware_llm.py or similar:
 """
 
 import os
+import time
+import uuid
 import asyncio
+import threading
+import contextvars
 import asyncpg
 import litellm
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Deque, Dict, List, Optional, Tuple
 from datetime import datetime
+from collections import OrderedDict, deque
 from contextlib import asynccontextmanager
 import logging
 from enum import Enum
@@ -120,6 +125,19 @@ class TrackerConfig:
         # LiteLLM URL for cost updates
         self.litellm_url = os.getenv("LITELLM_URL", "http://localhost:8080")
         
+        # Buffered writer settings: records are flushed when the batch size is reached
+        # or the flush interval elapses, whichever comes first
+        self.log_batch_size = int(os.getenv("TOKEN_LOG_BATCH_SIZE", "200"))
+        self.log_flush_interval = float(os.getenv("TOKEN_LOG_FLUSH_INTERVAL", "2.0"))
+        self.log_max_buffer = int(os.getenv("TOKEN_LOG_MAX_BUFFER", "20000"))
+        self.agent_name_cache_size = int(os.getenv("TOKEN_LOG_AGENT_NAME_CACHE_SIZE", "5000"))
+        # Resolved cost rates remembered for model names not known when costs were loaded
+        self.cost_lookup_cache_size = int(os.getenv("TOKEN_COST_LOOKUP_CACHE_SIZE", "1024"))
+        # Per-request token accumulator limits (buckets not drained within the TTL are discarded)
+        self.accumulator_ttl_seconds = float(os.getenv("TOKEN_ACCUMULATOR_TTL_SECONDS", "3600"))
+        self.accumulator_max_buckets = int(os.getenv("TOKEN_ACCUMULATOR_MAX_BUCKETS", "10000"))
+        self.accumulator_max_records = int(os.getenv("TOKEN_ACCUMULATOR_MAX_RECORDS", "1000"))
+        
         log.info(f"Standalone Tracker Config: db={self.db_name}, pool={pool_size}")
 
 
@@ -564,11 +582,22 @@ _db_pool = DatabasePool()
 # MODEL COST SERVICE
 # ==========================================
 
+# (input_cost_per_token, output_cost_per_token, cache_read_input_token_cost)
+CostRates = Tuple[float, float, float]
+
+
 class ModelCostService:
     """Service for retrieving and updating model costs"""
     
     def __init__(self):
         self._cache: Dict[str, Dict[str, Any]] = {}
+        # Precomputed on every load: name/alias -> rates. Exact names and alias resolutions are kept
+        # apart so that a deployment fallback still takes precedence over alias resolution.
+        self._exact_rates: Dict[str, CostRates] = {}
+        self._alias_rates: Dict[str, CostRates] = {}
+        # LRU of alias resolutions for names seen only at call time (None = no cost data)
+        self._unseen_rates: "OrderedDict[str, Optional[CostRates]]" = OrderedDict()
+        self._missing_warned: set = set()
         self._initialized = False
         self._lock = asyncio.Lock()
         self._last_update: Optional[datetime] = None
@@ -597,8 +626,9 @@ class ModelCostService:
             async with _db_pool.acquire() as conn:
                 rows = await conn.fetch("SELECT * FROM model_costs")
                 
+                cache: Dict[str, Dict[str, Any]] = {}
                 for row in rows:
-                    self._cache[row['name']] = {
+                    cache[row['name']] = {
                         'model_name': row['model_name'],
                         'model_version': row['model_version'],
                         'provider_key': row['provider_key'],
@@ -609,6 +639,8 @@ class ModelCostService:
                         'cache_read_input_token_cost': float(row['cache_read_input_token_cost'] or 0),
                     }
                 
+                self._cache = cache
+                self._build_resolved_rates()
                 self._last_update = datetime.now()
                 log.info(f"📊 Loaded {len(self._cache)} model costs from database")
                 
@@ -678,6 +710,63 @@ class ModelCostService:
         except Exception as e:
             log.error(f"❌ Failed to update costs from LiteLLM: {e}", exc_info=True)
     
+    def _build_resolved_rates(self):
+        """
+        Flatten the cost cache into name -> rates maps so calculate_cost is a dict lookup.
+        Aliases cover every BASE_MODEL_MAPPING entry and the date-suffixed names extract_base_model
+        would reduce to a known model; anything else is resolved once and kept in a small LRU.
+        """
+        exact_rates = {
+            name: (
+                data.get('input_cost_per_token') or 0.0,
+                data.get('output_cost_per_token') or 0.0,
+                data.get('cache_read_input_token_cost') or 0.0,
+            )
+            for name, data in self._cache.items()
+        }
+        alias_rates: Dict[str, CostRates] = {}
+        for alias, base_model in _BASE_MODEL_MAPPING.items():
+            if base_model in exact_rates:
+                alias_rates[alias] = exact_rates[base_model]
+        for data in self._cache.values():
+            for alias in (data.get('model_name'), data.get('model_version')):
+                if alias and alias not in alias_rates:
+                    rates = self._resolve_alias(alias, exact_rates)
+                    if rates is not None:
+                        alias_rates[alias] = rates
+        self._exact_rates = exact_rates
+        self._alias_rates = alias_rates
+        self._unseen_rates = OrderedDict()
+        self._missing_warned = set()
+        log.debug(f"💡 Resolved cost map built: {len(exact_rates)} models, {len(alias_rates)} aliases")
+
+    @staticmethod
+    def _resolve_alias(model_name: str, exact_rates: Dict[str, CostRates]) -> Optional[CostRates]:
+        """Env-configured base model mapping, then auto-extracted base model (date suffix removed)."""
+        if model_name in _BASE_MODEL_MAPPING:
+            rates = exact_rates.get(_BASE_MODEL_MAPPING[model_name])
+            if rates is not None:
+                return rates
+        base_model = extract_base_model(model_name)
+        if base_model != model_name:
+            return exact_rates.get(base_model)
+        return None
+
+    def _lookup_alias(self, model_name: str) -> Optional[CostRates]:
+        rates = self._alias_rates.get(model_name)
+        if rates is not None:
+            return rates
+        if model_name in self._unseen_rates:
+            self._unseen_rates.move_to_end(model_name)
+            return self._unseen_rates[model_name]
+        rates = self._resolve_alias(model_name, self._exact_rates)
+        if rates is not None:
+            log.info(f"💡 Cost lookup resolved response model '{model_name}' via base model mapping")
+        self._unseen_rates[model_name] = rates
+        while len(self._unseen_rates) > _config.cost_lookup_cache_size:
+            self._unseen_rates.popitem(last=False)
+        return rates
+
     def calculate_cost(self, model_name: str, prompt_tokens: int, completion_tokens: int, cached_tokens: int = 0, fallback_model: Optional[str] = None) -> Tuple[float, float, float, float]:
         """
         Calculate costs for token usage with comprehensive fallback chain.
@@ -696,36 +785,20 @@ class ModelCostService:
         Returns:
             Tuple of (prompt_cost, completion_cost, cached_cost, total_cost)
         """
-        cost_data = None
-        used_lookup = None  # Track which lookup method succeeded
-        
-        # Step 1: Try exact match first
-        cost_data = self._cache.get(model_name)
-        if cost_data:
-            used_lookup = f"exact match: {model_name}"
-
-        # Step 2: Fall back to the deployment/configured model name
-        if not cost_data and fallback_model and fallback_model != model_name:
-            cost_data = self._cache.get(fallback_model)
-            if cost_data:
-                used_lookup = f"deployment fallback: {fallback_model}"
-        
-        # Step 3: Try environment-configured base model mapping
-        if not cost_data and model_name in _BASE_MODEL_MAPPING:
-            base_model = _BASE_MODEL_MAPPING[model_name]
-            cost_data = self._cache.get(base_model)
-            if cost_data:
-                used_lookup = f"env mapping: {model_name} -> {base_model}"
-        
-        # Step 4: Try auto-extracted base model (removes date suffixes)
-        if not cost_data:
-            base_model = extract_base_model(model_name)
-            if base_model != model_name:
-                cost_data = self._cache.get(base_model)
-                if cost_data:
-                    used_lookup = f"auto-extracted: {base_model}"
-
-        if not cost_data:
+        # Resolution order matches the list above; the maps are precomputed in _build_resolved_rates
+        rates = self._exact_rates.get(model_name)
+        if rates is None and fallback_model and fallback_model != model_name:
+            rates = self._exact_rates.get(fallback_model)
+        if rates is None:
+            rates = self._lookup_alias(model_name)
+
+        if rates is None:
+            # Warn once per unknown model/fallback pair until costs are reloaded
+            if (model_name, fallback_model) in self._missing_warned:
+                return (0.0, 0.0, 0.0, 0.0)
+            if len(self._missing_warned) >= _config.cost_lookup_cache_size:
+                self._missing_warned.clear()
+            self._missing_warned.add((model_name, fallback_model))
             log.warning(
                 f"⚠️ No cost data found for model '{model_name}' "
                 f"(fallback: {fallback_model or 'none'}, "
@@ -733,13 +806,11 @@ class ModelCostService:
             )
             return (0.0, 0.0, 0.0, 0.0)
         
-        # Log successful lookup method
-        log.info(f"💡 Cost lookup succeeded via {used_lookup} for response model '{model_name}'")
-        
         # Calculate costs
-        prompt_cost = prompt_tokens * (cost_data.get('input_cost_per_token') or 0.0)
-        completion_cost = completion_tokens * (cost_data.get('output_cost_per_token') or 0.0)
-        cached_cost = cached_tokens * (cost_data.get('cache_read_input_token_cost') or 0.0)
+        input_rate, output_rate, cache_read_rate = rates
+        prompt_cost = prompt_tokens * input_rate
+        completion_cost = completion_tokens * output_rate
+        cached_cost = cached_tokens * cache_read_rate
         total_cost = prompt_cost + completion_cost + cached_cost
         
         return (
@@ -804,6 +875,228 @@ def stop_cost_update_scheduler():
         log.info("🛑 Standalone Tracker: Cost update scheduler stopped")
 
 
+# ==========================================
+# BUFFERED TOKEN USAGE WRITER
+# ==========================================
+
+_LEGACY_LOG_COLUMNS = [
+    "timestamp", "agent_id", "agent_name", "model_name", "session_id", "user_id", "request_id",
+    "prompt_tokens", "completion_tokens", "total_tokens", "cached_tokens",
+    "prompt_tokens_cost", "cached_tokens_cost", "completion_tokens_cost", "total_cost",
+    "status", "error_message",
+]
+_CATEGORIZED_LOG_COLUMNS = _LEGACY_LOG_COLUMNS + [
+    "call_category", "call_sub_category", "call_operation",
+    "tool_id", "tool_name", "evaluation_type", "agent_type", "agent_component",
+]
+# Rows for calls answered by the LLM response cache (zero tokens and cost, tokens the cache saved)
+_CACHE_LOG_COLUMNS = _CATEGORIZED_LOG_COLUMNS + ["cache_hit", "cache_tokens_saved"]
+_AGENT_NAME_INDEX = _LEGACY_LOG_COLUMNS.index("agent_name")
+_AGENT_ID_INDEX = _LEGACY_LOG_COLUMNS.index("agent_id")
+
+
+# Connection / pool failures: the batch is kept and retried on the next flush
+_TRANSIENT_DB_ERRORS = (asyncpg.PostgresConnectionError, asyncpg.InterfaceError, ConnectionError, OSError, asyncio.TimeoutError)
+
+
+class TokenUsageBuffer:
+    """
+    In-memory buffer for token_usage_logs rows, flushed in batches.
+
+    Records are appended synchronously (no I/O on the LLM call path) and written by a
+    background task with COPY, falling back to a multi-row INSERT and then to row-by-row
+    inserts, so one bad row only costs itself. A flush is triggered
+    when the buffer reaches the batch size or the flush interval elapses, and close()
+    drains whatever is left. Schema detection runs once per process and agent names are
+    resolved per batch and cached.
+    """
+
+    def __init__(self):
+        self.batch_size = max(1, _config.log_batch_size)
+        self.flush_interval = max(0.1, _config.log_flush_interval)
+        self.max_buffer = max(self.batch_size, _config.log_max_buffer)
+        # Bounded: when full, appending discards the oldest row
+        self._records: Deque[Tuple] = deque(maxlen=self.max_buffer)
+        self._flush_lock = asyncio.Lock()
+        self._flush_event: Optional[asyncio.Event] = None
+        self._flusher_task: Optional[asyncio.Task] = None
+        self._columns: Optional[List[str]] = None
+        self._agent_names: "OrderedDict[Any, str]" = OrderedDict()
+        self.dropped = 0
+        self.rejected = 0
+
+    def start(self):
+        """Start the background flusher on the running event loop"""
+        if self._flusher_task and not self._flusher_task.done():
+            return
+        self._flush_event = asyncio.Event()
+        self._flusher_task = asyncio.create_task(self._run(), name="token-usage-flusher")
+
+    def add(self, record: Tuple):
+        """Queue one row; never blocks on the database"""
+        if len(self._records) >= self.max_buffer:
+            # Database is unreachable or falling behind - the append below drops the oldest row
+            self.dropped += 1
+            if self.dropped % 1000 == 1:
+                log.warning(f"⚠️ Token usage buffer full ({self.max_buffer}); dropped {self.dropped} record(s) so far")
+        self._records.append(record)
+        if self._flusher_task is None or self._flusher_task.done():
+            try:
+                self.start()
+            except RuntimeError:
+                return
+        if len(self._records) >= self.batch_size:
+            self._flush_event.set()
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._flush_event.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._flush_event.clear()
+            try:
+                await self.flush()
+            except Exception as e:
+                log.error(f"❌ Token usage flush failed: {e}", exc_info=True)
+
+    async def flush(self):
+        """
+        Write every buffered record. Batches that fail on a connection or pool error are put
+        back for the next attempt; any other failure drops the batch so it cannot block the buffer.
+        """
+        async with self._flush_lock:
+            while self._records:
+                batch = [self._records.popleft() for _ in range(min(self.batch_size, len(self._records)))]
+                try:
+                    await self._write_batch(batch)
+                except _TRANSIENT_DB_ERRORS:
+                    # Re-queue ahead of newer rows; only what fits, as extendleft on a full deque drops from the right
+                    room = max(0, self.max_buffer - len(self._records))
+                    self.dropped += len(batch) - min(room, len(batch))
+                    if room:
+                        self._records.extendleft(reversed(batch[-room:]))
+                    raise
+                except Exception as e:
+                    self.dropped += len(batch)
+                    log.error(f"❌ Token usage batch of {len(batch)} record(s) dropped: {e}", exc_info=True)
+
+    async def _write_batch(self, batch: List[Tuple]):
+        async with _db_pool.acquire() as conn:
+            if self._columns is None:
+                existing = {
+                    row["column_name"] for row in await conn.fetch("""
+                        SELECT column_name FROM information_schema.columns 
+                        WHERE table_name = 'token_usage_logs'
+                    """)
+                }
+                if set(_CACHE_LOG_COLUMNS) <= existing:
+                    self._columns = _CACHE_LOG_COLUMNS
+                elif set(_CATEGORIZED_LOG_COLUMNS) <= existing:
+                    self._columns = _CATEGORIZED_LOG_COLUMNS
+                    log.warning("⚠️ Response cache columns not found; cache hits are logged as zero-token rows only.")
+                else:
+                    self._columns = _LEGACY_LOG_COLUMNS
+                    log.warning("⚠️ Categorization columns not found. Using legacy schema. Run migration script!")
+
+            batch = await self._fill_agent_names(conn, batch)
+            columns = self._columns
+            rows = [record[:len(columns)] for record in batch]
+
+            try:
+                await conn.copy_records_to_table("token_usage_logs", records=rows, columns=columns)
+            except (asyncpg.PostgresError, asyncpg.InterfaceError) as e:
+                if isinstance(e, _TRANSIENT_DB_ERRORS):
+                    raise
+                log.warning(f"⚠️ COPY into token_usage_logs failed ({e}); retrying with multi-row INSERT")
+                width = len(columns)
+                placeholders = ", ".join(
+                    "(" + ", ".join(f"${i * width + j + 1}" for j in range(width)) + ")"
+                    for i in range(len(rows))
+                )
+                try:
+                    await conn.execute(
+                        f"INSERT INTO token_usage_logs ({', '.join(columns)}) VALUES {placeholders}",
+                        *[value for row in rows for value in row]
+                    )
+                except _TRANSIENT_DB_ERRORS:
+                    raise
+                except asyncpg.PostgresError as e:
+                    log.warning(f"⚠️ Multi-row INSERT into token_usage_logs failed ({e}); retrying row by row")
+                    await self._write_rows_individually(conn, columns, rows)
+        log.debug(f"Token usage flushed: {len(batch)} record(s)")
+
+    async def _write_rows_individually(self, conn, columns: List[str], rows: List[Tuple]):
+        """Insert rows one at a time; rows the database rejects are logged, counted and dropped"""
+        query = (
+            f"INSERT INTO token_usage_logs ({', '.join(columns)}) "
+            f"VALUES ({', '.join(f'${i + 1}' for i in range(len(columns)))})"
+        )
+        for row in rows:
+            try:
+                await conn.execute(query, *row)
+            except _TRANSIENT_DB_ERRORS:
+                raise
+            except asyncpg.PostgresError as e:
+                self.rejected += 1
+                log.error(f"❌ Token usage row rejected and dropped ({self.rejected} so far): {e}; row={row}")
+
+    async def _fill_agent_names(self, conn, batch: List[Tuple]) -> List[Tuple]:
+        """Resolve missing agent names with one query per batch, backed by an LRU cache"""
+        unknown = {
+            record[_AGENT_ID_INDEX] for record in batch
+            if record[_AGENT_ID_INDEX] and not record[_AGENT_NAME_INDEX]
+            and record[_AGENT_ID_INDEX] not in self._agent_names
+        }
+        if unknown:
+            try:
+                rows = await conn.fetch(
+                    "SELECT agentic_application_id, agentic_application_name FROM agent_table "
+                    "WHERE agentic_application_id = ANY($1::text[])",
+                    [str(agent_id) for agent_id in unknown]
+                )
+                for row in rows:
+                    self._remember_agent_name(row["agentic_application_id"], row["agentic_application_name"])
+            except Exception as e:
+                log.warning(f"⚠️ Could not fetch agent names for {len(unknown)} agent id(s): {e}")
+
+        filled = []
+        for record in batch:
+            agent_id = record[_AGENT_ID_INDEX]
+            if agent_id and not record[_AGENT_NAME_INDEX]:
+                name = self._agent_names.get(str(agent_id))
+                if name:
+                    self._agent_names.move_to_end(str(agent_id))
+                    record = record[:_AGENT_NAME_INDEX] + (name,) + record[_AGENT_NAME_INDEX + 1:]
+            filled.append(record)
+        return filled
+
+    def _remember_agent_name(self, agent_id: Any, agent_name: str):
+        if not agent_id or not agent_name:
+            return
+        self._agent_names[str(agent_id)] = agent_name
+        self._agent_names.move_to_end(str(agent_id))
+        while len(self._agent_names) > _config.agent_name_cache_size:
+            self._agent_names.popitem(last=False)
+
+    async def close(self):
+        """Stop the background flusher and write out everything still buffered"""
+        if self._flusher_task and not self._flusher_task.done():
+            self._flusher_task.cancel()
+            try:
+                await self._flusher_task
+            except asyncio.CancelledError:
+                pass
+        self._flusher_task = None
+        if self._records:
+            pending = len(self._records)
+            try:
+                await self.flush()
+                log.info(f"✅ Token usage buffer drained on shutdown ({pending} record(s))")
+            except Exception as e:
+                log.error(f"❌ Failed to drain token usage buffer on shutdown: {e}", exc_info=True)
+
+
 # ==========================================
 # TOKEN USAGE LOGGER
 # ==========================================
@@ -813,6 +1106,7 @@ class StandaloneTokenLogger:
     
     def __init__(self):
         self.enabled = _config.enabled
+        self._buffer = TokenUsageBuffer()
     
     async def initialize(self):
         """Initialize logger and dependencies"""
@@ -830,6 +1124,9 @@ class StandaloneTokenLogger:
             # Start background cost updater
             start_cost_update_scheduler()
             
+            # Start buffered token usage writer
+            self._buffer.start()
+            
             log.info("✅ Standalone Token Logger fully initialized")
             
         except Exception as e:
@@ -860,7 +1157,8 @@ class StandaloneTokenLogger:
         deployment_model: Optional[str] = None,
     ):
         """
-        Log token usage to token_usage_logs table with categorization
+        Queue token usage for the token_usage_logs table with categorization.
+        Rows are written in batches by TokenUsageBuffer, so this adds no database round-trip.
         
         Standard fields:
         - timestamp, agent_id, agent_name, model_name, session_id, user_id, request_id
@@ -888,76 +1186,21 @@ class StandaloneTokenLogger:
                 fallback_model=deployment_model,
             )
             
-            # Fetch agent name from database if agent_id provided but no agent_name
-            if agent_id and not agent_name:
-                try:
-                    async with _db_pool.acquire() as conn:
-                        result = await conn.fetchrow(
-                            "SELECT agentic_application_name FROM agent_table WHERE agentic_application_id = $1",
-                            agent_id
-                        )
-                        if result:
-                            agent_name = result["agentic_application_name"]
-                except Exception as e:
-                    log.warning(f"⚠️ Could not fetch agent name for agent_id={agent_id}: {e}")
-            
-            # Insert into token_usage_logs table with categorization columns
-            async with _db_pool.acquire() as conn:
-                # Check if new columns exist
-                has_new_columns = await conn.fetchval("""
-                    SELECT EXISTS (
-                        SELECT 1 FROM information_schema.columns 
-                        WHERE table_name = 'token_usage_logs' 
-                        AND column_name = 'call_category'
-                    )
-                """)
-                
-                if has_new_columns:
-                    # Use new schema with categorization columns
-                    await conn.execute(
-                        """
-                        INSERT INTO token_usage_logs (
-                            timestamp, agent_id, agent_name, model_name, session_id, user_id, request_id,
-                            prompt_tokens, completion_tokens, total_tokens, cached_tokens,
-                            prompt_tokens_cost, cached_tokens_cost, completion_tokens_cost, total_cost,
-                            status, error_message,
-                            call_category, call_sub_category, call_operation,
-                            tool_id, tool_name, evaluation_type, agent_type, agent_component
-                        ) VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10, $11, $12, $13, $14, $15, $16, $17,
-                                  $18, $19, $20, $21, $22, $23, $24, $25)
-                        """,
-                        datetime.now(), agent_id, agent_name, model_name, session_id, user_id, request_id,
-                        prompt_tokens, completion_tokens, total_tokens, cached_tokens,
-                        prompt_cost, cached_cost, completion_cost, total_cost,
-                        status, None,  # error_message
-                        call_category, call_sub_category, call_operation,
-                        tool_id, tool_name, evaluation_type, agent_type, agent_component
-                    )
-                    log.info(
-                        f"✅ Token usage logged: model={model_name}, category={call_category}, "
-                        f"sub_category={call_sub_category}, agent_id={agent_id}, tokens={total_tokens}, cost=${total_cost:.8f}"
-                    )
-                else:
-                    # Fallback to old schema without categorization
-                    log.warning("⚠️ Categorization columns not found. Using legacy schema. Run migration script!")
-                    await conn.execute(
-                        """
-                        INSERT INTO token_usage_logs (
-                            timestamp, agent_id, agent_name, model_name, session_id, user_id, request_id,
-                            prompt_tokens, completion_tokens, total_tokens, cached_tokens,
-                            prompt_tokens_cost, cached_tokens_cost, completion_tokens_cost, total_cost,
-                            status, error_message
-                        ) VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10, $11, $12, $13, $14, $15, $16, $17)
-                        """,
-                        datetime.now(), agent_id, agent_name, model_name, session_id, user_id, request_id,
-                        prompt_tokens, completion_tokens, total_tokens, cached_tokens,
-                        prompt_cost, cached_cost, completion_cost, total_cost,
-                        status, None  # error_message
-                    )
-                    log.info(
-                        f"✅ Token usage logged (legacy): model={model_name}, agent_id={agent_id}, "
-                        f"tokens={total_tokens}, cost=${total_cost:.8f}"
-                    )
+            # Queue the row; agent_name is resolved (and cached) by the writer at flush time.
+            # Column order must match _CATEGORIZED_LOG_COLUMNS.
+            self._buffer.add((
+                datetime.now(), agent_id, agent_name, model_name, session_id, user_id, request_id,
+                prompt_tokens, completion_tokens, total_tokens, cached_tokens,
+                prompt_cost, cached_cost, completion_cost, total_cost,
+                status, None,  # error_message
+                call_category, call_sub_category, call_operation,
+                tool_id, tool_name, evaluation_type, agent_type, agent_component,
+                False, 0  # cache_hit, cache_tokens_saved
+            ))
+            log.debug(
+                f"Token usage queued: model={model_name}, category={call_category}, "
+                f"sub_category={call_sub_category}, agent_id={agent_id}, tokens={total_tokens}, cost=${total_cost:.8f}"
+            )
             
         except Exception as e:
             log.error(
@@ -966,9 +1209,45 @@ class StandaloneTokenLogger:
                 exc_info=True
             )
     
+    def log_cache_hit(self, model_name: Optional[str], tokens_saved: int, semantic: bool = False):
+        """
+        Queue a row for an LLM call answered by the response cache: no tokens or cost, the tokens
+        the cached response originally took in cache_tokens_saved, and status 'cache_hit' (or
+        'semantic_cache_hit'). Session, agent and category come from the calling context.
+        """
+        if not self.enabled:
+            return
+        try:
+            from call_categorizer import auto_categorize_llm_call
+            from telemetry_wrapper import SessionContext
+            categorization = auto_categorize_llm_call()
+            session_ctx = SessionContext.get()
+            user_id, session_id, agent_id = (
+                value if value != 'Unassigned' else None for value in (session_ctx[0], session_ctx[1], session_ctx[3])
+            )
+            if not model_name and session_ctx[7] != 'Unassigned':
+                model_name = session_ctx[7]
+            self._buffer.add((
+                datetime.now(), agent_id, None, model_name, session_id, user_id, None,
+                0, 0, 0, 0,
+                0.0, 0.0, 0.0, 0.0,
+                "semantic_cache_hit" if semantic else "cache_hit", None,
+                categorization.get('call_category'), categorization.get('call_sub_category'),
+                categorization.get('call_operation'), None, None, categorization.get('evaluation_type'),
+                categorization.get('agent_type'), categorization.get('agent_component'),
+                True, tokens_saved
+            ))
+        except Exception as e:
+            log.error(f"❌ Failed to log response cache hit: {e}", exc_info=True)
+
+    async def flush(self):
+        """Write buffered token usage rows immediately"""
+        await self._buffer.flush()
+    
     async def close(self):
         """Cleanup resources"""
         stop_cost_update_scheduler()
+        await self._buffer.close()
         await _db_pool.close()
 
 
@@ -994,6 +1273,11 @@ async def log_token_usage(**kwargs):
     await standalone_token_logger.log_token_usage(**kwargs)
 
 
+def log_cache_hit(model_name: Optional[str], tokens_saved: int, semantic: bool = False):
+    """Log an LLM call answered by the response cache"""
+    standalone_token_logger.log_cache_hit(model_name, tokens_saved, semantic=semantic)
+
+
 def calculate_cost(
     model_name: str,
     prompt_tokens: int,
@@ -1039,27 +1323,116 @@ def is_tracker_enabled() -> bool:
 # ==========================================
 # PER-REQUEST TOKEN ACCUMULATOR
 # ==========================================
-# Keyed by session_id. Because FastAPI/asyncio runs on a single event loop,
-# concurrent requests each hold their own session_id key with no locking needed.
-# The value is a list of lightweight dicts — one entry per LLM call.
+# Keyed by a per-request id, not the session id: two requests of one session (a retry,
+# a second tab, a Kafka redelivery) each get their own bucket. init_request_accumulator
+# sets the id in a contextvar, so the LLM hooks running under that request find it.
+# record_to_accumulator is reached both from the event loop
+# and from worker threads (LLM calls made via asyncio.to_thread, and the hooks
+# scheduled by _schedule_async_logging), so every access goes through a lock.
+# Buckets that are never drained (client disconnects, failed requests) expire
+# after a TTL, and the number of buckets and records per bucket is bounded.
+
+class RequestTokenAccumulator:
+    """Bounded, TTL-evicting store of per-request LLM call records."""
+
+    def __init__(self, ttl_seconds: float, max_buckets: int, max_records_per_bucket: int):
+        self.ttl_seconds = ttl_seconds
+        self.max_buckets = max_buckets
+        self.max_records_per_bucket = max_records_per_bucket
+        # request_id -> (opened_at monotonic, session_id, records); insertion order == age order
+        self._buckets: "OrderedDict[str, Tuple[float, str, List[Dict]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._expired = 0
+        self._evicted = 0
+        self._dropped_records = 0
+
+    def _evict_locked(self, now: float) -> None:
+        while self._buckets:
+            request_id, (opened_at, session_id, _) = next(iter(self._buckets.items()))
+            if now - opened_at <= self.ttl_seconds:
+                break
+            self._buckets.popitem(last=False)
+            self._expired += 1
+            log.debug(f"⌛ [TokenAccumulator] Bucket expired for request={request_id}, session={session_id}")
+        while len(self._buckets) > self.max_buckets:
+            request_id, (_, session_id, _) = self._buckets.popitem(last=False)
+            self._evicted += 1
+            log.warning(f"⚠️ [TokenAccumulator] Too many open buckets, evicted request={request_id}, session={session_id}")
+
+    def open(self, request_id: str, session_id: str) -> None:
+        now = time.monotonic()
+        with self._lock:
+            self._buckets[request_id] = (now, session_id, [])
+            self._evict_locked(now)
+
+    def record(self, request_id: str, record: Dict) -> Optional[int]:
+        """Append a record; returns the bucket's call count, or None if there is no live bucket."""
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._buckets.get(request_id)
+            if bucket is None:
+                return None
+            opened_at, _, records = bucket
+            if now - opened_at > self.ttl_seconds:
+                del self._buckets[request_id]
+                self._expired += 1
+                return None
+            if len(records) >= self.max_records_per_bucket:
+                self._dropped_records += 1
+                return len(records)
+            records.append(record)
+            return len(records)
+
+    def drain(self, request_id: str) -> List[Dict]:
+        with self._lock:
+            bucket = self._buckets.pop(request_id, None)
+            self._evict_locked(time.monotonic())
+        return bucket[2] if bucket else []
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            self._evict_locked(time.monotonic())
+            return {
+                "open_buckets": len(self._buckets),
+                "buffered_records": sum(len(records) for _, _, records in self._buckets.values()),
+                "expired_buckets": self._expired,
+                "evicted_buckets": self._evicted,
+                "dropped_records": self._dropped_records,
+                "max_buckets": self.max_buckets,
+                "ttl_seconds": int(self.ttl_seconds),
+            }
+
+
+_request_accumulator = RequestTokenAccumulator(
+    ttl_seconds=_config.accumulator_ttl_seconds,
+    max_buckets=_config.accumulator_max_buckets,
+    max_records_per_bucket=_config.accumulator_max_records,
+)
 
-_request_accumulators: Dict[str, List[Dict]] = {}
+# Accumulator bucket of the inference request running in the current context
+_current_request_id: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar(
+    "token_accumulator_request_id", default=None
+)
 
 
-def init_request_accumulator(session_id: str) -> None:
-    """Create a fresh token bucket for a new inference request.
-    Call this from the API handler before the graph starts."""
-    if session_id:
-        _request_accumulators[session_id] = []
-        log.info(f"🪣 [TokenAccumulator] Bucket opened for session={session_id}")
+def init_request_accumulator(session_id: str) -> Optional[str]:
+    """Create a fresh token bucket for a new inference request and make it the current one.
+    Call this from the API handler before the graph starts; returns the request id to drain with."""
+    if not session_id:
+        return None
+    request_id = uuid.uuid4().hex
+    _request_accumulator.open(request_id, session_id)
+    _current_request_id.set(request_id)
+    log.info(f"🪣 [TokenAccumulator] Bucket opened for request={request_id}, session={session_id}")
+    return request_id
 
 
 def record_to_accumulator(session_id: str, record: Dict) -> None:
-    """Append one LLM call's token record to the in-flight accumulator.
-    No-ops silently if the accumulator was never initialised (e.g. background tasks)."""
-    if session_id and session_id in _request_accumulators:
-        _request_accumulators[session_id].append(record)
-        call_n = len(_request_accumulators[session_id])
+    """Append one LLM call's token record to the current request's accumulator.
+    No-ops silently if no request opened one in this context (e.g. background tasks)."""
+    request_id = _current_request_id.get()
+    call_n = _request_accumulator.record(request_id, record) if request_id else None
+    if call_n is not None:
         log.info(
             f"📥 [TokenAccumulator] Call #{call_n} recorded: "
             f"model={record.get('model')}, "
@@ -1067,30 +1440,36 @@ def record_to_accumulator(session_id: str, record: Dict) -> None:
             f"completion={record.get('completion_tokens')}, "
             f"total={record.get('total_tokens')}, "
             f"category={record.get('call_category')}, "
-            f"session={session_id}"
+            f"request={request_id}, session={session_id}"
         )
     else:
         log.debug(
-            f"⏭️  [TokenAccumulator] No bucket for session={session_id} — skipping "
+            f"⏭️  [TokenAccumulator] No bucket for request={request_id}, session={session_id} — skipping "
             f"(background task or accumulator already cleared)"
         )
 
 
-def get_and_clear_accumulator(session_id: str) -> List[Dict]:
+def get_and_clear_accumulator(session_id: str, request_id: Optional[str] = None) -> List[Dict]:
     """Return every record collected for this request and remove the bucket.
-    Returns an empty list if nothing was registered."""
-    records = _request_accumulators.pop(session_id, [])
+    request_id defaults to the current context's; returns an empty list if nothing was registered."""
+    request_id = request_id or _current_request_id.get()
+    records = _request_accumulator.drain(request_id) if request_id else []
     total_tokens = sum(r.get('total_tokens', 0) for r in records)
     total_prompt = sum(r.get('prompt_tokens', 0) for r in records)
     total_completion = sum(r.get('completion_tokens', 0) for r in records)
     log.info(
-        f"📤 [TokenAccumulator] Bucket drained for session={session_id}: "
+        f"📤 [TokenAccumulator] Bucket drained for request={request_id}, session={session_id}: "
         f"{len(records)} LLM call(s), "
         f"prompt={total_prompt}, completion={total_completion}, total={total_tokens}"
     )
     return records
 
 
+def get_accumulator_stats() -> Dict[str, int]:
+    """Size and eviction counters of the per-request token accumulator."""
+    return _request_accumulator.stats()
+
+
 async def update_costs_now():
     """Manually trigger cost update from LiteLLM"""
     await _cost_service.fetch_and_update_costs_from_litellm()
@@ -1210,12 +1589,14 @@ __all__ = [
     "standalone_token_logger",
     "initialize_tracker",
     "log_token_usage",
+    "log_cache_hit",
     "calculate_cost",
     "cleanup_tracker",
     "is_tracker_enabled",
     "update_costs_now",
     "register_tracker_hooks",
     "StandaloneTokenLogger",
+    "TokenUsageBuffer",
     "TrackerConfig",
     "LLMCallCategory",
     "AgentType",
@@ -1224,4 +1605,6 @@ __all__ = [
     "init_request_accumulator",
     "record_to_accumulator",
     "get_and_clear_accumulator",
+    "get_accumulator_stats",
+    "RequestTokenAccumulator",
 ]
@@ -131,6 +131,20 @@ async def lifespan(app: FastAPI):
         asyncio.create_task(app_container.core_robustness_service.schedule_continuous_robustness_reevaluations())
         log.info("FastAPI Lifespan: Robustness evaluation task created.")
 
+        asyncio.create_task(app_container.token_usage_logs_repo.schedule_rollup_refresh())
+        log.info("FastAPI Lifespan: Token usage rollup task created.")
+
+        asyncio.create_task(app_container.chat_service.schedule_checkpoint_compaction())
+        log.info("FastAPI Lifespan: Checkpoint compaction task created.")
+
+        # One-shot migrations run on the background task supervisor, one at a time and drained on shutdown
+        from src.utils.background_tasks import background_tasks
+        await background_tasks.submit("maintenance", app_container.chat_service.migrate_chat_history_to_unified(), name="migrate_chat_history_to_unified")
+        log.info("FastAPI Lifespan: Chat history migration task submitted.")
+
+        await background_tasks.submit("maintenance", app_container.chat_service.create_chat_history_user_indexes(), name="create_chat_history_user_indexes")
+        log.info("FastAPI Lifespan: Chat history index migration task submitted.")
+
         # Log environment-specific startup information
         if IS_PRODUCTION:
             log.info("PRODUCTION MODE: Security features enabled, API documentation disabled")
@@ -170,6 +184,16 @@ async def lifespan(app: FastAPI):
 
     finally:
         log.info("FastAPI Lifespan: Shutdown initiated.")
+        # Finish queued background work (post-turn writes first, then memory updates, feedback learning,
+        # evaluation logs and migrations); LLM follow-ups still record token usage
+        from src.utils.background_tasks import background_tasks
+        await background_tasks.drain()
+        # Drain buffered token usage rows before the database pools go away
+        from litellm_standalone_tracker import cleanup_tracker
+        await cleanup_tracker()
+        # Flush queued Phoenix spans off the event loop; the exporter may be slow
+        from src.utils.phoenix_manager import phoenix_manager
+        await asyncio.to_thread(phoenix_manager.shutdown)
         await app_container.shutdown_services()
         log.info("FastAPI Lifespan: Shutdown complete.")
 
@@ -327,6 +351,12 @@ async def health_check():
             "version": version
         }
         
+        # Background work backlog (queue depth, latency per class) and post-turn step retries / failures
+        from src.utils.background_tasks import background_tasks
+        from src.utils.post_turn_persistence import post_turn_persistence
+        health_status["background_tasks"] = background_tasks.get_stats()
+        health_status["post_turn_persistence"] = post_turn_persistence.get_stats()
+
         # Check database connectivity if available
         try:
             if hasattr(app_container, 'db_manager') and app_container.db_manager:
@@ -3,9 +3,15 @@ Model Server for hosting all-MiniLM-L6-v2 and bge-reranker-large models
 """
 
 import os
+import time
+import asyncio
+import hashlib
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from contextlib import asynccontextmanager
-from typing import List, Union
-from fastapi import FastAPI, HTTPException
+from typing import Any, Callable, Dict, List, Tuple, Union
+import numpy as np
+from fastapi import FastAPI, HTTPException, Request, Response
 from pydantic import BaseModel
 import uvicorn
 from sentence_transformers import SentenceTransformer, CrossEncoder
@@ -21,6 +27,187 @@ logger = logging.getLogger(__name__)
 embedding_model = None
 cross_encoder_model = None
 
+# Micro-batching configuration
+BATCH_MAX_SIZE = int(os.getenv("MODEL_SERVER_BATCH_MAX_SIZE", "64"))
+BATCH_MAX_WAIT_MS = float(os.getenv("MODEL_SERVER_BATCH_MAX_WAIT_MS", "5"))
+EMBEDDING_CACHE_SIZE = int(os.getenv("MODEL_SERVER_EMBEDDING_CACHE_SIZE", "10000"))
+
+# Binary embeddings transport: raw little-endian float32, row-major, shape in the X-Embedding-Shape header.
+# Clients opt in through the Accept header; everyone else keeps receiving JSON.
+EMBEDDINGS_BINARY_MEDIA_TYPE = "application/x-embeddings-f32le"
+EMBEDDING_SHAPE_HEADER = "X-Embedding-Shape"
+
+# Forward passes run on a single worker thread so the event loop keeps accepting requests
+inference_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="model-inference")
+
+
+class BatchMetrics:
+    """Running counters for one micro-batching queue"""
+
+    def __init__(self):
+        self.requests = 0
+        self.items = 0
+        self.batches = 0
+        self.max_batch_size = 0
+        self.total_queue_wait_ms = 0.0
+        self.total_inference_ms = 0.0
+
+    def record_batch(self, request_count: int, item_count: int, queue_wait_ms: float, inference_ms: float):
+        self.requests += request_count
+        self.items += item_count
+        self.batches += 1
+        self.max_batch_size = max(self.max_batch_size, item_count)
+        self.total_queue_wait_ms += queue_wait_ms
+        self.total_inference_ms += inference_ms
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "requests": self.requests,
+            "items": self.items,
+            "batches": self.batches,
+            "avg_batch_size": round(self.items / self.batches, 2) if self.batches else 0.0,
+            "avg_requests_per_batch": round(self.requests / self.batches, 2) if self.batches else 0.0,
+            "max_batch_size": self.max_batch_size,
+            "avg_queue_wait_ms": round(self.total_queue_wait_ms / self.requests, 3) if self.requests else 0.0,
+            "avg_inference_ms": round(self.total_inference_ms / self.batches, 3) if self.batches else 0.0,
+        }
+
+
+class MicroBatcher:
+    """
+    Coalesces concurrent requests arriving within a short window into a single forward pass.
+
+    Each request submits a list of items; the batcher concatenates items from all queued
+    requests (up to max_batch_size, or until max_wait_ms elapses), runs process_fn once in
+    the inference executor and hands every request back its own slice of the results.
+    """
+
+    def __init__(self, name: str, process_fn: Callable[[List[Any]], List[Any]],
+                 max_batch_size: int = BATCH_MAX_SIZE, max_wait_ms: float = BATCH_MAX_WAIT_MS):
+        self.name = name
+        self.process_fn = process_fn
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max(0.0, max_wait_ms) / 1000.0
+        self.metrics = BatchMetrics()
+        self._queue: asyncio.Queue = None
+        self._worker: asyncio.Task = None
+
+    def start(self):
+        if self._worker is None:
+            self._queue = asyncio.Queue()
+            self._worker = asyncio.create_task(self._run(), name=f"{self.name}-batcher")
+
+    async def stop(self):
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+
+    async def submit(self, items: List[Any]) -> List[Any]:
+        if not items:
+            return []
+        self.start()
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((items, future, time.perf_counter()))
+        return await future
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            pending = [await self._queue.get()]
+            item_count = len(pending[0][0])
+            deadline = loop.time() + self.max_wait
+            while item_count < self.max_batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    request = await asyncio.wait_for(self._queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                pending.append(request)
+                item_count += len(request[0])
+
+            batch = [item for items, _, _ in pending for item in items]
+            started = time.perf_counter()
+            try:
+                results = await loop.run_in_executor(inference_executor, self.process_fn, batch)
+            except Exception as e:
+                for _, future, _ in pending:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            finished = time.perf_counter()
+
+            queue_wait_ms = sum((started - enqueued) * 1000 for _, _, enqueued in pending)
+            self.metrics.record_batch(len(pending), len(batch), queue_wait_ms, (finished - started) * 1000)
+
+            offset = 0
+            for items, future, _ in pending:
+                if not future.done():
+                    future.set_result(results[offset:offset + len(items)])
+                offset += len(items)
+
+
+class EmbeddingCache:
+    """LRU cache of text -> embedding keyed by the sha256 of the text"""
+
+    def __init__(self, max_size: int = EMBEDDING_CACHE_SIZE):
+        self.max_size = max_size
+        self._entries: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(text: str) -> str:
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+    def get(self, key: str):
+        embedding = self._entries.get(key)
+        if embedding is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return embedding
+
+    def put(self, key: str, embedding: np.ndarray):
+        if self.max_size <= 0:
+            return
+        self._entries[key] = embedding
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def snapshot(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+def _encode_batch(texts: List[str]) -> List[np.ndarray]:
+    # One forward pass per micro-batch, capped: a merged batch can exceed BATCH_MAX_SIZE
+    embeddings = embedding_model.encode(texts, show_progress_bar=False, batch_size=max(min(len(texts), BATCH_MAX_SIZE), 1))
+    return list(np.atleast_2d(embeddings))
+
+
+def _predict_batch(pairs: List[Tuple[str, str]]) -> List[float]:
+    scores = cross_encoder_model.predict([list(pair) for pair in pairs], show_progress_bar=False)
+    return np.atleast_1d(scores).tolist()
+
+
+embedding_batcher = MicroBatcher("embeddings", _encode_batch)
+rerank_batcher = MicroBatcher("rerank", _predict_batch)
+embedding_cache = EmbeddingCache()
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Load models on startup and cleanup on shutdown"""
@@ -37,9 +224,15 @@ async def lifespan(app: FastAPI):
     except Exception as e:
         logger.error(f"Failed to load models: {str(e)}")
         raise e
+
+    embedding_batcher.start()
+    rerank_batcher.start()
     
     yield
     logger.info("Shutting down model server...")
+    await embedding_batcher.stop()
+    await rerank_batcher.stop()
+    inference_executor.shutdown(wait=False)
 
 app = FastAPI(title="Model Server", version="1.0.0", lifespan=lifespan)
 
@@ -66,18 +259,51 @@ async def health_check():
         "cross_encoder_loaded": cross_encoder_model is not None
     }
 
+@app.get("/metrics")
+async def get_metrics():
+    return {
+        "batching": {
+            "max_batch_size": BATCH_MAX_SIZE,
+            "max_wait_ms": BATCH_MAX_WAIT_MS,
+        },
+        "embeddings": embedding_batcher.metrics.snapshot(),
+        "rerank": rerank_batcher.metrics.snapshot(),
+        "embedding_cache": embedding_cache.snapshot(),
+    }
+
 @app.post("/embeddings", response_model=EmbeddingResponse)
-async def get_embeddings(request: EmbeddingRequest):
+async def get_embeddings(request: EmbeddingRequest, http_request: Request):
     if embedding_model is None:
         raise HTTPException(status_code=500, detail="Embedding model not loaded")
     try:
         texts = request.texts if isinstance(request.texts, list) else [request.texts]
-        embeddings = embedding_model.encode(texts, show_progress_bar=False)
-        if len(embeddings.shape) == 1:
-            embeddings = [embeddings.tolist()]
-        else:
-            embeddings = embeddings.tolist()
-        return EmbeddingResponse(embeddings=embeddings)
+        keys = [EmbeddingCache.key(text) for text in texts]
+        embeddings = [embedding_cache.get(key) for key in keys]
+
+        # Duplicate texts within a request are encoded once
+        missing = OrderedDict()
+        for text, key, embedding in zip(texts, keys, embeddings):
+            if embedding is None:
+                missing.setdefault(key, text)
+        if missing:
+            computed = await embedding_batcher.submit(list(missing.values()))
+            computed_by_key = dict(zip(missing.keys(), computed))
+            for key, embedding in computed_by_key.items():
+                embedding_cache.put(key, embedding)
+            embeddings = [
+                embedding if embedding is not None else computed_by_key[key]
+                for key, embedding in zip(keys, embeddings)
+            ]
+
+        matrix = np.vstack(embeddings) if embeddings else np.empty((0, 0))
+        if EMBEDDINGS_BINARY_MEDIA_TYPE in http_request.headers.get("accept", ""):
+            payload = np.ascontiguousarray(matrix, dtype="<f4")
+            return Response(
+                content=payload.tobytes(),
+                media_type=EMBEDDINGS_BINARY_MEDIA_TYPE,
+                headers={EMBEDDING_SHAPE_HEADER: f"{payload.shape[0]},{payload.shape[1]}"}
+            )
+        return EmbeddingResponse(embeddings=matrix.tolist())
     except Exception as e:
         logger.error(f"Error generating embeddings: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Error generating embeddings: {str(e)}")
@@ -87,10 +313,8 @@ async def rerank_texts(request: RerankRequest):
     if cross_encoder_model is None:
         raise HTTPException(status_code=500, detail="Cross encoder model not loaded")
     try:
-        pairs = [[request.query, candidate] for candidate in request.candidates]
-        scores = cross_encoder_model.predict(pairs)
-        if hasattr(scores, 'tolist'):
-            scores = scores.tolist()
+        pairs = [(request.query, candidate) for candidate in request.candidates]
+        scores = await rerank_batcher.submit(pairs)
         return RerankResponse(scores=scores)
     except Exception as e:
         logger.error(f"Error in reranking: {str(e)}")
@@ -14,7 +14,7 @@ from src.database.repositories import (
     ToolRepository, ToolVersionRepository, ToolVersionRecycleBinRepository, McpToolRepository, ToolAgentMappingRepository, RecycleToolRepository, RecycleMcpToolRepository,
     AgentRepository, RecycleAgentRepository, ChatHistoryRepository,
     FeedbackLearningRepository, EvaluationDataRepository, QueryTokenUsageRepository,
-    TokenUsageLogsRepository, ModelCostsRepository,
+    TokenUsageLogsRepository, ModelCostsRepository, QueryLibraryIndexRepository,
     ToolEvaluationMetricsRepository, AgentEvaluationMetricsRepository,
     ExportAgentRepository, AgentMetadataRepository, AgentDataTableRepository, ChatStateHistoryManagerRepository,
     WorkflowRepository, WorkflowRunRepository, WorkflowStepsRepository, AgentWorkflowMappingRepository,
@@ -33,10 +33,10 @@ from src.database.services import (
     FeedbackLearningService, EvaluationService, ExportService, UserAgentAccessService,
     GroupService, GroupSecretsService, ConsistencyService, WorkflowService, VMManagementService,
     ToolGenerationCodeVersionService, ToolGenerationConversationHistoryService, KnowledgebaseService, RoleAccessService, DepartmentService,
-    TaskRegistryService
+    TaskRegistryService, CHAT_HISTORY_WRITE_UNIFIED
 )
 from src.database.core_evaluation_service import CoreEvaluationService, CoreConsistencyEvaluationService, CoreRobustnessEvaluationService
-from src.models.model_service import ModelService
+from src.models.model_service import ModelService, close_shared_http_clients
 # EXPORT:EXCLUDE:START
 from src.agent_templates import (
     ReactAgentOnboard, MultiAgentOnboard, PlannerExecutorAgentOnboard,
@@ -71,7 +71,7 @@ from telemetry_wrapper import logger as log
 
 from src.inference.inference_utils import EpisodicMemoryManager
 from src.utils.remote_model_client import RemoteSentenceTransformer as SentenceTransformer
-from src.utils.remote_model_client import get_remote_models_and_utils, ModelServerClient
+from src.utils.remote_model_client import get_remote_models_and_utils, ModelServerClient, AsyncModelServerClient
 from src.utils.kafka_manager import KafkaManager
 
 # EXPORT:EXCLUDE:START
@@ -115,6 +115,7 @@ class AppContainer:
         self.chat_history_repo: ChatHistoryRepository = None
         self.feedback_learning_repo: FeedbackLearningRepository = None
         self.query_token_usage_repo: QueryTokenUsageRepository = None
+        self.query_library_index_repo: QueryLibraryIndexRepository = None
         self.evaluation_data_repo: EvaluationDataRepository = None
         self.tool_evaluation_metrics_repo: ToolEvaluationMetricsRepository = None
         self.agent_evaluation_metrics_repo: AgentEvaluationMetricsRepository = None
@@ -318,6 +319,7 @@ class AppContainer:
         self.query_token_usage_repo = QueryTokenUsageRepository(pool=main_pool, login_pool=login_pool)
         self.token_usage_logs_repo = TokenUsageLogsRepository(pool=main_pool, login_pool=login_pool)
         self.model_costs_repo = ModelCostsRepository(pool=main_pool, login_pool=login_pool)
+        self.query_library_index_repo = QueryLibraryIndexRepository(pool=main_pool, login_pool=login_pool)
         self.evaluation_data_repo = EvaluationDataRepository(pool=logs_pool, login_pool=login_pool, agent_repo=self.agent_repo)
         self.tool_evaluation_metrics_repo = ToolEvaluationMetricsRepository(pool=logs_pool, login_pool=login_pool, agent_repo= self.agent_repo)
         self.agent_evaluation_metrics_repo = AgentEvaluationMetricsRepository(pool=logs_pool, login_pool=login_pool, agent_repo= self.agent_repo)
@@ -513,7 +515,8 @@ class AppContainer:
             cross_encoder = None,
             tool_repo=self.tool_repo,
             agent_repo = self.agent_repo,
-            authorization_service=self.authorization_service
+            authorization_service=self.authorization_service,
+            query_library_index_repo=self.query_library_index_repo
         )
         self.feedback_learning_service = FeedbackLearningService(
             feedback_learning_repo=self.feedback_learning_repo,
@@ -770,10 +773,13 @@ class AppContainer:
         await self.mcp_tool_repo.create_table_if_not_exists()
         await self.agent_repo.create_table_if_not_exists()
         await self.chat_history_repo.create_agent_conversation_summary_table()
+        if CHAT_HISTORY_WRITE_UNIFIED:
+            await self.chat_history_repo.create_unified_chat_history_table()
         await self.feedback_learning_repo.create_tables_if_not_exists()
         await self.query_token_usage_repo.create_table_if_not_exists()
         await self.token_usage_logs_repo.create_table_if_not_exists()
         await self.model_costs_repo.create_table_if_not_exists()
+        await self.query_library_index_repo.create_table_if_not_exists()
         await self.evaluation_service.create_evaluation_tables_if_not_exists()
         await self.consistency_service.create_evaluation_table_if_not_exists()
         await self.multi_db_connection_repo.create_db_connections_table_if_not_exists() # Create multi-DB connections table
@@ -875,6 +881,9 @@ class AppContainer:
         if self.chat_service and self.chat_service.gadk_session_service:
             self.chat_service.gadk_session_service.db_engine.dispose(close=True)
             log.info("AppContainer: Google ADK database connections closed.")
+        await AsyncModelServerClient.close_all()
+        await close_shared_http_clients()
+        await ChatHistoryRepository.close_shared_checkpointer()
 
         log.info("AppContainer: Shutdown complete. Database connections closed.")
 
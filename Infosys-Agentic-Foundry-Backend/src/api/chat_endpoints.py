@@ -21,7 +21,7 @@ util = RemoteSentenceTransformersUtil()
 from src.auth.authorization_service import AuthorizationService
 from src.database.redis_postgres_manager import RedisPostgresManager, TimedRedisPostgresManager, create_manager_from_env, create_timed_manager_from_env
 
-from src.schemas import AgentInferenceRequest, ChatSessionRequest, OldChatSessionsRequest, StoreExampleRequest, StoreExampleResponse, M2MInferenceRequest
+from src.schemas import AgentInferenceRequest, ChatSessionRequest, OldChatSessionsRequest, OldChatPageRequest, StoreExampleRequest, StoreExampleResponse, M2MInferenceRequest
 
 from src.database.services import ChatService, FeedbackLearningService, WorkflowService, TaskRegistryService
 from src.database.repositories import QueryTokenUsageRepository
@@ -33,6 +33,8 @@ from src.auth.dependencies import get_current_user, get_user_info_from_request,
 from src.decorators.tool_access import ToolUserContext
 from src.utils.file_manager import FileManager
 from src.utils.kafka_manager import KafkaManager
+from src.utils.post_turn_persistence import post_turn_persistence
+from src.utils.background_tasks import background_tasks
 
 from src.utils.secrets_handler import current_user_department, current_user_email
 
@@ -68,56 +70,123 @@ async def get_global_manager():
             _global_manager = None
     return _global_manager
 
-async def save_feedback_and_logs(
+async def save_plan_feedback(
     inference_request: AgentInferenceRequest,
     final_response: dict,
     feedback_learning_service: FeedbackLearningService,
+    session_id: str,
+    department_name: str = None
+) -> bool:
+    """
+    Saves the plan verifier feedback of a turn for future learnings.
+    Returns False while nothing was stored, so the post-turn persistence stage retries it.
+    """
+    current_plan = "\n".join(i for i in final_response.get("plan", []))
+    old_plan = "\n".join(i for i in (inference_request.prev_response or {}).get("plan", []))
+
+    result = await feedback_learning_service.save_feedback(
+        agent_id=inference_request.agentic_application_id,
+        query=inference_request.query,
+        old_final_response=old_plan,
+        old_steps="", # Adjust based on actual data availability
+        new_final_response=current_plan,
+        feedback=inference_request.plan_feedback, 
+        new_steps="",
+        lesson="",
+        department_name=department_name
+    )
+    # A feedback row that was stored but not mapped is not retried, that would duplicate it
+    if result.get("response_id") is None:
+        return False
+    log.info(f"[{session_id}] Data saved for future learnings.")
+    return True
+
+async def submit_post_turn_writes(
+    inference_request: AgentInferenceRequest,
+    final_response: dict,
+    last_message: dict,
+    inference_service: CentralizedAgentInference,
+    feedback_learning_service: FeedbackLearningService,
     chat_service: ChatService,
+    query_token_usage_repo: QueryTokenUsageRepository,
     session_id: str,
-    time_taken: float,
+    user_email: str,
+    start_time: float,
+    start_time_stamp: datetime,
     is_streaming: bool = False,
-    department_name: str = None
-):
+    department_name: str = None,
+    token_request_id: str = None
+) -> float:
     """
-    Helper function to handle post-inference logic:
-    1. Saving Plan/Verifier Feedback
-    2. Updating Chat History Response Time
+    Hands all post-inference writes of a turn to the post-turn persistence stage as one job:
+    feedback / chat history response time, response-time and token-usage entries in the
+    checkpoint (or chat state for python-based agents) and the per-query token usage row.
+    Fills response_time / token_usage into last_message for the response and returns the response time.
     """
-    # 1. Handle Feedback / Verifier Data
-    if inference_request.plan_verifier_flag:
-        try:
-            # Adjust extraction logic based on whether response is a dict or accumulated chunks
-            # For this example, assuming final_response follows the standard dictionary structure
-            if isinstance(final_response, dict) and "plan" in final_response:
-                current_plan = "\n".join(i for i in final_response.get("plan", []))
-                old_plan = "\n".join(i for i in inference_request.prev_response.get("plan", []))
-                
-                await feedback_learning_service.save_feedback(
-                    agent_id=inference_request.agentic_application_id,
-                    query=inference_request.query,
-                    old_final_response=old_plan,
-                    old_steps="", # Adjust based on actual data availability
-                    new_final_response=current_plan,
-                    feedback=inference_request.plan_feedback, 
-                    new_steps="",
-                    lesson="",
-                    department_name=department_name
-                )
-                log.info(f"[{session_id}] Data saved for future learnings.")
-        except Exception as e:
-            log.warning(f"[{session_id}] Could not save data for future learnings: {e}")
+    response_time = time.monotonic() - start_time
+    agent_id = inference_request.agentic_application_id
+    from litellm_standalone_tracker import get_and_clear_accumulator
+    token_records = get_and_clear_accumulator(session_id, request_id=token_request_id)
+
+    steps = []
+    if inference_request.plan_verifier_flag and isinstance(final_response, dict) and "plan" in final_response:
+        steps.append(("save_plan_feedback", lambda: save_plan_feedback(
+            inference_request=inference_request,
+            final_response=final_response,
+            feedback_learning_service=feedback_learning_service,
+            session_id=session_id,
+            department_name=department_name
+        )))
+    if not await chat_service.is_python_based_agent(agent_id):
+        steps.append(("update_latest_response_time", lambda: chat_service.update_latest_response_time(
+            agentic_application_id=agent_id,
+            session_id=session_id,
+            response_time=response_time
+        )))
+        steps.append(("update_turn_metadata_in_graph", lambda: inference_service.update_turn_metadata_in_graph(
+            agent_id=agent_id,
+            session_id=session_id,
+            response_time=response_time,
+            time_stamp=start_time_stamp,
+            token_records=token_records,
+        )))
+    else:
+        response_time_details = {
+            "response_time": response_time,
+            "start_timestamp": start_time_stamp.isoformat()
+        }
+        if is_streaming:
+            response_time_details = {"response_time_details": response_time_details}
 
-    # 2. Update Chat History Response Time
-    try:
-        if not await chat_service.is_python_based_agent(inference_request.agentic_application_id):
-            await chat_service.update_latest_response_time(
-                agentic_application_id=inference_request.agentic_application_id,
-                session_id=session_id,
-                response_time=time_taken
-            )
-            log.info(f"[{session_id}] Updated chat history response time: {time_taken:.2f}s")
-    except Exception as e:
-        log.warning(f"[{session_id}] Could not update response time in chat history: {e}")
+        async def add_response_time_to_chat_state():
+            thread_id = await chat_service._get_thread_id(agent_id, session_id)
+            await inference_service.hybrid_agent_inference._add_additional_data_to_final_response(response_time_details, thread_id=thread_id)
+
+        steps.append(("add_response_time_to_chat_state", add_response_time_to_chat_state))
+
+    if token_records:
+        steps.append(("query_token_usage_insert", lambda: query_token_usage_repo.insert(
+            session_id=session_id,
+            user_id=user_email,
+            agent_id=agent_id,
+            agent_name=token_records[0].get("agent_name"),
+            query=inference_request.query,
+            token_records=token_records,
+        )))
+        if last_message:
+            last_message["token_usage"] = {
+                "prompt_tokens":     sum(r.get("prompt_tokens", 0)     for r in token_records),
+                "completion_tokens": sum(r.get("completion_tokens", 0) for r in token_records),
+                "total_tokens":      sum(r.get("total_tokens", 0)      for r in token_records),
+                "cached_tokens":     sum(r.get("cached_tokens", 0)     for r in token_records),
+                "total_cost":        sum(r.get("total_cost", 0.0)      for r in token_records),
+                "llm_calls":         token_records,
+            }
+
+    await post_turn_persistence.submit(session_id, steps)
+    if last_message:
+        last_message["response_time"] = response_time
+    return response_time
 
 @router.post("/m2m_inference")
 async def m2m_inference_endpoint(
@@ -613,6 +682,9 @@ async def run_agent_inference_endpoint(
             detail=f"Access denied. User does not have execute permission for agents in department '{user_department}'."
         )
     
+    # Let the previous turn of this session finish persisting before it is read back
+    await post_turn_persistence.wait_for_session(inference_request.session_id)
+
     start_time = time.monotonic()
     start_time_stamp = datetime.now(timezone.utc).replace(tzinfo=None)
     
@@ -625,7 +697,7 @@ async def run_agent_inference_endpoint(
     # Open a fresh per-request token accumulator so every LLM hook call during
     # this inference can append its record — enabling per-query token totals.
     from litellm_standalone_tracker import init_request_accumulator
-    init_request_accumulator(session_id)
+    token_request_id = init_request_accumulator(session_id)
 
     #message queue
     message_queue = inference_request.message_queue
@@ -941,79 +1013,23 @@ async def run_agent_inference_endpoint(
                 if "executor_messages" in full_accumulated_response and isinstance(full_accumulated_response["executor_messages"], list) and full_accumulated_response["executor_messages"]:
                     last_message = full_accumulated_response["executor_messages"][-1]
                     last_message["start_timestamp"] = start_time_stamp.isoformat()
-                # Run background logic (Feedback, DB updates)
-                # We await here to ensure it completes before the connection fully closes
-                await save_feedback_and_logs(
+                # Post-turn writes (feedback, checkpoint metadata, token usage) run in the background persistence stage
+                await submit_post_turn_writes(
                     inference_request=inference_request,
                     final_response=full_accumulated_response,
+                    last_message=last_message,
+                    inference_service=inference_service,
                     feedback_learning_service=feedback_learning_service,
                     chat_service=chat_service,
+                    query_token_usage_repo=query_token_usage_repo,
                     session_id=session_id,
-                    time_taken=time_taken,
+                    user_email=user_data.email,
+                    start_time=start_time,
+                    start_time_stamp=start_time_stamp,
                     is_streaming=True,
-                    department_name=user_department
+                    department_name=user_department,
+                    token_request_id=token_request_id
                 )
-                if chat_service and not await chat_service.is_python_based_agent(inference_request.agentic_application_id):
-                    response_time = await inference_service.update_response_time(agent_id=inference_request.agentic_application_id, session_id=session_id, start_time=start_time, time_stamp=start_time_stamp)
-                    # Inject per-query token totals into the same checkpoint
-                    from litellm_standalone_tracker import get_and_clear_accumulator
-                    token_records = get_and_clear_accumulator(session_id)
-                    if token_records and last_message:
-                        agent_name = token_records[0].get("agent_name") if token_records else None
-                        await inference_service.update_token_usage_in_graph(
-                            agent_id=inference_request.agentic_application_id,
-                            session_id=session_id,
-                            token_records=token_records,
-                        )
-                        last_message["token_usage"] = {
-                            "prompt_tokens":     sum(r.get("prompt_tokens", 0)     for r in token_records),
-                            "completion_tokens": sum(r.get("completion_tokens", 0) for r in token_records),
-                            "total_tokens":      sum(r.get("total_tokens", 0)      for r in token_records),
-                            "cached_tokens":     sum(r.get("cached_tokens", 0)     for r in token_records),
-                            "total_cost":        sum(r.get("total_cost", 0.0)      for r in token_records),
-                            "llm_calls":         token_records,
-                        }
-                        asyncio.create_task(query_token_usage_repo.insert(
-                            session_id=session_id,
-                            user_id=user_data.email,
-                            agent_id=inference_request.agentic_application_id,
-                            agent_name=agent_name,
-                            query=inference_request.query,
-                            token_records=token_records,
-                        ))
-                else:
-                    response_time = time.monotonic() - start_time
-                    response_time_details = {
-                        "response_time_details":{
-                            "response_time": response_time,
-                            "start_timestamp": start_time_stamp.isoformat()
-                        }
-                    }
-                    thread_id = await chat_service._get_thread_id(inference_request.agentic_application_id, session_id)
-                    await inference_service.hybrid_agent_inference._add_additional_data_to_final_response(response_time_details, thread_id=thread_id)
-                    # Drain accumulator and persist per-query token usage for python-based agents
-                    from litellm_standalone_tracker import get_and_clear_accumulator
-                    token_records = get_and_clear_accumulator(session_id)
-                    if token_records and last_message:
-                        agent_name = token_records[0].get("agent_name") if token_records else None
-                        last_message["token_usage"] = {
-                            "prompt_tokens":     sum(r.get("prompt_tokens", 0)     for r in token_records),
-                            "completion_tokens": sum(r.get("completion_tokens", 0) for r in token_records),
-                            "total_tokens":      sum(r.get("total_tokens", 0)      for r in token_records),
-                            "cached_tokens":     sum(r.get("cached_tokens", 0)     for r in token_records),
-                            "total_cost":        sum(r.get("total_cost", 0.0)      for r in token_records),
-                            "llm_calls":         token_records,
-                        }
-                        asyncio.create_task(query_token_usage_repo.insert(
-                            session_id=session_id,
-                            user_id=user_data.email,
-                            agent_id=inference_request.agentic_application_id,
-                            agent_name=agent_name,
-                            query=inference_request.query,
-                            token_records=token_records,
-                        ))
-                if last_message:
-                    last_message["response_time"] = response_time
                 yield json.dumps(jsonable_encoder(full_accumulated_response))
         return StreamingResponse(stream_generator(), media_type="application/json")
 
@@ -1039,8 +1055,6 @@ async def run_agent_inference_endpoint(
 
         try:
             response = await new_task
-            end_time = time.monotonic()
-            time_taken = end_time - start_time
 
             # Inject Response Time into the last message payload only if not already set
             # (Historical messages should already have response_time from the base class)
@@ -1049,76 +1063,23 @@ async def run_agent_inference_endpoint(
                 last_message = response["executor_messages"][-1]
                 last_message["start_timestamp"] = start_time_stamp.isoformat()
 
-            # Run Post-Processing
-            await save_feedback_and_logs(
+            # Post-turn writes (feedback, checkpoint metadata, token usage) run in the background persistence stage
+            await submit_post_turn_writes(
                 inference_request=inference_request,
                 final_response=response,
+                last_message=last_message,
+                inference_service=inference_service,
                 feedback_learning_service=feedback_learning_service,
                 chat_service=chat_service,
+                query_token_usage_repo=query_token_usage_repo,
                 session_id=session_id,
-                time_taken=time_taken,
+                user_email=user_data.email,
+                start_time=start_time,
+                start_time_stamp=start_time_stamp,
                 is_streaming=False,
-                department_name=user_department
+                department_name=user_department,
+                token_request_id=token_request_id
             )
-            if chat_service and not await chat_service.is_python_based_agent(inference_request.agentic_application_id):
-                response_time = await inference_service.update_response_time(agent_id=inference_request.agentic_application_id, session_id=session_id, start_time=start_time, time_stamp=start_time_stamp)
-                # Inject per-query token totals into the same checkpoint
-                from litellm_standalone_tracker import get_and_clear_accumulator
-                token_records = get_and_clear_accumulator(session_id)
-                if token_records:
-                    agent_name = token_records[0].get("agent_name") if token_records else None
-                    await inference_service.update_token_usage_in_graph(
-                        agent_id=inference_request.agentic_application_id,
-                        session_id=session_id,
-                        token_records=token_records,
-                    )
-                    last_message["token_usage"] = {
-                        "prompt_tokens":     sum(r.get("prompt_tokens", 0)     for r in token_records),
-                        "completion_tokens": sum(r.get("completion_tokens", 0) for r in token_records),
-                        "total_tokens":      sum(r.get("total_tokens", 0)      for r in token_records),
-                        "cached_tokens":     sum(r.get("cached_tokens", 0)     for r in token_records),
-                        "total_cost":        sum(r.get("total_cost", 0.0)      for r in token_records),
-                        "llm_calls":         token_records,
-                    }
-                    asyncio.create_task(query_token_usage_repo.insert(
-                        session_id=session_id,
-                        user_id=user_data.email,
-                        agent_id=inference_request.agentic_application_id,
-                        agent_name=agent_name,
-                        query=inference_request.query,
-                        token_records=token_records,
-                    ))
-            else:
-                response_time = time.monotonic() - start_time
-                response_time_details = {
-                    "response_time": response_time,
-                    "start_timestamp": start_time_stamp.isoformat()
-                }
-                thread_id = await chat_service._get_thread_id(inference_request.agentic_application_id, session_id)
-                await inference_service.hybrid_agent_inference._add_additional_data_to_final_response(response_time_details, thread_id=thread_id)
-                # Drain accumulator and persist per-query token usage for python-based agents
-                from litellm_standalone_tracker import get_and_clear_accumulator
-                token_records = get_and_clear_accumulator(session_id)
-                if token_records:
-                    agent_name = token_records[0].get("agent_name") if token_records else None
-                    last_message["token_usage"] = {
-                        "prompt_tokens":     sum(r.get("prompt_tokens", 0)     for r in token_records),
-                        "completion_tokens": sum(r.get("completion_tokens", 0) for r in token_records),
-                        "total_tokens":      sum(r.get("total_tokens", 0)      for r in token_records),
-                        "cached_tokens":     sum(r.get("cached_tokens", 0)     for r in token_records),
-                        "total_cost":        sum(r.get("total_cost", 0.0)      for r in token_records),
-                        "llm_calls":         token_records,
-                    }
-                    asyncio.create_task(query_token_usage_repo.insert(
-                        session_id=session_id,
-                        user_id=user_data.email,
-                        agent_id=inference_request.agentic_application_id,
-                        agent_name=agent_name,
-                        query=inference_request.query,
-                        token_records=token_records,
-                    ))
-                    
-            last_message["response_time"] = response_time
             return response
 
         except asyncio.CancelledError:
@@ -1201,6 +1162,9 @@ async def send_feedback_endpoint(
     user_session = request.cookies.get("user_session")
     update_session_context(user_session=user_session, user_id=user_id)
 
+    # Like / regenerate / feedback act on the previous turn, so it has to be persisted first
+    await post_turn_persistence.wait_for_session(inference_request.session_id)
+
     if feedback_type == "like":
         # Call ChatService to handle like/unlike
         result = await chat_service.handle_like_feedback_message(
@@ -1275,7 +1239,7 @@ async def send_feedback_endpoint(
                 **Example format:** "When a user mentions [trigger word/pattern], always [specific action] before [main task]."
                 """
             if feedback_type!="regenerate":
-                asyncio.create_task(
+                await background_tasks.submit("feedback",
                     process_feedback_in_background(
                         llm, feedback_prompt, feedback_learning_service,
                         inference_request.agentic_application_id, original_query,
@@ -1336,6 +1300,7 @@ async def get_chat_history_endpoint(
         log.warning(f"Error fetching workflow history, falling back to agent history: {e}")
 
     # Fall back to regular chat history
+    await post_turn_persistence.wait_for_session(chat_session_request.session_id)
     history = await chat_service.get_chat_history_from_short_term_memory(
         agentic_application_id=chat_session_request.agent_id,
         session_id=chat_session_request.session_id,
@@ -1441,6 +1406,76 @@ async def get_old_conversations_endpoint(
     return JSONResponse(content=jsonable_encoder(result))
 
 
+@router.post("/get/old-conversations/page")
+async def get_old_conversations_page_endpoint(
+    request: Request,
+    page_request: OldChatPageRequest,
+    chat_service: ChatService = Depends(ServiceProvider.get_chat_service)
+):
+    """
+    API endpoint to retrieve one page of old chat records for a specific user and agent, newest first.
+
+    Parameters:
+    - request: The FastAPI Request object.
+    - page_request: Pydantic model containing user_email, agent_id, page_size and the cursor of the previous page.
+    - chat_service: Dependency-injected ChatService instance.
+
+    Returns:
+    - JSONResponse: 'sessions' (records of this page grouped by session ID) and 'next_cursor' (None on the last page).
+    """
+    user_id = request.cookies.get("user_id")
+    user_session = request.cookies.get("user_session")
+    update_session_context(user_session=user_session, user_id=user_id)
+
+    try:
+        result = await chat_service.get_old_chats_page_by_user_and_agent(
+            user_email=page_request.user_email,
+            agent_id=page_request.agent_id,
+            framework_type=page_request.framework_type,
+            page_size=page_request.page_size,
+            cursor=page_request.cursor
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    return JSONResponse(content=jsonable_encoder(result))
+
+
+@router.post("/get/old-conversation-sessions")
+async def get_old_conversation_sessions_endpoint(
+    request: Request,
+    page_request: OldChatPageRequest,
+    chat_service: ChatService = Depends(ServiceProvider.get_chat_service)
+):
+    """
+    API endpoint to list the chat sessions of a specific user and agent, most recently active first, one page at a time.
+
+    Parameters:
+    - request: The FastAPI Request object.
+    - page_request: Pydantic model containing user_email, agent_id, page_size and the cursor of the previous page.
+    - chat_service: Dependency-injected ChatService instance.
+
+    Returns:
+    - JSONResponse: 'sessions' (session_id, last_activity, last_user_input) and 'next_cursor' (None on the last page).
+    """
+    user_id = request.cookies.get("user_id")
+    user_session = request.cookies.get("user_session")
+    update_session_context(user_session=user_session, user_id=user_id)
+
+    try:
+        result = await chat_service.get_old_chat_sessions_by_user_and_agent(
+            user_email=page_request.user_email,
+            agent_id=page_request.agent_id,
+            framework_type=page_request.framework_type,
+            page_size=page_request.page_size,
+            cursor=page_request.cursor
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    return JSONResponse(content=jsonable_encoder(result))
+
+
 @router.get("/get/new-session-id")
 async def create_new_session_endpoint(request: Request, chat_service: ChatService = Depends(ServiceProvider.get_chat_service)) -> str:
     """
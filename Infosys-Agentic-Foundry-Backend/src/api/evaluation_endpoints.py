@@ -23,7 +23,6 @@ from src.inference import CentralizedAgentInference
 from src.api.dependencies import ServiceProvider # Dependency provider
 
 from groundtruth import evaluate_ground_truth_file
-from phoenix.otel import register
 from telemetry_wrapper import logger as log, update_session_context
 from src.utils.phoenix_manager import ensure_project_registered, traced_project_context
 
@@ -252,7 +251,7 @@ async def process_unprocessed_evaluations_endpoint(
     user = current_user  # Use current_user instead of get_user_info_from_request for consistency
     update_session_context(user_session=user_session, user_id=user_id)
 
-    register(
+    ensure_project_registered(
         project_name='evaluation-metrics',
         auto_instrument=True,
         set_global_tracer_provider=False,
@@ -7,6 +7,11 @@ GET /token-usage/export
 
 Returns a multi-sheet Excel workbook (.xlsx) as a downloadable attachment.
 
+GET /token-usage/summary
+    Same filters; returns aggregate KPIs and daily / model / category / agent
+    breakdowns as JSON, served from the hourly rollups plus the un-rolled tail,
+    together with this process's LLM response-cache hit rate and tokens saved.
+
 Sheets
 ------
 1. Summary            – aggregate KPIs (total tokens, total cost, call counts …)
@@ -32,6 +37,8 @@ from openpyxl.utils import get_column_letter
 
 from src.database.repositories import QueryTokenUsageRepository, TokenUsageLogsRepository
 from src.api.dependencies import ServiceProvider
+from src.models.llm_response_cache import LLM_RESPONSE_CACHE_ENABLED
+from litellm_standalone_tracker import get_accumulator_stats
 from src.auth.dependencies import get_current_user
 from src.auth.models import User
 from telemetry_wrapper import logger as log
@@ -489,6 +496,49 @@ def _build_cost_by_category_sheet(ws, log_rows: List[Dict], query_rows: List[Dic
 # Endpoint
 # ─────────────────────────────────────────────────────────────────────────────
 
+@router.get(
+    "/summary",
+    summary="Aggregated token-usage & cost figures for dashboards",
+)
+async def get_token_usage_summary(
+    user_id: Optional[str]   = Query(None, description="Filter by user e-mail"),
+    agent_id: Optional[str]  = Query(None, description="Filter by agent ID"),
+    agent_name: Optional[str] = Query(None, description="Filter by agent name (partial match)"),
+    date_from: Optional[date] = Query(None, description="Start date  (YYYY-MM-DD)"),
+    date_to: Optional[date]   = Query(None, description="End date    (YYYY-MM-DD)"),
+    model: Optional[str]      = Query(None, description="Filter by model name (partial match)"),
+    user_data: User = Depends(get_current_user),
+    token_usage_logs_repo: TokenUsageLogsRepository = Depends(ServiceProvider.get_token_usage_logs_repo),
+):
+    """
+    Return totals plus daily, per-model, per-category and per-agent breakdowns.
+
+    Figures come from the pre-aggregated hourly rollups merged with the raw
+    token_usage_logs rows that have not been rolled up yet, so response time
+    does not grow with the size of the usage history.
+    """
+    dt_from = datetime(date_from.year, date_from.month, date_from.day) if date_from else None
+    dt_to   = datetime(date_to.year,   date_to.month,   date_to.day,
+                       23, 59, 59) if date_to else None
+
+    log.info(
+        f"[TokenUsageSummary] Request by {user_data.email} | "
+        f"filters: user_id={user_id}, agent_id={agent_id}, agent_name={agent_name}, "
+        f"date_from={date_from}, date_to={date_to}, model={model}"
+    )
+    report = await token_usage_logs_repo.get_aggregated_report(
+        user_id=user_id,
+        agent_id=agent_id,
+        agent_name=agent_name,
+        date_from=dt_from,
+        date_to=dt_to,
+        model=model,
+    )
+    report["llm_response_cache"]["enabled"] = LLM_RESPONSE_CACHE_ENABLED
+    report["request_token_accumulator"] = get_accumulator_stats()
+    return report
+
+
 @router.get(
     "/export",
     summary="Download token-usage & cost report as Excel",
@@ -46,7 +46,6 @@ from src.config.constants import DatabaseName
 from src.decorators.tool_access import resource_access, require_role, authorized_tool, current_tool_user, get_tool_user_context, ToolUserContext
 
 
-from phoenix.otel import register
 from telemetry_wrapper import logger as log, update_session_context
 from src.utils.phoenix_manager import ensure_project_registered, traced_project_context_sync
 
@@ -679,7 +678,7 @@ async def add_tool_endpoint(
         user_session=user_session,
         user_id=user_id
     )
-    register(
+    ensure_project_registered(
             project_name='add-tool',
             auto_instrument=True,
             set_global_tracer_provider=False,
@@ -780,7 +779,7 @@ async def add_tool_with_file_endpoint(
         user_session=user_session,
         user_id=user_id
     )
-    register(
+    ensure_project_registered(
             project_name='add-tool',
             auto_instrument=True,
             set_global_tracer_provider=False,
@@ -889,7 +888,7 @@ async def add_tool_message_queue_endpoint(
         user_id=user_id
     )
     
-    register(
+    ensure_project_registered(
             project_name='add-tool-message-queue',
             auto_instrument=True,
             set_global_tracer_provider=False,
@@ -1385,7 +1384,7 @@ async def update_tool_endpoint(request: Request, tool_id: str, update_request: U
     
     update_session_context(tool_id=tool_id, tags=update_request.updated_tag_id_list, model_used=update_request.model_name,
                             action_type='update', action_on='tool', previous_value=previous_value, user_session=user_session, user_id=user_id)
-    register(
+    ensure_project_registered(
             project_name='update-tool',
             auto_instrument=True,
             set_global_tracer_provider=False,
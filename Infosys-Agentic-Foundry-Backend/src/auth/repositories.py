@@ -2561,6 +2561,14 @@ class DepartmentRepository:
                         except Exception as e:
                             log.warning(f"Could not drop chat table '{safe_table_name}': {e}")
                     deletion_stats['dynamic_chat_tables'] = str(dropped_chat_tables)
+
+                    # Same agents' rows in the unified chat history table (if it has been created)
+                    if agent_id_list and await conn.fetchval("SELECT to_regclass($1) IS NOT NULL", TableNames.CHAT_HISTORY.value):
+                        result = await conn.execute(
+                            f"DELETE FROM {TableNames.CHAT_HISTORY.value} WHERE agentic_application_id = ANY($1::text[])",
+                            agent_id_list
+                        )
+                        deletion_stats['chat_history'] = result.split()[-1] if result else '0'
             
             # 3. DELETE FROM RECYCLE DATABASE
             if recycle_pool:
@@ -17,6 +17,8 @@ class Limits:
     LANGGRAPH_LONG_TERM_MEMORY_LIMIT: Final[int] = 8
     LANGGRAPH_EXECUTOR_MESSAGES_LIMIT: Final[int] = 30
     PYTHON_BASED_AGENT_CHAT_HISTORY_LOOKBACK: Final[Optional[int]] = 30
+    OLD_CHATS_DEFAULT_PAGE_SIZE: Final[int] = 20
+    OLD_CHATS_MAX_PAGE_SIZE: Final[int] = 100
     # Cache TTL for admin config service (seconds)
     ADMIN_CONFIG_CACHE_TTL_SECONDS: Final[int] = 60
     # Configurable Epochs Limit
@@ -245,6 +247,10 @@ class AgentType(StrEnum):
 # Table Names
 # ============================================================================
 
+# Chat session ids are '<user_email>_<uuid>'; this extracts the email (chat_history.user_email)
+CHAT_SESSION_USER_EMAIL_REGEX: Final[str] = r'^([a-zA-Z0-9_.+-]+@[a-zA-Z0-9-]+\.[a-zA-Z0-9.-]+)_'
+
+
 class TableNames(StrEnum):
     # Tags
     TAG = "tags_table"
@@ -271,6 +277,9 @@ class TableNames(StrEnum):
     RECYCLE_CHECKPOINTS = "recycle_checkpoints"
     RECYCLE_CHECKPOINT_BLOBS = "recycle_checkpoint_blobs"
     RECYCLE_CHECKPOINT_WRITES = "recycle_checkpoint_writes"
+    # Unified long-term chat history (replaces the per-agent table_<agent_id> tables)
+    CHAT_HISTORY = "chat_history"
+    CHAT_HISTORY_MIGRATION = "chat_history_migration"
     # Feedback Learning
     FEEDBACK_LEARNING = "feedback_response"
     AGENT_FEEDBACK = "agent_feedback"
@@ -311,7 +320,11 @@ class TableNames(StrEnum):
     QUERY_TOKEN_USAGE = "query_token_usage"
     # Standalone LiteLLM token usage logs and model cost lookup
     TOKEN_USAGE_LOGS = "token_usage_logs"
+    TOKEN_USAGE_HOURLY_ROLLUPS = "token_usage_hourly_rollups"
+    TOKEN_USAGE_ROLLUP_STATE = "token_usage_rollup_state"
     MODEL_COSTS = "model_costs"
+    # Near-duplicate index behind the query library (auto-suggest queries)
+    QUERY_LIBRARY_INDEX = "query_library_index"
 
 
 # ============================================================================
@@ -5,6 +5,7 @@ from datetime import datetime, timezone
 from src.config.constants import TableNames
 from src.database.repositories import BaseRepository
 from src.schemas.admin_config_schemas import AdminConfigLimits
+from src.utils.cache_utils import single_flight, forget_in_flight
 from telemetry_wrapper import logger as log
 
 
@@ -95,8 +96,9 @@ class AdminConfigRepository(BaseRepository):
             log.error(f"Error creating table '{self.table_name}': {e}")
             raise
 
+    @single_flight(namespace="AdminConfigRepository")
     async def get_config(self) -> Optional[Dict[str, Any]]:
-        """Retrieves the current admin configuration."""
+        """Retrieves the current admin configuration; concurrent refreshes share one query."""
         query = f"SELECT * FROM {self.table_name} WHERE config_key = $1"
         try:
             async with self.pool.acquire() as conn:
@@ -151,6 +153,7 @@ class AdminConfigRepository(BaseRepository):
             async with self.pool.acquire() as conn:
                 result = await conn.execute(query, *values)
                 success = result == "UPDATE 1"
+                forget_in_flight("AdminConfigRepository", "get_config")
                 if success:
                     log.info(f"Admin config updated by {updated_by}: {updates}")
                 return success
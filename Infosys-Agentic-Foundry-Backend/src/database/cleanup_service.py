@@ -25,7 +25,7 @@ from collections import defaultdict
 from dataclasses import dataclass, field
 
 from src.config.application_config import app_config
-from src.config.constants import DatabaseName
+from src.config.constants import DatabaseName, TableNames
 from telemetry_wrapper import logger as log
 
 try:
@@ -1417,6 +1417,11 @@ class CleanupService:
                     self.stats["related_cleanup"]["ltm_tables"] += 1
                 except:
                     pass
+            try:
+                if await self.conn.fetchval("SELECT to_regclass($1) IS NOT NULL", TableNames.CHAT_HISTORY.value):
+                    await self.conn.execute(f"DELETE FROM {TableNames.CHAT_HISTORY.value} WHERE agentic_application_id = $1", agent_id)
+            except:
+                pass
             
             # Delete the agent
             await self.conn.execute(
@@ -40,6 +40,7 @@ from src.database.services import EvaluationService, ConsistencyService
 from src.models.model_service import ModelService, global_model_service
 from src.config.constants import AgentType
 from telemetry_wrapper import logger as log
+from call_categorizer import categorize_as
 from src.schemas import AgentInferenceRequest
 from src.schemas import AgentInferenceRequest
 
@@ -62,6 +63,7 @@ class CoreEvaluationService:
             self.model_service = model_service
 
 
+    @categorize_as("evaluation", evaluation_type="response_quality")
     async def _evaluate_agent_performance(
         self,
         llm,
@@ -204,6 +206,7 @@ class CoreEvaluationService:
         log.info("Agent evaluation completed successfully.")
         return scores, justifications
 
+    @categorize_as("evaluation", evaluation_type="metric_calculation")
     async def _tool_utilization_efficiency(
         self,
         llm,
@@ -312,6 +315,7 @@ class CoreEvaluationService:
             return {"error": f"Failed to process tool evaluation: {e}"}
 
 
+    @categorize_as("evaluation", evaluation_type="response_quality")
     async def is_meaningful_interaction(self, query, response, llm) -> bool:
         prompt = f"""
     You are a conversation filter agent. Your task is to check if a given user query and the corresponding agent response represent a meaningful and substantive interaction that should be evaluated.
@@ -382,7 +386,7 @@ class CoreEvaluationService:
             
             # Determine which LLM to use for evaluation based on the agent's model
             eval_llm_model_name = model2 if data['model_used'] == model1 else model1
-            eval_llm = await self.model_service.get_llm_model(model_name=eval_llm_model_name, temperature=0.0)
+            eval_llm = await self.model_service.get_llm_model(model_name=eval_llm_model_name, temperature=0.0, cache_responses=True)
             
             try:
                 # [SUCCESS] Check if interaction is meaningful
@@ -618,6 +622,7 @@ class CoreConsistencyEvaluationService:
 
 
 
+    @categorize_as("evaluation", evaluation_type="metric_calculation")
     async def evaluate_consistency_llm(self, queries, day0_responses, dayn_responses, llm: Runnable):
         """
         Uses LLM to evaluate consistency between Day 0 and Day N responses.
@@ -916,6 +921,7 @@ class CoreRobustnessEvaluationService:
     """
     )
 
+    @categorize_as("evaluation", call_sub_category="eval_query_generation")
     async def generate_contextual_queries(self, agentic_id: str, category: str):
         """
         Generates robustness queries using modular service calls.
@@ -997,6 +1003,7 @@ class CoreRobustnessEvaluationService:
         
         return dataset, response_col, score_col
 
+    @categorize_as("evaluation", evaluation_type="metric_calculation")
     async def score_responses(self, dataset, response_col: str, score_col: str, model_name: str = global_model_service.default_model_name):
         """
         Scores agent responses based on the robustness rubric.
@@ -9,10 +9,13 @@ from datetime import datetime, timezone, timedelta
 import asyncpg
 import difflib
 from typing import List, Dict, Any, Optional, Union, Literal, Tuple, Callable, TypeVar
+from contextlib import asynccontextmanager
+from psycopg.rows import dict_row
+from psycopg_pool import AsyncConnectionPool
 from langgraph.checkpoint.postgres.aio import AsyncPostgresSaver
-from src.config.constants import TableNames, DatabaseName
+from src.config.constants import TableNames, DatabaseName, CHAT_SESSION_USER_EMAIL_REGEX
 from src.config.application_config import app_config
-from src.utils.cache_utils import cache_result, invalidate_entity_cache, CacheableRepository
+from src.utils.cache_utils import cache_result, invalidate_entity_cache, CacheableRepository, single_flight, forget_in_flight
 from src.config.cache_config import EXPIRY_TIME, ENABLE_CACHING
 from telemetry_wrapper import logger as log
 from src.utils.secrets_handler import current_user_email
@@ -25,6 +28,11 @@ T = TypeVar('T')
 DB_TIMEOUT_SECONDS = float(os.getenv('DB_TIMEOUT_SECONDS', '30'))  # Default 30 seconds timeout
 DB_MAX_RETRIES = int(os.getenv('DB_MAX_RETRIES', '3'))  # Default 3 retries
 DB_RETRY_DELAY_SECONDS = float(os.getenv('DB_RETRY_DELAY_SECONDS', '10'))  # Default 10 seconds delay between retries
+TOKEN_USAGE_ROLLUP_INTERVAL_SECONDS = float(os.getenv('TOKEN_USAGE_ROLLUP_INTERVAL_SECONDS', '300'))  # How often raw token logs are compacted
+CHECKPOINTER_POOL_MIN_SIZE = int(os.getenv('CHECKPOINTER_POOL_MIN_SIZE', '2'))  # LangGraph checkpointer pool, separate from the asyncpg pools
+CHECKPOINTER_POOL_MAX_SIZE = int(os.getenv('CHECKPOINTER_POOL_MAX_SIZE', '20'))
+CHAT_HISTORY_PARTITIONS = int(os.getenv('CHAT_HISTORY_PARTITIONS', '16'))  # Hash partitions of the unified chat_history table (fixed once created)
+_CHAT_SESSION_USER_EMAIL_PATTERN = re.compile(CHAT_SESSION_USER_EMAIL_REGEX)
 
 # --- Base Repository ---
 
@@ -6045,6 +6053,11 @@ class ChatHistoryRepository(BaseRepository):
     dynamically named chat tables and the shared checkpoint tables.
     """
 
+    # Process-wide LangGraph checkpointer, shared by every instance and borrowed per request
+    _checkpointer_pool: Optional[AsyncConnectionPool] = None
+    _checkpointer: Optional[AsyncPostgresSaver] = None
+    _checkpointer_lock: Optional[asyncio.Lock] = None
+
     def __init__(self, pool: asyncpg.Pool, login_pool: asyncpg.Pool):
         """
         Initializes the ChatHistoryRepository.
@@ -6096,7 +6109,7 @@ class ChatHistoryRepository(BaseRepository):
                     """
                     await conn.execute(alter_statement)
                     log.info(f"Added response_time column to existing table '{table_name}'.")
-                
+
             log.info(f"Table '{table_name}' created successfully or already exists with response_time column.")
         except Exception as e:
             log.error(f"Error creating table '{table_name}': {e}")
@@ -6209,6 +6222,8 @@ class ChatHistoryRepository(BaseRepository):
                 ALTER TABLE {table_name} ADD COLUMN IF NOT EXISTS updated_on TIMESTAMPTZ DEFAULT CURRENT_TIMESTAMP;
                 """
                 await conn.execute(alter_statement)
+                # end_timestamp of the newest chat turn already folded into the summary
+                await conn.execute(f"ALTER TABLE {table_name} ADD COLUMN IF NOT EXISTS summary_watermark TIMESTAMP;")
             log.info(f"Table '{table_name}' created successfully or already exists with updated_on column.")
         except Exception as e:
             log.error(f"Error creating table '{table_name}': {e}")
@@ -6266,6 +6281,30 @@ class ChatHistoryRepository(BaseRepository):
             log.error(f"Failed to retrieve agent conversation summary from '{table_name}': {e}")
             return None
 
+    async def get_agent_conversation_summary_state(
+        self, agentic_application_id: str, session_id: str
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Retrieves the conversation summary of a session together with its watermark
+        (end_timestamp of the newest chat turn already summarized).
+
+        Returns:
+            dict: {'summary', 'summary_watermark'}, or None if not found or on error.
+        """
+        table_name = "agent_conversation_summary_table"
+        query = f"""
+        SELECT summary, summary_watermark
+        FROM {table_name}
+        WHERE agentic_application_id = $1 AND session_id = $2
+        """
+        try:
+            async with self.pool.acquire() as conn:
+                row = await conn.fetchrow(query, agentic_application_id, session_id)
+            return dict(row) if row else None
+        except Exception as e:
+            log.error(f"Failed to retrieve agent conversation summary state from '{table_name}': {e}")
+            return None
+
     async def get_chat_records_by_session_prefix(self, table_name: str, session_id_prefix: str) -> List[Dict[str, Any]]:
         """
         Retrieves chat history records from a specific table where session_id matches a prefix.
@@ -6299,29 +6338,122 @@ class ChatHistoryRepository(BaseRepository):
             log.error(f"Failed to retrieve chat records by session prefix from '{table_name}': {e}")
             return []
 
+    @staticmethod
+    def _legacy_session_user_expression(column: str = "session_id") -> str:
+        """
+        SQL expression extracting the user email from a legacy table's session_id.
+        It is inlined (not a bind parameter) so queries match the idx_<table>_user expression index.
+        """
+        return f"(substring({column} from '{CHAT_SESSION_USER_EMAIL_REGEX}'))"
+
+    async def get_chat_records_page_by_user(
+        self,
+        table_name: str,
+        user_email: str,
+        limit: int,
+        cursor: Optional[Tuple[datetime, str]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Retrieves one keyset page of a user's chat records from a legacy per-agent table, newest first.
+
+        Args:
+            table_name (str): The table to query.
+            user_email (str): The owner of the sessions.
+            limit (int): Maximum number of records to return.
+            cursor (Optional[Tuple[datetime, str]]): (end_timestamp, session_id) of the last record of the previous page.
+
+        Returns:
+            A list of chat history records, or an empty list if not found or on error.
+        """
+        user_expression = self._legacy_session_user_expression()
+        cursor_condition = "AND (end_timestamp, session_id) < ($3, $4)" if cursor else ""
+        query = f"""
+        SELECT session_id, start_timestamp, end_timestamp, human_message, ai_message, response_time
+        FROM {table_name}
+        WHERE {user_expression} = $1 {cursor_condition}
+        ORDER BY end_timestamp DESC, session_id DESC
+        LIMIT $2
+        """
+        try:
+            async with self.pool.acquire() as conn:
+                if not await conn.fetchval("SELECT to_regclass($1) IS NOT NULL", table_name):
+                    log.warning(f"Table '{table_name}' does not exist. Cannot retrieve old chats.")
+                    return []
+                records = await conn.fetch(query, user_email, limit, *(cursor or ()))
+            return [dict(row) for row in records]
+        except Exception as e:
+            log.error(f"Failed to retrieve chat records page from '{table_name}' for user '{user_email}': {e}")
+            return []
+
+    async def get_chat_sessions_page_by_user(
+        self,
+        table_name: str,
+        user_email: str,
+        limit: int,
+        cursor: Optional[Tuple[datetime, str]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Retrieves one keyset page of a user's sessions from a legacy per-agent table, most recently active first.
+        Each session is represented by its latest record, found while walking the user index backwards
+        (the NOT EXISTS probe hits the primary key), so no per-user aggregation is needed.
+
+        Args:
+            table_name (str): The table to query.
+            user_email (str): The owner of the sessions.
+            limit (int): Maximum number of sessions to return.
+            cursor (Optional[Tuple[datetime, str]]): (end_timestamp, session_id) of the last session of the previous page.
+
+        Returns:
+            A list of latest-record rows, one per session, or an empty list if not found or on error.
+        """
+        user_expression = self._legacy_session_user_expression("c.session_id")
+        cursor_condition = "AND (c.end_timestamp, c.session_id) < ($3, $4)" if cursor else ""
+        query = f"""
+        SELECT c.session_id, c.end_timestamp, c.human_message
+        FROM {table_name} c
+        WHERE {user_expression} = $1 {cursor_condition}
+        AND NOT EXISTS (
+            SELECT 1 FROM {table_name} newer
+            WHERE newer.session_id = c.session_id AND newer.end_timestamp > c.end_timestamp
+        )
+        ORDER BY c.end_timestamp DESC, c.session_id DESC
+        LIMIT $2
+        """
+        try:
+            async with self.pool.acquire() as conn:
+                if not await conn.fetchval("SELECT to_regclass($1) IS NOT NULL", table_name):
+                    log.warning(f"Table '{table_name}' does not exist. Cannot retrieve old chat sessions.")
+                    return []
+                records = await conn.fetch(query, user_email, limit, *(cursor or ()))
+            return [dict(row) for row in records]
+        except Exception as e:
+            log.error(f"Failed to retrieve chat sessions page from '{table_name}' for user '{user_email}': {e}")
+            return []
+
     async def update_agent_conversation_summary(
-        self, agentic_application_id: str, session_id: str, summary: str):
+        self, agentic_application_id: str, session_id: str, summary: str, summary_watermark: Optional[datetime] = None):
         """
-        Updates the conversation summary for a specific agent and session.
+        Inserts or updates the conversation summary for a specific agent and session, so a summary
+        is kept even when no preference row was created for the session yet.
         Args:
             agentic_application_id (str): The ID of the agent application.
             session_id (str): The ID of the session.
             summary (str): The new summary to set.
+            summary_watermark (Optional[datetime]): end_timestamp of the newest chat turn covered by the summary;
+                the stored watermark is kept when None.
         """
         table_name = "agent_conversation_summary_table"
-        update_statement = f"""
-        UPDATE {table_name}
-        SET summary = $1, updated_on = CURRENT_TIMESTAMP
-        WHERE agentic_application_id = $2 AND session_id = $3
+        upsert_statement = f"""
+        INSERT INTO {table_name} (agentic_application_id, session_id, summary, summary_watermark, updated_on)
+        VALUES ($2, $3, $1, $4, CURRENT_TIMESTAMP)
+        ON CONFLICT (agentic_application_id, session_id)
+        DO UPDATE SET summary = $1, summary_watermark = COALESCE($4, {table_name}.summary_watermark), updated_on = CURRENT_TIMESTAMP
         """
         try:
             async with self.pool.acquire() as conn:
-                result = await conn.execute(update_statement, summary, agentic_application_id, session_id)
-                if result != "UPDATE 0":
-                    log.info(f"Updated agent conversation summary for session '{session_id}' in table '{table_name}'.")
-                else:
-                    log.warning(f"No agent conversation summary found for session '{session_id}', no update performed.")
-                    return True
+                await conn.execute(upsert_statement, summary, agentic_application_id, session_id, summary_watermark)
+            log.info(f"Inserted/Updated agent conversation summary for session '{session_id}' in table '{table_name}'.")
+            return True
         except Exception as e:
             log.error(f"Failed to update agent conversation summary in '{table_name}': {e}")
             raise 
@@ -6364,7 +6496,7 @@ class ChatHistoryRepository(BaseRepository):
             log.error(f"Failed to retrieve chat records from '{table_name}': {e}")
             return []
 
-    async def delete_session_transactional(self, chat_table_name: str, thread_id: str, session_id: str) -> int:
+    async def delete_session_transactional(self, chat_table_name: str, thread_id: str, session_id: str, agentic_application_id: Optional[str] = None) -> int:
         """
         Deletes all data for a session (checkpoints and chat history) in a single transaction.
 
@@ -6372,6 +6504,7 @@ class ChatHistoryRepository(BaseRepository):
             chat_table_name (str): The name of the specific chat history table.
             thread_id (str): The thread_id used in checkpoint tables.
             session_id (str): The session_id used in the chat history table.
+            agentic_application_id (Optional[str]): When given, the session's rows in the unified chat history table are deleted too.
 
         Returns:
             int: The number of rows deleted from the chat history table.
@@ -6389,13 +6522,23 @@ class ChatHistoryRepository(BaseRepository):
                 await conn.execute(f"DELETE FROM {self.checkpoint_writes_table} WHERE thread_id = $1 OR thread_id = $2", thread_id, internal_thread)
                 log.info(f"Deleted records from checkpoint tables for thread_id: {thread_id}")
 
+                if agentic_application_id:
+                    result = await conn.execute(
+                        f"DELETE FROM {TableNames.CHAT_HISTORY.value} WHERE agentic_application_id = $1 AND session_id = $2",
+                        agentic_application_id, session_id
+                    )
+                    chat_rows_deleted += int(result.split()[-1])
+
                 try:
-                    result = await conn.execute(f"DELETE FROM {chat_table_name} WHERE session_id = $1", session_id)
-                    chat_rows_deleted = int(result.split()[-1])
-                    log.info(f"Deleted {chat_rows_deleted} rows from chat table '{chat_table_name}'.")
+                    # Savepoint, so a missing legacy table does not abort the surrounding transaction
+                    async with conn.transaction():
+                        result = await conn.execute(f"DELETE FROM {chat_table_name} WHERE session_id = $1", session_id)
+                    legacy_rows_deleted = int(result.split()[-1])
+                    log.info(f"Deleted {legacy_rows_deleted} rows from chat table '{chat_table_name}'.")
+                    # Rows are duplicated in both tables during the dual-write transition
+                    chat_rows_deleted = max(chat_rows_deleted, legacy_rows_deleted)
                 except asyncpg.exceptions.UndefinedTableError:
                     log.warning(f"Chat table '{chat_table_name}' not found. Skipping deletion.")
-                    chat_rows_deleted = 0
         return chat_rows_deleted
 
     async def delete_session_transactional_internal(self, internal_thread: str) -> int:
@@ -6441,17 +6584,175 @@ class ChatHistoryRepository(BaseRepository):
             log.error(f"Failed to delete agent conversation summary in '{table_name}': {e}")
             return False
 
-    async def get_checkpointer_context_manager(self):
+    async def get_shared_checkpointer(self) -> AsyncPostgresSaver:
         """
-        Returns an asynchronous context manager for LangGraph's PostgresSaver.
-        This allows inference services to use 'async with chat_history_repository.get_checkpointer_context_manager() as checkpointer:'
+        Returns the process-wide AsyncPostgresSaver, creating it on first use.
+        It is backed by its own psycopg connection pool (CHECKPOINTER_POOL_MIN_SIZE/MAX_SIZE),
+        so chat turns no longer open and tear down a connection for the checkpointer.
         """
+        cls = ChatHistoryRepository
+        if cls._checkpointer is not None:
+            return cls._checkpointer
         if not self.DB_URL:
             raise ValueError("Could not get the database connection string for the checkpointer.")
+        if cls._checkpointer_lock is None:
+            cls._checkpointer_lock = asyncio.Lock()
+        async with cls._checkpointer_lock:
+            if cls._checkpointer is None:
+                pool = AsyncConnectionPool(
+                    conninfo=self.DB_URL,
+                    min_size=CHECKPOINTER_POOL_MIN_SIZE,
+                    max_size=CHECKPOINTER_POOL_MAX_SIZE,
+                    # Same connection settings AsyncPostgresSaver.from_conn_string uses
+                    kwargs={"autocommit": True, "prepare_threshold": 0, "row_factory": dict_row},
+                    open=False,
+                )
+                await pool.open()
+                checkpointer = AsyncPostgresSaver(conn=pool)
+                try:
+                    await checkpointer.setup()
+                except Exception:
+                    await pool.close()
+                    raise
+                cls._checkpointer_pool = pool
+                cls._checkpointer = checkpointer
+                log.info(f"Shared LangGraph checkpointer pool opened (min={CHECKPOINTER_POOL_MIN_SIZE}, max={CHECKPOINTER_POOL_MAX_SIZE}).")
+        return cls._checkpointer
+
+    async def get_checkpointer_context_manager(self):
+        """
+        Returns an asynchronous context manager that lends out the shared LangGraph checkpointer.
+        This allows inference services to use 'async with chat_history_repository.get_checkpointer_context_manager() as checkpointer:'
+        Leaving the block does not close anything; connections go back to the checkpointer pool per operation.
+        """
+        checkpointer = await self.get_shared_checkpointer()
+
+        @asynccontextmanager
+        async def borrow():
+            yield checkpointer
+
+        return borrow()
+
+    @classmethod
+    async def close_shared_checkpointer(cls):
+        """Closes the shared checkpointer's connection pool (application shutdown)."""
+        pool = cls._checkpointer_pool
+        cls._checkpointer, cls._checkpointer_pool = None, None
+        if pool is not None:
+            await pool.close()
+            log.info("Shared LangGraph checkpointer pool closed.")
+
+    async def get_threads_for_checkpoint_compaction(self, keep_checkpoints: int, idle_seconds: float, limit: int) -> List[Dict[str, Any]]:
+        """
+        Returns up to `limit` (thread_id, checkpoint_ns) pairs holding more than `keep_checkpoints`
+        checkpoints whose latest checkpoint is older than `idle_seconds`, most bloated first.
+        Only idle threads are compacted so that no run is writing blobs for them concurrently.
+        """
+        query = f"""
+        SELECT thread_id, checkpoint_ns, COUNT(*) AS checkpoint_count
+        FROM {self.checkpoints_table}
+        GROUP BY thread_id, checkpoint_ns
+        HAVING COUNT(*) > $1
+           AND MAX((checkpoint->>'ts')::timestamptz) < NOW() - make_interval(secs => $2)
+        ORDER BY COUNT(*) DESC
+        LIMIT $3
+        """
+        async with self.pool.acquire() as conn:
+            rows = await conn.fetch(query, keep_checkpoints, float(idle_seconds), limit)
+        return [dict(row) for row in rows]
 
-        # AsyncPostgresSaver is itself an async context manager, so we just return its instance.
-        # The caller will then use 'async with' on this returned instance.
-        return AsyncPostgresSaver.from_conn_string(self.DB_URL)
+    async def prune_thread_checkpoints(self, thread_id: str, checkpoint_ns: str, keep_checkpoints: int) -> Dict[str, int]:
+        """
+        Keeps only the latest `keep_checkpoints` checkpoints of a thread and deletes, in one transaction,
+        the older checkpoints, the writes that no kept checkpoint reads (its own pending writes and its
+        parent's pending sends) and the channel blobs no kept checkpoint references.
+
+        Returns:
+            dict: Deleted row counts per table and the total bytes reclaimed.
+        """
+        prune_checkpoints = f"""
+        WITH keep AS (
+            SELECT checkpoint_id FROM {self.checkpoints_table}
+            WHERE thread_id = $1 AND checkpoint_ns = $2
+            ORDER BY checkpoint_id DESC
+            LIMIT $3
+        ), deleted AS (
+            DELETE FROM {self.checkpoints_table} c
+            WHERE c.thread_id = $1 AND c.checkpoint_ns = $2
+              AND c.checkpoint_id NOT IN (SELECT checkpoint_id FROM keep)
+            RETURNING pg_column_size(c.*) AS size
+        )
+        SELECT COUNT(*) AS rows, COALESCE(SUM(size), 0) AS bytes FROM deleted
+        """
+        prune_writes = f"""
+        WITH deleted AS (
+            DELETE FROM {self.checkpoint_writes_table} w
+            WHERE w.thread_id = $1 AND w.checkpoint_ns = $2
+              AND NOT EXISTS (
+                  SELECT 1 FROM {self.checkpoints_table} c
+                  WHERE c.thread_id = w.thread_id AND c.checkpoint_ns = w.checkpoint_ns
+                    AND (c.checkpoint_id = w.checkpoint_id OR c.parent_checkpoint_id = w.checkpoint_id)
+              )
+            RETURNING pg_column_size(w.*) AS size
+        )
+        SELECT COUNT(*) AS rows, COALESCE(SUM(size), 0) AS bytes FROM deleted
+        """
+        prune_blobs = f"""
+        WITH deleted AS (
+            DELETE FROM {self.checkpoint_blobs_table} b
+            WHERE b.thread_id = $1 AND b.checkpoint_ns = $2
+              AND NOT EXISTS (
+                  SELECT 1 FROM {self.checkpoints_table} c
+                  WHERE c.thread_id = b.thread_id AND c.checkpoint_ns = b.checkpoint_ns
+                    AND c.checkpoint->'channel_versions'->>b.channel = b.version
+              )
+            RETURNING pg_column_size(b.*) AS size
+        )
+        SELECT COUNT(*) AS rows, COALESCE(SUM(size), 0) AS bytes FROM deleted
+        """
+        async with self.pool.acquire() as conn:
+            async with conn.transaction():
+                checkpoints = await conn.fetchrow(prune_checkpoints, thread_id, checkpoint_ns, keep_checkpoints)
+                writes = await conn.fetchrow(prune_writes, thread_id, checkpoint_ns)
+                blobs = await conn.fetchrow(prune_blobs, thread_id, checkpoint_ns)
+        return {
+            "checkpoints_deleted": checkpoints["rows"],
+            "writes_deleted": writes["rows"],
+            "blobs_deleted": blobs["rows"],
+            "bytes_reclaimed": int(checkpoints["bytes"] + writes["bytes"] + blobs["bytes"]),
+        }
+
+    async def get_latest_channel_blob(self, thread_id: str, checkpoint_ns: str, channel: str) -> Optional[Dict[str, Any]]:
+        """Returns the blob (version, type, blob) a thread's latest checkpoint holds for `channel`."""
+        query = f"""
+        SELECT b.version, b.type, b.blob
+        FROM {self.checkpoints_table} c
+        JOIN {self.checkpoint_blobs_table} b
+          ON b.thread_id = c.thread_id AND b.checkpoint_ns = c.checkpoint_ns
+         AND b.channel = $3 AND b.version = c.checkpoint->'channel_versions'->>$3
+        WHERE c.thread_id = $1 AND c.checkpoint_ns = $2
+        ORDER BY c.checkpoint_id DESC
+        LIMIT 1
+        """
+        async with self.pool.acquire() as conn:
+            row = await conn.fetchrow(query, thread_id, checkpoint_ns, channel)
+        return dict(row) if row else None
+
+    async def replace_channel_blob(self, thread_id: str, checkpoint_ns: str, channel: str, version: str, blob_type: str, blob: bytes) -> int:
+        """Overwrites one channel blob in place (used to truncate message history). Returns the bytes saved."""
+        query = f"""
+        WITH old AS (
+            SELECT pg_column_size(blob) AS size FROM {self.checkpoint_blobs_table}
+            WHERE thread_id = $1 AND checkpoint_ns = $2 AND channel = $3 AND version = $4
+        )
+        UPDATE {self.checkpoint_blobs_table}
+        SET type = $5, blob = $6
+        WHERE thread_id = $1 AND checkpoint_ns = $2 AND channel = $3 AND version = $4
+        RETURNING (SELECT size FROM old) - pg_column_size(blob) AS saved
+        """
+        async with self.pool.acquire() as conn:
+            saved = await conn.fetchval(query, thread_id, checkpoint_ns, channel, version, blob_type, blob)
+        return int(saved or 0)
 
     async def get_all_thread_ids_from_checkpoints(self) -> List[Dict[str, str]]:
         """
@@ -6537,41 +6838,381 @@ class ChatHistoryRepository(BaseRepository):
             log.error(f"Error updating message tag record in '{table_name}': {e}")
             return False
 
-    async def fetch_user_query_from_chat_table(self, user_email:str, chat_table_name: str):
+    async def fetch_user_query_from_chat_table(self, user_email:str, chat_table_name: str, since: Optional[datetime] = None):
         """
         Fetches only the user query from the chat table for a given user_email.
 
         Args:
             user_email (str): The email of the user to filter the chat records.
             chat_table_name (str): The name of the chat table to query.
+            since (datetime, optional): Only rows with a later end_timestamp are read.
 
         Returns:
-            dict: A dictionary with 'user_history' and 'agent_history' lists of user queries.
+            dict: A dictionary with 'user_history' and 'agent_history' lists of user queries, and
+                'last_timestamp', the latest end_timestamp read (None when no rows were read).
         """
         try:
             async with self.pool.acquire() as conn:
                 query = f"""
-                SELECT DISTINCT human_message
+                SELECT human_message, session_id LIKE $1 AS is_user, MAX(end_timestamp) AS last_timestamp
                 FROM {chat_table_name}
-                WHERE session_id like $1
+                WHERE $2::timestamp IS NULL OR end_timestamp > $2::timestamp
+                GROUP BY human_message, is_user
                 """
-                user_history = await conn.fetch(query, f"{user_email}_%")
-
-                query1 = f"""
-                SELECT DISTINCT human_message
-                FROM {chat_table_name}
-                WHERE session_id not like $1;
-                """
-                agent_history = await conn.fetch(query1, f"{user_email}_%")
+                rows = await conn.fetch(query, f"{user_email}_%", since)
 
                 return {
-                    "user_history": [row['human_message'] for row in user_history],
-                    "agent_history": [row['human_message'] for row in agent_history],
+                    "user_history": [row['human_message'] for row in rows if row['is_user']],
+                    "agent_history": [row['human_message'] for row in rows if not row['is_user']],
+                    "last_timestamp": max((row['last_timestamp'] for row in rows if row['last_timestamp']), default=None),
                 }
 
         except Exception as e:
             log.error(f"Error fetching user queries from '{chat_table_name}': {e}")
-            return {"user_history": [], "agent_history": []}
+            return {"user_history": [], "agent_history": [], "last_timestamp": None}
+
+    # --- Unified chat history table (one partitioned table for all agents) ---
+
+    @staticmethod
+    def get_session_user_email(session_id: str) -> Optional[str]:
+        """Returns the user email a '<user_email>_<uuid>' session id belongs to, or None."""
+        match = _CHAT_SESSION_USER_EMAIL_PATTERN.match(session_id or "")
+        return match.group(1) if match else None
+
+    async def create_unified_chat_history_table(self):
+        """
+        Creates the unified chat history table, hash partitioned by agent id, and the migration bookkeeping table.
+        """
+        table_name = TableNames.CHAT_HISTORY.value
+        partitions = "\n".join(
+            f"CREATE TABLE IF NOT EXISTS {table_name}_p{remainder} PARTITION OF {table_name} "
+            f"FOR VALUES WITH (MODULUS {CHAT_HISTORY_PARTITIONS}, REMAINDER {remainder});"
+            for remainder in range(CHAT_HISTORY_PARTITIONS)
+        )
+        create_statement = f"""
+        CREATE TABLE IF NOT EXISTS {table_name} (
+            agentic_application_id TEXT NOT NULL,
+            session_id TEXT NOT NULL,
+            user_email TEXT,
+            start_timestamp TIMESTAMP,
+            end_timestamp TIMESTAMP NOT NULL,
+            human_message TEXT,
+            ai_message TEXT,
+            response_time FLOAT,
+            PRIMARY KEY (agentic_application_id, session_id, end_timestamp)
+        ) PARTITION BY HASH (agentic_application_id);
+        {partitions}
+        CREATE INDEX IF NOT EXISTS idx_{table_name}_user
+            ON {table_name} (agentic_application_id, user_email, end_timestamp, session_id);
+
+        CREATE TABLE IF NOT EXISTS {TableNames.CHAT_HISTORY_MIGRATION.value} (
+            legacy_table_name TEXT PRIMARY KEY,
+            agentic_application_id TEXT NOT NULL,
+            rows_copied BIGINT DEFAULT 0,
+            migrated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+        );
+        """
+        try:
+            async with self.pool.acquire() as conn:
+                await conn.execute(create_statement)
+            log.info(f"Unified chat history table '{table_name}' ready with {CHAT_HISTORY_PARTITIONS} partitions.")
+        except Exception as e:
+            log.error(f"Error creating unified chat history table '{table_name}': {e}")
+            raise
+
+    async def insert_unified_chat_record(
+        self,
+        agentic_application_id: str,
+        session_id: str,
+        start_timestamp: str,
+        end_timestamp: str,
+        human_message: str,
+        ai_message: str,
+        response_time: float = None
+    ):
+        """
+        Inserts a chat message pair into the unified chat history table.
+        """
+        insert_statement = f"""
+        INSERT INTO {TableNames.CHAT_HISTORY.value} (
+            agentic_application_id, session_id, user_email, start_timestamp, end_timestamp, human_message, ai_message, response_time
+        ) VALUES ($1, $2, $3, $4, $5, $6, $7, $8)
+        ON CONFLICT (agentic_application_id, session_id, end_timestamp) DO NOTHING
+        """
+        async with self.pool.acquire() as conn:
+            await conn.execute(
+                insert_statement,
+                agentic_application_id,
+                session_id,
+                self.get_session_user_email(session_id),
+                start_timestamp,
+                end_timestamp,
+                human_message,
+                ai_message,
+                response_time
+            )
+        log.info(f"Chat history inserted into '{TableNames.CHAT_HISTORY.value}' for agent '{agentic_application_id}', session '{session_id}'.")
+
+    async def update_unified_latest_response_time(self, agentic_application_id: str, session_id: str, response_time: float) -> bool:
+        """
+        Updates the response time of the most recent unified chat record of a session.
+        """
+        table_name = TableNames.CHAT_HISTORY.value
+        update_statement = f"""
+        UPDATE {table_name}
+        SET response_time = $1
+        WHERE agentic_application_id = $2 AND session_id = $3
+        AND end_timestamp = (
+            SELECT MAX(end_timestamp)
+            FROM {table_name}
+            WHERE agentic_application_id = $2 AND session_id = $3
+        )
+        """
+        try:
+            async with self.pool.acquire() as conn:
+                result = await conn.execute(update_statement, response_time, agentic_application_id, session_id)
+            return result == "UPDATE 1"
+        except Exception as e:
+            log.error(f"Error updating response time in '{table_name}' for session '{session_id}': {e}")
+            return False
+
+    async def get_unified_chat_records_by_user(self, agentic_application_id: str, user_email: str) -> List[Dict[str, Any]]:
+        """
+        Retrieves all unified chat records of a user for an agent, in chronological order (index seek on user_email).
+        """
+        query = f"""
+        SELECT session_id, start_timestamp, end_timestamp, human_message, ai_message, response_time
+        FROM {TableNames.CHAT_HISTORY.value}
+        WHERE agentic_application_id = $1 AND user_email = $2
+        ORDER BY end_timestamp ASC
+        """
+        try:
+            async with self.pool.acquire() as conn:
+                records = await conn.fetch(query, agentic_application_id, user_email)
+            return [dict(row) for row in records]
+        except Exception as e:
+            log.error(f"Failed to retrieve unified chat records for agent '{agentic_application_id}' and user '{user_email}': {e}")
+            return []
+
+    async def get_unified_chat_records_page_by_user(
+        self,
+        agentic_application_id: str,
+        user_email: str,
+        limit: int,
+        cursor: Optional[Tuple[datetime, str]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Retrieves one keyset page of a user's unified chat records for an agent, newest first.
+        The cursor is the (end_timestamp, session_id) of the last record of the previous page.
+        """
+        cursor_condition = "AND (end_timestamp, session_id) < ($4, $5)" if cursor else ""
+        query = f"""
+        SELECT session_id, start_timestamp, end_timestamp, human_message, ai_message, response_time
+        FROM {TableNames.CHAT_HISTORY.value}
+        WHERE agentic_application_id = $1 AND user_email = $2 {cursor_condition}
+        ORDER BY end_timestamp DESC, session_id DESC
+        LIMIT $3
+        """
+        try:
+            async with self.pool.acquire() as conn:
+                records = await conn.fetch(query, agentic_application_id, user_email, limit, *(cursor or ()))
+            return [dict(row) for row in records]
+        except Exception as e:
+            log.error(f"Failed to retrieve unified chat records page for agent '{agentic_application_id}' and user '{user_email}': {e}")
+            return []
+
+    async def get_unified_chat_sessions_page_by_user(
+        self,
+        agentic_application_id: str,
+        user_email: str,
+        limit: int,
+        cursor: Optional[Tuple[datetime, str]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Retrieves one keyset page of a user's unified chat sessions for an agent, most recently active first.
+        Each session is represented by its latest record (see get_chat_sessions_page_by_user).
+        """
+        table_name = TableNames.CHAT_HISTORY.value
+        cursor_condition = "AND (c.end_timestamp, c.session_id) < ($4, $5)" if cursor else ""
+        query = f"""
+        SELECT c.session_id, c.end_timestamp, c.human_message
+        FROM {table_name} c
+        WHERE c.agentic_application_id = $1 AND c.user_email = $2 {cursor_condition}
+        AND NOT EXISTS (
+            SELECT 1 FROM {table_name} newer
+            WHERE newer.agentic_application_id = c.agentic_application_id
+            AND newer.session_id = c.session_id AND newer.end_timestamp > c.end_timestamp
+        )
+        ORDER BY c.end_timestamp DESC, c.session_id DESC
+        LIMIT $3
+        """
+        try:
+            async with self.pool.acquire() as conn:
+                records = await conn.fetch(query, agentic_application_id, user_email, limit, *(cursor or ()))
+            return [dict(row) for row in records]
+        except Exception as e:
+            log.error(f"Failed to retrieve unified chat sessions page for agent '{agentic_application_id}' and user '{user_email}': {e}")
+            return []
+
+    async def get_unified_chat_records_by_session(self, agentic_application_id: str, session_id: str, limit: int) -> List[Dict[str, Any]]:
+        """
+        Retrieves the most recent unified chat records of a session, newest first.
+        """
+        query = f"""
+        SELECT session_id, start_timestamp, end_timestamp, human_message, ai_message, response_time
+        FROM {TableNames.CHAT_HISTORY.value}
+        WHERE agentic_application_id = $1 AND session_id = $2
+        ORDER BY end_timestamp DESC
+        LIMIT $3
+        """
+        try:
+            async with self.pool.acquire() as conn:
+                records = await conn.fetch(query, agentic_application_id, session_id, limit)
+            return [dict(row) for row in records]
+        except Exception as e:
+            log.error(f"Failed to retrieve unified chat records for session '{session_id}': {e}")
+            return []
+
+    async def get_unified_latest_message_record(self, agentic_application_id: str, session_id: str, message_column: str) -> Dict[str, Any] | None:
+        """
+        Retrieves the latest message ('human_message' or 'ai_message') and its end_timestamp for a session.
+        """
+        query = f"""
+        SELECT {message_column} AS message_content, end_timestamp
+        FROM {TableNames.CHAT_HISTORY.value}
+        WHERE agentic_application_id = $1 AND session_id = $2
+        ORDER BY end_timestamp DESC
+        LIMIT 1
+        """
+        try:
+            async with self.pool.acquire() as conn:
+                record = await conn.fetchrow(query, agentic_application_id, session_id)
+            return dict(record) if record else None
+        except Exception as e:
+            log.error(f"Error getting latest message record from '{TableNames.CHAT_HISTORY.value}': {e}")
+            return None
+
+    async def update_unified_message_tag_record(
+        self,
+        agentic_application_id: str,
+        session_id: str,
+        message_column: str,
+        updated_message_content: str,
+        end_timestamp: datetime
+    ) -> bool:
+        """
+        Updates a specific message of a session in the unified chat history table.
+        """
+        update_query = f"""
+        UPDATE {TableNames.CHAT_HISTORY.value}
+        SET {message_column} = $1
+        WHERE agentic_application_id = $2 AND session_id = $3 AND end_timestamp = $4
+        """
+        try:
+            async with self.pool.acquire() as conn:
+                result = await conn.execute(update_query, updated_message_content, agentic_application_id, session_id, end_timestamp)
+            return result != "UPDATE 0"
+        except Exception as e:
+            log.error(f"Error updating message tag record in '{TableNames.CHAT_HISTORY.value}': {e}")
+            return False
+
+    async def fetch_user_query_from_unified_chat_table(self, user_email: str, agentic_application_id: str, since: Optional[datetime] = None):
+        """
+        Fetches the distinct user queries of an agent from the unified table, split into the user's own and everyone else's.
+        With since, only rows with a later end_timestamp are read; 'last_timestamp' is the latest end_timestamp read.
+        """
+        query = f"""
+        SELECT human_message, user_email IS NOT DISTINCT FROM $2 AS is_user, MAX(end_timestamp) AS last_timestamp
+        FROM {TableNames.CHAT_HISTORY.value}
+        WHERE agentic_application_id = $1 AND ($3::timestamp IS NULL OR end_timestamp > $3::timestamp)
+        GROUP BY human_message, is_user
+        """
+        try:
+            async with self.pool.acquire() as conn:
+                rows = await conn.fetch(query, agentic_application_id, user_email, since)
+            return {
+                "user_history": [row['human_message'] for row in rows if row['is_user']],
+                "agent_history": [row['human_message'] for row in rows if not row['is_user']],
+                "last_timestamp": max((row['last_timestamp'] for row in rows), default=None),
+            }
+        except Exception as e:
+            log.error(f"Error fetching user queries from '{TableNames.CHAT_HISTORY.value}': {e}")
+            return {"user_history": [], "agent_history": [], "last_timestamp": None}
+
+    async def get_chat_history_tables_without_user_index(self, table_names: List[str]) -> List[str]:
+        """
+        Returns the existing per-agent chat tables among table_names that have no valid session-owner index yet.
+        """
+        query = """
+        SELECT t.relname AS table_name
+        FROM pg_class t
+        WHERE t.relname = ANY($1::text[]) AND t.relkind = 'r' AND t.relnamespace = current_schema()::regnamespace
+        AND NOT EXISTS (
+            SELECT 1 FROM pg_class i JOIN pg_index x ON x.indexrelid = i.oid
+            WHERE x.indrelid = t.oid AND i.relname = 'idx_' || t.relname || '_user' AND x.indisvalid
+        )
+        """
+        async with self.pool.acquire() as conn:
+            rows = await conn.fetch(query, table_names)
+        return [row["table_name"] for row in rows]
+
+    async def create_chat_history_user_index(self, table_name: str) -> None:
+        """
+        Builds the session-owner expression index used by paginated old-chat reads, without blocking chat writes.
+        A leftover invalid index from an interrupted build is dropped first.
+        """
+        index_name = f"idx_{table_name}_user"
+        async with self.pool.acquire() as conn:
+            # CONCURRENTLY cannot run inside a transaction block; each statement runs on its own here
+            await conn.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {index_name}")
+            await conn.execute(f"""
+            CREATE INDEX CONCURRENTLY IF NOT EXISTS {index_name}
+            ON {table_name} ({self._legacy_session_user_expression()}, end_timestamp, session_id)
+            """)
+
+    async def get_unmigrated_chat_history_tables(self, agentic_application_ids: List[str]) -> List[Dict[str, str]]:
+        """
+        Returns the existing per-agent chat tables (for the given agent ids) not yet copied into the unified table.
+        """
+        candidates = {f'table_{agent_id.replace("-", "_")}': agent_id for agent_id in agentic_application_ids}
+        query = f"""
+        SELECT t.table_name
+        FROM information_schema.tables t
+        WHERE t.table_schema = current_schema() AND t.table_name = ANY($1::text[])
+        AND NOT EXISTS (SELECT 1 FROM {TableNames.CHAT_HISTORY_MIGRATION.value} m WHERE m.legacy_table_name = t.table_name)
+        """
+        async with self.pool.acquire() as conn:
+            rows = await conn.fetch(query, list(candidates))
+        return [{"table_name": row["table_name"], "agentic_application_id": candidates[row["table_name"]]} for row in rows]
+
+    async def migrate_chat_history_table(self, legacy_table_name: str, agentic_application_id: str) -> int:
+        """
+        Copies one per-agent chat table into the unified table and records it as migrated, in one transaction.
+        Rows already present (dual writes) are skipped. Returns the number of rows copied.
+        """
+        copy_statement = f"""
+        INSERT INTO {TableNames.CHAT_HISTORY.value} (
+            agentic_application_id, session_id, user_email, start_timestamp, end_timestamp, human_message, ai_message, response_time
+        )
+        SELECT $1, session_id, substring(session_id from $2), start_timestamp, end_timestamp, human_message, ai_message, response_time
+        FROM {legacy_table_name}
+        WHERE session_id IS NOT NULL AND end_timestamp IS NOT NULL
+        ON CONFLICT (agentic_application_id, session_id, end_timestamp) DO NOTHING
+        """
+        async with self.pool.acquire() as conn:
+            async with conn.transaction():
+                result = await conn.execute(copy_statement, agentic_application_id, CHAT_SESSION_USER_EMAIL_REGEX)
+                rows_copied = int(result.split()[-1])
+                await conn.execute(
+                    f"""
+                    INSERT INTO {TableNames.CHAT_HISTORY_MIGRATION.value} (legacy_table_name, agentic_application_id, rows_copied)
+                    VALUES ($1, $2, $3)
+                    ON CONFLICT (legacy_table_name) DO UPDATE SET rows_copied = EXCLUDED.rows_copied, migrated_at = CURRENT_TIMESTAMP
+                    """,
+                    legacy_table_name, agentic_application_id, rows_copied
+                )
+        log.info(f"Migrated {rows_copied} rows from '{legacy_table_name}' into '{TableNames.CHAT_HISTORY.value}'.")
+        return rows_copied
 
     async def fetch_memory_from_postgres(self):
             """
@@ -8151,11 +8792,17 @@ class ChatStateHistoryManagerRepository(BaseRepository):
             CREATE INDEX IF NOT EXISTS idx_{self.table_name}_thread_id_timestamp
             ON {self.table_name} (thread_id, timestamp DESC);
         """
+        # text_pattern_ops lets 'thread_id LIKE <prefix>%' (all threads of one user and agent) use an index range scan
+        create_prefix_index_statement = f"""
+            CREATE INDEX IF NOT EXISTS idx_{self.table_name}_thread_id_pattern
+            ON {self.table_name} (thread_id text_pattern_ops, timestamp);
+        """
 
         try:
             async with self.pool.acquire() as conn:
                 await conn.execute(create_table_statement)
                 await conn.execute(create_index_statement)
+                await conn.execute(create_prefix_index_statement)
             log.info(f"[DB] Table '{self.table_name}' and index ensured to exist.")
 
         except Exception as e:
@@ -8238,12 +8885,13 @@ class ChatStateHistoryManagerRepository(BaseRepository):
             log.error(f"[DB] Error retrieving chat history for thread '{thread_id}': {e}")
             return []
 
-    async def get_chat_records_by_thread_id_prefix(self, thread_id_prefix: str) -> List[Dict[str, Any]]:
+    async def get_chat_records_by_thread_id_prefix(self, thread_id_prefix: str, since: Optional[datetime] = None) -> List[Dict[str, Any]]:
         """
         Retrieves chat history records from the table where thread_id matches a prefix.
 
         Args:
             thread_id_prefix (str): The prefix for the thread_id (e.g., 'hybrid_agent_uuid_user@example.com_%').
+            since (datetime, optional): Only records with a later timestamp are retrieved.
 
         Returns:
             A list of chat history records, or an empty list if not found or on error.
@@ -8255,10 +8903,10 @@ class ChatStateHistoryManagerRepository(BaseRepository):
                 query = f"""
                     SELECT thread_id, user_query, agent_steps, final_response, timestamp
                     FROM {self.table_name}
-                    WHERE thread_id LIKE $1
+                    WHERE thread_id LIKE $1 AND ($2::timestamptz IS NULL OR timestamp > $2::timestamptz)
                     ORDER BY timestamp ASC;
                 """
-                records = await conn.fetch(query, thread_id_prefix)
+                records = await conn.fetch(query, thread_id_prefix, since)
                 log.info(f"[DB] Retrieved {len(records)} records from '{self.table_name}' for thread_id prefix '{thread_id_prefix}'.")
                 
                 records = [dict(row) for row in records]
@@ -8272,6 +8920,77 @@ class ChatStateHistoryManagerRepository(BaseRepository):
             log.error(f"[DB] Failed to retrieve chat records by thread_id prefix from '{self.table_name}': {e}")
             return []
 
+    @staticmethod
+    def _escape_like_prefix(prefix: str) -> str:
+        """Escapes LIKE wildcards so '_' in table names and emails match literally and the whole prefix bounds the index scan."""
+        return prefix.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+
+    async def get_chat_records_page_by_thread_id_prefix(
+        self,
+        thread_id_prefix: str,
+        limit: int,
+        cursor: Optional[Tuple[datetime, str]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Retrieves one keyset page of chat records whose thread_id starts with a prefix, newest first.
+
+        Args:
+            thread_id_prefix (str): Literal thread_id prefix, without wildcards (e.g., 'table_<agent>_user@example.com_').
+            limit (int): Maximum number of records to return.
+            cursor (Optional[Tuple[datetime, str]]): (timestamp, thread_id) of the last record of the previous page.
+
+        Returns:
+            A list of chat history records, or an empty list if not found or on error.
+        """
+        cursor_condition = "AND (timestamp, thread_id) < ($3, $4)" if cursor else ""
+        query = f"""
+            SELECT thread_id, user_query, agent_steps, final_response, timestamp
+            FROM {self.table_name}
+            WHERE thread_id LIKE $1 {cursor_condition}
+            ORDER BY timestamp DESC, thread_id DESC
+            LIMIT $2;
+        """
+        try:
+            async with self.pool.acquire() as conn:
+                records = await conn.fetch(query, self._escape_like_prefix(thread_id_prefix), limit, *(cursor or ()))
+            records = [dict(row) for row in records]
+            for record in records:
+                record["agent_steps"] = json.loads(record["agent_steps"])
+            return records
+        except Exception as e:
+            log.error(f"[DB] Failed to retrieve chat records page by thread_id prefix from '{self.table_name}': {e}")
+            return []
+
+    async def get_chat_threads_page_by_thread_id_prefix(
+        self,
+        thread_id_prefix: str,
+        limit: int,
+        cursor: Optional[Tuple[datetime, str]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Retrieves one keyset page of threads whose thread_id starts with a prefix, most recently active first.
+        Each thread is represented by its latest entry; the NOT EXISTS probe uses the (thread_id, timestamp) index.
+        """
+        cursor_condition = "AND (c.timestamp, c.thread_id) < ($3, $4)" if cursor else ""
+        query = f"""
+            SELECT c.thread_id, c.user_query, c.timestamp
+            FROM {self.table_name} c
+            WHERE c.thread_id LIKE $1 {cursor_condition}
+            AND NOT EXISTS (
+                SELECT 1 FROM {self.table_name} newer
+                WHERE newer.thread_id = c.thread_id AND newer.timestamp > c.timestamp
+            )
+            ORDER BY c.timestamp DESC, c.thread_id DESC
+            LIMIT $2;
+        """
+        try:
+            async with self.pool.acquire() as conn:
+                records = await conn.fetch(query, self._escape_like_prefix(thread_id_prefix), limit, *(cursor or ()))
+            return [dict(row) for row in records]
+        except Exception as e:
+            log.error(f"[DB] Failed to retrieve chat threads page by thread_id prefix from '{self.table_name}': {e}")
+            return []
+
     async def get_most_recent_chat_entry(self, thread_id: str) -> Optional[Tuple[int, Dict[str, Any]]]:
         """
         Retrieves the most recent chat entry for a given thread_id, regardless of its final_response status.
@@ -11001,6 +11720,7 @@ class AgentKnowledgebaseMappingRepository(BaseRepository):
             now = datetime.now(timezone.utc)
             async with self.pool.acquire() as conn:
                 await conn.execute(upsert_statement, agentic_application_id, knowledgebase_ids, now)
+            forget_in_flight("AgentKnowledgebaseMappingRepository")
             
             log.info(f"Set {len(knowledgebase_ids)} knowledge bases for agent {agentic_application_id}")
             return True
@@ -11029,6 +11749,7 @@ class AgentKnowledgebaseMappingRepository(BaseRepository):
             now = datetime.now(timezone.utc)
             async with self.pool.acquire() as conn:
                 await conn.execute(update_statement, agentic_application_id, knowledgebase_ids, now)
+            forget_in_flight("AgentKnowledgebaseMappingRepository")
             
             log.info(f"Added {len(knowledgebase_ids)} knowledge bases to agent {agentic_application_id}")
             return True
@@ -11055,6 +11776,7 @@ class AgentKnowledgebaseMappingRepository(BaseRepository):
             now = datetime.now(timezone.utc)
             async with self.pool.acquire() as conn:
                 result = await conn.execute(update_statement, agentic_application_id, knowledgebase_ids, now)
+            forget_in_flight("AgentKnowledgebaseMappingRepository")
             
             log.info(f"Removed {len(knowledgebase_ids)} knowledge bases from agent {agentic_application_id}")
             return True
@@ -11063,6 +11785,7 @@ class AgentKnowledgebaseMappingRepository(BaseRepository):
             log.error(f"Error removing knowledge bases from agent: {e}")
             raise
 
+    @single_flight(namespace="AgentKnowledgebaseMappingRepository")
     async def get_knowledgebases_for_agent(
         self,
         agentic_application_id: str
@@ -11092,6 +11815,7 @@ class AgentKnowledgebaseMappingRepository(BaseRepository):
             log.error(f"Error retrieving knowledge bases for agent: {e}")
             raise
 
+    @single_flight(namespace="AgentKnowledgebaseMappingRepository")
     async def get_knowledgebase_ids_for_agent(
         self,
         agentic_application_id: str
@@ -11124,6 +11848,7 @@ class AgentKnowledgebaseMappingRepository(BaseRepository):
         try:
             async with self.pool.acquire() as conn:
                 result = await conn.execute(delete_statement, agentic_application_id)
+            forget_in_flight("AgentKnowledgebaseMappingRepository")
             
             deleted_count = int(result.split()[-1]) if result else 0
             
@@ -15515,9 +16240,10 @@ class QueryTokenUsageRepository(BaseRepository):
         agent_name: Optional[str],
         query: Optional[str],
         token_records: List[Dict],
-    ) -> None:
+    ) -> bool:
         """
         Aggregate token_records and write one summary row to query_token_usage.
+        Returns False if the row could not be written.
 
         Each entry in token_records is expected to carry:
             model, prompt_tokens, completion_tokens, cached_tokens, total_tokens,
@@ -15525,7 +16251,7 @@ class QueryTokenUsageRepository(BaseRepository):
             call_category, call_sub_category, status
         """
         if not token_records:
-            return
+            return True
 
         prompt_tokens    = sum(r.get("prompt_tokens",    0) for r in token_records)
         completion_tokens = sum(r.get("completion_tokens", 0) for r in token_records)
@@ -15559,8 +16285,10 @@ class QueryTokenUsageRepository(BaseRepository):
                 f"agent={agent_id} ({agent_name}), total_tokens={total_tokens}, "
                 f"total_cost=${total_cost:.8f}, llm_calls={len(token_records)}"
             )
+            return True
         except Exception as e:
             log.error(f"❌ [QueryTokenUsage] Failed to insert row: {e}", exc_info=True)
+            return False
 
     async def get_report_data(
         self,
@@ -15660,8 +16388,12 @@ class TokenUsageLogsRepository(BaseRepository):
             tool_name              TEXT,
             evaluation_type        TEXT,
             agent_type             TEXT,
-            agent_component        TEXT
+            agent_component        TEXT,
+            cache_hit              BOOLEAN        DEFAULT FALSE,
+            cache_tokens_saved     INTEGER        DEFAULT 0
         );
+        ALTER TABLE {self.table_name} ADD COLUMN IF NOT EXISTS cache_hit BOOLEAN DEFAULT FALSE;
+        ALTER TABLE {self.table_name} ADD COLUMN IF NOT EXISTS cache_tokens_saved INTEGER DEFAULT 0;
         CREATE INDEX IF NOT EXISTS idx_token_usage_logs_timestamp
             ON {self.table_name} (timestamp);
         CREATE INDEX IF NOT EXISTS idx_token_usage_logs_agent_id
@@ -15677,6 +16409,7 @@ class TokenUsageLogsRepository(BaseRepository):
             log.info(f"✅ TokenUsageLogsRepository: table '{self.table_name}' ready.")
         except Exception as e:
             log.error(f"❌ TokenUsageLogsRepository: failed to create table: {e}", exc_info=True)
+        await self.create_rollup_tables_if_not_exists()
 
     async def get_report_data(
         self,
@@ -15687,8 +16420,11 @@ class TokenUsageLogsRepository(BaseRepository):
         date_to: Optional[datetime] = None,
         model: Optional[str] = None,
     ) -> List[Dict]:
-        """Return rows from token_usage_logs matching the given filters."""
-        conditions = []
+        """
+        Return rows from token_usage_logs matching the given filters. Rows logged for calls the
+        LLM response cache answered are excluded, so every row returned is one LLM call.
+        """
+        conditions = ["NOT COALESCE(cache_hit, FALSE)"]
         params: List[Any] = []
         idx = 1
 
@@ -15717,7 +16453,7 @@ class TokenUsageLogsRepository(BaseRepository):
             params.append(date_to)
             idx += 1
 
-        where = ("WHERE " + " AND ".join(conditions)) if conditions else ""
+        where = "WHERE " + " AND ".join(conditions)
         sql = f"""
             SELECT timestamp, agent_id, agent_name, model_name, session_id, user_id,
                    prompt_tokens, completion_tokens, total_tokens, cached_tokens,
@@ -15736,6 +16472,287 @@ class TokenUsageLogsRepository(BaseRepository):
             log.error(f"❌ [TokenUsageLogs] get_report_data failed: {e}", exc_info=True)
             return []
 
+    # ── Hourly rollups ───────────────────────────────────────────────────────
+    # token_usage_logs grows by one row per LLM call, so report aggregates are
+    # served from token_usage_hourly_rollups (hour × agent × model × user ×
+    # category).  A watermark on token_usage_logs.id records how far the
+    # rollups have been compacted; rows above it (the un-rolled tail) are read
+    # from the raw table and merged at query time.  The watermark only moves to
+    # an id once every transaction that could still commit a lower id has
+    # ended (see refresh_rollups).  Rows logged for calls the
+    # LLM response cache answered (cache_hit) are counted in cache_hit_count,
+    # not call_count.
+
+    _ROLLUP_DIMENSIONS = ("agent_id", "agent_name", "model_name", "user_id", "call_category")
+    _ROLLUP_MEASURES = (
+        "prompt_tokens", "completion_tokens", "cached_tokens", "total_tokens",
+        "prompt_tokens_cost", "completion_tokens_cost", "cached_tokens_cost", "total_cost",
+    )
+
+    # Per-row expressions over token_usage_logs for the rollup counters
+    _ROLLUP_COUNTERS = {
+        "call_count": "CASE WHEN COALESCE(cache_hit, FALSE) THEN 0 ELSE 1 END",
+        "cache_hit_count": "CASE WHEN COALESCE(cache_hit, FALSE) THEN 1 ELSE 0 END",
+        "cache_tokens_saved": "COALESCE(cache_tokens_saved, 0)",
+    }
+
+    @property
+    def rollup_table(self) -> str:
+        return TableNames.TOKEN_USAGE_HOURLY_ROLLUPS.value
+
+    @property
+    def rollup_state_table(self) -> str:
+        return TableNames.TOKEN_USAGE_ROLLUP_STATE.value
+
+    async def create_rollup_tables_if_not_exists(self) -> None:
+        """
+        Create the hourly rollup table and its watermark row.  Dimension columns
+        are NOT NULL (empty string for missing values) so they can form the
+        primary key used by the upsert.
+        """
+        create_sql = f"""
+        CREATE TABLE IF NOT EXISTS {self.rollup_table} (
+            bucket_start           TIMESTAMP WITH TIME ZONE NOT NULL,
+            agent_id               TEXT NOT NULL DEFAULT '',
+            agent_name             TEXT NOT NULL DEFAULT '',
+            model_name             TEXT NOT NULL DEFAULT '',
+            user_id                TEXT NOT NULL DEFAULT '',
+            call_category          TEXT NOT NULL DEFAULT '',
+            call_count             BIGINT         DEFAULT 0,
+            prompt_tokens          BIGINT         DEFAULT 0,
+            completion_tokens      BIGINT         DEFAULT 0,
+            cached_tokens          BIGINT         DEFAULT 0,
+            total_tokens           BIGINT         DEFAULT 0,
+            prompt_tokens_cost     NUMERIC(20, 8) DEFAULT 0,
+            completion_tokens_cost NUMERIC(20, 8) DEFAULT 0,
+            cached_tokens_cost     NUMERIC(20, 8) DEFAULT 0,
+            total_cost             NUMERIC(20, 8) DEFAULT 0,
+            cache_hit_count        BIGINT         DEFAULT 0,
+            cache_tokens_saved     BIGINT         DEFAULT 0,
+            PRIMARY KEY (bucket_start, agent_id, agent_name, model_name, user_id, call_category)
+        );
+        ALTER TABLE {self.rollup_table} ADD COLUMN IF NOT EXISTS cache_hit_count BIGINT DEFAULT 0;
+        ALTER TABLE {self.rollup_table} ADD COLUMN IF NOT EXISTS cache_tokens_saved BIGINT DEFAULT 0;
+        CREATE INDEX IF NOT EXISTS idx_token_usage_rollups_agent
+            ON {self.rollup_table} (agent_id, bucket_start);
+        CREATE INDEX IF NOT EXISTS idx_token_usage_rollups_user
+            ON {self.rollup_table} (user_id, bucket_start);
+        CREATE TABLE IF NOT EXISTS {self.rollup_state_table} (
+            id           INTEGER PRIMARY KEY DEFAULT 1 CHECK (id = 1),
+            last_log_id  BIGINT NOT NULL DEFAULT 0,
+            updated_at   TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+        );
+        ALTER TABLE {self.rollup_state_table} ADD COLUMN IF NOT EXISTS pending_log_id BIGINT;
+        ALTER TABLE {self.rollup_state_table} ADD COLUMN IF NOT EXISTS pending_xmax BIGINT;
+        INSERT INTO {self.rollup_state_table} (id, last_log_id) VALUES (1, 0)
+            ON CONFLICT (id) DO NOTHING;
+        """
+        try:
+            async with self.pool.acquire() as conn:
+                await conn.execute(create_sql)
+            log.info(f"✅ TokenUsageLogsRepository: rollup table '{self.rollup_table}' ready.")
+        except Exception as e:
+            log.error(f"❌ TokenUsageLogsRepository: failed to create rollup tables: {e}", exc_info=True)
+
+    async def refresh_rollups(self) -> int:
+        """
+        Fold raw rows above the watermark into the hourly rollups.
+
+        Ids are allocated before commit, so a batch with lower ids can become visible
+        after a later one. Each refresh therefore only picks a candidate (the highest
+        committed id) together with the xmax of its snapshot, and the next refresh
+        compacts up to that candidate once the oldest running transaction is at or
+        past that xmax: every transaction that could still hold a lower id has then
+        committed or aborted. The watermark row is locked for the duration, so
+        concurrent refreshes from several workers serialize instead of double counting.
+
+        Returns:
+            Number of log ids the watermark advanced by (0 when nothing was compacted).
+        """
+        dims = ", ".join(self._ROLLUP_DIMENSIONS)
+        dim_exprs = ", ".join(f"COALESCE(CAST({d} AS TEXT), '')" for d in self._ROLLUP_DIMENSIONS)
+        measures = ", ".join(self._ROLLUP_MEASURES)
+        measure_sums = ", ".join(f"COALESCE(SUM({m}), 0)" for m in self._ROLLUP_MEASURES)
+        counters = ", ".join(self._ROLLUP_COUNTERS)
+        counter_sums = ", ".join(f"SUM({expr})" for expr in self._ROLLUP_COUNTERS.values())
+        updates = ", ".join(
+            f"{c} = {self.rollup_table}.{c} + EXCLUDED.{c}" for c in tuple(self._ROLLUP_COUNTERS) + self._ROLLUP_MEASURES
+        )
+        upsert_sql = f"""
+            INSERT INTO {self.rollup_table} (bucket_start, {dims}, {counters}, {measures})
+            SELECT date_trunc('hour', timestamp), {dim_exprs}, {counter_sums}, {measure_sums}
+            FROM {self.table_name}
+            WHERE id > $1 AND id <= $2 AND timestamp IS NOT NULL
+            GROUP BY 1, 2, 3, 4, 5, 6
+            ON CONFLICT (bucket_start, {dims}) DO UPDATE SET {updates}
+        """
+        try:
+            async with self.pool.acquire() as conn:
+                async with conn.transaction():
+                    state = await conn.fetchrow(
+                        f"""
+                        SELECT last_log_id, pending_log_id, pending_xmax,
+                               pg_snapshot_xmin(pg_current_snapshot())::text::bigint AS oldest_running_xid
+                        FROM {self.rollup_state_table} WHERE id = 1 FOR UPDATE
+                        """
+                    )
+                    if state is None:
+                        return 0
+                    last_id = upper_id = state["last_log_id"]
+                    pending_id = state["pending_log_id"]
+                    if pending_id is not None and pending_id > last_id and state["oldest_running_xid"] >= state["pending_xmax"]:
+                        await conn.execute(upsert_sql, last_id, pending_id)
+                        upper_id = pending_id
+                    elif pending_id is not None and pending_id > last_id:
+                        # Writers that were in flight when the candidate was taken are still running
+                        return 0
+                    candidate = await conn.fetchrow(
+                        f"""
+                        SELECT MAX(id) AS log_id, pg_snapshot_xmax(pg_current_snapshot())::text::bigint AS xmax
+                        FROM {self.table_name} WHERE id > $1
+                        """,
+                        upper_id
+                    )
+                    await conn.execute(
+                        f"""
+                        UPDATE {self.rollup_state_table}
+                        SET last_log_id = $1, pending_log_id = $2, pending_xmax = $3, updated_at = NOW()
+                        WHERE id = 1
+                        """,
+                        upper_id, candidate["log_id"], candidate["xmax"]
+                    )
+            rolled = upper_id - last_id
+            if rolled:
+                log.info(f"[TokenUsageRollup] Compacted token_usage_logs ids ({last_id}, {upper_id}] into hourly rollups")
+            return rolled
+        except Exception as e:
+            log.error(f"❌ [TokenUsageRollup] refresh failed: {e}", exc_info=True)
+            return 0
+
+    async def schedule_rollup_refresh(self, interval_seconds: float = TOKEN_USAGE_ROLLUP_INTERVAL_SECONDS) -> None:
+        """Background loop that keeps the hourly rollups current."""
+        log.info(f"[TokenUsageRollup] Background task started. Refreshing every {interval_seconds} seconds.")
+        while True:
+            await self.refresh_rollups()
+            await asyncio.sleep(interval_seconds)
+
+    async def get_aggregated_report(
+        self,
+        user_id: Optional[str] = None,
+        agent_id: Optional[str] = None,
+        agent_name: Optional[str] = None,
+        date_from: Optional[datetime] = None,
+        date_to: Optional[datetime] = None,
+        model: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """
+        Return totals plus daily / per-model / per-category / per-agent breakdowns.
+
+        Reads the hourly rollups and merges the raw rows above the watermark, so
+        the cost is proportional to the number of distinct dimension values
+        rather than to the number of logged LLM calls.
+        """
+        rollup_conditions, raw_conditions = [], []
+        params: List[Any] = []
+
+        def _add(rollup_expr: str, raw_expr: str, value: Any) -> None:
+            params.append(value)
+            rollup_conditions.append(rollup_expr.format(p=f"${len(params)}"))
+            raw_conditions.append(raw_expr.format(p=f"${len(params)}"))
+
+        if user_id:
+            _add("user_id = {p}", "user_id = {p}", user_id)
+        if agent_id:
+            _add("agent_id = {p}", "CAST(agent_id AS TEXT) = {p}", str(agent_id))
+        if agent_name:
+            _add("agent_name ILIKE {p}", "agent_name ILIKE {p}", f"%{agent_name}%")
+        if model:
+            _add("model_name ILIKE {p}", "model_name ILIKE {p}", f"%{model}%")
+        if date_from:
+            _add("bucket_start >= date_trunc('hour', {p}::timestamptz)", "timestamp >= {p}", date_from)
+        if date_to:
+            _add("bucket_start <= {p}", "timestamp <= {p}", date_to)
+
+        rollup_where = ("AND " + " AND ".join(rollup_conditions)) if rollup_conditions else ""
+        raw_where = ("AND " + " AND ".join(raw_conditions)) if raw_conditions else ""
+        measures = ", ".join(self._ROLLUP_MEASURES)
+        measure_sums = ", ".join(f"COALESCE(SUM({m}), 0) AS {m}" for m in self._ROLLUP_MEASURES)
+        counters = ", ".join(self._ROLLUP_COUNTERS)
+        raw_counters = ", ".join(self._ROLLUP_COUNTERS.values())
+        counter_sums = ", ".join(f"COALESCE(SUM({c}), 0) AS {c}" for c in self._ROLLUP_COUNTERS)
+
+        sql = f"""
+            WITH watermark AS (
+                SELECT COALESCE((SELECT last_log_id FROM {self.rollup_state_table} WHERE id = 1), 0) AS last_log_id
+            ),
+            combined AS (
+                SELECT bucket_start, agent_id, agent_name, model_name, call_category,
+                       {counters}, {measures}
+                FROM {self.rollup_table}
+                WHERE TRUE {rollup_where}
+                UNION ALL
+                SELECT date_trunc('hour', timestamp),
+                       COALESCE(CAST(agent_id AS TEXT), ''), COALESCE(agent_name, ''),
+                       COALESCE(model_name, ''), COALESCE(call_category, ''),
+                       {raw_counters}, {measures}
+                FROM {self.table_name}
+                WHERE id > (SELECT last_log_id FROM watermark) {raw_where}
+            )
+            SELECT
+                GROUPING(date_trunc('day', bucket_start)) AS g_day,
+                GROUPING(model_name) AS g_model,
+                GROUPING(call_category) AS g_category,
+                GROUPING(agent_id, agent_name) AS g_agent,
+                date_trunc('day', bucket_start) AS day,
+                model_name, call_category, agent_id, agent_name,
+                {counter_sums},
+                {measure_sums}
+            FROM combined
+            GROUP BY GROUPING SETS (
+                (), (date_trunc('day', bucket_start)), (model_name), (call_category), (agent_id, agent_name)
+            )
+        """
+        report: Dict[str, Any] = {
+            "summary": {}, "daily": [], "by_model": [], "by_category": [], "by_agent": [],
+            "llm_response_cache": {"hits": 0, "tokens_saved": 0, "hit_rate": 0.0},
+        }
+        try:
+            async with self.pool.acquire() as conn:
+                rows = await conn.fetch(sql, *params)
+        except Exception as e:
+            log.error(f"❌ [TokenUsageLogs] get_aggregated_report failed: {e}", exc_info=True)
+            return report
+
+        for r in rows:
+            totals = {c: int(r[c] or 0) for c in self._ROLLUP_COUNTERS}
+            for m in self._ROLLUP_MEASURES:
+                totals[m] = float(r[m]) if m.endswith("_cost") else int(r[m])
+            if not r["g_day"]:
+                report["daily"].append({"date": r["day"].strftime("%Y-%m-%d"), **totals})
+            elif not r["g_model"]:
+                report["by_model"].append({"model_name": r["model_name"] or "unknown", **totals})
+            elif not r["g_category"]:
+                report["by_category"].append({"call_category": r["call_category"] or "uncategorized", **totals})
+            elif not r["g_agent"]:
+                report["by_agent"].append({
+                    "agent_id": r["agent_id"] or None, "agent_name": r["agent_name"] or None, **totals
+                })
+            else:
+                report["summary"] = totals
+
+        hits = report["summary"].get("cache_hit_count", 0)
+        calls = report["summary"].get("call_count", 0)
+        # Share of LLM requests answered by the response cache instead of the provider
+        report["llm_response_cache"] = {
+            "hits": hits,
+            "tokens_saved": report["summary"].get("cache_tokens_saved", 0),
+            "hit_rate": round(hits / (hits + calls), 4) if hits + calls else 0.0,
+        }
+        report["daily"].sort(key=lambda d: d["date"])
+        for key in ("by_model", "by_category", "by_agent"):
+            report[key].sort(key=lambda d: d["total_cost"], reverse=True)
+        return report
+
 
 # --- ModelCostsRepository ---
 
@@ -15777,3 +16794,73 @@ class ModelCostsRepository(BaseRepository):
             log.info(f"✅ ModelCostsRepository: table '{self.table_name}' ready.")
         except Exception as e:
             log.error(f"❌ ModelCostsRepository: failed to create table: {e}", exc_info=True)
+
+
+# --- QueryLibraryIndexRepository ---
+
+class QueryLibraryIndexRepository(BaseRepository):
+    """
+    Persists the near-duplicate query library index (see src/utils/query_library_index.py)
+    per (user, agent), so the auto-suggest endpoint only indexes queries it has not seen before.
+    """
+
+    def __init__(self, pool: asyncpg.Pool, login_pool: asyncpg.Pool,
+                 table_name: str = TableNames.QUERY_LIBRARY_INDEX.value):
+        super().__init__(pool, login_pool, table_name=table_name)
+
+    async def create_table_if_not_exists(self) -> None:
+        create_sql = f"""
+        CREATE TABLE IF NOT EXISTS {self.table_name} (
+            user_email             TEXT NOT NULL,
+            agentic_application_id TEXT NOT NULL,
+            index_state            JSONB NOT NULL DEFAULT '{{}}'::jsonb,
+            updated_at             TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (user_email, agentic_application_id)
+        );
+        """
+        try:
+            async with self.pool.acquire() as conn:
+                await conn.execute(create_sql)
+            log.info(f"✅ QueryLibraryIndexRepository: table '{self.table_name}' ready.")
+        except Exception as e:
+            log.error(f"❌ QueryLibraryIndexRepository: failed to create table: {e}", exc_info=True)
+
+    async def get_index_state(self, user_email: str, agentic_application_id: str) -> Optional[Dict[str, Any]]:
+        """Returns the persisted index state, or None if there is none yet."""
+        query = f"SELECT index_state FROM {self.table_name} WHERE user_email = $1 AND agentic_application_id = $2"
+        try:
+            async with self.pool.acquire() as conn:
+                state = await conn.fetchval(query, user_email, agentic_application_id)
+            if isinstance(state, str):
+                state = json.loads(state)
+            return state
+        except Exception as e:
+            log.error(f"Error fetching query library index for user '{user_email}' and agent '{agentic_application_id}': {e}")
+            return None
+
+    async def delete_index_states(self, agentic_application_id: str) -> bool:
+        """Drops the persisted indexes of every user of the agent, so they are rebuilt from the remaining history."""
+        query = f"DELETE FROM {self.table_name} WHERE agentic_application_id = $1"
+        try:
+            async with self.pool.acquire() as conn:
+                await conn.execute(query, agentic_application_id)
+            return True
+        except Exception as e:
+            log.error(f"Error deleting query library indexes for agent '{agentic_application_id}': {e}")
+            return False
+
+    async def save_index_state(self, user_email: str, agentic_application_id: str, index_state: Dict[str, Any]) -> bool:
+        """Upserts the index state for the (user, agent) pair."""
+        query = f"""
+        INSERT INTO {self.table_name} (user_email, agentic_application_id, index_state, updated_at)
+        VALUES ($1, $2, $3::jsonb, CURRENT_TIMESTAMP)
+        ON CONFLICT (user_email, agentic_application_id)
+        DO UPDATE SET index_state = EXCLUDED.index_state, updated_at = EXCLUDED.updated_at
+        """
+        try:
+            async with self.pool.acquire() as conn:
+                await conn.execute(query, user_email, agentic_application_id, json.dumps(index_state))
+            return True
+        except Exception as e:
+            log.error(f"Error saving query library index for user '{user_email}' and agent '{agentic_application_id}': {e}")
+            return False
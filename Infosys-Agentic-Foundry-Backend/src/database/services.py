@@ -3,17 +3,18 @@ import os
 import re
 import ast
 import json
+import time
+import base64
 import uuid
 import shutil
 import inspect
 import hashlib
 import asyncio
-import difflib
 import subprocess
 import pandas as pd
 from pathlib import Path
 from urllib.parse import urlparse
-from datetime import datetime, timezone
+from datetime import datetime, timezone, timedelta
 from typing import List, Optional, Union, Dict, Any, Literal, Tuple, Set
 from fastapi import UploadFile, HTTPException
 from langchain_core.tools import BaseTool, StructuredTool
@@ -44,7 +45,7 @@ from src.database.repositories import (
     AgentMetadataRepository, ChatStateHistoryManagerRepository, WorkflowRepository, WorkflowRunRepository, AgentWorkflowMappingRepository,
     WorkflowStepsRepository, save_pending_module, get_all_pending_modules, ToolGenerationCodeVersionRepository, 
     UserAgentAccessRepository, GroupRepository, GroupSecretsRepository, ToolAccessKeyMappingRepository,
-    AccessKeyDefinitionsRepository, ToolDepartmentSharingRepository, TaskRegistryRepository
+    AccessKeyDefinitionsRepository, ToolDepartmentSharingRepository, TaskRegistryRepository, QueryLibraryIndexRepository
 )
 from src.database.admin_config_service import AdminConfigService
 from src.auth.repositories import RoleRepository, UserRepository, AuditLogRepository, DepartmentRepository
@@ -55,11 +56,35 @@ from src.tools.tool_code_processor import ToolCodeProcessor
 from src.utils.secrets_handler import get_user_secrets, current_user_email, current_request_headers
 from src.utils.tool_file_manager import ToolFileManager
 from src.utils.kafka_manager import KafkaManager
+from src.utils.query_library_index import QueryLibraryIndex, QUERY_LIBRARY_SIMILARITY_THRESHOLD, QUERY_LIBRARY_WATERMARK_OVERLAP_SECONDS
 from src.config.constants import AgentType, FrameworkType, Limits, TableNames
 from telemetry_wrapper import logger as log, update_session_context
 from src.tools.tool_validation import graph
 
 
+# --- Checkpoint compaction (bounded-growth mode for LangGraph checkpoint tables) ---
+CHECKPOINT_COMPACTION_ENABLED = os.getenv("CHECKPOINT_COMPACTION_ENABLED", "False").lower() == "true"
+CHECKPOINT_COMPACTION_INTERVAL_SECONDS = float(os.getenv("CHECKPOINT_COMPACTION_INTERVAL_SECONDS", "900"))
+CHECKPOINT_COMPACTION_KEEP_CHECKPOINTS = int(os.getenv("CHECKPOINT_COMPACTION_KEEP_CHECKPOINTS", "5"))
+CHECKPOINT_COMPACTION_IDLE_SECONDS = float(os.getenv("CHECKPOINT_COMPACTION_IDLE_SECONDS", "1800"))
+CHECKPOINT_COMPACTION_BATCH_THREADS = int(os.getenv("CHECKPOINT_COMPACTION_BATCH_THREADS", "50"))
+# Message truncation: keep at most this many messages per channel (0 = never truncate).
+# Requires CHECKPOINT_COMPACTION_SUMMARY_MODEL, so dropped messages are first folded into the conversation summary.
+CHECKPOINT_COMPACTION_MAX_MESSAGES = int(os.getenv("CHECKPOINT_COMPACTION_MAX_MESSAGES", "0"))
+CHECKPOINT_COMPACTION_SUMMARY_MODEL = os.getenv("CHECKPOINT_COMPACTION_SUMMARY_MODEL", "")
+CHECKPOINT_COMPACTION_MESSAGE_CHANNELS = [
+    c.strip() for c in os.getenv("CHECKPOINT_COMPACTION_MESSAGE_CHANNELS", "executor_messages,ongoing_conversation").split(",") if c.strip()
+]
+# --- Long-term chat history storage (defaults to per_agent; dual and unified are opted into for the migration) ---
+# per_agent: one table_<agent_id> table per agent (legacy)
+# dual:      write both the per-agent tables and the unified chat_history table, read the per-agent tables (transition);
+#            the per-agent write decides success, the unified copy is a best-effort mirror written after it
+# unified:   read and write only the unified chat_history table
+CHAT_HISTORY_STORAGE_MODE = os.getenv("CHAT_HISTORY_STORAGE_MODE", "per_agent").lower()
+CHAT_HISTORY_WRITE_LEGACY = CHAT_HISTORY_STORAGE_MODE != "unified"
+CHAT_HISTORY_WRITE_UNIFIED = CHAT_HISTORY_STORAGE_MODE in ("dual", "unified")
+CHAT_HISTORY_READ_UNIFIED = CHAT_HISTORY_STORAGE_MODE == "unified"
+
 
 # --- Tag Service ---
 
@@ -9113,7 +9138,8 @@ class ChatService:
             tool_repo: ToolRepository = None,
             agent_repo: AgentRepository = None,
             authorization_service: AuthorizationService = None,
-            gadk_session_service: DatabaseSessionService = None
+            gadk_session_service: DatabaseSessionService = None,
+            query_library_index_repo: QueryLibraryIndexRepository = None
         ):
         """
         Initializes the ChatService.
@@ -9127,8 +9153,10 @@ class ChatService:
             tool_repo (ToolRepository): The repository for tool data access (for updating last_used).
             agent_repo (AgentRepository): The repository for agent data access.
             gadk_session_service (DatabaseSessionService, optional): The database session service. Defaults to None.
+            query_library_index_repo (QueryLibraryIndexRepository, optional): Persists the query library index per user and agent.
         """
         self.repo = chat_history_repo
+        self.query_library_index_repo = query_library_index_repo
         self.chat_state_history_manager = chat_state_history_manager
         self.admin_config_service = admin_config_service    
         self.embedding_model = embedding_model
@@ -9137,6 +9165,7 @@ class ChatService:
         self.agent_repo = agent_repo
         self.authorization_service = authorization_service
         self.conversation_summary_prompt_template = PromptTemplate.from_template(CONVERSATION_SUMMARY_PROMPT)
+        self.checkpoint_compaction_stats: Dict[str, Any] = {}
         self.python_based_agent_types = [agent_type.value for agent_type in AgentType.python_based_types()]
         # db_url = "sqlite:///./google_adk_db1.db"
         db_url = chat_history_repo.DB_URL
@@ -9220,23 +9249,93 @@ class ChatService:
             bool: True if successful, False otherwise.
         """
         table_name = await self._get_chat_history_table_name(agentic_application_id)
+        record = dict(
+            session_id=session_id,
+            start_timestamp=start_timestamp,
+            end_timestamp=end_timestamp,
+            human_message=human_message,
+            ai_message=ai_message,
+            response_time=response_time
+        )
         try:
-            # Orchestration: ensure table exists, then insert.
-            await self.repo.create_chat_history_table(table_name)
-            await self.repo.insert_chat_record(
-                table_name=table_name,
-                session_id=session_id,
-                start_timestamp=start_timestamp,
-                end_timestamp=end_timestamp,
-                human_message=human_message,
-                ai_message=ai_message,
-                response_time=response_time
-            )
-            return True
+            if CHAT_HISTORY_WRITE_LEGACY:
+                # Orchestration: ensure table exists, then insert.
+                await self.repo.create_chat_history_table(table_name)
+                await self.repo.insert_chat_record(table_name=table_name, **record)
+            else:
+                await self.repo.insert_unified_chat_record(agentic_application_id=agentic_application_id, **record)
         except Exception as e:
             log.error(f"Service-level error saving chat message for session '{session_id}': {e}")
             return False
 
+        if CHAT_HISTORY_WRITE_LEGACY and CHAT_HISTORY_WRITE_UNIFIED:
+            await self._mirror_to_unified_chat_history(
+                f"saving chat message for session '{session_id}'",
+                self.repo.insert_unified_chat_record(agentic_application_id=agentic_application_id, **record)
+            )
+        return True
+
+    @staticmethod
+    async def _mirror_to_unified_chat_history(operation: str, write) -> None:
+        """
+        Runs a dual-mode write against the unified chat_history table.
+        In dual mode the per-agent tables are still the ones read, so their write decides success;
+        the unified copy is written afterwards and a failure there is only logged.
+        """
+        try:
+            await write
+        except Exception as e:
+            log.warning(f"Unified chat_history mirror failed while {operation}: {e}")
+
+    # Chat log file: a single JSON file organized by agent_id and session_id
+    # Structure: { agent_id: { session_id: { messages: [], summaries: [], ... } } }
+    CHAT_LOG_MAX_MESSAGES_BEFORE_SUMMARY = 10
+    CHAT_LOG_MESSAGES_KEPT_AFTER_SUMMARY = 5
+
+    @staticmethod
+    def _chat_log_paths() -> Tuple[str, str]:
+        """Returns the chat_logs directory (created if missing) and the conversations file path."""
+        # Relative to this file's location
+        chat_logs_dir = os.path.join(os.path.dirname(__file__), "..", "inference", "chat_logs")
+        os.makedirs(chat_logs_dir, exist_ok=True)
+        return chat_logs_dir, os.path.join(chat_logs_dir, "conversations.json")
+
+    @staticmethod
+    def _load_chat_log(filepath: str) -> Dict[str, Any]:
+        if not os.path.exists(filepath):
+            return {}
+        try:
+            with open(filepath, 'r', encoding='utf-8') as f:
+                content = f.read().strip()
+                return json.loads(content) if content else {}
+        except (json.JSONDecodeError, FileNotFoundError) as e:
+            log.warning(f"Error reading conversations.json, starting fresh: {e}")
+            return {}
+
+    @staticmethod
+    def _write_chat_log(all_conversations: Dict[str, Any], chat_logs_dir: str, filepath: str) -> None:
+        """Atomic write: write to a temp file, then rename."""
+        import tempfile
+
+        # First serialize to ensure valid JSON
+        json_content = json.dumps(all_conversations, indent=2, ensure_ascii=False)
+        temp_fd, temp_path = tempfile.mkstemp(dir=chat_logs_dir, suffix='.tmp')
+        try:
+            with os.fdopen(temp_fd, 'w', encoding='utf-8') as f:
+                f.write(json_content)
+                f.flush()
+                os.fsync(f.fileno())  # Ensure data is written to disk
+
+            # Atomic replace (on Windows, need to remove first)
+            if os.path.exists(filepath):
+                os.remove(filepath)
+            shutil.move(temp_path, filepath)
+        except Exception:
+            # Clean up temp file if it exists
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+
     async def save_chat_to_file(
         self,
         agentic_application_id: str, 
@@ -9249,8 +9348,7 @@ class ChatService:
     ) -> bool:
         """
         Saves chat message to a single JSON file organized by agent_id and session_id.
-        If messages exceed 10, summarizes older messages using LLM.
-        Structure: { agent_id: { session_id: { messages: [], summaries: [], ... } } }
+        If llm is given and messages exceed 10, older messages are then summarized (see summarize_chat_log_session).
         
         Args:
             agentic_application_id: The agent application ID
@@ -9264,27 +9362,14 @@ class ChatService:
         Returns:
             bool: True if successful, False otherwise
         """
-        import os
-        import json
-        import tempfile
-        import shutil
-        from datetime import datetime
-        
         # Helper function to convert datetime to string
         def ensure_string(value):
             if isinstance(value, datetime):
                 return value.isoformat()
             return str(value) if value is not None else ""
         
-        MAX_MESSAGES_BEFORE_SUMMARY = 10
-        
         try:
-            # Create the chat_logs directory path (relative to this file's location)
-            chat_logs_dir = os.path.join(os.path.dirname(__file__), "..", "inference", "chat_logs")
-            os.makedirs(chat_logs_dir, exist_ok=True)
-            
-            # Single file for all conversations
-            filepath = os.path.join(chat_logs_dir, "conversations.json")
+            chat_logs_dir, filepath = self._chat_log_paths()
             
             # Prepare the chat entry (convert datetime to string if needed)
             chat_entry = {
@@ -9294,19 +9379,7 @@ class ChatService:
                 "ai_message": str(ai_message) if ai_message else ""
             }
             
-            # Load existing data or create new structure
-            all_conversations = {}
-            if os.path.exists(filepath):
-                try:
-                    with open(filepath, 'r', encoding='utf-8') as f:
-                        content = f.read().strip()
-                        if content:
-                            all_conversations = json.loads(content)
-                        else:
-                            all_conversations = {}
-                except (json.JSONDecodeError, FileNotFoundError) as e:
-                    log.warning(f"Error reading conversations.json, starting fresh: {e}")
-                    all_conversations = {}
+            all_conversations = self._load_chat_log(filepath)
             
             # Initialize agent_id key if not exists
             if agentic_application_id not in all_conversations:
@@ -9328,83 +9401,72 @@ class ChatService:
             all_conversations[agentic_application_id][session_id]["messages"].append(chat_entry)
             all_conversations[agentic_application_id][session_id]["updated_at"] = ensure_string(end_timestamp)
             
-            # Check if messages exceed threshold - if so, summarize older ones
-            messages = all_conversations[agentic_application_id][session_id]["messages"]
-            if len(messages) > MAX_MESSAGES_BEFORE_SUMMARY and llm:
-                try:
-                    # Get messages to summarize (all except the last 5)
-                    messages_to_summarize = messages[:-5]
-                    messages_to_keep = messages[-5:]
-                    
-                    # Format messages for summarization (same format as get_chat_summary)
-                    chat_history = "\n\n".join([
-                        f"""Human Message: {msg['human_message']}
+            self._write_chat_log(all_conversations, chat_logs_dir, filepath)
+            log.info(f"Chat saved to file: {filepath} [Agent: {agentic_application_id[:8]}..., Session: {session_id[:8]}...]")
+        except Exception as e:
+            log.error(f"Failed to save chat to file: {e}")
+            return False
+
+        if llm:
+            await self.summarize_chat_log_session(agentic_application_id, session_id, llm)
+        return True
+
+    async def summarize_chat_log_session(self, agentic_application_id: str, session_id: str, llm: Any) -> bool:
+        """
+        Folds all but the latest messages of a session in the chat log file into a summary once
+        the session holds more than CHAT_LOG_MAX_MESSAGES_BEFORE_SUMMARY messages.
+        The file is re-read after the LLM call, so messages appended meanwhile are kept.
+
+        Returns:
+            bool: False if summarization failed, True otherwise (including when there is nothing to summarize)
+        """
+        try:
+            chat_logs_dir, filepath = self._chat_log_paths()
+            session = self._load_chat_log(filepath).get(agentic_application_id, {}).get(session_id)
+            messages = session.get("messages", []) if session else []
+            if len(messages) <= self.CHAT_LOG_MAX_MESSAGES_BEFORE_SUMMARY:
+                return True
+
+            messages_to_summarize = messages[:-self.CHAT_LOG_MESSAGES_KEPT_AFTER_SUMMARY]
+            # Format messages for summarization (same format as get_chat_summary)
+            chat_history = "\n\n".join([
+                f"""Human Message: {msg['human_message']}
     AI Message: {msg['ai_message']}"""
-                        for msg in messages_to_summarize
-                    ])
-                    
-                    # Get existing summary from file (past_conversation_summary)
-                    existing_summaries = all_conversations[agentic_application_id][session_id].get("summaries", [])
-                    past_conversation_summary = ""
-                    if existing_summaries:
-                        # Combine all existing summaries
-                        past_conversation_summary = "\n\n".join([s.get("summary", "") for s in existing_summaries if s.get("summary")])
-                    
-                    # Use the same CONVERSATION_SUMMARY_PROMPT approach
-                    conversation_summary_chain = self.conversation_summary_prompt_template | llm | StrOutputParser()
-                    summary_text = await conversation_summary_chain.ainvoke({
-                        "chat_history": chat_history,
-                        "past_conversation_summary": past_conversation_summary
-                    })
-                    
-                    # Create summary entry
-                    summary_entry = {
-                        "summarized_at": ensure_string(end_timestamp),
-                        "message_count": len(messages_to_summarize),
-                        "time_range": {
-                            "from": messages_to_summarize[0]["start_timestamp"],
-                            "to": messages_to_summarize[-1]["end_timestamp"]
-                        },
-                        "summary": summary_text
-                    }
-                    
-                    # Add to summaries and keep only recent messages
-                    all_conversations[agentic_application_id][session_id]["summaries"].append(summary_entry)
-                    all_conversations[agentic_application_id][session_id]["messages"] = messages_to_keep
-                    
-                    log.info(f"Summarized {len(messages_to_summarize)} messages for session {session_id[:8]}...")
-                    
-                except Exception as e:
-                    log.error(f"Failed to summarize conversation: {e}")
-                    # Continue without summarization if it fails
-            
-            # Save to file using atomic write (write to temp file, then rename)
-            # First serialize to ensure valid JSON
-            json_content = json.dumps(all_conversations, indent=2, ensure_ascii=False)
-            
-            # Write to temp file first
-            temp_fd, temp_path = tempfile.mkstemp(dir=chat_logs_dir, suffix='.tmp')
-            try:
-                with os.fdopen(temp_fd, 'w', encoding='utf-8') as f:
-                    f.write(json_content)
-                    f.flush()
-                    os.fsync(f.fileno())  # Ensure data is written to disk
-                
-                # Atomic replace (on Windows, need to remove first)
-                if os.path.exists(filepath):
-                    os.remove(filepath)
-                shutil.move(temp_path, filepath)
-                
-                log.info(f"Chat saved to file: {filepath} [Agent: {agentic_application_id[:8]}..., Session: {session_id[:8]}...]")
+                for msg in messages_to_summarize
+            ])
+            # Combine all existing summaries from the file (past_conversation_summary)
+            past_conversation_summary = "\n\n".join([s.get("summary", "") for s in session.get("summaries", []) if s.get("summary")])
+
+            # Use the same CONVERSATION_SUMMARY_PROMPT approach
+            conversation_summary_chain = self.conversation_summary_prompt_template | llm | StrOutputParser()
+            summary_text = await conversation_summary_chain.ainvoke({
+                "chat_history": chat_history,
+                "past_conversation_summary": past_conversation_summary
+            })
+
+            # Messages may have been appended during the LLM call; only the summarized ones are dropped
+            all_conversations = self._load_chat_log(filepath)
+            session = all_conversations.get(agentic_application_id, {}).get(session_id)
+            if not session:
                 return True
-            except Exception as e:
-                # Clean up temp file if it exists
-                if os.path.exists(temp_path):
-                    os.remove(temp_path)
-                raise e
-                
+            summarized = {(msg["start_timestamp"], msg["end_timestamp"]) for msg in messages_to_summarize}
+            session["messages"] = [
+                msg for msg in session.get("messages", []) if (msg["start_timestamp"], msg["end_timestamp"]) not in summarized
+            ]
+            session.setdefault("summaries", []).append({
+                "summarized_at": session.get("updated_at", messages_to_summarize[-1]["end_timestamp"]),
+                "message_count": len(messages_to_summarize),
+                "time_range": {
+                    "from": messages_to_summarize[0]["start_timestamp"],
+                    "to": messages_to_summarize[-1]["end_timestamp"]
+                },
+                "summary": summary_text
+            })
+            self._write_chat_log(all_conversations, chat_logs_dir, filepath)
+            log.info(f"Summarized {len(messages_to_summarize)} messages for session {session_id[:8]}...")
+            return True
         except Exception as e:
-            log.error(f"Failed to save chat to file: {e}")
+            log.error(f"Failed to summarize conversation: {e}")
             return False
 
     async def update_latest_response_time(
@@ -9427,17 +9489,34 @@ class ChatService:
         """
         table_name = await self._get_chat_history_table_name(agentic_application_id)
         try:
-            await self.repo.create_chat_history_table(table_name)
-            return await self.repo.update_latest_response_time(
-                table_name=table_name,
-                session_id=session_id,
-                response_time=response_time
-            )
-                    
+            if CHAT_HISTORY_WRITE_LEGACY:
+                await self.repo.create_chat_history_table(table_name)
+                updated = await self.repo.update_latest_response_time(
+                    table_name=table_name,
+                    session_id=session_id,
+                    response_time=response_time
+                )
+            else:
+                updated = await self.repo.update_unified_latest_response_time(
+                    agentic_application_id=agentic_application_id,
+                    session_id=session_id,
+                    response_time=response_time
+                )
         except Exception as e:
             log.error(f"Service-level error updating response time for session '{session_id}': {e}")
             return False
 
+        if CHAT_HISTORY_WRITE_LEGACY and CHAT_HISTORY_WRITE_UNIFIED:
+            await self._mirror_to_unified_chat_history(
+                f"updating response time for session '{session_id}'",
+                self.repo.update_unified_latest_response_time(
+                    agentic_application_id=agentic_application_id,
+                    session_id=session_id,
+                    response_time=response_time
+                )
+            )
+        return updated
+
     async def get_chat_history_from_short_term_memory(
         self,
         agentic_application_id: str,
@@ -9516,11 +9595,8 @@ class ChatService:
         elif framework_type == FrameworkType.LANGGRAPH:
             try:
                 # ... (original logic for standard LangGraph agents)
+                # The shared checkpointer runs setup() once when it is created
                 async with await self.get_checkpointer_context_manager() as checkpointer:
-                # checkpointer.setup() is often called implicitly or handled by LangGraph's app.compile()
-                # but explicitly calling it here ensures the table exists if it's the first time.
-                # However, for just retrieving, it might not be strictly necessary if tables are pre-created.
-                    await checkpointer.setup() # Ensure table exists
                     config = await self._get_thread_config(thread_id)
                     data = await checkpointer.aget(config) # Retrieve the state
                     data = data.get("channel_values", {}) if data else {}
@@ -9559,6 +9635,12 @@ class ChatService:
         Returns:
             A list of chat history records.
         """
+        if CHAT_HISTORY_READ_UNIFIED:
+            return await self.repo.get_unified_chat_records_by_session(
+                agentic_application_id=agentic_application_id,
+                session_id=session_id,
+                limit=limit
+            )
         table_name = await self._get_chat_history_table_name(agentic_application_id)
         return await self.repo.get_chat_records_by_session_from_long_term_memory(
             table_name=table_name,
@@ -9575,49 +9657,50 @@ class ChatService:
             executor_messages=None,
             executor_message_limit=Limits.LANGGRAPH_EXECUTOR_MESSAGES_LIMIT
         ) -> str:
-        """Retrieves a summary of the conversation history for a given session ID."""
-        # return ""
-        conversation_history_df = pd.DataFrame(
-            await self.get_chat_history_from_long_term_memory(
-                    agentic_application_id=agentic_application_id,
-                    session_id=session_id,
-                    limit=conversation_limit
-                )
+        """
+        Folds the chat turns added since the last summary into the stored conversation summary of a session.
+        Only turns newer than the session's summary watermark (at most the `conversation_limit` most recent ones)
+        are sent to the LLM along with the previous summary, so the cost of a summary does not grow with the conversation.
+        """
+        summary_state = await self.repo.get_agent_conversation_summary_state(
+            agentic_application_id=agentic_application_id,
+            session_id=session_id
+        ) or {}
+        past_conversation_summary = summary_state.get("summary") or ""
+        summary_watermark = summary_state.get("summary_watermark")
+
+        recent_records = await self.get_chat_history_from_long_term_memory(
+            agentic_application_id=agentic_application_id,
+            session_id=session_id,
+            limit=conversation_limit
         )
-        conversation_summary_chain = await self._get_summary_chain(llm)
+        new_records = sorted(
+            (record for record in recent_records if summary_watermark is None or record["end_timestamp"] > summary_watermark),
+            key=lambda record: (record["start_timestamp"] or record["end_timestamp"], record["end_timestamp"])
+        )
+        if not new_records:
+            log.debug(f"No new turns to summarize for session {session_id}")
+            return past_conversation_summary
+
+        chat_history = "\n\n".join(
+            f"""Human Message: {record["human_message"]}
+    AI Message: {record["ai_message"]}"""
+            for record in new_records
+        )
+        if executor_messages:
+            chat_history += "\n\n" + "\n\n".join(self.get_formatted_messages(messages=executor_messages, msg_limit=executor_message_limit))
 
-        # Process chat history if available
-        if len(conversation_history_df):
-            conversation_history_df = conversation_history_df.sort_values(
-                by=["start_timestamp", "end_timestamp"]
-            ).reset_index(drop=True)
-            chat_history = "\n\n".join(
-                [
-                    f"""Human Message: {Human_Message}
-    AI Message: {AI_Message}"""
-                    for Human_Message, AI_Message in conversation_history_df[
-                        ["human_message", "ai_message"]
-                    ].itertuples(index=False)
-                ]
-            )
-            if executor_messages:
-                chat_history += "\n\n" + "\n\n".join(self.get_formatted_messages(messages=executor_messages, msg_limit=executor_message_limit))
-            past_conversation_summary = await self.repo.get_agent_conversation_summary_with_preference(
-                                agentic_application_id=agentic_application_id,
-                                session_id=session_id
-                                )
-            past_conversation_summary = past_conversation_summary.get("summary", "") if past_conversation_summary else ""
-            conversation_summary = await conversation_summary_chain.ainvoke(
-                {"chat_history": chat_history, "past_conversation_summary": past_conversation_summary}
-            )
-            await self.repo.update_agent_conversation_summary(
-                agentic_application_id=agentic_application_id,
-                session_id=session_id,
-                summary=conversation_summary
-            )
-            log.debug("Chat summary stored successfully")
-        else:
-            conversation_summary = ""
+        conversation_summary_chain = await self._get_summary_chain(llm)
+        conversation_summary = await conversation_summary_chain.ainvoke(
+            {"chat_history": chat_history, "past_conversation_summary": past_conversation_summary}
+        )
+        await self.repo.update_agent_conversation_summary(
+            agentic_application_id=agentic_application_id,
+            session_id=session_id,
+            summary=conversation_summary,
+            summary_watermark=max(record["end_timestamp"] for record in new_records)
+        )
+        log.debug("Chat summary stored successfully")
         log.info(f"Conversation Summary generated for agent id {agentic_application_id} and session {session_id}")
         return conversation_summary
     
@@ -9639,6 +9722,202 @@ class ChatService:
             session_id=session_id
         )
 
+    # --- Checkpoint Compaction ---
+
+    async def _get_thread_owners(self) -> Dict[str, str]:
+        """
+        Maps the thread id prefix of every agent (as built by _get_thread_id) to its agent id,
+        so checkpoint threads can be attributed for every agent id shape ('<code>_<uuid>' and legacy UUIDs).
+        """
+        if not self.agent_repo:
+            return {}
+        agent_records = await self.agent_repo.get_all_agent_records()
+        return {
+            await self._get_thread_id(record["agentic_application_id"], ""): record["agentic_application_id"]
+            for record in agent_records
+        }
+
+    @staticmethod
+    def _resolve_thread_owner(thread_id: str, thread_owners: Dict[str, str]) -> Optional[Tuple[str, str]]:
+        """Returns (agentic_application_id, session_id) of a checkpoint thread, or None for unknown agents."""
+        for prefix_length in sorted({len(prefix) for prefix in thread_owners}, reverse=True):
+            agentic_application_id = thread_owners.get(thread_id[:prefix_length])
+            if agentic_application_id and len(thread_id) > prefix_length:
+                return agentic_application_id, thread_id[prefix_length:]
+        return None
+
+    async def _timed_state_load(self, checkpointer, thread_id: str, checkpoint_ns: str) -> float:
+        start = time.perf_counter()
+        await checkpointer.aget_tuple({"configurable": {"thread_id": thread_id, "checkpoint_ns": checkpoint_ns}})
+        return (time.perf_counter() - start) * 1000
+
+    async def _truncate_thread_messages(self, checkpointer, thread_id: str, checkpoint_ns: str, llm, thread_owners: Dict[str, str]) -> int:
+        """
+        Folds messages beyond CHECKPOINT_COMPACTION_MAX_MESSAGES into the conversation summary and
+        rewrites the latest message blobs without them. The cut is moved forward to a human message
+        so no tool result is separated from the AI message that requested it. Returns bytes saved.
+        """
+        parsed = self._resolve_thread_owner(thread_id, thread_owners)
+        if not parsed or checkpoint_ns:
+            return 0
+        agentic_application_id, session_id = parsed
+        bytes_saved = 0
+        for channel in CHECKPOINT_COMPACTION_MESSAGE_CHANNELS:
+            row = await self.repo.get_latest_channel_blob(thread_id, checkpoint_ns, channel)
+            if not row or row["blob"] is None:
+                continue
+            messages = checkpointer.serde.loads_typed((row["type"], row["blob"]))
+            if not isinstance(messages, list) or len(messages) <= CHECKPOINT_COMPACTION_MAX_MESSAGES:
+                continue
+            cut = next(
+                (i for i in range(len(messages) - CHECKPOINT_COMPACTION_MAX_MESSAGES, len(messages)) if isinstance(messages[i], HumanMessage)),
+                None
+            )
+            if not cut:
+                continue
+            dropped = "\n\n".join(
+                f"{'Human' if isinstance(m, HumanMessage) else 'AI' if isinstance(m, AIMessage) else 'Tool'} Message: {m.content}"
+                for m in messages[:cut] if isinstance(m, (HumanMessage, AIMessage, ToolMessage))
+            )
+            past_summary = await self.repo.get_agent_conversation_summary_with_preference(
+                agentic_application_id=agentic_application_id, session_id=session_id
+            )
+            summary = await (await self._get_summary_chain(llm)).ainvoke({
+                "chat_history": dropped,
+                "past_conversation_summary": past_summary.get("summary", "") if past_summary else ""
+            })
+            await self.repo.update_agent_conversation_summary(
+                agentic_application_id=agentic_application_id, session_id=session_id, summary=summary
+            )
+            blob_type, blob = checkpointer.serde.dumps_typed(messages[cut:])
+            bytes_saved += await self.repo.replace_channel_blob(thread_id, checkpoint_ns, channel, row["version"], blob_type, blob)
+            log.info(f"[CheckpointCompaction] Summarized and dropped {cut} old '{channel}' messages for thread {thread_id}.")
+        return bytes_saved
+
+    async def compact_checkpoints(self) -> Dict[str, Any]:
+        """
+        One incremental compaction pass over up to CHECKPOINT_COMPACTION_BATCH_THREADS idle threads:
+        keeps the latest CHECKPOINT_COMPACTION_KEEP_CHECKPOINTS checkpoints per thread, prunes the
+        writes and blobs only older checkpoints used and, when configured, truncates old messages
+        into the conversation summary. Returns (and accumulates) bytes reclaimed and the state-load
+        latency measured before and after compaction.
+        """
+        threads = await self.repo.get_threads_for_checkpoint_compaction(
+            keep_checkpoints=CHECKPOINT_COMPACTION_KEEP_CHECKPOINTS,
+            idle_seconds=CHECKPOINT_COMPACTION_IDLE_SECONDS,
+            limit=CHECKPOINT_COMPACTION_BATCH_THREADS
+        )
+        pass_stats = {"threads": 0, "checkpoints_deleted": 0, "writes_deleted": 0, "blobs_deleted": 0,
+                      "bytes_reclaimed": 0, "load_ms_before": 0.0, "load_ms_after": 0.0}
+        if not threads:
+            return pass_stats
+
+        checkpointer = await self.repo.get_shared_checkpointer()
+        llm = None
+        thread_owners: Dict[str, str] = {}
+        if CHECKPOINT_COMPACTION_MAX_MESSAGES > 0 and CHECKPOINT_COMPACTION_SUMMARY_MODEL:
+            from src.models.model_service import global_model_service
+            llm = await global_model_service.get_llm_model(CHECKPOINT_COMPACTION_SUMMARY_MODEL, temperature=0)
+            thread_owners = await self._get_thread_owners()
+
+        for thread in threads:
+            thread_id, checkpoint_ns = thread["thread_id"], thread["checkpoint_ns"]
+            try:
+                pass_stats["load_ms_before"] += await self._timed_state_load(checkpointer, thread_id, checkpoint_ns)
+                pruned = await self.repo.prune_thread_checkpoints(thread_id, checkpoint_ns, CHECKPOINT_COMPACTION_KEEP_CHECKPOINTS)
+                if llm is not None:
+                    pruned["bytes_reclaimed"] += await self._truncate_thread_messages(checkpointer, thread_id, checkpoint_ns, llm, thread_owners)
+                pass_stats["load_ms_after"] += await self._timed_state_load(checkpointer, thread_id, checkpoint_ns)
+                pass_stats["threads"] += 1
+                for key, value in pruned.items():
+                    pass_stats[key] += value
+            except Exception as e:
+                log.error(f"[CheckpointCompaction] Failed to compact thread {thread_id}: {e}", exc_info=True)
+
+        for key, value in pass_stats.items():
+            self.checkpoint_compaction_stats[key] = self.checkpoint_compaction_stats.get(key, 0) + value
+        self.checkpoint_compaction_stats["passes"] = self.checkpoint_compaction_stats.get("passes", 0) + 1
+        if pass_stats["threads"]:
+            log.info(
+                f"[CheckpointCompaction] Compacted {pass_stats['threads']} threads: "
+                f"{pass_stats['checkpoints_deleted']} checkpoints, {pass_stats['writes_deleted']} writes, "
+                f"{pass_stats['blobs_deleted']} blobs deleted, {pass_stats['bytes_reclaimed']} bytes reclaimed; "
+                f"avg state load {pass_stats['load_ms_before'] / pass_stats['threads']:.1f} ms -> "
+                f"{pass_stats['load_ms_after'] / pass_stats['threads']:.1f} ms"
+            )
+        return pass_stats
+
+    def get_checkpoint_compaction_stats(self) -> Dict[str, Any]:
+        """Cumulative compaction metrics for this process."""
+        return dict(self.checkpoint_compaction_stats)
+
+    async def schedule_checkpoint_compaction(self, interval_seconds: float = CHECKPOINT_COMPACTION_INTERVAL_SECONDS) -> None:
+        """Background loop that compacts checkpoint history; no-op unless CHECKPOINT_COMPACTION_ENABLED."""
+        if not CHECKPOINT_COMPACTION_ENABLED:
+            return
+        log.info(f"[CheckpointCompaction] Background task started. Compacting every {interval_seconds} seconds.")
+        while True:
+            try:
+                await self.compact_checkpoints()
+            except Exception as e:
+                log.error(f"[CheckpointCompaction] Compaction pass failed: {e}", exc_info=True)
+            await asyncio.sleep(interval_seconds)
+
+    async def create_chat_history_user_indexes(self) -> Dict[str, int]:
+        """
+        Startup migration that builds the session-owner index of every per-agent chat table still missing it
+        (CREATE INDEX CONCURRENTLY, one table at a time). Tables created later are indexed on the next startup.
+        No-op in 'unified' mode, where the per-agent tables are no longer read.
+        """
+        stats = {"tables": 0, "failed": 0}
+        if CHAT_HISTORY_READ_UNIFIED or not self.agent_repo:
+            return stats
+        try:
+            agent_records = await self.agent_repo.get_all_agent_records()
+            table_names = [await self._get_chat_history_table_name(record["agentic_application_id"]) for record in agent_records]
+            pending = await self.repo.get_chat_history_tables_without_user_index(table_names)
+        except Exception as e:
+            log.error(f"[ChatHistoryIndexes] Could not list per-agent chat tables: {e}")
+            return stats
+        for table_name in pending:
+            try:
+                await self.repo.create_chat_history_user_index(table_name)
+                stats["tables"] += 1
+            except Exception as e:
+                stats["failed"] += 1
+                log.error(f"[ChatHistoryIndexes] Failed to index '{table_name}': {e}")
+        if pending:
+            log.info(f"[ChatHistoryIndexes] Done: {stats}")
+        return stats
+
+    async def migrate_chat_history_to_unified(self) -> Dict[str, int]:
+        """
+        Copies the per-agent chat history tables into the unified chat_history table.
+        No-op in 'per_agent' mode. Each table is copied once (tracked in chat_history_migration);
+        with dual writes active, rows written afterwards already land in both tables.
+        """
+        stats = {"tables": 0, "rows": 0, "failed": 0}
+        if not CHAT_HISTORY_WRITE_UNIFIED or not self.agent_repo:
+            return stats
+        try:
+            agent_records = await self.agent_repo.get_all_agent_records()
+            pending = await self.repo.get_unmigrated_chat_history_tables([record["agentic_application_id"] for record in agent_records])
+        except Exception as e:
+            log.error(f"[ChatHistoryMigration] Could not list per-agent chat tables: {e}")
+            return stats
+        if not pending:
+            return stats
+        log.info(f"[ChatHistoryMigration] Copying {len(pending)} per-agent chat tables into '{TableNames.CHAT_HISTORY.value}'.")
+        for table in pending:
+            try:
+                stats["rows"] += await self.repo.migrate_chat_history_table(table["table_name"], table["agentic_application_id"])
+                stats["tables"] += 1
+            except Exception as e:
+                stats["failed"] += 1
+                log.error(f"[ChatHistoryMigration] Failed to migrate '{table['table_name']}': {e}")
+        log.info(f"[ChatHistoryMigration] Done: {stats}")
+        return stats
+
     async def create_new_session_id(self, email: str) -> str:
         """
         Generates a new unique session ID based on the user's email.
@@ -9742,22 +10021,11 @@ class ChatService:
                 if session_id_full not in result:
                     result[session_id_full] = []
 
-                # Extract the final AI message from agent_steps for 'agent_response'
-                ai_message_content = ""
-                if final_response:
-                    ai_message_content = final_response
-                elif agent_steps:
-                    # Look for the last assistant message if final_response is null
-                    for msg in reversed(agent_steps):
-                        if msg.get("role") == "assistant" and msg.get("content"):
-                            ai_message_content = msg["content"]
-                            break
-
                 result[session_id_full].append({
                     "timestamp_start": timestamp, # Using timestamp for both start/end for simplicity of a turn
                     "timestamp_end": timestamp,
                     "user_input": user_input,
-                    "agent_response": ai_message_content
+                    "agent_response": self._python_agent_turn_response(final_response, agent_steps)
                 })
 
         elif framework_type == FrameworkType.GOOGLE_ADK:
@@ -9765,10 +10033,16 @@ class ChatService:
 
         else:
             try:
-                raw_records = await self.repo.get_chat_records_by_session_prefix(
-                    table_name=table_name,
-                    session_id_prefix=f"{user_email}_%"
-                )
+                if CHAT_HISTORY_READ_UNIFIED:
+                    raw_records = await self.repo.get_unified_chat_records_by_user(
+                        agentic_application_id=agent_id,
+                        user_email=user_email
+                    )
+                else:
+                    raw_records = await self.repo.get_chat_records_by_session_prefix(
+                        table_name=table_name,
+                        session_id_prefix=f"{user_email}_%"
+                    )
             except Exception as e:
                 log.error(f"Error retrieving old chats for LangGraph agent '{agent_id}' and user '{user_email}': {e}")
                 return {} # Return empty dict on error
@@ -9793,6 +10067,198 @@ class ChatService:
         log.info(f"Retrieved old chats for user '{user_email}' and agent '{agent_id}'.")
         return result
 
+    @staticmethod
+    def _python_agent_turn_response(final_response: Optional[str], agent_steps: Optional[List[Dict[str, Any]]]) -> str:
+        """Returns the final AI message of a Python-based agent turn, falling back to the last assistant step."""
+        if final_response:
+            return final_response
+        # Look for the last assistant message if final_response is null
+        for msg in reversed(agent_steps or []):
+            if msg.get("role") == "assistant" and msg.get("content"):
+                return msg["content"]
+        return ""
+
+    @staticmethod
+    def _encode_old_chats_cursor(timestamp: datetime, session_id: str) -> str:
+        """Encodes the (timestamp, session_id) keyset position of the last item of a page as an opaque cursor."""
+        payload = json.dumps({"ts": timestamp.isoformat(), "sid": session_id})
+        return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii")
+
+    @staticmethod
+    def _decode_old_chats_cursor(cursor: Optional[str]) -> Optional[Tuple[datetime, str]]:
+        """Decodes a cursor produced by _encode_old_chats_cursor; raises ValueError if it is malformed."""
+        if not cursor:
+            return None
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+            return datetime.fromisoformat(payload["ts"]), str(payload["sid"])
+        except Exception as e:
+            raise ValueError(f"Invalid cursor: {cursor}") from e
+
+    async def get_old_chats_page_by_user_and_agent(
+        self,
+        user_email: str,
+        agent_id: str,
+        framework_type: FrameworkType = FrameworkType.LANGGRAPH,
+        page_size: int = Limits.OLD_CHATS_DEFAULT_PAGE_SIZE,
+        cursor: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Retrieves one page of old chat records for a specific user and agent, newest records first.
+        Pages are keyset paginated on (end_timestamp, session_id), so the cost of a page does not grow with the user's history.
+
+        Args:
+            user_email (str): The email of the user.
+            agent_id (str): The ID of the agent.
+            framework_type (FrameworkType): The framework used by the agent ('google_adk', 'langgraph').
+            page_size (int): Maximum number of chat records in the page.
+            cursor (Optional[str]): The 'next_cursor' of the previous page, or None for the first page.
+
+        Returns:
+            Dict[str, Any]: 'sessions' maps session IDs to their records of this page (in chronological order)
+            and 'next_cursor' is the cursor of the next page, or None on the last page.
+            A session spanning two pages appears in both.
+
+        Raises:
+            ValueError: If the cursor is malformed.
+        """
+        keyset = self._decode_old_chats_cursor(cursor)
+        table_name = await self._get_chat_history_table_name(agent_id)
+        turns = []
+
+        if await self.is_python_based_agent(agent_id):
+            thread_id_prefix = f"{table_name}_{user_email}_"
+            raw_records = await self.chat_state_history_manager.get_chat_records_page_by_thread_id_prefix(
+                thread_id_prefix=thread_id_prefix,
+                limit=page_size + 1,
+                cursor=(keyset[0], f"{table_name}_{keyset[1]}") if keyset else None
+            )
+            for row in raw_records:
+                turns.append((row['thread_id'][len(table_name)+1:], {
+                    "timestamp_start": row['timestamp'],
+                    "timestamp_end": row['timestamp'],
+                    "user_input": row['user_query'],
+                    "agent_response": self._python_agent_turn_response(row['final_response'], row['agent_steps'])
+                }))
+
+        elif framework_type == FrameworkType.GOOGLE_ADK:
+            # The ADK session service has no paginated listing; its history is returned as a single page
+            sessions = await self.get_detailed_chats_by_user_and_app_for_gadk(user_id=user_email, app_name=agent_id)
+            return {"sessions": sessions, "next_cursor": None}
+
+        else:
+            if CHAT_HISTORY_READ_UNIFIED:
+                raw_records = await self.repo.get_unified_chat_records_page_by_user(
+                    agentic_application_id=agent_id,
+                    user_email=user_email,
+                    limit=page_size + 1,
+                    cursor=keyset
+                )
+            else:
+                raw_records = await self.repo.get_chat_records_page_by_user(
+                    table_name=table_name,
+                    user_email=user_email,
+                    limit=page_size + 1,
+                    cursor=keyset
+                )
+            for row in raw_records:
+                turns.append((row['session_id'], {
+                    "timestamp_start": row['start_timestamp'],
+                    "timestamp_end": row['end_timestamp'],
+                    "user_input": row['human_message'],
+                    "agent_response": row['ai_message']
+                }))
+
+        next_cursor = None
+        if len(turns) > page_size:
+            turns = turns[:page_size]
+            last_session_id, last_turn = turns[-1]
+            next_cursor = self._encode_old_chats_cursor(last_turn["timestamp_end"], last_session_id)
+
+        sessions = {}
+        for session_id, turn in reversed(turns):
+            sessions.setdefault(session_id, []).append(turn)
+
+        log.info(f"Retrieved a page of {len(turns)} old chat records for user '{user_email}' and agent '{agent_id}'.")
+        return {"sessions": sessions, "next_cursor": next_cursor}
+
+    async def get_old_chat_sessions_by_user_and_agent(
+        self,
+        user_email: str,
+        agent_id: str,
+        framework_type: FrameworkType = FrameworkType.LANGGRAPH,
+        page_size: int = Limits.OLD_CHATS_DEFAULT_PAGE_SIZE,
+        cursor: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Retrieves one page of a user's chat sessions with an agent, most recently active first,
+        keyset paginated on the (end_timestamp, session_id) of each session's latest message.
+
+        Args:
+            user_email (str): The email of the user.
+            agent_id (str): The ID of the agent.
+            framework_type (FrameworkType): The framework used by the agent ('google_adk', 'langgraph').
+            page_size (int): Maximum number of sessions in the page.
+            cursor (Optional[str]): The 'next_cursor' of the previous page, or None for the first page.
+
+        Returns:
+            Dict[str, Any]: 'sessions' is a list of {'session_id', 'last_activity', 'last_user_input'}
+            and 'next_cursor' is the cursor of the next page, or None on the last page.
+
+        Raises:
+            ValueError: If the cursor is malformed.
+        """
+        keyset = self._decode_old_chats_cursor(cursor)
+        table_name = await self._get_chat_history_table_name(agent_id)
+
+        if await self.is_python_based_agent(agent_id):
+            raw_sessions = await self.chat_state_history_manager.get_chat_threads_page_by_thread_id_prefix(
+                thread_id_prefix=f"{table_name}_{user_email}_",
+                limit=page_size + 1,
+                cursor=(keyset[0], f"{table_name}_{keyset[1]}") if keyset else None
+            )
+            sessions = [
+                {"session_id": row['thread_id'][len(table_name)+1:], "last_activity": row['timestamp'], "last_user_input": row['user_query']}
+                for row in raw_sessions
+            ]
+
+        elif framework_type == FrameworkType.GOOGLE_ADK:
+            # The ADK session service has no paginated listing; all sessions are returned as a single page
+            history = await self.get_detailed_chats_by_user_and_app_for_gadk(user_id=user_email, app_name=agent_id)
+            sessions = [
+                {"session_id": session_id, "last_activity": records[-1].get("timestamp_end"), "last_user_input": records[-1].get("user_input")}
+                for session_id, records in history.items() if records
+            ]
+            return {"sessions": sessions, "next_cursor": None}
+
+        else:
+            if CHAT_HISTORY_READ_UNIFIED:
+                raw_sessions = await self.repo.get_unified_chat_sessions_page_by_user(
+                    agentic_application_id=agent_id,
+                    user_email=user_email,
+                    limit=page_size + 1,
+                    cursor=keyset
+                )
+            else:
+                raw_sessions = await self.repo.get_chat_sessions_page_by_user(
+                    table_name=table_name,
+                    user_email=user_email,
+                    limit=page_size + 1,
+                    cursor=keyset
+                )
+            sessions = [
+                {"session_id": row['session_id'], "last_activity": row['end_timestamp'], "last_user_input": row['human_message']}
+                for row in raw_sessions
+            ]
+
+        next_cursor = None
+        if len(sessions) > page_size:
+            sessions = sessions[:page_size]
+            next_cursor = self._encode_old_chats_cursor(sessions[-1]["last_activity"], sessions[-1]["session_id"])
+
+        log.info(f"Retrieved a page of {len(sessions)} old chat sessions for user '{user_email}' and agent '{agent_id}'.")
+        return {"sessions": sessions, "next_cursor": next_cursor}
+
     async def delete_session(self, agentic_application_id: str, session_id: str, framework_type: FrameworkType = FrameworkType.LANGGRAPH) -> Dict[str, Any]:
         """
         Deletes the entire conversation history for a specific session based on the agent's framework.
@@ -9814,6 +10280,7 @@ class ChatService:
             try:
                 success = await self.chat_state_history_manager.clear_chat_history(thread_id)
                 if success:
+                    await self.invalidate_query_library(agentic_application_id)
                     return {
                         "status": "success",
                         "message": f"Memory history deleted successfully for Python-based agent session {session_id}.",
@@ -9836,6 +10303,7 @@ class ChatService:
                     user_id=user_id,
                     session_id=session_id
                 )
+                await self.invalidate_query_library(agentic_application_id)
 
                 return {
                     "status": "success",
@@ -9854,7 +10322,8 @@ class ChatService:
                 chat_rows_deleted = await self.repo.delete_session_transactional(
                     chat_table_name=chat_table_name,
                     thread_id=thread_id,
-                    session_id=session_id
+                    session_id=session_id,
+                    agentic_application_id=agentic_application_id if CHAT_HISTORY_WRITE_UNIFIED else None
                 )
                 conversation_summary_and_preference_deleted = await self.repo.delete_agent_conversation_summary(
                     agentic_application_id=agentic_application_id,
@@ -9862,6 +10331,7 @@ class ChatService:
                 )
                 if conversation_summary_and_preference_deleted:
                     log.info(f"Deleted conversation summary and preference for session '{session_id}'.")
+                await self.invalidate_query_library(agentic_application_id)
 
                 return {
                     "status": "success",
@@ -9895,7 +10365,7 @@ class ChatService:
             return success
         except Exception as e:
             log.error(f"Error deleting internal thread '{internal_thread}': {e}")
-            return f"Error deleting internal thread '{internal_thread}': {e}"
+            return False
 
     async def get_all_sessions(self) -> List[Dict[str, str]]:
         """
@@ -9938,11 +10408,18 @@ class ChatService:
             return None
 
         try:
-            latest_message_record = await self.repo.get_latest_message_record(
-                table_name=table_name,
-                session_id=session_id,
-                message_column=message_column
-            )
+            if CHAT_HISTORY_READ_UNIFIED:
+                latest_message_record = await self.repo.get_unified_latest_message_record(
+                    agentic_application_id=agentic_application_id,
+                    session_id=session_id,
+                    message_column=message_column
+                )
+            else:
+                latest_message_record = await self.repo.get_latest_message_record(
+                    table_name=table_name,
+                    session_id=session_id,
+                    message_column=message_column
+                )
 
             if not latest_message_record:
                 log.warning(f"No latest {message_type} message found for session {session_id} in table {table_name}.")
@@ -9963,13 +10440,33 @@ class ChatService:
                 tags_were_present = False
                 log.info(f"Adding tags to latest {message_type} message for session {session_id}.")
 
-            success = await self.repo.update_message_tag_record(
-                table_name=table_name,
-                session_id=session_id,
-                message_column=message_column,
-                updated_message_content=updated_content,
-                end_timestamp=end_timestamp
-            )
+            if CHAT_HISTORY_WRITE_LEGACY:
+                success = await self.repo.update_message_tag_record(
+                    table_name=table_name,
+                    session_id=session_id,
+                    message_column=message_column,
+                    updated_message_content=updated_content,
+                    end_timestamp=end_timestamp
+                )
+                if success and CHAT_HISTORY_WRITE_UNIFIED:
+                    await self._mirror_to_unified_chat_history(
+                        f"updating message tags for session '{session_id}'",
+                        self.repo.update_unified_message_tag_record(
+                            agentic_application_id=agentic_application_id,
+                            session_id=session_id,
+                            message_column=message_column,
+                            updated_message_content=updated_content,
+                            end_timestamp=end_timestamp
+                        )
+                    )
+            else:
+                success = await self.repo.update_unified_message_tag_record(
+                    agentic_application_id=agentic_application_id,
+                    session_id=session_id,
+                    message_column=message_column,
+                    updated_message_content=updated_content,
+                    end_timestamp=end_timestamp
+                )
 
             if success:
                 return not tags_were_present # True if tags were added, False if removed
@@ -10290,45 +10787,101 @@ class ChatService:
             return {"message": "Sorry, we couldn't update your request at the moment. Please try again later."}
 
     @staticmethod
-    async def get_unique_messages(messages: List[str], similarity_threshold=0.5):
+    async def get_unique_messages(messages: List[str], similarity_threshold=QUERY_LIBRARY_SIMILARITY_THRESHOLD):
         """
         Filters a list of messages to return only those that are not too similar to each other.
-        The `similarity_threshold` is a float from 0 to 1.
+        The `similarity_threshold` is a float from 0 to 1 (Jaccard similarity of character shingles).
         """
         if not messages:
             return []
 
-        unique_messages: List[str] = []
-        # Loop through each message in the original list
-        for new_message in messages:
-            is_similar = False
-            # Compare the new message to all the messages we've already deemed unique
-            for existing_message in unique_messages:
-                # Use SequenceMatcher to get a similarity ratio (e.g., 0.95)
-                similarity = difflib.SequenceMatcher(None, new_message.lower(), existing_message.lower()).ratio()
-                if similarity >= similarity_threshold:
-                    is_similar = True
-                    break  # Found a similar message, no need to check further
-            
-            # If no similar message was found, add it to our unique list
-            if not is_similar:
-                unique_messages.append(new_message)
+        index = QueryLibraryIndex(similarity_threshold=similarity_threshold)
+        await asyncio.to_thread(index.add_all, messages)
+        return index.library
 
-        return unique_messages
+    async def _build_query_library(self, user_email: str, agentic_application_id: str, state: Optional[Dict[str, Any]],
+                                   queries: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Folds newly fetched queries into the persisted (user, agent) query library and returns the
+        user history, agent history and near-duplicate free query library.
+
+        Args:
+            state (Optional[Dict[str, Any]]): The persisted state from _get_query_library_state, None if there is none.
+            queries (Dict[str, Any]): The queries fetched since the state's watermark, with 'last_timestamp'
+                (chat rows) and 'last_update_time' (Google ADK sessions) of what was read.
+        """
+        state = state or {}
+        user_history = list(dict.fromkeys(state.get("user_history", []) + queries["user_history"]))
+        agent_history = list(dict.fromkeys(state.get("agent_history", []) + queries["agent_history"]))
+        if not self.query_library_index_repo:
+            return {"user_history": user_history, "agent_history": agent_history,
+                    "query_library": await self.get_unique_messages(user_history + agent_history)}
+
+        index = await asyncio.to_thread(QueryLibraryIndex.from_state, state)
+        new_messages = queries["user_history"] + queries["agent_history"]
+        watermark = dict(state.get("watermark") or {})
+        last_timestamp = queries.get("last_timestamp")
+        if last_timestamp and (not watermark.get("history") or last_timestamp > datetime.fromisoformat(watermark["history"])):
+            watermark["history"] = last_timestamp.isoformat()
+        if queries.get("last_update_time"):
+            watermark["google_adk"] = max(watermark.get("google_adk") or 0, queries["last_update_time"])
+
+        seen_before = len(index.seen)
+        await asyncio.to_thread(index.add_all, new_messages)
+        changed = len(index.seen) != seen_before or watermark != state.get("watermark")
+        if changed or not state:
+            await self.query_library_index_repo.save_index_state(user_email, agentic_application_id, {
+                **index.to_state(),
+                "user_history": user_history,
+                "agent_history": agent_history,
+                "watermark": watermark,
+            })
+        return {"user_history": user_history, "agent_history": agent_history, "query_library": index.library}
+
+    async def _get_query_library_state(self, user_email: str, agentic_application_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Returns the persisted query library state of the user and agent, or None when there is none
+        or it cannot be extended (no watermark yet, or an incompatible index version).
+        """
+        if not self.query_library_index_repo:
+            return None
+        state = await self.query_library_index_repo.get_index_state(user_email, agentic_application_id)
+        if not state or "watermark" not in state or not QueryLibraryIndex.is_compatible(state):
+            return None
+        return state
 
-    async def fetch_user_queries_from_python_based_agent_for_suggestions(self, user_email: str, agentic_application_id: str, chat_table_name: str) -> Dict[str, List[str]]:
+    @staticmethod
+    def _query_library_since(watermark: Optional[str]) -> Optional[datetime]:
+        """
+        Chat rows after this time are fetched for the query library. The window reaches back
+        QUERY_LIBRARY_WATERMARK_OVERLAP_SECONDS before the watermark, because chat rows are written
+        after the turn ends and can commit out of end_timestamp order; re-read queries are skipped
+        by the index.
+        """
+        if not watermark:
+            return None
+        return datetime.fromisoformat(watermark) - timedelta(seconds=QUERY_LIBRARY_WATERMARK_OVERLAP_SECONDS)
+
+    async def invalidate_query_library(self, agentic_application_id: str) -> None:
+        """Drops the persisted query libraries of the agent after chat history was deleted; they are rebuilt on next use."""
+        if self.query_library_index_repo:
+            await self.query_library_index_repo.delete_index_states(agentic_application_id)
+
+    async def fetch_user_queries_from_python_based_agent_for_suggestions(self, user_email: str, agentic_application_id: str, chat_table_name: str,
+                                                                        since: Optional[datetime] = None) -> Dict[str, Any]:
         """
         Fetches all user queries from Python-based agents for a specific user and agent.
 
         Args:
             user_email (str): The email of the user to fetch queries for.
             agentic_application_id (str): The ID of the agentic application.
+            since (datetime, optional): Only records after this time are read.
         """
-        queries = {"user_history": [], "agent_history": []}
+        queries = {"user_history": [], "agent_history": [], "last_timestamp": None}
         thread_id_prefix = f"{chat_table_name}_"
         try:
             raw_records = await self.chat_state_history_manager.get_chat_records_by_thread_id_prefix(
-                thread_id_prefix=thread_id_prefix
+                thread_id_prefix=thread_id_prefix, since=since
             )
         except Exception as e:
             log.error(f"Error retrieving user queries for Python-based agent '{agentic_application_id}' and user '{user_email}': {e}")
@@ -10341,21 +10894,25 @@ class ChatService:
                 queries["user_history"].append(row['user_query'])
             else:
                 queries["agent_history"].append(row['user_query'])
+        if raw_records:
+            queries["last_timestamp"] = raw_records[-1]['timestamp']
 
         return queries
 
-    async def fetch_user_queries_from_google_adk_for_suggestions(self, user_email: str, agentic_application_id: str) -> Dict[str, List[str]]:
+    async def fetch_user_queries_from_google_adk_for_suggestions(self, user_email: str, agentic_application_id: str,
+                                                                 since: Optional[float] = None) -> Dict[str, Any]:
         """
         Fetches all user queries from Google ADK database for a specific user and agent.
 
         Args:
             user_email (str): The email of the user to fetch queries for.
             agentic_application_id (str): The ID of the agentic application (app_name in ADK).
+            since (float, optional): Only sessions updated after this epoch time are read.
 
         Returns:
-            Dict[str, List[str]]: A dictionary containing user queries and query library.
+            Dict[str, Any]: A dictionary containing user queries and the latest 'last_update_time' of the sessions read.
         """
-        queries = {"user_history": [], "agent_history": []}
+        queries = {"user_history": [], "agent_history": [], "last_update_time": None}
         log.info(f"Fetching user queries from Google ADK for agent '{agentic_application_id}'.")
 
         try:
@@ -10369,6 +10926,9 @@ class ChatService:
 
             # Iterate through each session to extract user queries
             for session in sessions_list:
+                last_update_time = getattr(session, "last_update_time", None)
+                if since is not None and last_update_time is not None and last_update_time <= since:
+                    continue
                 try:
                     complete_session_chat_history = await self.gadk_session_service.get_session(
                         app_name=agentic_application_id, 
@@ -10382,6 +10942,8 @@ class ChatService:
                         queries["user_history"].extend(current_chat_queries)
                     else:
                         queries["agent_history"].extend(current_chat_queries)
+                    if last_update_time is not None:
+                        queries["last_update_time"] = max(queries["last_update_time"] or 0, last_update_time)
 
                 except Exception as session_error:
                     log.warning(f"Error fetching session '{session.id}' for Google ADK: {session_error}")
@@ -10395,6 +10957,8 @@ class ChatService:
     async def fetch_all_user_queries(self, user_email: str, agentic_application_id: str) -> Dict[str, List[str]]:
         """
         Fetches all user queries from the chat table for a specific user email.
+        Only chat rows (and Google ADK sessions) newer than the watermark of the persisted query
+        library are read; the library is rebuilt from scratch after chat history is deleted.
 
         Args:
             user_email (str): The email of the user to fetch queries for.
@@ -10404,28 +10968,30 @@ class ChatService:
             Dict[str, List[str]]: A dictionary containing user queries and other session IDs.
         """
         chat_table_name = await self._get_chat_history_table_name(agentic_application_id)
+        state = await self._get_query_library_state(user_email, agentic_application_id)
+        watermark = (state or {}).get("watermark") or {}
+        since = self._query_library_since(watermark.get("history"))
 
         if await self.is_python_based_agent(agentic_application_id):
-            queries = await self.fetch_user_queries_from_python_based_agent_for_suggestions(user_email=user_email, agentic_application_id=agentic_application_id, chat_table_name=chat_table_name)
+            queries = await self.fetch_user_queries_from_python_based_agent_for_suggestions(user_email=user_email, agentic_application_id=agentic_application_id, chat_table_name=chat_table_name, since=since)
 
         else:
-            queries = await self.repo.fetch_user_query_from_chat_table(user_email=user_email, chat_table_name=chat_table_name)
-            queries_adk = await self.fetch_user_queries_from_google_adk_for_suggestions(user_email=user_email, agentic_application_id=agentic_application_id)
+            if CHAT_HISTORY_READ_UNIFIED:
+                queries = await self.repo.fetch_user_query_from_unified_chat_table(user_email=user_email, agentic_application_id=agentic_application_id, since=since)
+            else:
+                queries = await self.repo.fetch_user_query_from_chat_table(user_email=user_email, chat_table_name=chat_table_name, since=since)
+            queries_adk = await self.fetch_user_queries_from_google_adk_for_suggestions(user_email=user_email, agentic_application_id=agentic_application_id, since=watermark.get("google_adk"))
             queries["user_history"].extend(queries_adk.get("user_history", []))
             queries["agent_history"].extend(queries_adk.get("agent_history", []))
+            queries["last_update_time"] = queries_adk.get("last_update_time")
 
         try:
-            queries["user_history"] = list(set(queries["user_history"]))
-            queries["agent_history"] = list(set(queries["agent_history"]))
-            all_message = queries["user_history"] + queries["agent_history"]
-
-            query_library = await self.get_unique_messages(all_message)
-            queries["query_library"] = query_library
-            log.info(f"Fetched {len(queries['user_history'])} user queries and {len(queries['agent_history'])} agent queries for user '{user_email}' and agent '{agentic_application_id}'. Total unique queries: {len(query_library)}")
+            queries = await self._build_query_library(user_email, agentic_application_id, state, queries)
+            log.info(f"Fetched {len(queries['user_history'])} user queries and {len(queries['agent_history'])} agent queries for user '{user_email}' and agent '{agentic_application_id}'. Total unique queries: {len(queries['query_library'])}")
 
         except Exception as e:
             log.error(f"Error processing user queries for user '{user_email}' and agent '{agentic_application_id}': {e}")
-            queries["query_library"] = []
+            queries = {"user_history": list(set(queries["user_history"])), "agent_history": list(set(queries["agent_history"])), "query_library": []}
 
         return queries
 
@@ -4,7 +4,6 @@ import os
 import re
 import json
 import time
-import asyncio
 import threading
 import inspect
 from pathlib import Path
@@ -41,10 +40,12 @@ from src.decorators.tool_access import resource_access, require_role, authorized
 from src.auth.models import UserRole
 from src.utils.sandbox import get_sandbox_builtins, get_sandbox_extras
 from telemetry_wrapper import logger as log, update_session_context
+from call_categorizer import set_call_category, reset_call_category
 from src.utils.phoenix_manager import ensure_project_registered, traced_project_context, log_trace_context
 from src.storage import get_storage_client
 
 from src.utils.kafka_manager import KafkaManager
+from src.utils.background_tasks import background_tasks
 
 # Define common TypedDict for state if applicable to all workflows
 class BaseWorkflowState(TypedDict):
@@ -929,6 +930,7 @@ run_shell_command(command="cat /databases/{db_connection_names[0]}/samples.md")
                 log.error(f"[{session_id}] Error occurred while retrieving agent configuration for agent_id={agentic_application_id}: {e}")
                 raise HTTPException(status_code=500, detail=f"Error occurred while retrieving agent configuration: {str(e)}")
 
+        call_category_token = None
         try:
             query = inference_request.query or ""
             
@@ -972,6 +974,8 @@ run_shell_command(command="cat /databases/{db_connection_names[0]}/samples.md")
             )
 
             update_session_context(agent_type=agent_config["AGENT_TYPE"], agent_name=agent_name)
+            # Declared like the session context above so token logging never has to inspect the stack
+            call_category_token = set_call_category("agent_inference", agent_type=agent_config["AGENT_TYPE"])
 
             # Fetch knowledgebase names from database if agent has KB mappings
             knowledgebase_names = None
@@ -1166,9 +1170,9 @@ Always prioritize accuracy: if the knowledge base provides specific information,
             if insert_into_eval_flag:
                 try:
                     time_start = time.monotonic()
-                    asyncio.create_task(self.evaluation_service.log_evaluation_data(session_id, agentic_application_id, agent_config, response_evaluation, model_name))
+                    await background_tasks.submit("evaluation", self.evaluation_service.log_evaluation_data(session_id, agentic_application_id, agent_config, response_evaluation, model_name))
                     time_end = time.monotonic()
-                    log.info(f"[{session_id}] Evaluation data logging task created | time_to_dispatch={time_end - time_start:.4f}s")
+                    log.info(f"[{session_id}] Evaluation data logging task queued | time_to_dispatch={time_end - time_start:.4f}s")
                 except Exception as e:
                     log.error(f"[{session_id}] Error Occurred while inserting into evaluation data for agent_id={agentic_application_id}: {e}")
             end_time = time.monotonic()
@@ -1193,6 +1197,10 @@ Always prioritize accuracy: if the knowledge base provides specific information,
             # Catch any unhandled exceptions and raise a 500 internal server error
             log.error(f"[{session_id}] Unhandled error in agent inference for agent_id={agentic_application_id}: {e}", exc_info=True)
             raise HTTPException(status_code=500, detail=f"Internal Server Error in run method of Langgraph inference: {str(e)}")
+        finally:
+            # The generator runs in the caller's context; later LLM calls of the request must not inherit the label
+            if call_category_token is not None:
+                reset_call_category(call_category_token)
 
     async def update_response_time(self, agent_id: str, session_id: str, start_time: float, time_stamp: Any):
         """Updates the response time in the last executor message for the given session."""
@@ -1286,6 +1294,45 @@ Always prioritize accuracy: if the knowledge base provides specific information,
         except Exception as e:
             log.error(f"❌ [TokenUsageGraph] Error injecting token usage into graph: {e}", exc_info=True)
 
+    async def update_turn_metadata_in_graph(
+        self,
+        agent_id: str,
+        session_id: str,
+        response_time: float,
+        time_stamp: Any,
+        token_records: Optional[List[Dict]] = None,
+    ) -> None:
+        """Writes the response_time and token_usage sentinels of one turn in a single checkpoint update.
+
+        Same sentinels as update_response_time and update_token_usage_in_graph, but appended
+        together through one aupdate_state call, so the turn costs one checkpoint write instead of two.
+        Exceptions propagate so the post-turn persistence stage can retry the write.
+        """
+        sentinels = [ChatMessage(content=[{
+            "response_time": response_time,
+            "start_timestamp": time_stamp.isoformat()
+        }], role="response_time")]
+        if token_records:
+            sentinels.append(ChatMessage(content=[{
+                "prompt_tokens":     sum(r.get('prompt_tokens', 0)     for r in token_records),
+                "completion_tokens": sum(r.get('completion_tokens', 0) for r in token_records),
+                "total_tokens":      sum(r.get('total_tokens', 0)      for r in token_records),
+                "cached_tokens":     sum(r.get('cached_tokens', 0)     for r in token_records),
+                "llm_calls":         token_records,
+            }], role="token_usage"))
+
+        async with await self.chat_service.get_checkpointer_context_manager() as checkpointer:
+            thread_id = await self.chat_service._get_thread_id(agent_id, session_id)
+            graph_config = await self.chat_service._get_thread_config(thread_id)
+            workflow = StateGraph(BaseWorkflowState)
+            workflow.add_edge(START, END)
+            app = workflow.compile(checkpointer=checkpointer)
+            await app.aupdate_state(config=graph_config, values={"executor_messages": sentinels})
+        log.info(
+            f"[{session_id}] Turn metadata written to checkpoint | agent_id={agent_id}, "
+            f"response_time={response_time:.2f}s, llm_calls={len(token_records or [])}"
+        )
+
 
 class BaseMetaTypeAgentInference(BaseAgentInference):
     """
@@ -243,3 +243,10 @@ After drafting your response, verify that you've correctly applied all relevant
         """Delegates token-usage graph injection to react_agent_inference (common for all LangGraph types)."""
         log.debug(f"[{session_id}] Delegating update_token_usage_in_graph to react_agent_inference for agent_id={agent_id}, records_count={len(token_records) if token_records else 0}")
         return await self.react_agent_inference.update_token_usage_in_graph(agent_id, session_id, token_records)
+
+    async def update_turn_metadata_in_graph(self, agent_id: str, session_id: str, response_time: float, time_stamp: Any, token_records: list = None):
+        """Delegates the combined response-time / token-usage checkpoint write to react_agent_inference (common for all LangGraph types)."""
+        log.debug(f"[{session_id}] Delegating update_turn_metadata_in_graph to react_agent_inference for agent_id={agent_id}")
+        return await self.react_agent_inference.update_turn_metadata_in_graph(
+            agent_id, session_id, response_time=response_time, time_stamp=time_stamp, token_records=token_records
+        )
@@ -1,6 +1,5 @@
 # © 2024-25 Infosys Limited, Bangalore, India. All Rights Reserved.
 import json
-import asyncio
 from uuid import uuid4
 from abc import abstractmethod
 from typing import Any, List, Dict, Optional, Union, Literal, Callable, Tuple, AsyncGenerator
@@ -28,8 +27,9 @@ from src.prompts.prompts import FORMATTER_PROMPT, GADK_EVALUATION_PROMPT, GADK_V
 from src.utils.helper_functions import convert_value_type_of_candidate_as_given_in_reference
 from src.config.constants import Limits, AgentType
 
-from phoenix.otel import register
 from phoenix.trace import using_project
+from src.utils.phoenix_manager import ensure_project_registered
+from src.utils.background_tasks import background_tasks
 from telemetry_wrapper import logger as log, update_session_context
 
 
@@ -1487,7 +1487,7 @@ Use positive examples as guidance and explicitly avoid negative examples.
             agent_name = agent_config["AGENT_NAME"]
             project_name = agent_name + '_' + user_name
 
-            register(
+            ensure_project_registered(
                 project_name=project_name,
                 auto_instrument=True,
                 set_global_tracer_provider=False,
@@ -1579,7 +1579,7 @@ Use positive examples as guidance and explicitly avoid negative examples.
 
                 try:
                     log.info("Inserting evaluation data for Google ADK inference into the database.")
-                    asyncio.create_task(self.evaluation_service.log_evaluation_data(session_id, agentic_application_id, agent_config, response_evaluation, model_name))
+                    await background_tasks.submit("evaluation", self.evaluation_service.log_evaluation_data(session_id, agentic_application_id, agent_config, response_evaluation, model_name))
                 except Exception as e:
                     log.error(f"Error Occurred while inserting into evaluation data of Google ADK inference: {e}")
 
@@ -4,7 +4,6 @@ import ast
 import json
 import os
 import asyncio
-import functools
 from copy import deepcopy
 from typing import List, Dict, Tuple, Union, Any, Optional
 from pydantic import BaseModel, Field
@@ -20,7 +19,9 @@ from src.utils.remote_model_client import (
     RemoteTensorUtils,
     RemoteNumpyUtils,
     RemoteSentenceTransformersUtil,
-    get_remote_models_and_utils
+    get_remote_models_and_utils,
+    encode_async,
+    predict_async
 )
 
 # Create instances to replace local modules
@@ -31,6 +32,7 @@ SentenceTransformer = RemoteSentenceTransformer
 CrossEncoder = RemoteCrossEncoder
 
 from src.models.model_service import ModelService
+from src.models.llm_response_cache import with_response_cache
 from src.database.services import ChatService, ToolService, AgentService, FeedbackLearningService, EvaluationService, ConsistencyService
 from src.config.constants import Limits
 from src.prompts.prompts import FORMATTER_PROMPT
@@ -142,6 +144,7 @@ class InferenceUtils:
             """
             repaired_json: Dict = Field(description="Repaired JSON Object")
         json_correction_parser = JsonOutputParser(pydantic_object=CorrectedJSON)
+        llm = with_response_cache(llm)
         json_repair_template = """JSON Response to repair:
 {json_response}
 
@@ -317,7 +320,7 @@ Output:
 ```
 
 """
-        response = await llm.ainvoke(prompt)
+        response = await with_response_cache(llm).ainvoke(prompt)
         response = response.content.strip()
         if "```json" in response:
             response = response[response.find("```json") + len("```json"):]
@@ -439,10 +442,7 @@ Output:
             """
             user_id = agent_id if agent_id else current_user_email.get("user_123")
             try:
-                _loop = asyncio.get_event_loop()
-                query_embedding = await _loop.run_in_executor(
-                    None, functools.partial(embedding_model.encode, query, convert_to_tensor=True)
-                )
+                query_embedding = await encode_async(embedding_model, query, convert_to_tensor=True)
                 manager = await get_global_manager()
                 if manager:
                     records = await manager.get_records_by_category(user_id, limit=50)
@@ -457,33 +457,21 @@ Output:
                         
                         if stored_query.strip():
                             # Calculate query-to-query similarity
-                            query_embedding_for_query = await _loop.run_in_executor(
-                                None, functools.partial(embedding_model.encode, stored_query, convert_to_tensor=True)
-                            )
-                            query_similarity = float(await _loop.run_in_executor(
-                                None, util.cos_sim, query_embedding, query_embedding_for_query
-                            ))
+                            query_embedding_for_query = await encode_async(embedding_model, stored_query, convert_to_tensor=True)
+                            query_similarity = float(util.cos_sim(query_embedding, query_embedding_for_query))
                             
                             # Calculate query-to-response similarity
                             if stored_response.strip():
-                                response_embedding = await _loop.run_in_executor(
-                                    None, functools.partial(embedding_model.encode, stored_response[:200], convert_to_tensor=True)
-                                )  # Truncate response
-                                response_similarity = float(await _loop.run_in_executor(
-                                    None, util.cos_sim, query_embedding, response_embedding
-                                ))
+                                response_embedding = await encode_async(embedding_model, stored_response[:200], convert_to_tensor=True)  # Truncate response
+                                response_similarity = float(util.cos_sim(query_embedding, response_embedding))
                             else:
                                 response_similarity = 0.0
                             
                             # Combined score: 70% query + 30% response
                             similarity = 0.7 * query_similarity + 0.3 * response_similarity
                         else:
-                            item_embedding = await _loop.run_in_executor(
-                                None, functools.partial(embedding_model.encode, content, convert_to_tensor=True)
-                            )
-                            similarity = float(await _loop.run_in_executor(
-                                None, util.cos_sim, query_embedding, item_embedding
-                            ))
+                            item_embedding = await encode_async(embedding_model, content, convert_to_tensor=True)
+                            similarity = float(util.cos_sim(query_embedding, item_embedding))
                         scored_results.append({
                             'key': record_data.get('memory_key', record.id),
                             'content': content,
@@ -1041,20 +1029,13 @@ Output:
             log.debug(f"Extracted {len(scenario_texts)} scenario texts for embedding")
             
             # Encode query and scenarios using SBERT
-            _loop = asyncio.get_event_loop()
-            query_embedding = await _loop.run_in_executor(
-                None, functools.partial(self.embedding_model.encode, query, convert_to_tensor=True)
-            )
-            scenario_embeddings = await _loop.run_in_executor(
-                None, functools.partial(self.embedding_model.encode, scenario_texts, convert_to_tensor=True)
-            )
+            query_embedding = await encode_async(self.embedding_model, query, convert_to_tensor=True)
+            scenario_embeddings = await encode_async(self.embedding_model, scenario_texts, convert_to_tensor=True)
             
-            # Calculate cosine similarities using remote utility
+            # Calculate cosine similarities locally
             similarities = []
             for scenario_emb in scenario_embeddings:
-                sim_score = await _loop.run_in_executor(
-                    None, util.cos_sim, query_embedding, scenario_emb
-                )
+                sim_score = util.cos_sim(query_embedding, scenario_emb)
                 similarities.append(sim_score)
             
             # Set threshold for semantic similarity
@@ -1147,7 +1128,7 @@ Output:
                 content = result.get("final_response", "")
             else:
                 # LangChain LLM - returns object with .content
-                result = await llm.ainvoke(semantic_matching_prompt)
+                result = await with_response_cache(llm).ainvoke(semantic_matching_prompt)
                 content = result.content
             
             log.debug(f"LLM semantic matching response received, length: {len(content)} chars")
@@ -1511,7 +1492,7 @@ class EpisodicMemoryManager:
                 else:
                     positive_cands.append(c)
 
-        def rerank_with_cross_encoder(cands):
+        async def rerank_with_cross_encoder(cands):
             if not cands:
                 return []
             
@@ -1529,8 +1510,10 @@ class EpisodicMemoryManager:
             
             try:
                 # Get raw logits from cross-encoder for both query and response pairs
-                query_raw_scores = self.cross_encoder.predict(query_pairs)
-                response_raw_scores = self.cross_encoder.predict(query_response_pairs)
+                query_raw_scores, response_raw_scores = await asyncio.gather(
+                    predict_async(self.cross_encoder, query_pairs),
+                    predict_async(self.cross_encoder, query_response_pairs)
+                )
                 
                 # Apply sigmoid to convert logits to probabilities (0-1 range) using remote operations
                 if not torch.is_tensor(query_raw_scores):
@@ -1555,9 +1538,10 @@ class EpisodicMemoryManager:
                 log.error(f"Cross-encoder failed: {e}, falling back to bi-encoder scores")
                 return [{"candidate": cands[i], "score": cands[i]['score'], "bi_score": cands[i]['score']} for i in range(len(cands))]
 
-        _loop = asyncio.get_event_loop()
-        scored_pos = await _loop.run_in_executor(None, rerank_with_cross_encoder, positive_cands)
-        scored_neg = await _loop.run_in_executor(None, rerank_with_cross_encoder, negative_cands)
+        scored_pos, scored_neg = await asyncio.gather(
+            rerank_with_cross_encoder(positive_cands),
+            rerank_with_cross_encoder(negative_cands)
+        )
 
         # Filter by relevance threshold and update usage statistics for qualifying examples
         qualified_pos = []
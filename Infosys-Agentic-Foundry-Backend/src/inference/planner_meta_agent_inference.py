@@ -1,7 +1,6 @@
 # © 2024-25 Infosys Limited, Bangalore, India. All Rights Reserved.
 import os
 import json
-import asyncio
 from typing import Dict, List
 
 from langgraph.types import interrupt, StreamWriter
@@ -9,6 +8,7 @@ from langgraph.graph import StateGraph, START, END
 from langchain_core.messages import AIMessage, ChatMessage
 
 from src.utils.helper_functions import get_timestamp, build_effective_query_with_user_updates
+from src.utils.post_turn_persistence import post_turn_persistence
 from src.inference.inference_utils import InferenceUtils
 from src.inference.base_agent_inference import BaseWorkflowState, BaseMetaTypeAgentInference
 from src.schemas import AdminConfigLimits
@@ -582,43 +582,38 @@ Please synthesize these results into a single, comprehensive, and well-formatted
             writer({"Node Name": "Memory Update", "Status": "Started"})
             thread_id = await self.chat_service._get_thread_id(state['agentic_application_id'], state['session_id'])
             internal_thread_id = f"inside{thread_id}"
-            asyncio.create_task(self.chat_service.delete_internal_thread(internal_thread_id))
-
             errors = []
             end_timestamp = get_timestamp()
             try:
-                # Save to database
-                asyncio.create_task(self.chat_service.save_chat_message(
+                chat_record = dict(
                     agentic_application_id=state["agentic_application_id"],
                     session_id=state["session_id"],
                     start_timestamp=state["start_timestamp"],
                     end_timestamp=end_timestamp,
                     human_message=state["query"],
                     ai_message=state["response"]
-                ))
-                
-                # Save to file (using ChatService method)
-                await self.chat_service.save_chat_to_file(
-                    agentic_application_id=state["agentic_application_id"],
-                    session_id=state["session_id"],
-                    start_timestamp=state["start_timestamp"],
-                    end_timestamp=end_timestamp,
-                    human_message=state["query"],
-                    ai_message=state["response"],
-                    llm=llm
                 )
-                
-                asyncio.create_task(self.chat_service.update_preferences_and_analyze_conversation(
-                    user_input=state["query"], llm=llm, agentic_application_id=state["agentic_application_id"], session_id=state["session_id"]
-                ))
+                # Chat history row and chat file are written by the post-turn persistence stage, off the response path
+                await post_turn_persistence.submit(state["session_id"], [
+                    ("delete_internal_thread", lambda: self.chat_service.delete_internal_thread(internal_thread_id)),
+                    ("save_chat_message", lambda: self.chat_service.save_chat_message(**chat_record)),
+                    ("save_chat_to_file", lambda: self.chat_service.save_chat_to_file(**chat_record)),
+                ])
+
+                # LLM-derived follow-ups do not gate the next turn of the session
+                analysis_steps = [
+                    ("summarize_chat_log_session", lambda: self.chat_service.summarize_chat_log_session(state["agentic_application_id"], state["session_id"], llm=llm)),
+                    ("update_preferences_and_analyze_conversation", lambda: self.chat_service.update_preferences_and_analyze_conversation(user_input=state["query"], llm=llm, agentic_application_id=state["agentic_application_id"], session_id=state["session_id"]))
+                ]
                 config_limits = await self.admin_config_service.get_limits()
-                if (len(state["ongoing_conversation"]) + 1) % (2*config_limits.chat_summary_interval) == 0:
+                if (len(state["ongoing_conversation"])+1) % (2*config_limits.chat_summary_interval) == 0:
                     log.debug("Storing chat summary")
-                    asyncio.create_task(self.chat_service.get_chat_summary(
+                    analysis_steps.append(("get_chat_summary", lambda: self.chat_service.get_chat_summary(
                         agentic_application_id=state["agentic_application_id"],
                         session_id=state["session_id"],
                         llm=llm
-                    ))
+                    )))
+                await post_turn_persistence.submit(state["session_id"], analysis_steps, ordered=False)
             except Exception as e:
                 writer({"Node Name": "Memory Update", "Status": "Failed"})
                 error = f"Error occurred in Final response: {e}"
@@ -2,7 +2,6 @@
 import os
 import re
 import json
-import asyncio
 from abc import abstractmethod
 
 from typing import Any, Dict, List, Optional, Union, Callable, Literal, Tuple, AsyncGenerator
@@ -21,6 +20,7 @@ from src.utils.helper_functions import get_timestamp
 
 from telemetry_wrapper import logger as log, update_session_context
 from src.utils.phoenix_manager import ensure_project_registered, traced_project_context, log_trace_context
+from src.utils.background_tasks import background_tasks
 
 
 class BasePythonBasedAgentInference(AbstractBaseInference):
@@ -561,7 +561,7 @@ class BasePythonBasedAgentInference(AbstractBaseInference):
 
                 try:
                     log.info("Inserting evaluation data into the database.")
-                    asyncio.create_task(self.evaluation_service.log_evaluation_data(session_id, agentic_application_id, agent_config, response_evaluation, model_name))
+                    await background_tasks.submit("evaluation", self.evaluation_service.log_evaluation_data(session_id, agentic_application_id, agent_config, response_evaluation, model_name))
                 except Exception as e:
                     log.error(f"Error Occurred while inserting into evaluation data: {e}")
 
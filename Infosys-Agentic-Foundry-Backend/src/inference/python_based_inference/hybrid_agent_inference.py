@@ -1,5 +1,4 @@
 # © 2024-25 Infosys Limited, Bangalore, India. All Rights Reserved.
-import asyncio
 from typing import Any, List, Dict, Optional, Literal, AsyncGenerator
 from fastapi import HTTPException
 
@@ -12,6 +11,7 @@ from src.utils.helper_functions import get_timestamp, build_effective_query_with
 
 from telemetry_wrapper import logger as log
 from src.utils.phoenix_manager import traced_project_context_sync
+from src.utils.post_turn_persistence import post_turn_persistence
 
 
 class HybridAgentInference(BasePythonBasedAgentInference):
@@ -519,40 +519,26 @@ IMPORTANT: Provide ONLY the improved answer/response directly. Do NOT include ac
                         # Calculate response time in seconds
                         response_time = (end_timestamp - start_timestamp).total_seconds()
                         
-                        # Save to database
-                        asyncio.create_task(
-                            self.chat_service.save_chat_message(
-                                agentic_application_id=agentic_application_id,
-                                session_id=session_id,
-                                start_timestamp=start_timestamp,
-                                end_timestamp=end_timestamp,
-                                human_message=agent_resp["user_query"],
-                                ai_message=agent_resp["final_response"],
-                                response_time=response_time
-                            )
-                        )
-                        
-                        # Save to file (using ChatService method)
-                        asyncio.create_task(
-                            self.chat_service.save_chat_to_file(
-                                agentic_application_id=agentic_application_id,
-                                session_id=session_id,
-                                start_timestamp=start_timestamp,
-                                end_timestamp=end_timestamp,
-                                human_message=agent_resp["user_query"],
-                                ai_message=agent_resp["final_response"],
-                                llm=llm
-                            )
-                        )
-                        
-                        asyncio.create_task(
-                            self.chat_service.update_preferences_and_analyze_conversation(
-                                user_input=agent_resp["user_query"],
-                                llm=llm,
-                                agentic_application_id=agentic_application_id,
-                                session_id=session_id
-                            )
+                        chat_record = dict(
+                            agentic_application_id=agentic_application_id,
+                            session_id=session_id,
+                            start_timestamp=start_timestamp,
+                            end_timestamp=end_timestamp,
+                            human_message=agent_resp["user_query"],
+                            ai_message=agent_resp["final_response"]
                         )
+                        # Chat history row and chat file are written by the post-turn persistence stage, off the response path;
+                        # the steps run after this loop moves on, so they bind this turn's values
+                        await post_turn_persistence.submit(session_id, [
+                            ("save_chat_message", lambda chat_record=chat_record, response_time=response_time: self.chat_service.save_chat_message(**chat_record, response_time=response_time)),
+                            ("save_chat_to_file", lambda chat_record=chat_record: self.chat_service.save_chat_to_file(**chat_record)),
+                        ])
+
+                        # LLM-derived follow-ups do not gate the next turn of the session
+                        await post_turn_persistence.submit(session_id, [
+                            ("summarize_chat_log_session", lambda: self.chat_service.summarize_chat_log_session(agentic_application_id, session_id, llm=llm)),
+                            ("update_preferences_and_analyze_conversation", lambda chat_record=chat_record: self.chat_service.update_preferences_and_analyze_conversation(user_input=chat_record["human_message"], llm=llm, agentic_application_id=agentic_application_id, session_id=session_id))
+                        ], ordered=False)
 
                     # Formatting for canvas view
                     if response_formatting_flag and final_response_generated_flag:
@@ -1123,40 +1109,26 @@ IMPORTANT: Provide ONLY the improved answer/response directly. Do NOT include ac
                         end_timestamp = get_timestamp()
                         response_time = (end_timestamp - start_timestamp).total_seconds()
                         
-                        # Save to database
-                        asyncio.create_task(
-                            self.chat_service.save_chat_message(
-                                agentic_application_id=agentic_application_id,
-                                session_id=session_id,
-                                start_timestamp=start_timestamp,
-                                end_timestamp=end_timestamp,
-                                human_message=agent_resp.get("user_query"),
-                                ai_message=agent_resp.get("final_response"),
-                                response_time=response_time
-                            )
-                        )
-                        
-                        # Save to file (using ChatService method)
-                        asyncio.create_task(
-                            self.chat_service.save_chat_to_file(
-                                agentic_application_id=agentic_application_id,
-                                session_id=session_id,
-                                start_timestamp=start_timestamp,
-                                end_timestamp=end_timestamp,
-                                human_message=agent_resp.get("user_query"),
-                                ai_message=agent_resp.get("final_response"),
-                                llm=llm
-                            )
-                        )
-                        
-                        asyncio.create_task(
-                            self.chat_service.update_preferences_and_analyze_conversation(
-                                user_input=agent_resp.get("user_query"),
-                                llm=llm,
-                                agentic_application_id=agentic_application_id,
-                                session_id=session_id
-                            )
+                        chat_record = dict(
+                            agentic_application_id=agentic_application_id,
+                            session_id=session_id,
+                            start_timestamp=start_timestamp,
+                            end_timestamp=end_timestamp,
+                            human_message=agent_resp.get("user_query"),
+                            ai_message=agent_resp.get("final_response")
                         )
+                        # Chat history row and chat file are written by the post-turn persistence stage, off the response path;
+                        # the steps run after this loop moves on, so they bind this turn's values
+                        await post_turn_persistence.submit(session_id, [
+                            ("save_chat_message", lambda chat_record=chat_record, response_time=response_time: self.chat_service.save_chat_message(**chat_record, response_time=response_time)),
+                            ("save_chat_to_file", lambda chat_record=chat_record: self.chat_service.save_chat_to_file(**chat_record)),
+                        ])
+
+                        # LLM-derived follow-ups do not gate the next turn of the session
+                        await post_turn_persistence.submit(session_id, [
+                            ("summarize_chat_log_session", lambda: self.chat_service.summarize_chat_log_session(agentic_application_id, session_id, llm=llm)),
+                            ("update_preferences_and_analyze_conversation", lambda chat_record=chat_record: self.chat_service.update_preferences_and_analyze_conversation(user_input=chat_record["human_message"], llm=llm, agentic_application_id=agentic_application_id, session_id=session_id))
+                        ], ordered=False)
 
                     # Formatting for canvas view
                     if response_formatting_flag and final_response_generated_flag:                        
@@ -414,7 +414,6 @@ class AzureAIModelService(BaseAIModelService):
                         else:
                             yield {"raw": {"tool_verifier": "User approved the tool execution."}, "content": "User approved the tool execution by clicking the thumbs up button."}
 
-                        tool_execution_tasks = []
                         for tool_call in pending_tool_calls:
                             if tool_call["id"] in updated_tool_calls_dict:
                                 # Update tool call arguments with user-provided updates
@@ -428,9 +427,7 @@ class AzureAIModelService(BaseAIModelService):
                                     tool_call["function"]["original_arguments"] = reference_args
                                 log.info(f"  [Agent Stream] Applied user update for tool '{tool_call['function']['name']}' (ID: {tool_call['id']}).")
 
-                            tool_execution_tasks.append(self._execute_tool_call(tool_call))
-
-                        tool_outputs = await asyncio.gather(*tool_execution_tasks)
+                        tool_outputs = await self._execute_tool_calls(pending_tool_calls)
                         for tool_output, tool_call in zip(tool_outputs, pending_tool_calls):
                             tool_call_name = tool_call["function"]["name"]
                             original_args = tool_call["function"].get("original_arguments", None)
@@ -653,11 +650,7 @@ class AzureAIModelService(BaseAIModelService):
                         else:
                             yield {"raw": {"content_display": f"Agent called the tool '{tool_name}', passing no arguments."}, "content": f"Agent called the tool '{tool_name}', passing no arguments."}
                     # Execute Tools (Parallel)
-                    tool_execution_tasks = [
-                        self._execute_tool_call(tool_call)
-                        for tool_call in tool_calls_for_execution
-                    ]
-                    tool_results = await asyncio.gather(*tool_execution_tasks)
+                    tool_results = await self._execute_tool_calls(tool_calls_for_execution)
                     
                     # Append Tool Outputs and yield results
                     for i, tool_call in enumerate(tool_calls_for_execution):
@@ -877,7 +870,6 @@ class AzureAIModelService(BaseAIModelService):
                             updated_tool_calls_dict[pending_tool_calls[0]["id"]] = updated_tool_calls_dict[self.first_tool_id_placeholder]
                             log.info(f"  [Agent] Mapped placeholder ID to actual tool_call_id '{pending_tool_calls[0]['id']}', for single tool call update.")
 
-                        tool_execution_tasks = []
                         for tool_call in pending_tool_calls:
                             if tool_call["id"] in updated_tool_calls_dict:
                                 # Update tool call arguments with user-provided updates
@@ -891,9 +883,7 @@ class AzureAIModelService(BaseAIModelService):
                                     tool_call["function"]["original_arguments"] = reference_args
                                 log.info(f"  [Agent] Applied user update for tool '{tool_call['function']['name']}' (ID: {tool_call['id']}).")
 
-                            tool_execution_tasks.append(self._execute_tool_call(tool_call))
-
-                        tool_outputs = await asyncio.gather(*tool_execution_tasks)
+                        tool_outputs = await self._execute_tool_calls(pending_tool_calls)
                         for tool_output, tool_call in zip(tool_outputs, pending_tool_calls):
                             tool_call_name = tool_call["function"]["name"]
                             original_args = tool_call["function"].get("original_arguments", None)
@@ -1040,11 +1030,7 @@ class AzureAIModelService(BaseAIModelService):
                     tool_calls_for_execution: List[ChatCompletionMessageToolCall] = response_message.tool_calls
 
                     # Execute all requested tool calls in parallel
-                    tool_execution_tasks = [
-                        self._execute_tool_call(tool_call)
-                        for tool_call in tool_calls_for_execution
-                    ]
-                    tool_results = await asyncio.gather(*tool_execution_tasks)
+                    tool_results = await self._execute_tool_calls(tool_calls_for_execution)
 
                     # Add the outputs of the tool calls back to the conversation history
                     for i, tool_call in enumerate(tool_calls_for_execution):
@@ -1,4 +1,5 @@
 # © 2024-25 Infosys Limited, Bangalore, India. All Rights Reserved.
+import os
 import re
 import ast
 import json
@@ -15,6 +16,12 @@ from src.utils.helper_functions import convert_value_type_of_candidate_as_given_
 from telemetry_wrapper import logger as log
 
 
+# Upper bound on tool calls from one assistant turn that run at the same time (overridable per agent)
+TOOL_CALL_MAX_CONCURRENCY = int(os.getenv("TOOL_CALL_MAX_CONCURRENCY", "8"))
+# Per-tool-call timeout in seconds; 0 disables it (overridable per agent)
+TOOL_CALL_TIMEOUT_SECONDS = float(os.getenv("TOOL_CALL_TIMEOUT_SECONDS", "300"))
+
+
 # --- Abstract Base Agent Class ---
 
 class BaseAIModelService(ABC):
@@ -305,6 +312,35 @@ class BaseAIModelService(ABC):
             log.info(f"  [Agent] Error executing tool '{function_name}': {e}")
             return {"error": f"Error executing tool '{function_name}': {str(e)}"}
 
+    async def _execute_tool_calls(self, tool_calls: List[ChatCompletionMessageToolCall | dict]) -> List[Any]:
+        """
+        Executes all tool calls from one assistant turn concurrently and returns their results
+        in the same order as `tool_calls`.
+
+        Concurrency is capped by the `max_parallel_tool_calls` agent setting (default TOOL_CALL_MAX_CONCURRENCY)
+        and each call is bounded by `tool_call_timeout` seconds (default TOOL_CALL_TIMEOUT_SECONDS, 0 = no limit).
+        A timed-out call yields an error result instead of failing the whole turn; a synchronous tool that
+        times out keeps running in its worker thread, but its result is discarded.
+        """
+        if not tool_calls:
+            return []
+        max_concurrency = max(1, int(self._agent_config_kwargs.get("max_parallel_tool_calls", TOOL_CALL_MAX_CONCURRENCY)))
+        timeout = float(self._agent_config_kwargs.get("tool_call_timeout", TOOL_CALL_TIMEOUT_SECONDS)) or None
+        semaphore = asyncio.Semaphore(max_concurrency)
+
+        async def run_one(tool_call: ChatCompletionMessageToolCall | dict) -> Any:
+            async with semaphore:
+                try:
+                    return await asyncio.wait_for(self._execute_tool_call(tool_call), timeout=timeout)
+                except asyncio.TimeoutError:
+                    function_name = tool_call["function"]["name"] if isinstance(tool_call, dict) else tool_call.function.name
+                    log.warning(f"  [Agent] Tool '{function_name}' timed out after {timeout} seconds.")
+                    return {"error": f"Tool '{function_name}' timed out after {timeout} seconds."}
+
+        if len(tool_calls) > 1:
+            log.info(f"  [Agent] Executing {len(tool_calls)} tool calls concurrently (max {max_concurrency} at a time).")
+        return list(await asyncio.gather(*(run_one(tool_call) for tool_call in tool_calls)))
+
     @abstractmethod
     async def astream(
             self,
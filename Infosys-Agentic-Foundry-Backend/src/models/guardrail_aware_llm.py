@@ -13,6 +13,7 @@ Token/cost tracing is covered for all invocation paths:
 """
 
 import asyncio
+import contextvars
 from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Union
 
 # Lazily captured reference to the main event loop.
@@ -312,8 +313,9 @@ class TokenLoggingMixin:
            → uses loop.create_task() for zero-overhead fire-and-forget.
         2. Called from a thread executor (e.g. LangGraph formatter node run via
            asyncio.to_thread) where get_running_loop() raises RuntimeError
-           → falls back to asyncio.run_coroutine_threadsafe() using the main
-             event loop reference captured on the first async LLM call.
+           → schedules the task on the main event loop reference captured on the
+             first async LLM call, in a copy of the worker thread's context so the
+             hooks still see the request's session and token accumulator.
         """
         try:
             loop = asyncio.get_running_loop()
@@ -322,7 +324,8 @@ class TokenLoggingMixin:
             # We are in a worker thread. Use the captured main event loop.
             loop = _main_event_loop
             if loop is not None and loop.is_running():
-                asyncio.run_coroutine_threadsafe(coro, loop)
+                context = contextvars.copy_context()
+                loop.call_soon_threadsafe(lambda: loop.create_task(coro, context=context))
             else:
                 coro.close()
                 log.debug("[TokenLogging] No event loop available — sync token logging skipped")
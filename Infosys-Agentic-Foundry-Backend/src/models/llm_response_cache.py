@@ -0,0 +1,292 @@
+# © 2024-25 Infosys Limited, Bangalore, India. All Rights Reserved.
+"""
+Opt-in response cache (LLM_RESPONSE_CACHE_ENABLED=true) for deterministic,
+temperature-0 LangChain chat model calls.
+
+Plugs into LangChain's per-model ``cache`` field, so a cached model skips the
+provider call (and the token-logging hooks) entirely on a hit. Entries are keyed
+on the LangChain llm_string (model, temperature, bound tools and other call
+parameters) plus the normalized message list, and stored in Redis with a TTL
+when caching is enabled, otherwise in a bounded in-process LRU.
+
+An optional semantic tier matches a new prompt against recent prompts for the
+same llm_string by embedding similarity. It is off unless
+LLM_SEMANTIC_CACHE_THRESHOLD is set.
+
+Every hit is logged to token_usage_logs by the standalone tracker as a zero-cost row
+flagged cache_hit with the tokens the cached response took, so the token-usage report
+aggregates hit rate and tokens saved across processes and restarts.
+
+Usage:
+    llm = await model_service.get_llm_model(model_name, temperature=0, cache_responses=True)
+    llm = with_response_cache(llm)   # for an LLM instance handed in by a caller
+"""
+
+import os
+import re
+import json
+import time
+import hashlib
+import asyncio
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from langchain_core.caches import BaseCache, RETURN_VAL_TYPE
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.load import dumps, loads
+
+from src.config import cache_config
+from telemetry_wrapper import logger as log
+
+
+LLM_RESPONSE_CACHE_ENABLED = os.getenv("LLM_RESPONSE_CACHE_ENABLED", "False").lower() == "true"
+LLM_RESPONSE_CACHE_TTL = int(os.getenv("LLM_RESPONSE_CACHE_TTL", "86400"))
+LLM_RESPONSE_CACHE_LOCAL_SIZE = int(os.getenv("LLM_RESPONSE_CACHE_LOCAL_SIZE", "2000"))
+# Cosine similarity a prompt must reach to reuse another prompt's response; 0 disables the semantic tier
+LLM_SEMANTIC_CACHE_THRESHOLD = float(os.getenv("LLM_SEMANTIC_CACHE_THRESHOLD", "0"))
+LLM_SEMANTIC_CACHE_MAX_ENTRIES = int(os.getenv("LLM_SEMANTIC_CACHE_MAX_ENTRIES", "500"))
+LLM_SEMANTIC_CACHE_MAX_PROMPT_CHARS = int(os.getenv("LLM_SEMANTIC_CACHE_MAX_PROMPT_CHARS", "4000"))
+
+_KEY_PREFIX = "llm_response_cache"
+# llm_string holds the model parameters as repr'd (name, value) pairs or JSON
+_MODEL_NAME_PATTERN = re.compile(r"""['"](?:deployment_name|model_name|model)['"]\s*[,:]\s*['"]([^'"]+)['"]""")
+
+
+def _normalize(value: Any) -> Any:
+    """Drop per-call message ids and surrounding whitespace so equivalent prompts share a key."""
+    if isinstance(value, dict):
+        return {k: _normalize(v) for k, v in value.items() if k != "id"}
+    if isinstance(value, list):
+        return [_normalize(v) for v in value]
+    if isinstance(value, str):
+        return value.strip()
+    return value
+
+
+def _normalized_prompt(prompt: str) -> str:
+    try:
+        return json.dumps(_normalize(json.loads(prompt)), sort_keys=True, separators=(",", ":"))
+    except (TypeError, ValueError):
+        return prompt.strip()
+
+
+def _prompt_text(prompt: str) -> str:
+    """Concatenated message contents, used as the text embedded by the semantic tier."""
+    try:
+        messages = json.loads(prompt)
+    except (TypeError, ValueError):
+        return prompt
+    parts = []
+    for message in messages if isinstance(messages, list) else [messages]:
+        content = message.get("kwargs", {}).get("content") if isinstance(message, dict) else None
+        if isinstance(content, str):
+            parts.append(content)
+        elif isinstance(content, list):
+            parts.extend(p.get("text", "") for p in content if isinstance(p, dict))
+    return "\n".join(parts) or prompt
+
+
+def _tokens_in(generations: Sequence[Any]) -> int:
+    total = 0
+    for generation in generations:
+        usage = getattr(getattr(generation, "message", None), "usage_metadata", None) or {}
+        total += int(usage.get("total_tokens", 0) or 0)
+    return total
+
+
+def _model_name(llm_string: str) -> Optional[str]:
+    """Model or deployment name from a LangChain llm_string, for attributing cache hits."""
+    match = _MODEL_NAME_PATTERN.search(llm_string or "")
+    return match.group(1) if match else None
+
+
+def _log_hit(llm_string: str, tokens: int, semantic: bool = False):
+    try:
+        from litellm_standalone_tracker import log_cache_hit
+        log_cache_hit(_model_name(llm_string), tokens, semantic=semantic)
+    except Exception as e:
+        log.warning(f"[LLMResponseCache] Could not log cache hit: {e}")
+
+
+class LLMResponseCache(BaseCache):
+    """LangChain cache backed by Redis (with TTL) or a local LRU, plus an optional semantic tier."""
+
+    def __init__(self, ttl: int = LLM_RESPONSE_CACHE_TTL, local_size: int = LLM_RESPONSE_CACHE_LOCAL_SIZE,
+                 semantic_threshold: float = LLM_SEMANTIC_CACHE_THRESHOLD):
+        self.ttl = ttl
+        self.local_size = local_size
+        self.semantic_threshold = semantic_threshold
+        self._local: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+        self._local_lock = threading.Lock()
+        # llm_string -> OrderedDict[key, embedding]
+        self._semantic_index: Dict[str, "OrderedDict[str, Any]"] = {}
+
+    @staticmethod
+    def make_key(prompt: str, llm_string: str) -> str:
+        digest = hashlib.sha256(f"{llm_string}\x00{_normalized_prompt(prompt)}".encode("utf-8")).hexdigest()
+        return f"{_KEY_PREFIX}:{digest}"
+
+    # ── storage ──────────────────────────────────────────────────────────────
+
+    def _get_raw(self, key: str) -> Optional[str]:
+        if cache_config.ENABLE_CACHING and cache_config.default_cache is not None:
+            try:
+                return cache_config.default_cache.get(key)
+            except Exception as e:
+                log.warning(f"[LLMResponseCache] Redis GET failed, using local cache: {e}")
+        with self._local_lock:
+            entry = self._local.get(key)
+            if entry is None:
+                return None
+            expires_at, raw = entry
+            if expires_at < time.monotonic():
+                del self._local[key]
+                return None
+            self._local.move_to_end(key)
+            return raw
+
+    def _set_raw(self, key: str, raw: str):
+        if cache_config.ENABLE_CACHING and cache_config.default_cache is not None:
+            try:
+                cache_config.default_cache.set(key, raw, ex=self.ttl)
+                return
+            except Exception as e:
+                log.warning(f"[LLMResponseCache] Redis SET failed, using local cache: {e}")
+        with self._local_lock:
+            self._local[key] = (time.monotonic() + self.ttl, raw)
+            self._local.move_to_end(key)
+            while len(self._local) > self.local_size:
+                self._local.popitem(last=False)
+
+    def _decode(self, raw: Optional[str]) -> Optional[Tuple[List[Any], int]]:
+        if raw is None:
+            return None
+        try:
+            payload = json.loads(raw)
+            return [loads(g) for g in payload["generations"]], int(payload.get("tokens", 0))
+        except Exception as e:
+            log.warning(f"[LLMResponseCache] Discarding unreadable cache entry: {e}")
+            return None
+
+    # ── BaseCache interface ──────────────────────────────────────────────────
+
+    def lookup(self, prompt: str, llm_string: str) -> Optional[RETURN_VAL_TYPE]:
+        decoded = self._decode(self._get_raw(self.make_key(prompt, llm_string)))
+        if decoded is None:
+            return None
+        generations, tokens = decoded
+        _log_hit(llm_string, tokens)
+        log.debug(f"[LLMResponseCache] Exact hit, {tokens} tokens saved")
+        return generations
+
+    def update(self, prompt: str, llm_string: str, return_val: RETURN_VAL_TYPE) -> None:
+        key = self.make_key(prompt, llm_string)
+        try:
+            raw = json.dumps({"generations": [dumps(g) for g in return_val], "tokens": _tokens_in(return_val)})
+        except Exception as e:
+            log.warning(f"[LLMResponseCache] Response not serializable, not cached: {e}")
+            return
+        self._set_raw(key, raw)
+
+    async def alookup(self, prompt: str, llm_string: str) -> Optional[RETURN_VAL_TYPE]:
+        key = self.make_key(prompt, llm_string)
+        decoded = self._decode(await asyncio.to_thread(self._get_raw, key))
+        semantic = False
+        if decoded is None and self.semantic_threshold > 0:
+            decoded = await self._semantic_lookup(prompt, llm_string)
+            semantic = decoded is not None
+        if decoded is None:
+            return None
+        generations, tokens = decoded
+        _log_hit(llm_string, tokens, semantic=semantic)
+        log.debug(f"[LLMResponseCache] {'Semantic' if semantic else 'Exact'} hit, {tokens} tokens saved")
+        return generations
+
+    async def aupdate(self, prompt: str, llm_string: str, return_val: RETURN_VAL_TYPE) -> None:
+        await asyncio.to_thread(self.update, prompt, llm_string, return_val)
+        if self.semantic_threshold > 0:
+            await self._semantic_index_add(prompt, llm_string)
+
+    def clear(self, **kwargs: Any) -> None:
+        with self._local_lock:
+            self._local.clear()
+        self._semantic_index.clear()
+        if cache_config.ENABLE_CACHING and cache_config.default_cache is not None:
+            try:
+                keys = list(cache_config.default_cache.scan_iter(match=f"{_KEY_PREFIX}:*"))
+                if keys:
+                    cache_config.default_cache.delete(*keys)
+            except Exception as e:
+                log.warning(f"[LLMResponseCache] Redis clear failed: {e}")
+
+    # ── semantic tier ────────────────────────────────────────────────────────
+
+    async def _embed(self, prompt: str):
+        text = _prompt_text(prompt)
+        if len(text) > LLM_SEMANTIC_CACHE_MAX_PROMPT_CHARS:
+            return None
+        from src.api.dependencies import ServiceProvider
+        from src.utils.remote_model_client import encode_async
+        embedding = np.asarray(
+            await encode_async(ServiceProvider.get_embedding_model(), [text], convert_to_numpy=True), dtype=np.float32
+        )[0]
+        norm = float(np.linalg.norm(embedding))
+        return embedding / norm if norm else None
+
+    async def _semantic_lookup(self, prompt: str, llm_string: str) -> Optional[Tuple[List[Any], int]]:
+        index = self._semantic_index.get(llm_string)
+        if not index:
+            return None
+        try:
+            query = await self._embed(prompt)
+        except Exception as e:
+            log.debug(f"[LLMResponseCache] Semantic lookup skipped: {e}")
+            return None
+        if query is None:
+            return None
+        best_key, best_score = None, self.semantic_threshold
+        for key, embedding in list(index.items()):
+            score = float(query @ embedding)
+            if score >= best_score:
+                best_key, best_score = key, score
+        if best_key is None:
+            return None
+        decoded = self._decode(await asyncio.to_thread(self._get_raw, best_key))
+        if decoded is None:
+            index.pop(best_key, None)
+        return decoded
+
+    async def _semantic_index_add(self, prompt: str, llm_string: str):
+        try:
+            embedding = await self._embed(prompt)
+        except Exception as e:
+            log.debug(f"[LLMResponseCache] Semantic indexing skipped: {e}")
+            return
+        if embedding is None:
+            return
+        index = self._semantic_index.setdefault(llm_string, OrderedDict())
+        index[self.make_key(prompt, llm_string)] = embedding
+        while len(index) > LLM_SEMANTIC_CACHE_MAX_ENTRIES:
+            index.popitem(last=False)
+
+
+llm_response_cache = LLMResponseCache()
+
+
+def with_response_cache(llm: Any) -> Any:
+    """
+    Return a copy of a LangChain chat model that reads/writes the shared response cache.
+    Non-LangChain models (e.g. BaseAIModelService), models sampling at a non-zero temperature
+    and disabled caching return llm unchanged.
+    """
+    if not LLM_RESPONSE_CACHE_ENABLED or not isinstance(llm, BaseChatModel):
+        return llm
+    if getattr(llm, "temperature", None) not in (None, 0):
+        return llm
+    if llm.cache is llm_response_cache:
+        return llm
+    return llm.model_copy(update={"cache": llm_response_cache})
+
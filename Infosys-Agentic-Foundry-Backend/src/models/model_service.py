@@ -1,11 +1,14 @@
 # © 2024-25 Infosys Limited, Bangalore, India. All Rights Reserved.
 import os
+from collections import OrderedDict
 from typing import Any, Dict, List, Union, Tuple
+import httpx
 from langchain_openai import AzureChatOpenAI, ChatOpenAI
 from langchain_google_genai import ChatGoogleGenerativeAI
 from google.adk.models.lite_llm import LiteLlm
 
 from src.models.azure_ai_model_service import AzureAIModelService
+from src.models.llm_response_cache import with_response_cache
 from src.models.guardrail_aware_llm import (
     GuardrailAzureChatOpenAI,
     GuardrailChatOpenAI,
@@ -17,6 +20,51 @@ from src.config.constants import ModelNames
 from telemetry_wrapper import logger as log
 
 
+# Loaded LLM instances kept per (model, temperature, guardrail mode); least recently used are evicted
+LLM_CLIENT_CACHE_SIZE = int(os.getenv("LLM_CLIENT_CACHE_SIZE", "32"))
+# Connection pool shared by every LLM instance that talks to the same endpoint
+LLM_HTTP_MAX_CONNECTIONS = int(os.getenv("LLM_HTTP_MAX_CONNECTIONS", "100"))
+LLM_HTTP_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("LLM_HTTP_MAX_KEEPALIVE_CONNECTIONS", "20"))
+LLM_HTTP_KEEPALIVE_EXPIRY = float(os.getenv("LLM_HTTP_KEEPALIVE_EXPIRY", "60"))
+
+_shared_http_clients: Dict[str, Tuple[httpx.Client, httpx.AsyncClient]] = {}
+
+
+def get_shared_http_clients(endpoint: str) -> Tuple[httpx.Client, httpx.AsyncClient]:
+    """
+    Returns the (sync, async) httpx clients shared by all LLM instances for an endpoint,
+    so TLS connections are reused across agents, temperatures and requests.
+    Per-request timeouts are still set by the OpenAI SDK.
+    """
+    key = (endpoint or "").rstrip("/")
+    clients = _shared_http_clients.get(key)
+    if clients is None:
+        limits = httpx.Limits(
+            max_connections=LLM_HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=LLM_HTTP_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=LLM_HTTP_KEEPALIVE_EXPIRY,
+        )
+        timeout = httpx.Timeout(600.0, connect=5.0)
+        clients = (
+            httpx.Client(limits=limits, timeout=timeout),
+            httpx.AsyncClient(limits=limits, timeout=timeout),
+        )
+        _shared_http_clients[key] = clients
+        log.info(f"Created shared LLM HTTP connection pool for endpoint: {key}")
+    return clients
+
+
+async def close_shared_http_clients() -> None:
+    """Closes every shared LLM HTTP connection pool (application shutdown)."""
+    while _shared_http_clients:
+        endpoint, (sync_client, async_client) = _shared_http_clients.popitem()
+        try:
+            sync_client.close()
+            await async_client.aclose()
+        except Exception as e:
+            log.warning(f"Error closing LLM HTTP connection pool for {endpoint}: {e}")
+
+
 class ModelService:
     """
     Service layer for managing LLM models.
@@ -29,7 +77,8 @@ class ModelService:
         """
         self.chat_state_history_manager = chat_state_history_manager
 
-        self._loaded_models: Dict[str, Union[AzureChatOpenAI, ChatOpenAI, ChatGoogleGenerativeAI]] = {} # Cache for loaded LLM instances
+        # LRU cache of loaded LLM instances keyed by (model_name, temperature, use_litellm_proxy)
+        self._loaded_models: "OrderedDict[Tuple[str, float, bool], Union[AzureChatOpenAI, ChatOpenAI, ChatGoogleGenerativeAI]]" = OrderedDict()
 
         # LiteLLM Proxy configuration (for guardrails and token tracking)
         self.use_litellm_proxy = os.getenv("USE_LITELLM_PROXY_FLAG", "false").lower() == "true"
@@ -179,6 +228,7 @@ class ModelService:
                     temperature = 1
                 
                 log.info(f"Loading model via LiteLLM proxy with guardrails: {model_name}")
+                http_client, http_async_client = get_shared_http_clients(self.litellm_endpoint)
                 return GuardrailAzureChatOpenAI(
                     openai_api_key=api_key,
                     azure_endpoint=self.litellm_endpoint,
@@ -186,6 +236,8 @@ class ModelService:
                     azure_deployment=model_name,
                     temperature=temperature,
                     max_tokens=None,
+                    http_client=http_client,
+                    http_async_client=http_async_client,
                 )
 
         # Original Azure OpenAI configuration
@@ -195,6 +247,7 @@ class ModelService:
                 raise ValueError("Azure model's is not set in environment variables.")
 
             log.info(f"Loading Azure OpenAI model with token logging: {model_name}")
+            http_client, http_async_client = get_shared_http_clients(self.__azure_api_base)
             return TokenLoggingAzureChatOpenAI(
                 openai_api_key=self.__azure_api_key,
                 azure_endpoint=self.__azure_api_base,
@@ -203,6 +256,8 @@ class ModelService:
                 temperature=temperature,
                 max_retries=0,
                 max_tokens=None,
+                http_client=http_client,
+                http_async_client=http_async_client,
             )
 
         if model_name in self.azure_openai_gpt_5_models:
@@ -213,6 +268,7 @@ class ModelService:
                 raise ValueError("Azure GPT-5 model's is not set in environment variables.")
 
             log.info(f"Loading Azure OpenAI GPT-5 model with token logging: {model_name}")
+            http_client, http_async_client = get_shared_http_clients(self.__azure_gpt_5_api_base)
             return TokenLoggingAzureChatOpenAI(
                 openai_api_key=self.__azure_gpt_5_api_key,
                 azure_endpoint=self.__azure_gpt_5_api_base,
@@ -221,6 +277,8 @@ class ModelService:
                 temperature=temperature,
                 max_retries=10,
                 max_tokens=None,
+                http_client=http_client,
+                http_async_client=http_async_client,
             )
         
         if model_name in self.openai_models:
@@ -231,12 +289,15 @@ class ModelService:
                 raise ValueError("OPENAI_BASE_URL_ENDPOINT is not set in environment variables.")
 
             log.info(f"Loading OpenAI model: {model_name}")
+            http_client, http_async_client = get_shared_http_clients(base_url)
             return ChatOpenAI(
                 openai_api_key=api_key,
                 openai_api_base=base_url,
                 model=model_name,
                 temperature=temperature,
-                max_retries=10
+                max_retries=10,
+                http_client=http_client,
+                http_async_client=http_async_client,
             )
 
         if model_name in self.google_genai_models:
@@ -258,12 +319,15 @@ class ModelService:
                 raise ValueError("OPENAI_API_KEY is not set in environment variables.")
 
             log.info(f"Loading OpenAI model: {model_name}")
+            http_client, http_async_client = get_shared_http_clients(self.__openai_base_url)
             return ChatOpenAI(
                 api_key=self.__openai_api_key,
                 base_url=self.__openai_base_url,
                 model=model_name,
                 temperature=temperature,
-                max_retries=10
+                max_retries=10,
+                http_client=http_client,
+                http_async_client=http_async_client,
             )
 
         if model_name in self.gpt_oss_models:
@@ -272,24 +336,29 @@ class ModelService:
                 raise ValueError("GPT_OSS_BASE_URL_ENDPOINT is not set in environment variables.")
 
             log.info(f"Loading GPT-OSS model: {model_name}")
+            http_client, http_async_client = get_shared_http_clients(self.__gpt_oss_base_url)
             return ChatOpenAI(
                 openai_api_key=self.__gpt_oss_api_key,
                 openai_api_base=self.__gpt_oss_base_url,
                 model=model_name,
                 temperature=temperature,
-                max_retries=10
+                max_retries=10,
+                http_client=http_client,
+                http_async_client=http_async_client,
             )
 
         log.error(f"Invalid model name: {model_name}")
         raise ValueError("Invalid model name specified")
 
-    async def get_llm_model(self, model_name: str, temperature: float = 0) -> AzureChatOpenAI | ChatOpenAI | ChatGoogleGenerativeAI:
+    async def get_llm_model(self, model_name: str, temperature: float = 0, cache_responses: bool = False) -> AzureChatOpenAI | ChatOpenAI | ChatGoogleGenerativeAI:
         """
         Retrieves a loaded LLM instance from the cache, or loads it if not present.
 
         Args:
             model_name (str): The name of the model to retrieve.
             temperature (float): The temperature setting for the LLM.
+            cache_responses (bool): Return a copy that serves repeated prompts from the LLM response cache.
+                Intended for deterministic internal calls (validation, evaluation, repair prompts).
 
         Returns:
             Any: An instance of the loaded LLM.
@@ -297,16 +366,26 @@ class ModelService:
         Raises:
             ValueError: If the model name is invalid or loading fails.
         """
-        if temperature != 0:
-            log.info(f"Model '{model_name}' with temperature {temperature} not in cache. Loading...")
-            return await self._load_llm_instance(model_name, temperature)
-
-        if model_name not in self._loaded_models:
-            log.info(f"Model '{model_name}' not in cache. Loading and caching...")
-            self._loaded_models[model_name] = await self._load_llm_instance(model_name, temperature)
+        key = self._model_cache_key(model_name, temperature)
+        llm = self._loaded_models.get(key)
+        if llm is None:
+            log.info(f"Model '{model_name}' with temperature {temperature} not in cache. Loading and caching...")
+            llm = await self._load_llm_instance(model_name, temperature)
+            self._cache_llm_instance(key, llm)
         else:
-            log.debug(f"Model '{model_name}' retrieved from cache.")
-        return self._loaded_models[model_name]
+            self._loaded_models.move_to_end(key)
+            log.debug(f"Model '{model_name}' with temperature {temperature} retrieved from cache.")
+        return with_response_cache(llm) if cache_responses else llm
+
+    def _model_cache_key(self, model_name: str, temperature: float = 0) -> Tuple[str, float, bool]:
+        return (model_name, float(temperature), self.use_litellm_proxy)
+
+    def _cache_llm_instance(self, key: Tuple[str, float, bool], llm: Any) -> None:
+        self._loaded_models[key] = llm
+        self._loaded_models.move_to_end(key)
+        while len(self._loaded_models) > LLM_CLIENT_CACHE_SIZE:
+            evicted_key, _ = self._loaded_models.popitem(last=False)
+            log.debug(f"Evicted LLM instance {evicted_key} from cache.")
     
     async def get_llm_model_using_python(self, model_name: str, temperature: float = 0) -> AzureAIModelService:
         """
@@ -432,13 +511,14 @@ class ModelService:
         failed_models = []
 
         for model_name in all_model_names:
-            if model_name in self._loaded_models:
+            key = self._model_cache_key(model_name)
+            if key in self._loaded_models:
                 log.debug(f"Model '{model_name}' already in cache. Skipping.")
                 loaded_count += 1
                 continue
             
             try:
-                self._loaded_models[model_name] = await self._load_llm_instance(model_name)
+                self._cache_llm_instance(key, await self._load_llm_instance(model_name))
                 log.info(f"Model '{model_name}' loaded and cached successfully.")
                 loaded_count += 1
             except Exception as e:
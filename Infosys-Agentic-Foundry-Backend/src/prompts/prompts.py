@@ -812,7 +812,7 @@ Instructions:
 Old summery: this is the past conversation summary provided by the user, which should be used to generate the new summary.
 {past_conversation_summary}
 
-Chat History - This is the full transcript of the conversation you will summarize. Focus on extracting the key points and relevant actions from this text.
+Chat History - These are the turns of the conversation since the old summary was written. Merge their key points and relevant actions into the old summary.
 Chat History:
 {chat_history}
 
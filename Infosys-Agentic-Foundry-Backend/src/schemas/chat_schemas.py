@@ -1,7 +1,7 @@
 # © 2024-25 Infosys Limited, Bangalore, India. All Rights Reserved.
 from pydantic import BaseModel, Field, field_validator
 from typing import Literal, Optional, Dict, List, Any
-from src.config.constants import FrameworkType, ModelNames
+from src.config.constants import FrameworkType, ModelNames, Limits
 
 _DEFAULT_FRAMEWORK_TYPE = FrameworkType.LANGGRAPH
 
@@ -94,6 +94,11 @@ class OldChatSessionsRequest(BaseModel): # This is the new class for get_old_cha
     agent_id: str = Field(..., description="The ID of the agent for which old chat sessions are requested.")
     framework_type: FrameworkType = Field(_DEFAULT_FRAMEWORK_TYPE, description="The framework type of the agent (e.g., 'langgraph', 'google_adk', 'pure_python').")
 
+class OldChatPageRequest(OldChatSessionsRequest):
+    """Schema for requesting one page of old chat history or old chat sessions for a user and agent, newest first."""
+    page_size: int = Field(Limits.OLD_CHATS_DEFAULT_PAGE_SIZE, ge=1, le=Limits.OLD_CHATS_MAX_PAGE_SIZE, description="Maximum number of chat records (or sessions) in the page.")
+    cursor: Optional[str] = Field(None, description="The 'next_cursor' returned with the previous page; omit it to get the first page.")
+
 class StoreExampleRequest(BaseModel):
     agent_id: str
     query: str
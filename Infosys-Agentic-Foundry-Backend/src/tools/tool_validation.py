@@ -6,6 +6,7 @@ from typing import Optional, Any
 from pydantic import BaseModel
 from typing import Optional,Annotated
 from telemetry_wrapper import logger as log, update_session_context
+from call_categorizer import categorize_as
 from src.prompts.tool_validation_prompts import docstring_length,error_handling,safe_validation,validate_inputs,hardcoded_values,name_descriptiveness
 
 
@@ -112,7 +113,7 @@ class ToolValidationState(BaseModel):
 async def get_llm(model_name: str):
     from src.api.dependencies import ServiceProvider
     model_service = ServiceProvider.get_model_service()
-    llm = await model_service.get_llm_model(model_name=model_name)
+    llm = await model_service.get_llm_model(model_name=model_name, cache_responses=True)
     return llm
 def extract_json(response):
     start=response.find('{')
@@ -166,6 +167,7 @@ async def test_Case1_is_code_compilable(func_code: str) -> bool:
             "suggestion": str(e)
         }
 
+@categorize_as("tool_operation", tool_operation="execution_validation")
 async def test_Case2_docstring_lengthlimit(function_code: str, model: str):
     prompt = docstring_length.format(function_code=function_code)
     llm= await get_llm(model)
@@ -179,6 +181,7 @@ async def test_Case2_docstring_lengthlimit(function_code: str, model: str):
         raw_output = response.removeprefix("```").removesuffix("```").strip()
     return raw_output
 
+@categorize_as("tool_operation", tool_operation="execution_validation")
 async def test_Case3_validate_function_name_descriptiveness(function_code: str, model: str, temperature: float = 0.0) -> str:
     prompt = name_descriptiveness.format(function_code=function_code)
     llm= await get_llm(model)
@@ -194,6 +197,7 @@ async def test_Case3_validate_function_name_descriptiveness(function_code: str,
         raw_output = extract_json(response)
     return raw_output
 
+@categorize_as("tool_operation", tool_operation="parameter_validation")
 async def test_Case4_validate_function_inputs(function_code: str, model: str) -> str:
     import ast
     parsed_code = ast.parse(function_code)
@@ -209,6 +213,7 @@ async def test_Case4_validate_function_inputs(function_code: str, model: str) ->
                     })
     return json.dumps({ "validation": True })
 
+@categorize_as("tool_operation", tool_operation="execution_validation")
 async def test_Case5_error_handling(function_code: str, model:str, temperature: float = 0.0):
     prompt = error_handling.format(function_code=function_code)
     llm= await get_llm(model)
@@ -223,6 +228,7 @@ async def test_Case5_error_handling(function_code: str, model:str, temperature:
     else:
         raw_output = extract_json(response)
     return raw_output
+@categorize_as("tool_operation", tool_operation="execution_validation")
 async def test_Case6_malicious_code_detection(function_code: str, model:str,temperature: float = 0.0):
     prompt = safe_validation.format(function_code=function_code)
     llm = await get_llm(model)
@@ -252,6 +258,7 @@ def rename_function(code_str: str) -> str:
         return new_code
     except Exception as e:
         return f"Error: {e}"
+@categorize_as("tool_operation", tool_operation="execution_validation")
 async def test_Case7_hardcoded_values(function_code: str, model:str):
     import re
     from flask import json
@@ -0,0 +1,298 @@
+# © 2024-25 Infosys Limited, Bangalore, India. All Rights Reserved.
+"""
+Supervisor for all fire-and-forget background work (post-turn chat writes, memory updates,
+feedback learning, evaluation logging, one-shot startup migrations, ...).
+
+Instead of a bare asyncio.create_task, work is submitted under a named task class:
+
+- Every class has a bounded queue and its own concurrency limit, so a burst of one kind of
+  work cannot exhaust the DB pool or the LLM quota for the others.
+- All classes share BACKGROUND_TASKS_MAX_CONCURRENCY slots; when slots are contended, queued
+  work of the class with the lowest priority number is started first.
+- Work submitted with an ordering_key (post-turn writes use the session id) runs one job at a
+  time per key, in submission order; wait_for_key lets the next turn of a session wait
+  (bounded) until the earlier writes of that session are done.
+- When a queue is full, submit waits up to BACKGROUND_TASKS_SUBMIT_TIMEOUT. Work of classes
+  marked run_inline_when_full (writes that must not be lost) is then run by the caller, after
+  the earlier jobs of its ordering key; best-effort work is dropped and counted.
+- drain() (application shutdown) stops intake, waits for queued and running work and cancels
+  what is left after the timeout.
+- get_stats() reports queue depth, running count, counters and queue wait / run latency per class.
+
+Usage:
+    await background_tasks.submit("evaluation", evaluation_service.log_evaluation_data(...))
+"""
+
+import os
+import time
+import asyncio
+import contextvars
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Coroutine, Deque, Dict, Optional, Set
+
+from telemetry_wrapper import logger as log
+from call_categorizer import copy_context_without_call_category
+
+
+BACKGROUND_TASKS_MAX_CONCURRENCY = int(os.getenv("BACKGROUND_TASKS_MAX_CONCURRENCY", "16"))
+BACKGROUND_TASKS_QUEUE_SIZE = int(os.getenv("BACKGROUND_TASKS_QUEUE_SIZE", "1000"))  # Per task class
+BACKGROUND_TASKS_SUBMIT_TIMEOUT = float(os.getenv("BACKGROUND_TASKS_SUBMIT_TIMEOUT", "5"))
+BACKGROUND_TASKS_DRAIN_TIMEOUT = float(os.getenv("BACKGROUND_TASKS_DRAIN_TIMEOUT", "30"))
+BACKGROUND_TASKS_BARRIER_TIMEOUT = float(os.getenv("BACKGROUND_TASKS_BARRIER_TIMEOUT", "30"))
+
+
+@dataclass(frozen=True)
+class TaskClass:
+    name: str
+    priority: int  # Lower runs first when the shared slots are contended
+    concurrency: int
+    queue_size: int = BACKGROUND_TASKS_QUEUE_SIZE
+    run_inline_when_full: bool = False
+
+
+DEFAULT_TASK_CLASSES = (
+    # Post-turn writes: chat history rows, chat log files, checkpoint metadata, token usage, internal thread cleanup
+    TaskClass("persistence", priority=0, concurrency=int(os.getenv("BACKGROUND_PERSISTENCE_CONCURRENCY", "8")), run_inline_when_full=True),
+    # LLM-derived memory: preference analysis, conversation and chat log summaries
+    TaskClass("memory", priority=1, concurrency=int(os.getenv("BACKGROUND_MEMORY_CONCURRENCY", "4"))),
+    # Feedback learning (lesson generation)
+    TaskClass("feedback", priority=2, concurrency=int(os.getenv("BACKGROUND_FEEDBACK_CONCURRENCY", "2"))),
+    # Evaluation data logging
+    TaskClass("evaluation", priority=3, concurrency=int(os.getenv("BACKGROUND_EVALUATION_CONCURRENCY", "2"))),
+    # One-shot startup migrations (chat history copy, index builds)
+    TaskClass("maintenance", priority=4, concurrency=int(os.getenv("BACKGROUND_MAINTENANCE_CONCURRENCY", "1"))),
+)
+
+
+@dataclass
+class BackgroundJob:
+    task_class: str
+    name: str
+    coro: Coroutine[Any, Any, Any]
+    ordering_key: Optional[str] = None
+    queued_at: float = field(default_factory=time.perf_counter)
+    # Request context (session/logging context) the coroutine runs in, minus the caller's explicit call category
+    context: contextvars.Context = field(default_factory=copy_context_without_call_category)
+
+
+@dataclass
+class _ClassState:
+    spec: TaskClass
+    queue: Deque[BackgroundJob] = field(default_factory=deque)
+    # Keyed jobs waiting for the earlier job of their key; they count against queue_size
+    waiting: int = 0
+    running: int = 0
+    space: Optional[asyncio.Event] = None
+    stats: Dict[str, float] = field(default_factory=lambda: {
+        "submitted": 0, "completed": 0, "failed": 0, "dropped": 0, "inline": 0, "cancelled": 0,
+        "queue_wait_ms_total": 0.0, "queue_wait_ms_max": 0.0, "run_ms_total": 0.0, "run_ms_max": 0.0,
+    })
+
+
+class BackgroundTaskSupervisor:
+    """Runs submitted coroutines under per-class queues, concurrency limits, priorities and per-key ordering."""
+
+    def __init__(self, task_classes=DEFAULT_TASK_CLASSES, max_concurrency: int = BACKGROUND_TASKS_MAX_CONCURRENCY):
+        self._classes: Dict[str, _ClassState] = {spec.name: _ClassState(spec=spec) for spec in task_classes}
+        self._by_priority = sorted(self._classes.values(), key=lambda state: state.spec.priority)
+        self._max_concurrency = max(1, max_concurrency)
+        self._running = 0
+        self._tasks: Set[asyncio.Task] = set()
+        self._accepting = True
+        # ordering key -> jobs submitted after the key's active (queued or running) job
+        self._key_backlog: Dict[str, Deque[BackgroundJob]] = {}
+        self._key_idle: Dict[str, asyncio.Event] = {}
+
+    def _state(self, task_class: str) -> _ClassState:
+        state = self._classes.get(task_class)
+        if state is None:
+            raise ValueError(f"Unknown background task class '{task_class}'. Known classes: {', '.join(self._classes)}")
+        if state.space is None:
+            state.space = asyncio.Event()
+            state.space.set()
+        return state
+
+    async def submit(self, task_class: str, coro: Coroutine[Any, Any, Any], name: Optional[str] = None,
+                     ordering_key: Optional[str] = None) -> bool:
+        """
+        Queue a coroutine under a task class. Returns True once it is queued (or was run inline),
+        False if it was dropped because the class queue stayed full.
+        Jobs with the same ordering_key run one at a time in submission order.
+        """
+        try:
+            state = self._state(task_class)
+        except ValueError:
+            coro.close()
+            raise
+        job = BackgroundJob(task_class=task_class, name=name or getattr(coro, "__qualname__", "task"), coro=coro,
+                            ordering_key=ordering_key)
+        state.stats["submitted"] += 1
+
+        if self._accepting and self._queued(state) >= state.spec.queue_size:
+            state.space.clear()
+            try:
+                await asyncio.wait_for(state.space.wait(), timeout=BACKGROUND_TASKS_SUBMIT_TIMEOUT)
+            except asyncio.TimeoutError:
+                pass
+
+        if self._accepting and self._queued(state) < state.spec.queue_size:
+            self._enqueue(state, job)
+            self._dispatch()
+            return True
+
+        if state.spec.run_inline_when_full or not self._accepting:
+            # Backpressure / shutdown path: the caller pays for the work instead of losing it,
+            # after the earlier jobs of its ordering key so their order is kept
+            state.stats["inline"] += 1
+            log.warning(f"[Background] '{task_class}' queue unavailable, running '{job.name}' inline.")
+            if ordering_key is not None:
+                await self.wait_for_key(ordering_key)
+            await self._run(state, job)
+            return True
+
+        state.stats["dropped"] += 1
+        job.coro.close()
+        log.warning(f"[Background] '{task_class}' queue full for {BACKGROUND_TASKS_SUBMIT_TIMEOUT}s, dropped '{job.name}'.")
+        return False
+
+    @staticmethod
+    def _queued(state: _ClassState) -> int:
+        return len(state.queue) + state.waiting
+
+    def _enqueue(self, state: _ClassState, job: BackgroundJob) -> None:
+        key = job.ordering_key
+        if key is None:
+            state.queue.append(job)
+            return
+        self._key_idle.setdefault(key, asyncio.Event()).clear()
+        backlog = self._key_backlog.get(key)
+        if backlog is None:
+            # No job of this key queued or running: it becomes the key's active job
+            self._key_backlog[key] = deque()
+            state.queue.append(job)
+        else:
+            backlog.append(job)
+            state.waiting += 1
+
+    def _release_key(self, key: str) -> None:
+        """The active job of key finished: queue its next job or mark the key idle."""
+        backlog = self._key_backlog.get(key)
+        if backlog:
+            job = backlog.popleft()
+            state = self._classes[job.task_class]
+            state.waiting -= 1
+            state.queue.append(job)
+            return
+        self._key_backlog.pop(key, None)
+        event = self._key_idle.pop(key, None)
+        if event:
+            event.set()
+
+    async def wait_for_key(self, ordering_key: str, timeout: float = BACKGROUND_TASKS_BARRIER_TIMEOUT) -> None:
+        """Wait until the jobs already submitted under ordering_key have finished."""
+        event = self._key_idle.get(ordering_key)
+        if event is None:
+            return
+        try:
+            await asyncio.wait_for(event.wait(), timeout=timeout)
+        except asyncio.TimeoutError:
+            log.warning(f"[Background] Jobs for '{ordering_key}' still pending after {timeout}s; continuing.")
+
+    def _dispatch(self) -> None:
+        """Start queued jobs while shared and per-class slots are free, highest priority class first."""
+        while self._running < self._max_concurrency:
+            state = next(
+                (state for state in self._by_priority if state.queue and state.running < state.spec.concurrency),
+                None
+            )
+            if state is None:
+                return
+            job = state.queue.popleft()
+            if state.space is not None:
+                state.space.set()
+            state.running += 1
+            self._running += 1
+            task = asyncio.get_running_loop().create_task(self._run(state, job), name=f"background-{job.task_class}-{job.name}")
+            self._tasks.add(task)
+            task.add_done_callback(lambda done, state=state, job=job: self._on_done(done, state, job))
+
+    def _on_done(self, task: asyncio.Task, state: _ClassState, job: BackgroundJob) -> None:
+        self._tasks.discard(task)
+        state.running -= 1
+        self._running -= 1
+        if task.cancelled():
+            state.stats["cancelled"] += 1
+        if job.ordering_key is not None:
+            self._release_key(job.ordering_key)
+        self._dispatch()
+
+    async def _run(self, state: _ClassState, job: BackgroundJob) -> None:
+        started = time.perf_counter()
+        wait_ms = (started - job.queued_at) * 1000
+        state.stats["queue_wait_ms_total"] += wait_ms
+        state.stats["queue_wait_ms_max"] = max(state.stats["queue_wait_ms_max"], wait_ms)
+        try:
+            await asyncio.get_running_loop().create_task(job.coro, context=job.context)
+            state.stats["completed"] += 1
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            state.stats["failed"] += 1
+            log.error(f"[Background] '{job.task_class}' task '{job.name}' failed: {e}", exc_info=True)
+        finally:
+            run_ms = (time.perf_counter() - started) * 1000
+            state.stats["run_ms_total"] += run_ms
+            state.stats["run_ms_max"] = max(state.stats["run_ms_max"], run_ms)
+
+    async def drain(self, timeout: float = BACKGROUND_TASKS_DRAIN_TIMEOUT) -> None:
+        """Stop taking new work onto the queues, wait for queued and running work and cancel what is left."""
+        self._accepting = False
+        deadline = time.monotonic() + timeout
+        while self._tasks or any(self._queued(state) for state in self._classes.values()):
+            remaining = deadline - time.monotonic()
+            if remaining <= 0 or not self._tasks:
+                break
+            await asyncio.wait(set(self._tasks), timeout=remaining)
+
+        leftover = sum(self._queued(state) for state in self._classes.values())
+        if self._tasks or leftover:
+            log.warning(f"[Background] Drain timed out after {timeout}s; cancelling {len(self._tasks)} running and {leftover} queued tasks.")
+        for state in self._classes.values():
+            while state.queue:
+                state.queue.popleft().coro.close()
+                state.stats["cancelled"] += 1
+        for backlog in self._key_backlog.values():
+            while backlog:
+                job = backlog.popleft()
+                job.coro.close()
+                self._classes[job.task_class].waiting -= 1
+                self._classes[job.task_class].stats["cancelled"] += 1
+        for task in list(self._tasks):
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        log.info("[Background] Background task supervisor drained.")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Queue depth, running count, counters and average / max latencies per task class."""
+        stats = {"running": self._running, "max_concurrency": self._max_concurrency,
+                 "ordering_keys_pending": len(self._key_backlog), "classes": {}}
+        for name, state in self._classes.items():
+            counters = state.stats
+            finished = counters["completed"] + counters["failed"]
+            started = finished + state.running
+            stats["classes"][name] = {
+                "priority": state.spec.priority,
+                "concurrency": state.spec.concurrency,
+                "queued": self._queued(state),
+                "running": state.running,
+                **{key: counters[key] for key in ("submitted", "completed", "failed", "dropped", "inline", "cancelled")},
+                "queue_wait_ms_avg": round(counters["queue_wait_ms_total"] / started, 2) if started else 0.0,
+                "queue_wait_ms_max": round(counters["queue_wait_ms_max"], 2),
+                "run_ms_avg": round(counters["run_ms_total"] / finished, 2) if finished else 0.0,
+                "run_ms_max": round(counters["run_ms_max"], 2),
+            }
+        return stats
+
+
+background_tasks = BackgroundTaskSupervisor()
@@ -1,8 +1,9 @@
+import copy
 import functools
 import hashlib
 import json
 from telemetry_wrapper import logger as log
-from typing import Callable
+from typing import Callable, Dict, Optional, Tuple
 from src.config import cache_config  # use module, not direct vars to avoid stale references
 from datetime import datetime
 import asyncio
@@ -19,6 +20,69 @@ async def _resolve_cache_client():
     return client
 
 
+# --- Single-flight: concurrent identical reads in this process share one in-flight call ---
+
+# (event loop id, key) -> the shared in-flight task
+_in_flight: Dict[Tuple[int, str], asyncio.Future] = {}
+
+
+def _single_flight_key(namespace: str, func: Callable, args: tuple, kwargs: dict) -> str:
+    # Unlike make_cache_key, None arguments are kept: callers must only share a call with identical arguments
+    if args and hasattr(args[0], '__dict__'):
+        args = args[1:]  # self
+    raw_key = json.dumps({"func": func.__qualname__, "args": args, "kwargs": kwargs}, sort_keys=True, default=str)
+    return f"{namespace or 'global'}:{func.__name__}:{hashlib.sha256(raw_key.encode()).hexdigest()}"
+
+
+def _release_in_flight(entry: Tuple[int, str], task: asyncio.Future) -> None:
+    if _in_flight.get(entry) is task:
+        del _in_flight[entry]
+    if not task.cancelled():
+        task.exception()  # Retrieved here so an error nobody awaited anymore is not reported as unhandled
+
+
+async def single_flight_call(key: str, func: Callable, *args, **kwargs):
+    """
+    Runs func(*args, **kwargs) once for all concurrent callers using the same key.
+    The call runs as its own task, so a cancelled caller does not cancel it for the others;
+    callers that joined an in-flight call get a deep copy of the result so they cannot mutate each other's data.
+    """
+    entry = (id(asyncio.get_running_loop()), key)
+    task = _in_flight.get(entry)
+    if task is None:
+        task = asyncio.ensure_future(func(*args, **kwargs))
+        _in_flight[entry] = task
+        task.add_done_callback(functools.partial(_release_in_flight, entry))
+        return await asyncio.shield(task)
+
+    log.debug(f"Single-flight JOIN: {key}")
+    result = await asyncio.shield(task)
+    try:
+        return copy.deepcopy(result)
+    except Exception:
+        return result
+
+
+def forget_in_flight(namespace: str, method_name: Optional[str] = None) -> None:
+    """
+    Detaches in-flight calls of a namespace (or one of its methods) after a write, so later reads start a fresh
+    query instead of joining one that began before the write. Callers already waiting still get their result.
+    """
+    prefix = f"{namespace or 'global'}:{method_name}:" if method_name else f"{namespace or 'global'}:"
+    for entry in [entry for entry in _in_flight if entry[1].startswith(prefix)]:
+        _in_flight.pop(entry, None)
+
+
+def single_flight(namespace: str = "default"):
+    """Decorator coalescing concurrent identical calls of an async read (no caching once the call completes)."""
+    def decorator(func: Callable):
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            return await single_flight_call(_single_flight_key(namespace, func, args, kwargs), func, *args, **kwargs)
+        return wrapper
+    return decorator
+
+
 class CacheableRepository:
     async def _namespace(self):
         return self.__class__.__name__
@@ -27,7 +91,12 @@ class CacheableRepository:
     def cache(cls, ttl=None, namespace=None):
         return cache_result(ttl=ttl, namespace=namespace)  # ttl already passed explicitly in decorators
 
+    @classmethod
+    def single_flight(cls, namespace=None):
+        return single_flight(namespace=namespace)
+
     async def invalidate_entity(self, method_name: str, *args, namespace=None, **kwargs):
+        forget_in_flight(namespace or await self._namespace(), method_name)
         client = await _resolve_cache_client()
         if client is None:
             return
@@ -39,6 +108,7 @@ class CacheableRepository:
             
 
     async def invalidate_all_method_cache(self, method_name: str, namespace: str = None):
+        forget_in_flight(namespace or await self._namespace(), method_name)
         client = await _resolve_cache_client()
         if client is None:
             return
@@ -74,14 +144,7 @@ async def make_cache_key(namespace: str, func: Callable, *args, **kwargs) -> str
 def cache_result(ttl: int = 300, namespace: str = "default", lock_timeout: int = 1):
     # Must remain sync (decorator factory); wrapper is async
     def decorator(func: Callable):
-        @functools.wraps(func)
-        async def wrapper(*args, **kwargs):
-            client = await _resolve_cache_client()
-            if client is None:
-                if cache_config.ENABLE_CACHING:
-                    log.warning("Caching enabled but Redis client unavailable; executing function directly")
-                return await func(*args, **kwargs)
-            
+        async def cached_call(client, *args, **kwargs):
             log.info("------- CACHING STARTED -------")
 
             key = await make_cache_key(namespace, func, *args, **kwargs)
@@ -129,11 +192,24 @@ def cache_result(ttl: int = 300, namespace: str = "default", lock_timeout: int =
             except Exception as e:
                 log.error(f"Cache wrapper error for {key}: {e}; executing function directly")
                 return await func(*args, **kwargs)
+
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            # Concurrent identical calls in this process share one Redis lookup and at most one
+            # underlying call, also when Redis is unavailable or the lock wait times out
+            flight_key = _single_flight_key(namespace, func, args, kwargs)
+            client = await _resolve_cache_client()
+            if client is None:
+                if cache_config.ENABLE_CACHING:
+                    log.warning("Caching enabled but Redis client unavailable; executing function directly")
+                return await single_flight_call(flight_key, func, *args, **kwargs)
+            return await single_flight_call(flight_key, cached_call, client, *args, **kwargs)
         return wrapper
     return decorator
 
 
 async def invalidate_entity_cache(namespace: str, func: Callable, *args, **kwargs):
+    forget_in_flight(namespace, func.__name__)
     client = await _resolve_cache_client()
     if client is None:
         return
@@ -146,6 +222,7 @@ async def invalidate_entity_cache(namespace: str, func: Callable, *args, **kwarg
 
 
 async def invalidate_all_variants(namespace: str, func: Callable):
+    forget_in_flight(namespace, func.__name__)
     client = await _resolve_cache_client()
     if client is None:
         return
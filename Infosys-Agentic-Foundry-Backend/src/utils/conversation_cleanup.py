@@ -301,6 +301,12 @@ class ConversationCleanup:
             logger.error(f"Error backing up conversation summary: {e}")
             raise
             
+    @staticmethod
+    def _unified_chat_history_exists(cursor) -> bool:
+        """Whether the unified chat history table has been created (CHAT_HISTORY_STORAGE_MODE dual/unified)."""
+        cursor.execute("SELECT to_regclass(%s) IS NOT NULL", (TableNames.CHAT_HISTORY.value,))
+        return cursor.fetchone()[0]
+
     def backup_longterm_memory(self, agentic_application_id: str, session_id: str, deleted_date: datetime = None):
         """Backup long-term memory records to recycle database"""
         try:
@@ -317,6 +323,7 @@ class ConversationCleanup:
             """, (table_name,))
             
             table_exists = main_cursor.fetchone()[0]
+            records = []
             
             if table_exists:
                 # Get records from the table
@@ -327,20 +334,29 @@ class ConversationCleanup:
                 """, (session_id,))
                 
                 records = main_cursor.fetchall()
+
+            if not records and self._unified_chat_history_exists(main_cursor):
+                # Session only stored in the unified chat history table; backed up under the per-agent table name
+                main_cursor.execute(f"""
+                    SELECT session_id, start_timestamp, end_timestamp, human_message, ai_message, response_time
+                    FROM {TableNames.CHAT_HISTORY.value}
+                    WHERE agentic_application_id = %s AND session_id = %s
+                """, (agentic_application_id, session_id))
+                records = main_cursor.fetchall()
+
+            if records:
+                # Insert into recycle database with deleted_date
+                if deleted_date is None:
+                    deleted_date = datetime.now()
+                recycle_cursor = self.recycle_conn.cursor()
+                for record in records:
+                    recycle_cursor.execute("""
+                        INSERT INTO recycle_longterm_memory
+                        (table_name, session_id, start_timestamp, end_timestamp, human_message, ai_message, response_time, deleted_date)
+                        VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+                    """, (table_name, *record, deleted_date))
                 
-                if records:
-                    # Insert into recycle database with deleted_date
-                    if deleted_date is None:
-                        deleted_date = datetime.now()
-                    recycle_cursor = self.recycle_conn.cursor()
-                    for record in records:
-                        recycle_cursor.execute("""
-                            INSERT INTO recycle_longterm_memory
-                            (table_name, session_id, start_timestamp, end_timestamp, human_message, ai_message, response_time, deleted_date)
-                            VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
-                        """, (table_name, *record, deleted_date))
-                    
-                    logger.info(f"Backed up {len(records)} long-term memory records from {table_name}")
+                logger.info(f"Backed up {len(records)} long-term memory records from {table_name}")
                     
         except Exception as e:
             logger.error(f"Error backing up long-term memory: {e}")
@@ -454,6 +470,21 @@ class ConversationCleanup:
                     WHERE session_id = %s
                 """, (session_id,))
                 longterm_deleted = main_cursor.rowcount
+
+            if self._unified_chat_history_exists(main_cursor):
+                main_cursor.execute(f"""
+                    DELETE FROM {TableNames.CHAT_HISTORY.value}
+                    WHERE agentic_application_id = %s AND session_id = %s
+                """, (agentic_application_id, session_id))
+                longterm_deleted = max(longterm_deleted, main_cursor.rowcount)
+
+            # Persisted query libraries (auto-suggest) of the agent are rebuilt from the remaining history
+            main_cursor.execute("SELECT to_regclass(%s) IS NOT NULL", (TableNames.QUERY_LIBRARY_INDEX.value,))
+            if main_cursor.fetchone()[0]:
+                main_cursor.execute(f"""
+                    DELETE FROM {TableNames.QUERY_LIBRARY_INDEX.value}
+                    WHERE agentic_application_id = %s
+                """, (agentic_application_id,))
             
             # Delete checkpoint data
             thread_id = f"{table_name}_{session_id}"
@@ -21,7 +21,7 @@ import os
 import json
 from dotenv import load_dotenv
 
-from src.config.constants import TableNames
+from src.config.constants import TableNames, CHAT_SESSION_USER_EMAIL_REGEX
 
 # Configure logging
 logging.basicConfig(
@@ -177,6 +177,18 @@ class ConversationRestore:
             if records:
                 # Check if table exists in main database
                 main_cursor = self.main_conn.cursor()
+
+                # Restore into the unified chat history table as well when it exists (dual / unified storage mode)
+                main_cursor.execute("SELECT to_regclass(%s) IS NOT NULL", (TableNames.CHAT_HISTORY.value,))
+                if main_cursor.fetchone()[0]:
+                    for record in records:
+                        main_cursor.execute(f"""
+                            INSERT INTO {TableNames.CHAT_HISTORY.value}
+                            (agentic_application_id, session_id, user_email, start_timestamp, end_timestamp, human_message, ai_message, response_time)
+                            VALUES (%s, %s, substring(%s from %s), %s, %s, %s, %s, %s)
+                            ON CONFLICT (agentic_application_id, session_id, end_timestamp) DO NOTHING
+                        """, (agentic_application_id, record[0], record[0], CHAT_SESSION_USER_EMAIL_REGEX, *record[1:]))
+
                 main_cursor.execute("""
                     SELECT EXISTS (
                         SELECT FROM information_schema.tables 
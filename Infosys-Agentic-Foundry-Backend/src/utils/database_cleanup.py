@@ -99,6 +99,14 @@ class DatabaseCleanup:
             self.recycle_conn.close()
             logger.info("Recycle database connection closed")
             
+    @staticmethod
+    def clear_query_library_index(cursor):
+        """Drops the persisted auto-suggest query libraries, which are built from the deleted chat history"""
+        cursor.execute("SELECT to_regclass(%s) IS NOT NULL", (TableNames.QUERY_LIBRARY_INDEX.value,))
+        if cursor.fetchone()[0]:
+            cursor.execute(f"TRUNCATE TABLE {TableNames.QUERY_LIBRARY_INDEX.value}")
+            logger.info(f"✓ Cleared {TableNames.QUERY_LIBRARY_INDEX.value}")
+
     def get_tables_with_prefix(self, prefix: str = "table_") -> List[str]:
         """
         Get all table names that start with the specified prefix
@@ -232,6 +240,8 @@ class DatabaseCleanup:
                     logger.error(f"  ✗ {error_msg}")
                     results["errors"].append(error_msg)
             
+            self.clear_query_library_index(cursor)
+
             # Commit transaction
             self.main_conn.commit()
             cursor.close()
@@ -536,6 +546,8 @@ class DatabaseCleanup:
                     logger.error(f"  ✗ {error_msg}")
                     results["errors"].append(error_msg)
             
+            self.clear_query_library_index(main_cursor)
+
             # Commit both connections
             self.main_conn.commit()
             self.recycle_conn.commit()
@@ -77,7 +77,7 @@ async def semantic_retrieval(
         embedding_model, _ = get_remote_models(model_server)
         
         log.info(f"Generating embedding for query: {query[:50]}...")
-        query_embedding = embedding_model.encode([query], convert_to_numpy=True)[0]
+        query_embedding = (await embedding_model.aencode([query], convert_to_numpy=True))[0]
         
         vector_store = PostgresVectorStoreJSONB(pool=pool)
         results = await vector_store.semantic_search(
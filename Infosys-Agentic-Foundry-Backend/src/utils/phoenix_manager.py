@@ -4,17 +4,49 @@ Phoenix Project Manager - Handles efficient project registration for Arize Phoen
 Prevents duplicate registrations and manages project lifecycle.
 
 CRITICAL: This module addresses trace mixing issues in concurrent environments.
+
+Tracing is set up once per process: a single TracerProvider, instrumented once, whose
+spans go through TraceExportPipeline - a bounded queue drained by a background thread,
+so a slow or unreachable collector never adds latency to requests (spans are dropped
+instead). Projects are attributed per request via `using_project`, and each project
+can be head-sampled, with errored or slow traces kept by tail sampling.
 """
 
+import os
+import time
+import queue
 import threading
 import contextvars
-from typing import Set, Optional
+from importlib.metadata import entry_points
+from typing import Dict, List, Set, Optional, Sequence
 from contextlib import asynccontextmanager, contextmanager
-from phoenix.otel import register
+from phoenix.otel import TracerProvider, GRPCSpanExporter, HTTPSpanExporter, PROJECT_NAME
 from phoenix.trace import using_project
 from opentelemetry import trace
+from opentelemetry.context import Context
+from opentelemetry.sdk.resources import Resource
+from opentelemetry.sdk.trace import ReadableSpan, SpanProcessor
+from opentelemetry.sdk.trace.export import SpanExporter
+from opentelemetry.sdk.trace.sampling import Decision, ParentBased, Sampler, SamplingResult
+from opentelemetry.trace import StatusCode
 from telemetry_wrapper import logger as log
 
+
+PHOENIX_DEFAULT_PROJECT = os.getenv("PHOENIX_PROJECT_NAME", "default")
+# "grpc" (default, matches PHOENIX_GRPC_PORT) or "http/protobuf"
+PHOENIX_TRACE_PROTOCOL = os.getenv("PHOENIX_TRACE_PROTOCOL", "grpc")
+PHOENIX_TRACE_QUEUE_SIZE = int(os.getenv("PHOENIX_TRACE_QUEUE_SIZE", "8192"))
+PHOENIX_TRACE_BATCH_SIZE = int(os.getenv("PHOENIX_TRACE_BATCH_SIZE", "512"))
+PHOENIX_TRACE_FLUSH_INTERVAL = float(os.getenv("PHOENIX_TRACE_FLUSH_INTERVAL", "2.0"))
+# Head sampling: fraction of traces exported, optionally per project ("proj_a=0.1,proj_b=0.5")
+PHOENIX_TRACE_SAMPLE_RATE = float(os.getenv("PHOENIX_TRACE_SAMPLE_RATE", "1.0"))
+PHOENIX_TRACE_PROJECT_SAMPLE_RATES = os.getenv("PHOENIX_TRACE_PROJECT_SAMPLE_RATES", "")
+# Tail sampling: traces dropped by head sampling are still exported when they errored
+# or took at least this long (0 disables tail sampling)
+PHOENIX_TRACE_TAIL_LATENCY_MS = float(os.getenv("PHOENIX_TRACE_TAIL_LATENCY_MS", "10000"))
+PHOENIX_TRACE_TAIL_MAX_TRACES = int(os.getenv("PHOENIX_TRACE_TAIL_MAX_TRACES", "1000"))
+PHOENIX_TRACE_TAIL_MAX_SPANS_PER_TRACE = int(os.getenv("PHOENIX_TRACE_TAIL_MAX_SPANS_PER_TRACE", "500"))
+
 # Context variable to store the current project name per async task
 _current_project: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar(
     'phoenix_current_project', 
@@ -22,6 +54,199 @@ _current_project: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar
 )
 
 
+def _parse_project_sample_rates(value: str) -> Dict[str, float]:
+    rates = {}
+    for item in value.split(","):
+        if "=" not in item:
+            continue
+        project, rate = item.rsplit("=", 1)
+        try:
+            rates[project.strip()] = min(max(float(rate), 0.0), 1.0)
+        except ValueError:
+            log.warning(f"[Phoenix] Ignoring invalid sample rate for project '{project.strip()}': {rate}")
+    return rates
+
+
+def _instrument_openinference_libraries(tracer_provider: TracerProvider) -> None:
+    """
+    Instrument every installed OpenInference library (e.g. openinference-instrumentation-langchain)
+    against the given provider. Instrumentors register under the "openinference_instrumentor"
+    entry point group and expose the public BaseInstrumentor.instrument API.
+    """
+    for entry_point in entry_points(group="openinference_instrumentor"):
+        try:
+            instrumentor = entry_point.load()()
+            if not instrumentor.is_instrumented_by_opentelemetry:
+                instrumentor.instrument(tracer_provider=tracer_provider)
+                log.info(f"[Phoenix] Instrumented {entry_point.name}")
+        except Exception as e:
+            log.warning(f"[Phoenix] Could not instrument {entry_point.name}: {e}")
+
+class ProjectHeadSampler(Sampler):
+    """
+    Root-span sampler keyed on the project of the current traced_project_context.
+    Traces outside the sample are still recorded (not exported) when tail sampling is on,
+    so TraceExportPipeline can keep them if they turn out to be errored or slow.
+    """
+
+    _TRACE_ID_MASK = (1 << 64) - 1
+
+    def __init__(self, default_rate: float, project_rates: Dict[str, float], tail_sampling: bool):
+        self.default_rate = default_rate
+        self.project_rates = project_rates
+        self.tail_sampling = tail_sampling
+
+    def should_sample(self, parent_context: Optional[Context], trace_id: int, name: str, kind=None,
+                      attributes=None, links=None, trace_state=None) -> SamplingResult:
+        rate = self.project_rates.get(_current_project.get(), self.default_rate)
+        if (trace_id & self._TRACE_ID_MASK) < rate * (self._TRACE_ID_MASK + 1):
+            return SamplingResult(Decision.RECORD_AND_SAMPLE, attributes)
+        return SamplingResult(Decision.RECORD_ONLY if self.tail_sampling else Decision.DROP, attributes)
+
+    def get_description(self) -> str:
+        return f"ProjectHeadSampler{{default={self.default_rate}, projects={self.project_rates}}}"
+
+
+class _FollowRecordingParent(Sampler):
+    """Child spans of a recorded-but-unsampled parent stay recorded so tail sampling sees the whole trace."""
+
+    def should_sample(self, parent_context: Optional[Context], trace_id: int, name: str, kind=None,
+                      attributes=None, links=None, trace_state=None) -> SamplingResult:
+        if trace.get_current_span(parent_context).is_recording():
+            return SamplingResult(Decision.RECORD_ONLY, attributes)
+        return SamplingResult(Decision.DROP, attributes)
+
+    def get_description(self) -> str:
+        return "FollowRecordingParent"
+
+
+class TraceExportPipeline(SpanProcessor):
+    """
+    Span processor that never blocks the request path.
+
+    on_end only appends to a bounded queue (spans are dropped and counted when it is full);
+    a daemon thread exports batches of up to PHOENIX_TRACE_BATCH_SIZE spans every
+    PHOENIX_TRACE_FLUSH_INTERVAL seconds. Unsampled, recorded traces are buffered per trace
+    until their local root ends and exported only if a span errored or the root was slow.
+    """
+
+    def __init__(self, exporter: SpanExporter, max_queue_size: int = PHOENIX_TRACE_QUEUE_SIZE,
+                 max_batch_size: int = PHOENIX_TRACE_BATCH_SIZE, flush_interval: float = PHOENIX_TRACE_FLUSH_INTERVAL,
+                 tail_latency_ms: float = PHOENIX_TRACE_TAIL_LATENCY_MS):
+        self._exporter = exporter
+        self._queue: "queue.Queue[ReadableSpan]" = queue.Queue(maxsize=max_queue_size)
+        self._max_batch_size = max_batch_size
+        self._flush_interval = flush_interval
+        self._tail_latency_ns = int(tail_latency_ms * 1_000_000)
+        self._pending: Dict[int, List[ReadableSpan]] = {}
+        self._pending_lock = threading.Lock()
+        self._export_lock = threading.Lock()
+        self._shutdown = threading.Event()
+        self.exported = 0
+        self.dropped = 0
+        self.tail_kept = 0
+        self._worker = threading.Thread(target=self._run, name="phoenix-trace-export", daemon=True)
+        self._worker.start()
+
+    def on_start(self, span, parent_context: Optional[Context] = None) -> None:
+        pass
+
+    def on_end(self, span: ReadableSpan) -> None:
+        if self._shutdown.is_set():
+            return
+        if span.context.trace_flags.sampled:
+            self._enqueue(span)
+        elif self._tail_latency_ns > 0:
+            self._tail_sample(span)
+
+    def _enqueue(self, span: ReadableSpan) -> None:
+        try:
+            self._queue.put_nowait(span)
+        except queue.Full:
+            self.dropped += 1
+            if self.dropped % 1000 == 1:
+                log.warning(f"[Phoenix] Trace export queue full, dropping spans ({self.dropped} dropped so far)")
+
+    def _tail_sample(self, span: ReadableSpan) -> None:
+        trace_id = span.context.trace_id
+        is_local_root = span.parent is None or span.parent.is_remote
+        with self._pending_lock:
+            spans = self._pending.get(trace_id)
+            if spans is None:
+                if len(self._pending) >= PHOENIX_TRACE_TAIL_MAX_TRACES:
+                    self._pending.pop(next(iter(self._pending)))
+                spans = self._pending[trace_id] = []
+            if len(spans) < PHOENIX_TRACE_TAIL_MAX_SPANS_PER_TRACE:
+                spans.append(span)
+            if not is_local_root:
+                return
+            del self._pending[trace_id]
+        slow = (span.end_time or 0) - (span.start_time or 0) >= self._tail_latency_ns
+        if slow or any(s.status.status_code == StatusCode.ERROR for s in spans):
+            self.tail_kept += 1
+            for s in spans:
+                self._enqueue(s)
+
+    def _next_batch(self, timeout: Optional[float]) -> List[ReadableSpan]:
+        try:
+            batch = [self._queue.get(timeout=timeout) if timeout else self._queue.get_nowait()]
+        except queue.Empty:
+            return []
+        while len(batch) < self._max_batch_size:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _export(self, batch: Sequence[ReadableSpan]) -> None:
+        try:
+            self._exporter.export(batch)
+            self.exported += len(batch)
+        except Exception as e:
+            log.warning(f"[Phoenix] Failed to export {len(batch)} spans: {e}")
+
+    def _run(self) -> None:
+        while not self._shutdown.is_set():
+            deadline = time.monotonic() + self._flush_interval
+            batch: List[ReadableSpan] = []
+            while len(batch) < self._max_batch_size and not self._shutdown.is_set():
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                batch.extend(self._next_batch(min(remaining, 0.5))[: self._max_batch_size - len(batch)])
+            if batch:
+                with self._export_lock:
+                    self._export(batch)
+
+    def force_flush(self, timeout_millis: int = 30000) -> bool:
+        deadline = time.monotonic() + timeout_millis / 1000
+        with self._export_lock:
+            while time.monotonic() < deadline:
+                batch = self._next_batch(None)
+                if not batch:
+                    return True
+                self._export(batch)
+        return self._queue.empty()
+
+    def shutdown(self) -> None:
+        if self._shutdown.is_set():
+            return
+        self._shutdown.set()
+        self._worker.join(timeout=self._flush_interval + 1)
+        self.force_flush(timeout_millis=5000)
+        self._exporter.shutdown()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "queued": self._queue.qsize(),
+            "exported": self.exported,
+            "dropped": self.dropped,
+            "tail_kept": self.tail_kept,
+            "pending_tail_traces": len(self._pending),
+        }
+
+
 class PhoenixProjectManager:
     """
     Singleton manager for Phoenix project registration.
@@ -46,6 +271,9 @@ class PhoenixProjectManager:
                 return
             self._registered_projects: Set[str] = set()
             self._project_lock = threading.Lock()
+            self._tracer_provider: Optional[TracerProvider] = None
+            self._pipeline: Optional[TraceExportPipeline] = None
+            self._instrumented = False
             self._initialized = True
             log.info("PhoenixProjectManager initialized")
     
@@ -53,16 +281,23 @@ class PhoenixProjectManager:
                         set_global_tracer_provider: bool = False, batch: bool = True) -> bool:
         """
         Register a Phoenix project if it hasn't been registered yet.
+
+        All projects share the process-wide tracer provider and export pipeline, which are
+        created (and instrumented) on first use; spans are attributed to a project by
+        traced_project_context. Export is always batched in the background.
         
         Args:
             project_name: Name of the project to register
             auto_instrument: Enable automatic instrumentation
             set_global_tracer_provider: Set as global tracer (usually False)
-            batch: Enable batch export
+            batch: Kept for compatibility; export is always batched
             
         Returns:
             bool: True if newly registered, False if already registered
         """
+        # Lock-free fast path: this runs on every inference request
+        if project_name in self._registered_projects:
+            return False
         with self._project_lock:
             if project_name in self._registered_projects:
                 log.debug(f"[Phoenix] Project '{project_name}' already registered, skipping")
@@ -70,12 +305,7 @@ class PhoenixProjectManager:
             
             try:
                 log.info(f"[Phoenix] Registering new Phoenix project: '{project_name}'")
-                register(
-                    project_name=project_name,
-                    auto_instrument=auto_instrument,
-                    set_global_tracer_provider=set_global_tracer_provider,
-                    batch=batch
-                )
+                self._ensure_tracing_locked(auto_instrument, set_global_tracer_provider)
                 self._registered_projects.add(project_name)
                 log.info(f"[Phoenix] Successfully registered Phoenix project: '{project_name}'")
                 return True
@@ -84,6 +314,44 @@ class PhoenixProjectManager:
                 log.error(f"[Phoenix] Failed to register Phoenix project '{project_name}': {e}", exc_info=True)
                 raise
     
+    def _ensure_tracing_locked(self, auto_instrument: bool, set_global_tracer_provider: bool) -> None:
+        """Create the shared tracer provider and export pipeline, and instrument once per process."""
+        if self._tracer_provider is None:
+            project_rates = _parse_project_sample_rates(PHOENIX_TRACE_PROJECT_SAMPLE_RATES)
+            tail_sampling = PHOENIX_TRACE_TAIL_LATENCY_MS > 0
+            sampler = ParentBased(
+                root=ProjectHeadSampler(PHOENIX_TRACE_SAMPLE_RATE, project_rates, tail_sampling),
+                local_parent_not_sampled=_FollowRecordingParent(),
+            )
+            self._tracer_provider = TracerProvider(
+                resource=Resource.create({PROJECT_NAME: PHOENIX_DEFAULT_PROJECT}),
+                sampler=sampler,
+                verbose=False,
+            )
+            exporter = GRPCSpanExporter() if PHOENIX_TRACE_PROTOCOL == "grpc" else HTTPSpanExporter()
+            self._pipeline = TraceExportPipeline(exporter)
+            # Replaces the provider's default synchronous processor
+            self._tracer_provider.add_span_processor(self._pipeline)
+            log.info(
+                f"[Phoenix] Trace pipeline started: protocol={PHOENIX_TRACE_PROTOCOL}, "
+                f"sample_rate={PHOENIX_TRACE_SAMPLE_RATE}, project_rates={project_rates}, "
+                f"tail_latency_ms={PHOENIX_TRACE_TAIL_LATENCY_MS}"
+            )
+        if set_global_tracer_provider:
+            trace.set_tracer_provider(self._tracer_provider)
+        if auto_instrument and not self._instrumented:
+            _instrument_openinference_libraries(self._tracer_provider)
+            self._instrumented = True
+
+    def get_trace_pipeline_stats(self) -> Dict[str, int]:
+        """Queue depth and export/drop counters of the trace export pipeline."""
+        return self._pipeline.stats() if self._pipeline else {}
+
+    def shutdown(self) -> None:
+        """Flush queued spans and stop the export thread."""
+        if self._tracer_provider is not None:
+            self._tracer_provider.shutdown()
+
     def is_registered(self, project_name: str) -> bool:
         """Check if a project is already registered."""
         with self._project_lock:
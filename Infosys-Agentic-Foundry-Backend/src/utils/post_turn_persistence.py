@@ -0,0 +1,117 @@
+# © 2024-25 Infosys Limited, Bangalore, India. All Rights Reserved.
+"""
+Post-turn persistence stage for chat turns.
+
+Everything a turn writes once its answer is known (chat history row, chat log file,
+response-time / token-usage entries in the LangGraph checkpoint, feedback, per-query token
+usage) is submitted here as one job of named steps, so none of it is on the response path.
+Jobs run on the background task supervisor (src/utils/background_tasks.py):
+
+- Ordered jobs run in the "persistence" class with the session id as ordering key: jobs of
+  one session run one at a time in submission order, and the next turn of that session waits
+  (bounded) for them via wait_for_session.
+- LLM-derived follow-ups (preference analysis, conversation summaries, chat log summaries)
+  are submitted with ordered=False and run in the "memory" class, which the session barrier
+  does not wait for.
+- Queueing, backpressure (persistence jobs run inline when the queue stays full, so writes are
+  never dropped) and shutdown draining are the supervisor's.
+- A step fails when it raises, returns False (the result convention of the service and
+  repository writes it wraps) or times out (POST_TURN_STEP_TIMEOUT, POST_TURN_ANALYSIS_STEP_TIMEOUT
+  for unordered jobs). Failed steps are retried with exponential backoff; a step that still
+  fails is logged and the remaining steps of the job still run.
+
+Usage:
+    await post_turn_persistence.submit(session_id, [
+        ("save_chat_message", lambda: chat_service.save_chat_message(...)),
+        ("save_chat_to_file", lambda: chat_service.save_chat_to_file(...)),
+    ])
+"""
+
+import os
+import asyncio
+import contextvars
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from telemetry_wrapper import logger as log
+from src.utils.background_tasks import background_tasks
+
+
+POST_TURN_MAX_RETRIES = int(os.getenv("POST_TURN_MAX_RETRIES", "3"))
+POST_TURN_RETRY_BACKOFF = float(os.getenv("POST_TURN_RETRY_BACKOFF", "0.5"))
+# Per attempt; ordered steps gate the session's next turn, analysis steps wait on the LLM
+POST_TURN_STEP_TIMEOUT = float(os.getenv("POST_TURN_STEP_TIMEOUT", "20"))
+POST_TURN_ANALYSIS_STEP_TIMEOUT = float(os.getenv("POST_TURN_ANALYSIS_STEP_TIMEOUT", "120"))
+POST_TURN_BARRIER_TIMEOUT = float(os.getenv("POST_TURN_BARRIER_TIMEOUT", "30"))
+
+# (step name, zero-argument callable returning the coroutine to await); a callable so the step can be retried
+PostTurnStep = Tuple[str, Callable[[], Awaitable[Any]]]
+
+
+class PostTurnStepFailed(Exception):
+    """A step that returned False or timed out."""
+
+
+class PostTurnPersistence:
+    """Post-turn writes as retried steps on the background task supervisor, ordered per session."""
+
+    def __init__(self):
+        self._stats = {"submitted": 0, "completed": 0, "step_retries": 0, "step_failures": 0}
+
+    async def submit(self, session_id: str, steps: List[Optional[PostTurnStep]], ordered: bool = True) -> None:
+        """
+        Queue the steps of one turn. Returns as soon as the job is queued; the supervisor runs it
+        inline only when the persistence queue stays full or the application is draining.
+        """
+        steps = [step for step in steps if step]
+        if not steps:
+            return
+        self._stats["submitted"] += 1
+        if ordered:
+            await background_tasks.submit(
+                "persistence", self._run_steps(session_id, steps, POST_TURN_STEP_TIMEOUT),
+                name=f"post-turn-{steps[0][0]}", ordering_key=session_id
+            )
+        else:
+            await background_tasks.submit(
+                "memory", self._run_steps(session_id, steps, POST_TURN_ANALYSIS_STEP_TIMEOUT),
+                name=f"post-turn-{steps[0][0]}"
+            )
+
+    async def wait_for_session(self, session_id: str, timeout: float = POST_TURN_BARRIER_TIMEOUT) -> None:
+        """Wait until the ordered jobs already submitted for the session have been persisted."""
+        await background_tasks.wait_for_key(session_id, timeout=timeout)
+
+    @staticmethod
+    async def _run_step(step: Callable[[], Awaitable[Any]], timeout: float) -> None:
+        # Each step runs in its own copy of the job's context
+        task = asyncio.get_running_loop().create_task(step(), context=contextvars.copy_context())
+        try:
+            result = await asyncio.wait_for(task, timeout=timeout)
+        except asyncio.TimeoutError:
+            raise PostTurnStepFailed(f"timed out after {timeout}s") from None
+        if result is False:
+            raise PostTurnStepFailed("step reported failure")
+
+    async def _run_steps(self, session_id: str, steps: List[PostTurnStep], timeout: float) -> None:
+        for name, step in steps:
+            for attempt in range(1, POST_TURN_MAX_RETRIES + 1):
+                try:
+                    await self._run_step(step, timeout)
+                    break
+                except Exception as e:
+                    if attempt == POST_TURN_MAX_RETRIES:
+                        self._stats["step_failures"] += 1
+                        log.error(f"[PostTurn] Step '{name}' failed for session {session_id} after {attempt} attempts: {e}",
+                                  exc_info=not isinstance(e, PostTurnStepFailed))
+                    else:
+                        self._stats["step_retries"] += 1
+                        log.warning(f"[PostTurn] Step '{name}' failed for session {session_id} (attempt {attempt}), retrying: {e}")
+                        await asyncio.sleep(POST_TURN_RETRY_BACKOFF * 2 ** (attempt - 1))
+        self._stats["completed"] += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Job and step counters; queue depths are in the supervisor's stats."""
+        return dict(self._stats)
+
+
+post_turn_persistence = PostTurnPersistence()
@@ -4,6 +4,13 @@ from typing import List, Dict, Any, Optional
 import asyncpg
 from datetime import datetime, timezone
 from telemetry_wrapper import logger as log
+from knowledgebase_server.utils.chunk_hashing import (
+    compute_chunk_hash,
+    CHUNK_CONFLICT_TARGET,
+    CHUNK_DEDUP_INDEX_NAME,
+    CHUNK_FILENAME_EXPRESSION,
+    LEGACY_CHUNK_DEDUP_INDEX_NAME,
+)
 
 
 class PostgresVectorStoreJSONB:
@@ -18,6 +25,7 @@ class PostgresVectorStoreJSONB:
             id SERIAL PRIMARY KEY,
             kb_id TEXT NOT NULL,
             chunk_text TEXT NOT NULL,
+            content_hash TEXT,
             embedding JSONB NOT NULL,
             metadata JSONB DEFAULT '{{}}',
             created_on TIMESTAMPTZ DEFAULT CURRENT_TIMESTAMP,
@@ -25,14 +33,40 @@ class PostgresVectorStoreJSONB:
         );
         """
         
+        # Tables created before content hashing was introduced need the column added
+        alter_table_query = f"""
+        ALTER TABLE {self.table_name} ADD COLUMN IF NOT EXISTS content_hash TEXT;
+        """
+
         create_indexes_query = f"""
         CREATE INDEX IF NOT EXISTS idx_vector_embeddings_jsonb_kb_id 
         ON {self.table_name} (kb_id);
         """
+
+        # Legacy rows keep a NULL hash and are replaced the next time their document is re-ingested
+        create_hash_index_query = f"""
+        CREATE UNIQUE INDEX IF NOT EXISTS {CHUNK_DEDUP_INDEX_NAME}
+        ON {self.table_name} (kb_id, {CHUNK_FILENAME_EXPRESSION}, content_hash)
+        WHERE content_hash IS NOT NULL;
+        """
+
+        drop_legacy_hash_index_query = f"""
+        DROP INDEX IF EXISTS {LEGACY_CHUNK_DEDUP_INDEX_NAME};
+        """
+
+        create_hash_lookup_index_query = f"""
+        CREATE INDEX IF NOT EXISTS idx_vector_embeddings_jsonb_content_hash
+        ON {self.table_name} (content_hash)
+        WHERE content_hash IS NOT NULL;
+        """
         
         async with self.pool.acquire() as conn:
             await conn.execute(create_table_query)
+            await conn.execute(alter_table_query)
             await conn.execute(create_indexes_query)
+            await conn.execute(create_hash_index_query)
+            await conn.execute(drop_legacy_hash_index_query)
+            await conn.execute(create_hash_lookup_index_query)
             log.info(f"Table '{self.table_name}' and indexes created successfully")
 
     async def store_embeddings(
@@ -50,8 +84,9 @@ class PostgresVectorStoreJSONB:
         
         insert_query = f"""
         INSERT INTO {self.table_name} 
-        (kb_id, chunk_text, embedding, metadata, created_on, updated_on)
-        VALUES ($1, $2, $3, $4, $5, $6)
+        (kb_id, chunk_text, content_hash, embedding, metadata, created_on, updated_on)
+        VALUES ($1, $2, $3, $4, $5, $6, $7)
+        ON CONFLICT {CHUNK_CONFLICT_TARGET} DO NOTHING
         """
         
         now = datetime.now(timezone.utc)
@@ -63,6 +98,7 @@ class PostgresVectorStoreJSONB:
             records.append((
                 kb_id,
                 chunk,
+                compute_chunk_hash(chunk),
                 json.dumps(embedding_list),
                 json.dumps(metadata),
                 now,
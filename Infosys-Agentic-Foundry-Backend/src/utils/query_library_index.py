@@ -0,0 +1,153 @@
+# © 2024-25 Infosys Limited, Bangalore, India. All Rights Reserved.
+"""
+Near-duplicate index for the query library (auto-suggest queries).
+
+Queries are reduced to character 3-gram shingles, summarised by a MinHash signature and
+bucketed with LSH banding. A new query is only compared (exact shingle Jaccard) against the
+library entries it shares a band bucket with, so adding a query costs time proportional to
+its few candidates instead of the whole library.
+
+The index is serialisable (to_state / from_state) so it can be persisted per (user, agent)
+and extended with only the queries that were not seen before. Queries are never removed from a
+persisted index; it is dropped and rebuilt when chat history is deleted.
+"""
+
+import os
+import re
+import zlib
+import hashlib
+import numpy as np
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+
+QUERY_LIBRARY_SIMILARITY_THRESHOLD = float(os.getenv("QUERY_LIBRARY_SIMILARITY_THRESHOLD", "0.5"))
+# How far before the persisted watermark chat rows are re-read, for rows committed out of timestamp order
+QUERY_LIBRARY_WATERMARK_OVERLAP_SECONDS = float(os.getenv("QUERY_LIBRARY_WATERMARK_OVERLAP_SECONDS", "300"))
+QUERY_LIBRARY_SHINGLE_SIZE = 3
+QUERY_LIBRARY_LSH_BANDS = 32
+QUERY_LIBRARY_LSH_ROWS = 2  # bands * rows = signature length; 32x2 keeps recall ~99.99% at Jaccard 0.5
+
+_MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+_MAX_HASH = np.uint64((1 << 32) - 1)
+# Fixed seed: signatures must be identical across processes since they are persisted.
+# a, b < 2**32 and 32-bit shingle hashes keep a * x + b inside uint64.
+_rng = np.random.RandomState(20240917)
+_PERM_A = _rng.randint(1, 1 << 32, size=QUERY_LIBRARY_LSH_BANDS * QUERY_LIBRARY_LSH_ROWS, dtype=np.uint64)
+_PERM_B = _rng.randint(0, 1 << 32, size=QUERY_LIBRARY_LSH_BANDS * QUERY_LIBRARY_LSH_ROWS, dtype=np.uint64)
+_WHITESPACE = re.compile(r"\s+")
+# Bump when shingling / hashing changes so persisted signatures are rebuilt
+_INDEX_VERSION = 1
+
+
+def normalize_query(text: str) -> str:
+    """Lowercases and collapses whitespace."""
+    return _WHITESPACE.sub(" ", (text or "").lower()).strip()
+
+
+def query_fingerprint(text: str) -> str:
+    """Stable short fingerprint of the normalised query, used to skip already indexed queries."""
+    return hashlib.blake2b(normalize_query(text).encode("utf-8"), digest_size=8).hexdigest()
+
+
+def query_shingles(text: str, size: int = QUERY_LIBRARY_SHINGLE_SIZE) -> Set[int]:
+    """Hashed character shingles of the normalised query."""
+    normalized = normalize_query(text)
+    if len(normalized) <= size:
+        return {zlib.crc32(normalized.encode("utf-8"))}
+    return {zlib.crc32(normalized[i:i + size].encode("utf-8")) for i in range(len(normalized) - size + 1)}
+
+
+def minhash_signature(shingles: Set[int]) -> List[int]:
+    """MinHash signature of a shingle set (one minimum per permutation)."""
+    hashes = np.fromiter(shingles, dtype=np.uint64, count=len(shingles))
+    permuted = ((np.outer(_PERM_A, hashes) + _PERM_B[:, None]) % _MERSENNE_PRIME) & _MAX_HASH
+    return permuted.min(axis=1).tolist()
+
+
+def jaccard(first: Set[int], second: Set[int]) -> float:
+    if not first or not second:
+        return 0.0
+    return len(first & second) / len(first | second)
+
+
+class QueryLibraryIndex:
+    """Keeps the first query of every group of near-duplicate queries."""
+
+    def __init__(self, similarity_threshold: float = QUERY_LIBRARY_SIMILARITY_THRESHOLD):
+        self.similarity_threshold = similarity_threshold
+        self.library: List[str] = []
+        self.signatures: List[List[int]] = []
+        self.seen: Set[str] = set()
+        self._shingles: List[Optional[Set[int]]] = []
+        self._buckets: Dict[tuple, List[int]] = {}
+
+    def _band_keys(self, signature: List[int]) -> List[tuple]:
+        rows = QUERY_LIBRARY_LSH_ROWS
+        return [(band, *signature[band * rows:(band + 1) * rows]) for band in range(QUERY_LIBRARY_LSH_BANDS)]
+
+    def _library_shingles(self, position: int) -> Set[int]:
+        # Shingles of restored entries are recomputed lazily, only when an entry becomes a candidate
+        if self._shingles[position] is None:
+            self._shingles[position] = query_shingles(self.library[position])
+        return self._shingles[position]
+
+    def _append(self, query: str, signature: List[int], shingles: Optional[Set[int]]) -> None:
+        position = len(self.library)
+        self.library.append(query)
+        self.signatures.append(signature)
+        self._shingles.append(shingles)
+        for key in self._band_keys(signature):
+            self._buckets.setdefault(key, []).append(position)
+
+    def add(self, query: str) -> bool:
+        """Indexes a query; returns True when it was added to the library as a new unique query."""
+        fingerprint = query_fingerprint(query)
+        if fingerprint in self.seen:
+            return False
+        self.seen.add(fingerprint)
+
+        shingles = query_shingles(query)
+        signature = minhash_signature(shingles)
+        candidates = set()
+        for key in self._band_keys(signature):
+            candidates.update(self._buckets.get(key, ()))
+        for position in sorted(candidates):
+            if jaccard(shingles, self._library_shingles(position)) >= self.similarity_threshold:
+                return False
+
+        self._append(query, signature, shingles)
+        return True
+
+    def add_all(self, queries: Iterable[str]) -> int:
+        """Indexes queries in order; returns how many were added to the library."""
+        return sum(1 for query in queries if self.add(query))
+
+    def to_state(self) -> Dict[str, Any]:
+        return {
+            "version": _INDEX_VERSION,
+            "similarity_threshold": self.similarity_threshold,
+            "library": self.library,
+            "signatures": self.signatures,
+            "seen": sorted(self.seen),
+        }
+
+    @staticmethod
+    def is_compatible(state: Optional[Dict[str, Any]], similarity_threshold: float = QUERY_LIBRARY_SIMILARITY_THRESHOLD) -> bool:
+        """Whether a persisted state was built with the current shingling, hashing and threshold."""
+        if not state or state.get("version") != _INDEX_VERSION or state.get("similarity_threshold") != similarity_threshold:
+            return False
+        signature_length = QUERY_LIBRARY_LSH_BANDS * QUERY_LIBRARY_LSH_ROWS
+        library, signatures = state.get("library", []), state.get("signatures", [])
+        return len(library) == len(signatures) and all(len(signature) == signature_length for signature in signatures)
+
+    @classmethod
+    def from_state(cls, state: Optional[Dict[str, Any]], similarity_threshold: float = QUERY_LIBRARY_SIMILARITY_THRESHOLD) -> "QueryLibraryIndex":
+        """Restores a persisted index; a missing or incompatible state yields an empty index."""
+        index = cls(similarity_threshold=similarity_threshold)
+        if not cls.is_compatible(state, similarity_threshold):
+            return index
+        library, signatures = state["library"], state["signatures"]
+        for query, signature in zip(library, signatures):
+            index._append(query, signature, None)
+        index.seen = set(state.get("seen", []))
+        return index
@@ -2,16 +2,46 @@
 Model Client for communicating with the FastAPI model server
 """
 import os
+import time
+import asyncio
+import functools
+import threading
+import weakref
+import httpx
 import requests
-from typing import List, Union, Any
+import numpy as np
+from typing import Dict, List, Optional, Tuple, Union, Any
 import logging
 
 logger = logging.getLogger(__name__)
 
+MODEL_SERVER_TIMEOUT = float(os.getenv("MODEL_SERVER_TIMEOUT", "30"))
+MODEL_SERVER_MAX_RETRIES = int(os.getenv("MODEL_SERVER_MAX_RETRIES", "2"))
+MODEL_SERVER_HEALTH_TTL = float(os.getenv("MODEL_SERVER_HEALTH_TTL", "30"))
+MODEL_SERVER_MAX_CONNECTIONS = int(os.getenv("MODEL_SERVER_MAX_CONNECTIONS", "50"))
+
+# Binary embeddings transport negotiated with the model server; JSON remains the fallback
+EMBEDDINGS_BINARY_MEDIA_TYPE = "application/x-embeddings-f32le"
+EMBEDDING_SHAPE_HEADER = "X-Embedding-Shape"
+EMBEDDINGS_ACCEPT_HEADER = f"{EMBEDDINGS_BINARY_MEDIA_TYPE}, application/json;q=0.5"
+
+
+def decode_embeddings_response(response: Union[requests.Response, httpx.Response]) -> Union[np.ndarray, List[List[float]]]:
+    """Decodes an /embeddings response, zero-copy for the binary format and a list of lists for JSON"""
+    content_type = response.headers.get("Content-Type", "")
+    if content_type.startswith(EMBEDDINGS_BINARY_MEDIA_TYPE):
+        rows, cols = (int(dim) for dim in response.headers[EMBEDDING_SHAPE_HEADER].split(","))
+        return np.frombuffer(response.content, dtype="<f4").reshape(rows, cols)
+    return response.json()["embeddings"]
+
 class ModelServerClient:
     """Client for communicating with the model server"""
     _warning_logged = False  
     _connection_failed = {}  
+    # Sessions and health results are shared per base_url so constructing a client is cheap
+    _sessions: Dict[str, requests.Session] = {}
+    _health_cache: Dict[str, Tuple[bool, float]] = {}
+    _lock = threading.Lock()
     
     def __init__(self, base_url: str = None):
         self.base_url = base_url or os.getenv("MODEL_SERVER_URL")
@@ -20,7 +50,7 @@ class ModelServerClient:
             if not self.base_url or self.base_url.lower() == "none":
                 self.base_url = None
         
-        self.session = requests.Session()
+        self.session = ModelServerClient._get_shared_session(self.base_url)
         self.server_available = False
         
         if not self.base_url:
@@ -28,6 +58,11 @@ class ModelServerClient:
                 logger.info("MODEL_SERVER_URL not configured. Remote model features will be unavailable.")
                 ModelServerClient._warning_logged = True
             return
+
+        cached = ModelServerClient._health_cache.get(self.base_url)
+        if cached and time.monotonic() - cached[1] < MODEL_SERVER_HEALTH_TTL:
+            self.server_available = cached[0]
+            return
         
         try:
             response = self.session.get(f"{self.base_url}/health", timeout=5)
@@ -44,6 +79,123 @@ class ModelServerClient:
             if self.base_url not in ModelServerClient._connection_failed:
                 logger.error(f"Failed to connect to model server at {self.base_url}: {e}")
                 ModelServerClient._connection_failed[self.base_url] = True
+        ModelServerClient._health_cache[self.base_url] = (self.server_available, time.monotonic())
+
+    @classmethod
+    def _get_shared_session(cls, base_url: Optional[str]) -> requests.Session:
+        with cls._lock:
+            session = cls._sessions.get(base_url)
+            if session is None:
+                session = requests.Session()
+                adapter = requests.adapters.HTTPAdapter(pool_maxsize=MODEL_SERVER_MAX_CONNECTIONS)
+                session.mount("http://", adapter)
+                session.mount("https://", adapter)
+                cls._sessions[base_url] = session
+            return session
+
+
+class AsyncModelServerClient:
+    """
+    Async client for the model server backed by a shared keep-alive connection pool.
+
+    One instance exists per base_url (see get_instance). The health state is cached and
+    re-probed in the background once it is older than MODEL_SERVER_HEALTH_TTL, so callers
+    never wait on /health after the first probe. Requests use MODEL_SERVER_TIMEOUT and are
+    retried with exponential backoff on transport errors and 5xx responses.
+    """
+    _instances: Dict[str, "AsyncModelServerClient"] = {}
+
+    def __init__(self, base_url: str):
+        self.base_url = base_url
+        self.server_available: Optional[bool] = None
+        self._last_probe = 0.0
+        self._probe_task: Optional[asyncio.Task] = None
+        # httpx clients are bound to the event loop that created them
+        self._clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient]" = weakref.WeakKeyDictionary()
+
+    @classmethod
+    def get_instance(cls, base_url: str = None) -> "AsyncModelServerClient":
+        base_url = (base_url or os.getenv("MODEL_SERVER_URL") or "").strip()
+        if not base_url or base_url.lower() == "none":
+            raise ConnectionError("MODEL_SERVER_URL not configured. Remote model features are unavailable.")
+        instance = cls._instances.get(base_url)
+        if instance is None:
+            instance = cls._instances.setdefault(base_url, cls(base_url))
+        return instance
+
+    @classmethod
+    async def get_available_instance(cls, base_url: str = None) -> "AsyncModelServerClient":
+        """
+        Returns the instance for base_url, raising ConnectionError without a request while its
+        cached health state is unhealthy so callers go straight to their fallback.
+        """
+        instance = cls.get_instance(base_url)
+        if not await instance.is_available():
+            raise ConnectionError(f"Model server at {instance.base_url} is unavailable.")
+        return instance
+
+    def _get_client(self) -> httpx.AsyncClient:
+        loop = asyncio.get_running_loop()
+        client = self._clients.get(loop)
+        if client is None or client.is_closed:
+            client = httpx.AsyncClient(
+                base_url=self.base_url,
+                timeout=httpx.Timeout(MODEL_SERVER_TIMEOUT, connect=5.0),
+                limits=httpx.Limits(
+                    max_connections=MODEL_SERVER_MAX_CONNECTIONS,
+                    max_keepalive_connections=MODEL_SERVER_MAX_CONNECTIONS
+                )
+            )
+            self._clients[loop] = client
+        return client
+
+    async def _probe_health(self) -> bool:
+        try:
+            response = await self._get_client().get("/health", timeout=5.0)
+            available = response.status_code == 200
+        except httpx.HTTPError as e:
+            logger.warning(f"Model server health probe failed for {self.base_url}: {e}")
+            available = False
+        if available != self.server_available:
+            logger.info(f"Model server at {self.base_url} is {'available' if available else 'unavailable'}")
+        self.server_available = available
+        self._last_probe = time.monotonic()
+        return available
+
+    async def is_available(self) -> bool:
+        """Returns the cached health state, probing inline only when it has never been checked"""
+        if self.server_available is None:
+            return await self._probe_health()
+        if time.monotonic() - self._last_probe > MODEL_SERVER_HEALTH_TTL and (self._probe_task is None or self._probe_task.done()):
+            self._probe_task = asyncio.create_task(self._probe_health())
+        return self.server_available
+
+    async def post(self, path: str, json: Dict[str, Any], headers: Dict[str, str] = None) -> httpx.Response:
+        client = self._get_client()
+        for attempt in range(MODEL_SERVER_MAX_RETRIES + 1):
+            try:
+                response = await client.post(path, json=json, headers=headers)
+                if response.status_code < 500 or attempt == MODEL_SERVER_MAX_RETRIES:
+                    return response
+                logger.warning(f"Model server {path} returned {response.status_code}, retrying ({attempt + 1}/{MODEL_SERVER_MAX_RETRIES})")
+            except httpx.TransportError as e:
+                if attempt == MODEL_SERVER_MAX_RETRIES:
+                    self.server_available = False
+                    self._last_probe = time.monotonic()
+                    raise ConnectionError(f"Model server unreachable at {self.base_url}: {e}") from e
+                logger.warning(f"Model server {path} transport error: {e}, retrying ({attempt + 1}/{MODEL_SERVER_MAX_RETRIES})")
+            await asyncio.sleep(0.2 * (2 ** attempt))
+
+    async def aclose(self):
+        for client in list(self._clients.values()):
+            await client.aclose()
+        self._clients.clear()
+
+    @classmethod
+    async def close_all(cls):
+        for instance in list(cls._instances.values()):
+            await instance.aclose()
+
 
 class RemoteUtils:
     """Remote utilities to replace torch, numpy operations and sentence-transformers utilities"""
@@ -145,30 +297,60 @@ class RemoteSentenceTransformer:
     
     def encode(self, sentences: Union[str, List[str]], 
                convert_to_tensor: bool = False, 
+               convert_to_numpy: bool = False,
                show_progress_bar: bool = False,
-               **kwargs) -> Union[List[List[float]], List[float]]:
+               **kwargs) -> Union[List[List[float]], List[float], np.ndarray]:
         try:
-            payload = {
-                "texts": sentences,
-                "convert_to_tensor": False
-            }
             response = self.client.session.post(
                 f"{self.client.base_url}/embeddings",
-                json=payload,
-                timeout=30
+                json=self._build_payload(sentences),
+                headers={"Accept": EMBEDDINGS_ACCEPT_HEADER},
+                timeout=MODEL_SERVER_TIMEOUT
             )
-            if response.status_code != 200:
-                raise Exception(f"Model server error: {response.status_code} - {response.text}")
-            result = response.json()
-            embeddings = result["embeddings"]
-            if isinstance(sentences, str):
-                return embeddings[0] if embeddings else []
-            else:
-                return embeddings
+            return self._parse_response(response, sentences, convert_to_numpy)
+        except Exception as e:
+            logger.error(f"Error encoding sentences: {e}")
+            raise e
+
+    async def aencode(self, sentences: Union[str, List[str]],
+                      convert_to_tensor: bool = False,
+                      convert_to_numpy: bool = False,
+                      show_progress_bar: bool = False,
+                      **kwargs) -> Union[List[List[float]], List[float], np.ndarray]:
+        """Async counterpart of encode using the pooled AsyncModelServerClient; fails fast while the server is unhealthy"""
+        try:
+            async_client = await AsyncModelServerClient.get_available_instance(self.client.base_url)
+            response = await async_client.post(
+                "/embeddings",
+                json=self._build_payload(sentences),
+                headers={"Accept": EMBEDDINGS_ACCEPT_HEADER}
+            )
+            return self._parse_response(response, sentences, convert_to_numpy)
         except Exception as e:
             logger.error(f"Error encoding sentences: {e}")
             raise e
 
+    @staticmethod
+    def _build_payload(sentences: Union[str, List[str]]) -> Dict[str, Any]:
+        return {
+            "texts": sentences,
+            "convert_to_tensor": False
+        }
+
+    @staticmethod
+    def _parse_response(response, sentences: Union[str, List[str]], convert_to_numpy: bool):
+        if response.status_code != 200:
+            raise Exception(f"Model server error: {response.status_code} - {response.text}")
+        embeddings = decode_embeddings_response(response)
+        if convert_to_numpy:
+            embeddings = np.asarray(embeddings, dtype=np.float32)
+        elif isinstance(embeddings, np.ndarray):
+            embeddings = embeddings.tolist()
+        if isinstance(sentences, str):
+            return embeddings[0] if len(embeddings) else []
+        else:
+            return embeddings
+
 class RemoteCrossEncoder:
     """Drop-in replacement for CrossEncoder"""
     
@@ -180,72 +362,163 @@ class RemoteCrossEncoder:
         try:
             if len(sentences) == 0:
                 return []
-            if isinstance(sentences[0], str):
-                query, candidates = sentences[0], [sentences[1]]
-            else:
-                query = sentences[0][0]
-                candidates = [pair[1] for pair in sentences]
-            payload = {
-                "query": query,
-                "candidates": candidates
-            }
             response = self.client.session.post(
                 f"{self.client.base_url}/rerank",
-                json=payload,
-                timeout=30
+                json=self._build_payload(sentences),
+                timeout=MODEL_SERVER_TIMEOUT
             )
-            if response.status_code != 200:
-                raise Exception(f"Model server error: {response.status_code} - {response.text}")
-            result = response.json()
-            scores = result["scores"]
-            if isinstance(sentences[0], str):
-                return scores[0] if scores else 0.0
-            return scores
+            return self._parse_response(response, sentences)
             
         except Exception as e:
             logger.error(f"Error predicting with cross encoder: {e}")
             raise e
 
+    async def apredict(self, sentences: List[List[str]], **kwargs) -> Union[List[float], float]:
+        """Async counterpart of predict using the pooled AsyncModelServerClient; fails fast while the server is unhealthy"""
+        try:
+            if len(sentences) == 0:
+                return []
+            async_client = await AsyncModelServerClient.get_available_instance(self.client.base_url)
+            response = await async_client.post("/rerank", json=self._build_payload(sentences))
+            return self._parse_response(response, sentences)
+        except Exception as e:
+            logger.error(f"Error predicting with cross encoder: {e}")
+            raise e
+
+    @staticmethod
+    def _build_payload(sentences: List[List[str]]) -> Dict[str, Any]:
+        if isinstance(sentences[0], str):
+            query, candidates = sentences[0], [sentences[1]]
+        else:
+            query = sentences[0][0]
+            candidates = [pair[1] for pair in sentences]
+        return {
+            "query": query,
+            "candidates": candidates
+        }
+
+    @staticmethod
+    def _parse_response(response, sentences: List[List[str]]) -> Union[List[float], float]:
+        if response.status_code != 200:
+            raise Exception(f"Model server error: {response.status_code} - {response.text}")
+        scores = response.json()["scores"]
+        if isinstance(sentences[0], str):
+            return scores[0] if scores else 0.0
+        return scores
+
+class LocalUtils:
+    """
+    NumPy implementation of the RemoteUtils interface.
+
+    Cosine similarity, sigmoid and array creation run in-process on vectors the caller already
+    holds, so they cost microseconds instead of an HTTP round trip. Operations without a local
+    implementation are forwarded to RemoteUtils, which is only created when first needed.
+    """
+
+    def __init__(self, client: ModelServerClient = None):
+        self._client = client
+        self._remote_utils = None
+
+    @property
+    def remote_utils(self) -> RemoteUtils:
+        if self._remote_utils is None:
+            self._remote_utils = RemoteUtils(self._client)
+        return self._remote_utils
+
+    def cos_sim(self, a: Union[List[float], np.ndarray], b: Union[List[float], List[List[float]], np.ndarray]) -> Union[float, List[float]]:
+        """Local cosine similarity with the same input/output shapes as RemoteUtils.cos_sim"""
+        vector_a = np.asarray(a, dtype=np.float32)
+        if vector_a.ndim > 1:
+            vector_a = vector_a.reshape(-1, vector_a.shape[-1])[0]
+        vectors_b = np.asarray(b, dtype=np.float32)
+        single = vectors_b.ndim == 1 or (vectors_b.ndim == 2 and vectors_b.shape[0] == 1)
+        vectors_b = vectors_b.reshape(-1, vectors_b.shape[-1])
+
+        norms = np.linalg.norm(vectors_b, axis=1) * np.linalg.norm(vector_a)
+        dots = vectors_b @ vector_a
+        similarities = np.divide(dots, norms, out=np.zeros_like(dots), where=norms != 0)
+        if single:
+            return float(similarities[0])
+        return similarities.tolist()
+
+    def tensor_operations(self, data: Any, operation: str, **kwargs) -> Any:
+        """Local replacement for the torch operations served by /tensor_ops"""
+        if operation == "to_tensor":
+            return np.asarray(data, dtype=np.float32).tolist()
+        if operation == "sigmoid":
+            values = np.asarray(data, dtype=np.float64)
+            return (1.0 / (1.0 + np.exp(-values))).tolist()
+        if operation == "softmax":
+            values = np.asarray(data, dtype=np.float64)
+            axis = kwargs.get("dim", kwargs.get("axis", -1))
+            shifted = np.exp(values - values.max(axis=axis, keepdims=True))
+            return (shifted / shifted.sum(axis=axis, keepdims=True)).tolist()
+        return self.remote_utils.tensor_operations(data, operation, **kwargs)
+
+    def array_operations(self, data: Any, operation: str, **kwargs) -> Any:
+        """Local replacement for the numpy operations served by /array_ops"""
+        if operation == "create_array":
+            return np.asarray(data).tolist()
+        if operation in ("mean", "sum", "max", "min"):
+            result = getattr(np, operation)(np.asarray(data, dtype=np.float64), axis=kwargs.get("axis"))
+            return result.tolist() if isinstance(result, np.ndarray) else float(result)
+        return self.remote_utils.array_operations(data, operation, **kwargs)
+
+
 class RemoteTensorUtils:
-    """Utility class to replace torch tensor operations with remote calls"""
+    """Utility class to replace torch tensor operations, computed locally with NumPy"""
     
     def __init__(self, client: ModelServerClient = None):
-        self.client = client or ModelServerClient()
-        self.remote_utils = RemoteUtils(client)
+        self.client = client
+        self.utils = LocalUtils(client)
     
     def tensor(self, data: List) -> List:
-        """Replace torch.tensor() with remote operation"""
-        return self.remote_utils.tensor_operations(data, "to_tensor")
+        """Replace torch.tensor()"""
+        return self.utils.tensor_operations(data, "to_tensor")
     
     def sigmoid(self, data: List) -> List:
-        """Replace torch.sigmoid() with remote operation"""
-        return self.remote_utils.tensor_operations(data, "sigmoid")
+        """Replace torch.sigmoid()"""
+        return self.utils.tensor_operations(data, "sigmoid")
     
     def is_tensor(self, obj: Any) -> bool:
         """Check if object is tensor-like (in remote setup, check if it's a list of numbers)"""
         return isinstance(obj, (list, tuple)) and len(obj) > 0 and isinstance(obj[0], (int, float))
 
 class RemoteNumpyUtils:
-    """Utility class to replace numpy operations with remote calls"""
+    """Utility class to replace numpy operations, computed locally with NumPy"""
     
     def __init__(self, client: ModelServerClient = None):
-        self.client = client or ModelServerClient()
-        self.remote_utils = RemoteUtils(client)
+        self.client = client
+        self.utils = LocalUtils(client)
     
     def array(self, data: List) -> List:
-        """Replace numpy.array() with remote operation"""
-        return self.remote_utils.array_operations(data, "create_array")
+        """Replace numpy.array()"""
+        return self.utils.array_operations(data, "create_array")
 
 class RemoteSentenceTransformersUtil:
     """Utility class to replace sentence_transformers.util operations"""
     
     def __init__(self, client: ModelServerClient = None):
-        self.client = client or ModelServerClient()
-        self.remote_utils = RemoteUtils(client)
+        self.client = client
+        self.utils = LocalUtils(client)
     
     def cos_sim(self, a: List[float], b: Union[List[float], List[List[float]]]) -> Union[float, List[float]]:
-        """Replace sentence_transformers.util.cos_sim with remote calculation"""
-        return self.remote_utils.cos_sim(a, b)
+        """Replace sentence_transformers.util.cos_sim with a local calculation"""
+        return self.utils.cos_sim(a, b)
+
+async def encode_async(embedding_model: Any, sentences: Union[str, List[str]], **kwargs):
+    """Awaits aencode when the model provides it, otherwise runs encode in the default executor"""
+    if hasattr(embedding_model, "aencode"):
+        return await embedding_model.aencode(sentences, **kwargs)
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(None, functools.partial(embedding_model.encode, sentences, **kwargs))
+
+async def predict_async(cross_encoder: Any, sentences: List[List[str]], **kwargs):
+    """Awaits apredict when the cross encoder provides it, otherwise runs predict in the default executor"""
+    if hasattr(cross_encoder, "apredict"):
+        return await cross_encoder.apredict(sentences, **kwargs)
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(None, functools.partial(cross_encoder.predict, sentences, **kwargs))
 
 def get_remote_models_and_utils(base_url: str = None):
     """Factory function to get all remote model instances and utilities"""
@@ -4,7 +4,13 @@ import os
 import atexit # For graceful shutdown
 import json # Import json for serialization
 import contextvars
+import queue
+import random
+import time
+from logging.handlers import QueueHandler, QueueListener
 from opentelemetry import trace, _logs # Use _logs for the logs API/SDK
+from opentelemetry import context as otel_context
+from opentelemetry.trace import NonRecordingSpan
 from opentelemetry.sdk.trace import TracerProvider
 from opentelemetry.sdk.trace.export import BatchSpanProcessor
 from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
@@ -30,6 +36,16 @@ USE_OTEL_LOGGING = os.getenv("USE_OTEL_LOGGING", "True").lower() == "true"
 # --- MODIFICATION 1: ADDED MASTER LOGGING SWITCH ---
 ENABLE_LOGGING = os.getenv("ENABLE_LOGGING", "True").lower() == "true"
 
+# --- Logging pipeline configuration ---
+LOG_LEVEL = getattr(logging, os.getenv("LOG_LEVEL", "DEBUG").upper(), logging.DEBUG)
+# Queue mode: callers only snapshot context and enqueue; enrichment, formatting and export run on a listener thread (opt-in)
+ASYNC_LOGGING = os.getenv("ASYNC_LOGGING", "False").lower() == "true"
+LOG_QUEUE_MAX_SIZE = int(os.getenv("LOG_QUEUE_MAX_SIZE", "10000"))
+# Per-module thresholds, e.g. "src.database=INFO,src.inference.react_agent_inference=DEBUG"
+LOG_MODULE_LEVELS = os.getenv("LOG_MODULE_LEVELS", "")
+# Fraction of DEBUG records kept (1.0 keeps every record)
+LOG_DEBUG_SAMPLE_RATE = float(os.getenv("LOG_DEBUG_SAMPLE_RATE", "1.0"))
+
 # --- 1. OpenTelemetryManager Class (No changes) ---
 class OpenTelemetryManager:
     _instance = None
@@ -208,6 +224,11 @@ class SpanContextManager:
 # --- 3. SessionContext Class ---
 # Manages session-specific attributes for logging.
 _session_context: contextvars.ContextVar[Dict[str, Any]] = contextvars.ContextVar('session_context', default={})
+_SESSION_CONTEXT_FIELDS = (
+    'user_id', 'session_id', 'user_session', 'agent_id', 'agent_name', 'tool_id', 'tool_name', 'model_used',
+    'tags', 'agent_type', 'tools_binded', 'agents_binded', 'user_query', 'response', 'action_type', 'action_on',
+    'previous_value', 'new_value', 'agent_call_id'
+)
 class SessionContext:
     @classmethod
     def _serialize_if_complex(cls, value: Any) -> Any:
@@ -256,18 +277,7 @@ class SessionContext:
     def get(cls):
         """Retrieve all context values, defaulting to 'Unassigned' if not set"""
         current_ctx = _session_context.get()
-        return (
-            current_ctx.get('user_id', 'Unassigned'), current_ctx.get('session_id', 'Unassigned'),
-            current_ctx.get('user_session', 'Unassigned'), current_ctx.get('agent_id', 'Unassigned'),
-            current_ctx.get('agent_name', 'Unassigned'), current_ctx.get('tool_id', 'Unassigned'),
-            current_ctx.get('tool_name', 'Unassigned'), current_ctx.get('model_used', 'Unassigned'),
-            current_ctx.get('tags', 'Unassigned'), current_ctx.get('agent_type', 'Unassigned'),
-            current_ctx.get('tools_binded', 'Unassigned'), current_ctx.get('agents_binded', 'Unassigned'),
-            current_ctx.get('user_query', 'Unassigned'), current_ctx.get('response', 'Unassigned'),
-            current_ctx.get('action_type', 'Unassigned'), current_ctx.get('action_on', 'Unassigned'),
-            current_ctx.get('previous_value', 'Unassigned'), current_ctx.get('new_value', 'Unassigned'),
-            current_ctx.get('agent_call_id', 'Unassigned')
-        )
+        return tuple(current_ctx.get(field, 'Unassigned') for field in _SESSION_CONTEXT_FIELDS)
     @classmethod
 
     def clear(cls):
@@ -275,75 +285,187 @@ class SessionContext:
 
 # --- 4. CustomFilter Class ---
 # Custom logging filter to inject session context and trace IDs into log records.
+def _populate_record(record: logging.LogRecord, ctx: Dict[str, Any], span_context) -> None:
+    """Copy session context, trace/span IDs and the server name onto a log record."""
+    for field in _SESSION_CONTEXT_FIELDS:
+        setattr(record, field, ctx.get(field, 'Unassigned'))
+    if span_context is not None and span_context.is_valid:
+        record.trace_id = "{:032x}".format(span_context.trace_id)
+        record.span_id = "{:016x}".format(span_context.span_id)
+    else:
+        record.trace_id = "00000000000000000000000000000000"
+        record.span_id = "0000000000000000"
+    # Always inject server name into each log record
+    record.server_name = SERVER_NAME
+
+
 class CustomFilter(logging.Filter):
+    """Synchronous mode: enrich every record on the calling thread (creates a span if none is active)."""
     def filter(self, record):
-        (user_id, session_id, user_session, agent_id, agent_name,
-         tool_id, tool_name, model_used, tags, agent_type, tools_binded,
-         agents_binded, user_query, response, action_type, action_on,
-         previous_value, new_value, agent_call_id) = SessionContext.get()
         current_span = SpanContextManager.get_or_create_span_context(otel_manager.get_tracer())
-        record.trace_id = "00000000000000000000000000000000"
-        record.span_id = "0000000000000000"
-        if current_span and current_span.get_span_context().is_valid:
-            span_context = current_span.get_span_context()
-            record.trace_id = "{:032x}".format(span_context.trace_id)
-            record.span_id = "{:016x}".format(span_context.span_id)
-        record.user_id = user_id
-        record.session_id = session_id
-        record.user_session = user_session
-        record.agent_id = agent_id
-        record.agent_name = agent_name
-        record.tool_id = tool_id
-        record.tool_name = tool_name
-        record.model_used = model_used
-        record.tags = tags
-        record.agent_type = agent_type
-        record.tools_binded = tools_binded
-        record.agents_binded= agents_binded
-        record.user_query = user_query
-        record.response = response
-        record.action_type = action_type
-        record.action_on = action_on
-        record.previous_value = previous_value
-        record.new_value = new_value
-        record.agent_call_id = agent_call_id
-        # Always inject server name into each log record
-        try:
-            record.server_name = SERVER_NAME
-        except Exception:
-            record.server_name = "server"
+        _populate_record(record, _session_context.get(), current_span.get_span_context() if current_span else None)
+        return True
+
+
+class ContextCaptureFilter(logging.Filter):
+    """
+    Queue mode: snapshot the session context dict and the active span context on the
+    calling thread. SessionContext.set() always installs a fresh dict, so keeping a
+    reference is enough; the 19 fields are only expanded on the listener thread.
+    No span is created here.
+    """
+    def filter(self, record):
+        record._session_ctx = _session_context.get()
+        span_context = trace.get_current_span().get_span_context()
+        if not span_context.is_valid:
+            thread_span = getattr(SpanContextManager._thread_local, 'current_span', None)
+            span_context = thread_span.get_span_context() if thread_span else None
+        record._otel_span_context = span_context
+        return True
+
+
+def _parse_module_levels(spec: str) -> Dict[str, int]:
+    """Parse "pkg.module=LEVEL,..." into {module_prefix: levelno}."""
+    levels = {}
+    for item in spec.split(","):
+        if "=" not in item:
+            continue
+        module, level = (part.strip() for part in item.split("=", 1))
+        levelno = logging.getLevelName(level.upper())
+        if module and isinstance(levelno, int):
+            levels[module] = levelno
+    return levels
+
+
+class LevelGateFilter(logging.Filter):
+    """
+    Cheap first-stage filter: per-module level thresholds and sampling of DEBUG records.
+
+    Every module logs through the shared "agentic_workflow_logger", so the module is
+    derived from the record's source path (cached per path) and matched against the
+    longest configured prefix; unmatched modules use the default level.
+    """
+    _root_dir = os.path.dirname(os.path.abspath(__file__))
+
+    def __init__(self, default_level: int = LOG_LEVEL, module_levels: Optional[Dict[str, int]] = None,
+                 debug_sample_rate: float = LOG_DEBUG_SAMPLE_RATE):
+        super().__init__()
+        self.default_level = default_level
+        self.module_levels = module_levels or {}
+        self.debug_sample_rate = debug_sample_rate
+        self._thresholds: Dict[str, int] = {}
+
+    def _threshold_for(self, pathname: str) -> int:
+        threshold = self._thresholds.get(pathname)
+        if threshold is None:
+            threshold = self.default_level
+            if self.module_levels:
+                module = os.path.splitext(os.path.relpath(pathname, self._root_dir))[0].replace(os.sep, ".")
+                matches = [prefix for prefix in self.module_levels if module == prefix or module.startswith(prefix + ".")]
+                if matches:
+                    threshold = self.module_levels[max(matches, key=len)]
+            self._thresholds[pathname] = threshold
+        return threshold
+
+    def filter(self, record):
+        if record.levelno < self._threshold_for(record.pathname):
+            return False
+        if record.levelno <= logging.DEBUG and self.debug_sample_rate < 1.0:
+            return random.random() < self.debug_sample_rate
         return True
 
+    def min_level(self) -> int:
+        return min([self.default_level, *self.module_levels.values()])
+
+
+class NonBlockingQueueHandler(QueueHandler):
+    """QueueHandler that drops records instead of blocking or raising when the queue is full."""
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record):
+        # Only merge args into the message (they may be mutated after the call returns);
+        # the record is owned by this handler, so no copy and no formatting here.
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class ContextEnrichingQueueListener(QueueListener):
+    """
+    Listener thread for queue mode: expands the captured session context onto the
+    record and re-activates the captured span so the OTel handler exports the same
+    trace/span IDs the caller would have seen.
+    """
+    def handle(self, record):
+        ctx = record.__dict__.pop('_session_ctx', None) or {}
+        span_context = record.__dict__.pop('_otel_span_context', None)
+        _populate_record(record, ctx, span_context)
+        token = None
+        if span_context is not None and span_context.is_valid:
+            token = otel_context.attach(trace.set_span_in_context(NonRecordingSpan(span_context)))
+        try:
+            super().handle(record)
+        finally:
+            if token is not None:
+                otel_context.detach(token)
+
+    def add_handler(self, handler: logging.Handler) -> None:
+        self.handlers = self.handlers + (handler,)
+
 # --- 5. Global Logger Initialization ---
 # This part remains at the global scope to ensure the logger is ready on import.
 
 # Create the singleton instance of OpenTelemetryManager
 otel_manager = OpenTelemetryManager()
 logger = logging.getLogger("agentic_workflow_logger")
+log_listener: Optional[ContextEnrichingQueueListener] = None
+
+LOG_FORMAT = "%(asctime)s [%(levelname)s] [%(server_name)s] - %(message)s"
+LOG_DATE_FORMAT = "%Y-%m-%d %H:%M:%S"
 
 # --- WRAP LOGGER SETUP IN THE MASTER SWITCH ---
 if ENABLE_LOGGING:
-    logger.setLevel(logging.DEBUG)
+    level_gate = LevelGateFilter(LOG_LEVEL, _parse_module_levels(LOG_MODULE_LEVELS), LOG_DEBUG_SAMPLE_RATE)
+    # The logger level is the lowest threshold so per-module overrides can go below LOG_LEVEL
+    logger.setLevel(level_gate.min_level())
 
     # Configure handlers and filters only if not already configured
     # This prevents duplicate handlers if the module is imported multiple times
     if not logger.handlers:
-        logger.addFilter(CustomFilter())
+        logger.addFilter(level_gate)
 
-        log_format = "%(asctime)s [%(levelname)s] [%(server_name)s] - %(message)s"
-        formatter = logging.Formatter(log_format, datefmt="%Y-%m-%d %H:%M:%S")
+        formatter = logging.Formatter(LOG_FORMAT, datefmt=LOG_DATE_FORMAT)
 
         console_handler = logging.StreamHandler()
         console_handler.setFormatter(formatter)
         console_handler.setLevel(logging.INFO)
-        logger.addHandler(console_handler)
+
+        if ASYNC_LOGGING:
+            logger.addFilter(ContextCaptureFilter())
+            logger.addHandler(NonBlockingQueueHandler(queue.Queue(maxsize=LOG_QUEUE_MAX_SIZE)))
+            log_listener = ContextEnrichingQueueListener(logger.handlers[0].queue, console_handler, respect_handler_level=True)
+            log_listener.start()
+        else:
+            logger.addFilter(CustomFilter())
+            logger.addHandler(console_handler)
 
         if USE_OTEL_LOGGING:
             otel_manager.setup_tracing(service_name="agentic-workflow-service")
             otel_manager.setup_logging(service_name="agentic-workflow-service", use_http=True)
             if otel_manager.get_logger_provider():
                 otel_handler = LoggingHandler(level=logging.DEBUG, logger_provider=otel_manager.get_logger_provider())
-                logger.addHandler(otel_handler)
+                if log_listener:
+                    log_listener.add_handler(otel_handler)
+                else:
+                    logger.addHandler(otel_handler)
             else:
                 logger.warning("OTel setup was requested but failed. OTel handler not added.")
 else:
@@ -388,7 +510,90 @@ def with_logging_span(operation_name: Optional[str] = None):
         return wrapper
     return decorator
 
+def stop_log_listener():
+    """Drain the log queue and stop the listener thread (queue mode only)."""
+    global log_listener
+    if log_listener is not None:
+        log_listener.stop()
+        log_listener = None
+
+
+def benchmark_logging(requests: int = 200, lines_per_request: int = 40, debug_ratio: float = 0.75) -> Dict[str, float]:
+    """
+    Measure caller-side logging cost per simulated request for each pipeline mode.
+
+    A request emits lines_per_request f-string log calls (debug_ratio of them DEBUG)
+    with a populated session context. Output goes to os.devnull; in queue mode only
+    the time spent on the calling thread is counted, which is what request latency sees.
+    f-string arguments are evaluated even for gated records; the baseline row shows that share.
+    """
+    update_session_context(user_id="bench@example.com", session_id="bench-session", agent_id="agent-1",
+                           agent_name="Benchmark Agent", model_used="gpt-4o", agent_type="react_agent",
+                           tools_binded=["tool_a", "tool_b"], user_query="benchmark query " * 20)
+    payload = {"messages": ["x" * 200] * 5}
+    results: Dict[str, float] = {}
+
+    def _run(name: str, bench_logger: logging.Logger) -> None:
+        debug_lines = int(lines_per_request * debug_ratio)
+        started = time.perf_counter()
+        for _ in range(requests):
+            for i in range(lines_per_request):
+                if i < debug_lines:
+                    bench_logger.debug(f"debug line {i}: state={payload}")
+                else:
+                    bench_logger.info(f"info line {i}: done")
+        results[name] = (time.perf_counter() - started) * 1e6 / requests
+
+    with open(os.devnull, "w") as devnull:
+        def _make_logger(name: str, gate: LevelGateFilter) -> logging.Logger:
+            bench_logger = logging.getLogger(f"telemetry_benchmark.{name}")
+            bench_logger.handlers.clear()
+            bench_logger.filters.clear()
+            bench_logger.propagate = False
+            bench_logger.setLevel(gate.min_level())
+            bench_logger.addFilter(gate)
+            return bench_logger
+
+        def _stream_handler() -> logging.Handler:
+            handler = logging.StreamHandler(devnull)
+            handler.setFormatter(logging.Formatter(LOG_FORMAT, datefmt=LOG_DATE_FORMAT))
+            return handler
+
+        # Baseline: building the f-string messages with every record rejected by the logger level
+        _run("baseline_no_output", _make_logger("baseline", LevelGateFilter(logging.CRITICAL)))
+
+        sync_logger = _make_logger("sync", LevelGateFilter(logging.DEBUG))
+        sync_logger.addFilter(CustomFilter())
+        sync_logger.addHandler(_stream_handler())
+        _run("sync", sync_logger)
+
+        for name, gate in (
+            ("queue", LevelGateFilter(logging.DEBUG)),
+            ("queue_debug_sampled_10pct", LevelGateFilter(logging.DEBUG, debug_sample_rate=0.1)),
+            ("queue_debug_gated", LevelGateFilter(logging.INFO)),
+        ):
+            bench_queue: queue.Queue = queue.Queue()
+            bench_logger = _make_logger(name, gate)
+            bench_logger.addFilter(ContextCaptureFilter())
+            bench_logger.addHandler(NonBlockingQueueHandler(bench_queue))
+            listener = ContextEnrichingQueueListener(bench_queue, _stream_handler(), respect_handler_level=True)
+            listener.start()
+            try:
+                _run(name, bench_logger)
+            finally:
+                listener.stop()
+
+    SessionContext.clear()
+    return results
+
+
+if __name__ == "__main__":
+    for mode, micros in benchmark_logging().items():
+        print(f"{mode:<28} {micros:10.1f} µs per request")
+
 # --- 7. Register Atexit Shutdown Hook ---
 atexit.register(otel_manager.shutdown)
+# Registered last so it runs first: drain queued records before the OTel providers shut down
+atexit.register(stop_log_listener)
 
 